@@ -55,6 +55,7 @@ SUPABASE_BUCKET = 'documents'
 # OpenAI Configuration
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4o-mini')
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL') or None
 
 # File size thresholds
 DIRECT_UPLOAD_THRESHOLD = 4 * 1024 * 1024  # 4MB - files above this use direct Supabase upload
@@ -98,7 +99,7 @@ logger.info(f"OPENAI_API_KEY length: {len(OPENAI_API_KEY) if OPENAI_API_KEY else
 
 if OPENAI_AVAILABLE and OPENAI_API_KEY:
     try:
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        openai_client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
         logger.info("OpenAI client initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize OpenAI client: {str(e)}")
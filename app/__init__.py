@@ -74,6 +74,10 @@ def create_app(config_name=None):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Serialize API responses with orjson when available
+    from app.utils.responses import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # Initialize config to create directories
     config = config_class()
     
@@ -158,6 +162,10 @@ def create_app(config_name=None):
     from app.utils.security import setup_security_headers
     setup_security_headers(app)
     
+    # Compress large responses (brotli or gzip, by Accept-Encoding)
+    from app.utils.responses import setup_compression
+    setup_compression(app)
+    
     # Add health check endpoint
     @app.route('/health')
     def health_check():
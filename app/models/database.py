@@ -3,20 +3,32 @@ SQLAlchemy models for RExeli production database.
 Database models for Supabase PostgreSQL integration.
 """
 
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy import Column, String, Integer, Text, DateTime, Numeric, Boolean, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB, insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import (Column, String, Integer, BigInteger, Text, Date, DateTime, Numeric, Boolean,
+                        ForeignKey, Index, UniqueConstraint)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 
 db = SQLAlchemy()
 
+# insert() constructs of the dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
 class Document(db.Model):
     """Document model for storing uploaded PDF information."""
     __tablename__ = 'documents'
+    __table_args__ = (
+        # Documents by status, newest first
+        Index('idx_documents_status_created', 'processing_status', 'created_at'),
+        Index('idx_documents_created_at', 'created_at'),
+        Index('idx_documents_document_type', 'document_type'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     filename = Column(String(255), nullable=False)
@@ -52,15 +64,26 @@ class Document(db.Model):
 class ProcessingSession(db.Model):
     """Processing session model for tracking document processing workflows."""
     __tablename__ = 'processing_sessions'
+    __table_args__ = (
+        # get_or_create_processing_session; also serves the document_id foreign key
+        Index('idx_processing_sessions_document_status', 'document_id', 'session_status'),
+        # Batch status lists a batch's sessions in submission order
+        Index('idx_processing_sessions_batch_created', 'batch_id', 'created_at', 'id'),
+        Index('idx_processing_sessions_status_created', 'session_status', 'created_at'),
+        Index('idx_processing_sessions_created_at', 'created_at'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id', ondelete='CASCADE'), nullable=False)
+    batch_id = Column(String(64))
     session_status = Column(String(50), default='started')
     progress = Column(Integer, default=0)
     current_stage = Column(String(100))
     stage_message = Column(Text)
     classification_results = Column(JSONB)
     quality_score = Column(Numeric(5, 2))
+    results = Column(JSONB)
+    error_message = Column(Text)
     started_at = Column(DateTime(timezone=True), default=func.now())
     completed_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), default=func.now())
@@ -76,12 +99,15 @@ class ProcessingSession(db.Model):
         return {
             'id': str(self.id),
             'document_id': str(self.document_id),
+            'batch_id': self.batch_id,
             'session_status': self.session_status,
             'progress': self.progress,
             'current_stage': self.current_stage,
             'stage_message': self.stage_message,
             'classification_results': self.classification_results,
             'quality_score': float(self.quality_score) if self.quality_score else None,
+            'results': self.results,
+            'error_message': self.error_message,
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -91,6 +117,12 @@ class ProcessingSession(db.Model):
 class DocumentRegion(db.Model):
     """Document region model for storing region information."""
     __tablename__ = 'document_regions'
+    __table_args__ = (
+        # Upsert key when a session is reprocessed
+        UniqueConstraint('processing_session_id', 'region_name', 'page_number',
+                         name='uq_document_regions_session_region'),
+        Index('idx_document_regions_page', 'page_number'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     processing_session_id = Column(UUID(as_uuid=True), ForeignKey('processing_sessions.id', ondelete='CASCADE'), nullable=False)
@@ -131,22 +163,31 @@ class DocumentRegion(db.Model):
     @classmethod
     def from_region_dict(cls, region_data: Dict[str, Any], processing_session_id: str, page_number: int = 1) -> 'DocumentRegion':
         """Create DocumentRegion from region dictionary data."""
-        return cls(
-            processing_session_id=processing_session_id,
-            region_name=region_data.get('name', ''),
-            page_number=page_number,
-            x_coordinate=region_data.get('x', 0),
-            y_coordinate=region_data.get('y', 0),
-            width=region_data.get('width', region_data.get('w', 0)),
-            height=region_data.get('height', region_data.get('h', 0)),
-            region_type=region_data.get('type'),
-            confidence_score=region_data.get('confidence'),
-            is_suggested=region_data.get('suggested', False)
-        )
+        return cls(**cls.mapping_from_region_dict(region_data, processing_session_id, page_number))
+    
+    @staticmethod
+    def mapping_from_region_dict(region_data: Dict[str, Any], processing_session_id: str, page_number: int = 1) -> Dict[str, Any]:
+        """Column values for a region dictionary, as used by bulk inserts."""
+        return {
+            'processing_session_id': processing_session_id,
+            'region_name': region_data.get('name', ''),
+            'page_number': page_number,
+            'x_coordinate': region_data.get('x', 0),
+            'y_coordinate': region_data.get('y', 0),
+            'width': region_data.get('width', region_data.get('w', 0)),
+            'height': region_data.get('height', region_data.get('h', 0)),
+            'region_type': region_data.get('type'),
+            'confidence_score': region_data.get('confidence'),
+            'is_suggested': region_data.get('suggested', False)
+        }
 
 class ExtractionResult(db.Model):
     """Extraction result model for storing OCR and AI extraction results."""
     __tablename__ = 'extraction_results'
+    __table_args__ = (
+        # One result per region and method; upsert key when a session is reprocessed
+        UniqueConstraint('region_id', 'processing_method', name='uq_extraction_results_region_method'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     region_id = Column(UUID(as_uuid=True), ForeignKey('document_regions.id', ondelete='CASCADE'), nullable=False)
@@ -155,7 +196,7 @@ class ExtractionResult(db.Model):
     processing_method = Column(String(100))  # 'ocr', 'ai', 'hybrid'
     validation_status = Column(String(50), default='pending')
     corrected_text = Column(Text)
-    metadata = Column(JSONB)
+    extraction_metadata = Column('metadata', JSONB)  # 'metadata' is reserved on declarative models
     created_at = Column(DateTime(timezone=True), default=func.now())
     updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     
@@ -172,7 +213,7 @@ class ExtractionResult(db.Model):
             'processing_method': self.processing_method,
             'validation_status': self.validation_status,
             'corrected_text': self.corrected_text,
-            'metadata': self.metadata,
+            'metadata': self.extraction_metadata,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -180,6 +221,10 @@ class ExtractionResult(db.Model):
 class ExportHistory(db.Model):
     """Export history model for tracking Excel exports."""
     __tablename__ = 'export_history'
+    __table_args__ = (
+        Index('idx_export_history_session_created', 'processing_session_id', 'created_at'),
+        Index('idx_export_history_created_at', 'created_at'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     processing_session_id = Column(UUID(as_uuid=True), ForeignKey('processing_sessions.id', ondelete='CASCADE'), nullable=False)
@@ -207,6 +252,12 @@ class ExportHistory(db.Model):
 class Analytics(db.Model):
     """Analytics model for tracking usage and performance metrics."""
     __tablename__ = 'analytics'
+    __table_args__ = (
+        # Events of one type over a time range
+        Index('idx_analytics_event_type_timestamp', 'event_type', 'timestamp'),
+        Index('idx_analytics_timestamp', 'timestamp'),
+        Index('idx_analytics_session_id', 'session_id'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     session_id = Column(UUID(as_uuid=True), ForeignKey('processing_sessions.id', ondelete='CASCADE'))
@@ -227,6 +278,41 @@ class Analytics(db.Model):
         }
 
 
+class AnalyticsDailyRollup(db.Model):
+    """Per-day, per-event-type counts and processing time totals, maintained as events are written."""
+    __tablename__ = 'analytics_daily_rollups'
+    
+    day = Column(Date, primary_key=True)
+    event_type = Column(String(100), primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0)
+    timed_count = Column(Integer, nullable=False, default=0)  # Events that carried processing_time_ms
+    total_processing_time_ms = Column(BigInteger, nullable=False, default=0)
+    min_processing_time_ms = Column(Integer)
+    max_processing_time_ms = Column(Integer)
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for API responses."""
+        return {
+            'day': self.day.isoformat() if self.day else None,
+            'event_type': self.event_type,
+            'event_count': self.event_count,
+            'timed_count': self.timed_count,
+            'total_processing_time_ms': self.total_processing_time_ms,
+            'min_processing_time_ms': self.min_processing_time_ms,
+            'max_processing_time_ms': self.max_processing_time_ms
+        }
+
+class AnalyticsLatencyBucket(db.Model):
+    """Per-day, per-event-type processing time histogram used for percentiles."""
+    __tablename__ = 'analytics_daily_latency_buckets'
+    
+    day = Column(Date, primary_key=True)
+    event_type = Column(String(100), primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # See app.services.analytics_rollup.latency_bucket
+    event_count = Column(Integer, nullable=False, default=0)
+
+
 def init_db(app):
     """Initialize database with Flask app."""
     db.init_app(app)
@@ -255,16 +341,32 @@ def get_or_create_processing_session(document_id: str) -> ProcessingSession:
     return session
 
 def log_analytics_event(event_type: str, event_data: Optional[Dict[str, Any]] = None, 
-                       session_id: Optional[str] = None, processing_time_ms: Optional[int] = None):
-    """Log analytics event."""
+                       session_id: Optional[str] = None, processing_time_ms: Optional[int] = None,
+                       buffered: bool = True):
+    """Log analytics event.
+    
+    When the app's analytics writer is enabled the event is queued and written in
+    a batch by its background thread (returns None); otherwise, or with
+    ``buffered=False``, it is committed immediately and the row returned.
+    """
+    writer = getattr(current_app, 'analytics_writer', None) if buffered and has_app_context() else None
+    if writer is not None and writer.enabled:
+        writer.record(event_type, event_data, session_id=session_id, processing_time_ms=processing_time_ms)
+        return None
+    
+    from app.services.analytics_rollup import apply_rollups
+    
     analytics = Analytics(
         session_id=session_id,
         event_type=event_type,
         event_data=event_data,
-        processing_time_ms=processing_time_ms
+        processing_time_ms=processing_time_ms,
+        timestamp=datetime.now(timezone.utc)
     )
     
     db.session.add(analytics)
+    apply_rollups(db.session, [{'event_type': event_type, 'timestamp': analytics.timestamp,
+                                'processing_time_ms': processing_time_ms}])
     db.session.commit()
     
     return analytics
\ No newline at end of file
@@ -3,22 +3,23 @@ PDF Converter V2 - Routes
 Main application routes and API endpoints.
 """
 
-from flask import Blueprint, request, jsonify, render_template, send_file, current_app
+from flask import Blueprint, Response, request, jsonify, render_template, send_file, current_app, stream_with_context
 import os
-import hashlib
 import structlog
 import datetime
+import json
 from marshmallow import Schema, fields, validate, ValidationError
 
-# Try to import python-magic, fallback to basic validation if not available
-try:
-    import magic
-    HAS_MAGIC = True
-except ImportError:
-    HAS_MAGIC = False
+from app.models.database import db
+from app.services.analytics_rollup import daily_summary
+from app.services.event_bus import format_sse
+from app.utils.responses import requested_view, result_view
+from app.utils.upload_stream import UploadRejected, check_pdf_header, ingest_pdf
 
 logger = structlog.get_logger()
 
+ANALYTICS_MAX_DAYS = 366
+
 # Create blueprints
 main_bp = Blueprint('main', __name__)
 api_bp = Blueprint('api', __name__)
@@ -53,23 +54,9 @@ def validate_pdf_file(file):
         file_content = file.read(1024)
         file.seek(0)  # Reset file pointer
         
-        # Check PDF signature
-        if not file_content.startswith(b'%PDF-'):
-            return False, "Invalid PDF signature"
-        
-        # If python-magic is available, perform MIME type check
-        if HAS_MAGIC:
-            try:
-                mime_type = magic.from_buffer(file_content, mime=True)
-                if mime_type != 'application/pdf':
-                    return False, f"Invalid file type: {mime_type}. Expected: application/pdf"
-            except Exception as e:
-                logger.warning("Magic library check failed", error=str(e))
-        
-        # Basic PDF version check
-        pdf_version = file_content[:8].decode('ascii', errors='ignore')
-        if not pdf_version.startswith('%PDF-1.'):
-            return False, "Unsupported PDF version"
+        header_error = check_pdf_header(file_content)
+        if header_error:
+            return False, header_error
         
         return True, "Valid PDF file"
         
@@ -98,7 +85,11 @@ def health_check():
 
 @api_bp.route('/upload', methods=['POST'])
 def upload_file():
-    """Handle PDF file upload with comprehensive security validation."""
+    """Handle PDF file upload with comprehensive security validation.
+    
+    The upload is streamed to disk in chunks, hashed and validated on the way,
+    and stored under its SHA-256 so memory per upload stays constant.
+    """
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
@@ -107,53 +98,61 @@ def upload_file():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Comprehensive file validation
-        is_valid, validation_message = validate_pdf_file(file)
-        if not is_valid:
+        # Check filename extension before reading any content
+        if not file.filename.lower().endswith('.pdf'):
+            return jsonify({'error': 'Only PDF files are supported'}), 400
+        
+        try:
+            ingested = ingest_pdf(
+                file.stream,
+                current_app.config.get('UPLOAD_FOLDER', '/tmp'),
+                current_app.config['MAX_CONTENT_LENGTH'],
+                chunk_size=current_app.config.get('UPLOAD_CHUNK_SIZE', 64 * 1024)
+            )
+        except UploadRejected as e:
             logger.warning("File validation failed", 
                          filename=file.filename, 
-                         reason=validation_message)
-            return jsonify({'error': validation_message}), 400
-        
-        # Generate secure filename with hash
-        file_content = file.read()
-        file.seek(0)  # Reset file pointer
-        
-        file_hash = hashlib.sha256(file_content).hexdigest()
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        secure_filename_str = f"{timestamp}_{file_hash[:16]}.pdf"
-        
-        # Ensure upload folder exists
-        upload_folder = current_app.config.get('UPLOAD_FOLDER', '/tmp')
-        if not os.path.exists(upload_folder):
-            os.makedirs(upload_folder, mode=0o755)
-        
-        filepath = os.path.join(upload_folder, secure_filename_str)
-        
-        # Save file with restricted permissions
-        file.save(filepath)
-        os.chmod(filepath, 0o644)  # Read-only for group and others
+                         reason=str(e))
+            return jsonify({'error': str(e)}), 400
         
         logger.info("File uploaded successfully", 
                    original_filename=file.filename,
-                   secure_filename=secure_filename_str,
-                   file_size=len(file_content))
+                   secure_filename=ingested.filename,
+                   file_size=ingested.size,
+                   duplicate=ingested.duplicate)
         
         # Get PDF info if service is available
         pdf_info = {}
         try:
             if hasattr(current_app, 'pdf_service'):
-                pdf_info = current_app.pdf_service.get_pdf_info(filepath)
+                pdf_info = current_app.pdf_service.get_pdf_info(ingested.filepath)
         except Exception as e:
             logger.warning("PDF info extraction failed", error=str(e))
         
-        return jsonify({
+        response = {
             'success': True,
-            'filename': secure_filename_str,
-            'filepath': filepath,
-            'file_size': len(file_content),
+            'filename': ingested.filename,
+            'filepath': ingested.filepath,
+            'file_size': ingested.size,
+            'sha256': ingested.sha256,
+            'duplicate': ingested.duplicate,
             'pdf_info': pdf_info
-        })
+        }
+        
+        # A file seen before may already have full-document results
+        if ingested.duplicate:
+            try:
+                cached = current_app.processing_pipeline.cached_result(
+                    ingested.filepath, content_hash=ingested.sha256
+                )
+                if cached is not None:
+                    response['processing_results'] = result_view(
+                        cached, current_app.config.get('RESULT_DEFAULT_VIEW', 'full')
+                    )
+            except Exception as e:
+                logger.warning("Result cache lookup failed", error=str(e))
+        
+        return jsonify(response)
         
     except Exception as e:
         logger.error("Error uploading file", error=str(e), exc_info=True)
@@ -169,8 +168,11 @@ def classify_document():
         if not filepath or not os.path.exists(filepath):
             return jsonify({'error': 'Invalid file path'}), 400
         
-        # Extract text from PDF
-        text_data = current_app.pdf_service.extract_text_from_pdf(filepath)
+        # Extract text from PDF (reused across this document's API calls)
+        session = current_app.session_cache.open(filepath)
+        text_data = session.get_or_compute(
+            'text-0', lambda: current_app.pdf_service.extract_text_from_pdf(filepath)
+        )
         
         # Classify document
         classification = current_app.document_classifier.classify_document(
@@ -197,16 +199,20 @@ def suggest_regions():
         if not filepath or not os.path.exists(filepath):
             return jsonify({'error': 'Invalid file path'}), 400
         
-        # Get first page image
-        page_image = current_app.pdf_service.get_page_image(filepath, 0)
+        # Get first page image, rendered once per document session
+        session = current_app.session_cache.open(filepath)
+        page_image = session.get_or_compute(
+            'page-0', lambda: current_app.pdf_service.get_page_image(filepath, 0)
+        )
         
         if page_image is None:
             return jsonify({'error': 'Could not extract page image'}), 400
         
-        # Get suggested regions
-        regions = current_app.smart_region_manager.suggest_regions(
-            document_type, page_image
-        )
+        # Get suggested regions (layout analysis is cached per document type)
+        regions = session.get_or_compute(
+            f"regions-{document_type or 'auto'}",
+            lambda: current_app.smart_region_manager.suggest_regions(document_type, page_image) or None
+        ) or []
         
         return jsonify({
             'success': True,
@@ -228,17 +234,21 @@ def extract_data():
         if not filepath or not os.path.exists(filepath):
             return jsonify({'error': 'Invalid file path'}), 400
         
-        # Get page image
-        page_image = current_app.pdf_service.get_page_image(filepath, 0)
+        # Get page image, usually already rendered by /api/suggest-regions
+        session = current_app.session_cache.open(filepath)
+        page_image = session.get_or_compute(
+            'page-0', lambda: current_app.pdf_service.get_page_image(filepath, 0)
+        )
         
         if page_image is None:
             return jsonify({'error': 'Could not extract page image'}), 400
         
-        # Extract data from regions
+        # Extract data from regions; unchanged regions reuse earlier OCR
         extracted_data = {}
         for region in regions:
-            region_data = current_app.ocr_service.extract_text_from_image(
-                page_image, region
+            region_data = session.get_or_compute(
+                current_app.session_cache.artifact_key('ocr', region),
+                lambda: current_app.ocr_service.extract_text_from_image(page_image, region)
             )
             extracted_data[region.get('name', 'unknown')] = region_data
         
@@ -341,16 +351,93 @@ def ai_status():
         # Check if OpenAI API key is configured
         api_key_configured = bool(current_app.config.get('OPENAI_API_KEY'))
         
+        ai_service = getattr(current_app, 'ai_service', None)
+        resilience = ai_service.get_resilience_statistics() \
+            if hasattr(ai_service, 'get_resilience_statistics') else None
+        
         return jsonify({
             'ai_service': 'OpenAI',
             'configured': api_key_configured,
-            'model': current_app.config.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+            'model': current_app.config.get('OPENAI_MODEL', 'gpt-3.5-turbo'),
+            'circuit_breaker': resilience['circuit_breaker']['state'] if resilience else None,
+            'resilience': resilience
         })
         
     except Exception as e:
         logger.error("Error checking AI status", error=str(e))
         return jsonify({'error': 'AI status check failed'}), 500
 
+@api_bp.route('/ai/metrics')
+def ai_metrics():
+    """AI usage and latency telemetry (JSON, or Prometheus text with ?format=prometheus)"""
+    try:
+        ai_service = getattr(current_app, 'ai_service', None)
+        if not hasattr(ai_service, 'telemetry'):
+            return jsonify({'error': 'AI telemetry not available'}), 503
+        
+        if request.args.get('format') == 'prometheus':
+            return current_app.response_class(
+                ai_service.telemetry.to_prometheus(),
+                mimetype='text/plain; version=0.0.4'
+            )
+        
+        return jsonify({
+            'model': ai_service.model,
+            'telemetry': ai_service.get_telemetry(),
+            'resilience': ai_service.get_resilience_statistics()
+        })
+        
+    except Exception as e:
+        logger.error("Error collecting AI metrics", error=str(e))
+        return jsonify({'error': 'AI metrics collection failed'}), 500
+
+@api_bp.route('/services/status')
+def services_status():
+    """Which services have been built, and their import and construction times"""
+    try:
+        registry = getattr(current_app, 'service_registry', None)
+        if registry is None:
+            return jsonify({'error': 'Service registry not available'}), 503
+        
+        return jsonify(registry.get_statistics())
+        
+    except Exception as e:
+        logger.error("Error getting services status", error=str(e))
+        return jsonify({'error': 'Services status check failed'}), 500
+
+@api_bp.route('/analytics/daily')
+def analytics_daily():
+    """Daily event counts and processing time percentiles per event type
+    
+    Reads the pre-aggregated rollup tables, never the raw events. Query
+    parameters: ?days=N (default 7, ending today, UTC) or ?start=&end= as
+    YYYY-MM-DD, and ?event_type= (repeatable) to limit the event types.
+    """
+    try:
+        try:
+            today = datetime.datetime.now(datetime.timezone.utc).date()
+            end = datetime.date.fromisoformat(request.args['end']) if request.args.get('end') else today
+            if request.args.get('start'):
+                start = datetime.date.fromisoformat(request.args['start'])
+            else:
+                start = end - datetime.timedelta(days=int(request.args.get('days', 7)) - 1)
+        except ValueError:
+            return jsonify({'error': 'Invalid date range'}), 400
+        if start > end or (end - start).days >= ANALYTICS_MAX_DAYS:
+            return jsonify({'error': f'Date range must cover 1 to {ANALYTICS_MAX_DAYS} days'}), 400
+        
+        event_types = request.args.getlist('event_type')
+        return jsonify({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'event_types': event_types or None,
+            'days': daily_summary(db.session, start, end, event_types)
+        })
+        
+    except Exception as e:
+        logger.error("Error reading analytics rollups", error=str(e))
+        return jsonify({'error': 'Analytics summary failed'}), 500
+
 @api_bp.route('/security/headers')
 def security_headers():
     """Get security headers configuration"""
@@ -366,29 +453,52 @@ def security_headers():
 
 @api_bp.route('/process-document', methods=['POST'])
 def process_document():
-    """Process document through complete pipeline"""
+    """Process document through complete pipeline
+    
+    Results are returned inline. Pass "async": true to queue the document
+    instead and get 202 with a processing ID to follow at
+    /api/process-stream/<id> or /api/process-status/<id>, and "reprocess":
+    true to ignore cached results for identical documents. "view"
+    ("summary", "fields", "full" or "compact") selects how much of the
+    inline results is returned.
+    """
     try:
         data = request.get_json()
         filepath = data.get('filepath')
         regions = data.get('regions')
         document_type = data.get('document_type')
+        use_cache = not data.get('reprocess', False)
         
         if not filepath or not os.path.exists(filepath):
             return jsonify({'error': 'Invalid file path'}), 400
         
+        try:
+            view = requested_view(data, current_app.config.get('RESULT_DEFAULT_VIEW', 'full'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         logger.info("Starting document processing", 
                    filepath=filepath, 
                    document_type=document_type,
                    regions_provided=bool(regions))
         
+        if data.get('async', False):
+            processing_id = current_app.job_runner.submit(filepath, regions, document_type, use_cache=use_cache)
+            return jsonify({
+                'success': True,
+                'processing_id': processing_id,
+                'status': 'queued',
+                'status_url': f"/api/process-status/{processing_id}"
+            }), 202
+        
         # Process document through pipeline
         processing_results = current_app.processing_pipeline.process_document(
-            filepath, regions, document_type
+            filepath, regions, document_type, use_cache=use_cache
         )
         
         return jsonify({
             'success': True,
-            'processing_results': processing_results
+            'processing_results': result_view(processing_results, view)
         })
         
     except Exception as e:
@@ -445,20 +555,212 @@ def generate_processing_report():
 
 @api_bp.route('/process-status/<processing_id>')
 def get_processing_status(processing_id):
-    """Get processing status for a specific processing ID"""
+    """Get processing status, progress and (once finished) results for a processing ID
+    
+    ?view=summary|fields|full|compact selects how much of the results is returned.
+    """
     try:
-        # This would typically check a database or cache for processing status
-        # For now, return a basic status response
-        return jsonify({
-            'processing_id': processing_id,
-            'status': 'completed',  # This should be dynamic based on actual processing
-            'progress': 100.0,
-            'stage': 'finalization',
-            'message': 'Processing completed successfully'
-        })
+        try:
+            view = requested_view(default=current_app.config.get('RESULT_DEFAULT_VIEW', 'full'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        status = current_app.job_runner.get_status(processing_id)
+        if status is None:
+            return jsonify({'error': 'Unknown processing ID'}), 404
+        
+        status['results'] = result_view(status['results'], view)
+        return jsonify(status)
         
     except Exception as e:
         logger.error("Error getting processing status", 
                     error=str(e), 
                     processing_id=processing_id)
         return jsonify({'error': 'Status check failed'}), 500
+
+
+@api_bp.route('/process-stream/<processing_id>')
+def stream_processing(processing_id):
+    """Stream stage, progress and partial-result events for a processing ID (server-sent events)
+    
+    The stream ends after a "complete" or "failed" event, which carries the
+    status only; fetch the results from /api/process-status/<id>.
+    Reconnecting clients resume from the Last-Event-ID header.
+    """
+    try:
+        if current_app.job_runner.get_status(processing_id) is None:
+            return jsonify({'error': 'Unknown processing ID'}), 404
+        
+        last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+        
+        events = current_app.job_runner.events(
+            processing_id,
+            last_event_id=last_event_id,
+            heartbeat=current_app.config.get('SSE_HEARTBEAT_INTERVAL', 15)
+        )
+        
+        return Response(
+            stream_with_context(format_sse(event) for event in events),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        
+    except Exception as e:
+        logger.error("Error opening processing stream", 
+                    error=str(e), 
+                    processing_id=processing_id)
+        return jsonify({'error': 'Stream unavailable'}), 500
+
+
+def _batch_documents_from_request():
+    """Documents for /process-batch from a JSON body or a multipart upload of ``files``
+    
+    Returns (documents, use_cache). Raises ValueError or UploadRejected with a
+    message for the client.
+    """
+    if request.files:
+        try:
+            regions = json.loads(request.form['regions']) if request.form.get('regions') else None
+        except ValueError:
+            raise ValueError('regions must be a JSON array')
+        document_type = request.form.get('document_type') or None
+        documents = []
+        for file in request.files.getlist('files'):
+            if not file.filename or not file.filename.lower().endswith('.pdf'):
+                raise ValueError(f'Only PDF files are supported: {file.filename}')
+            try:
+                ingested = ingest_pdf(
+                    file.stream,
+                    current_app.config.get('UPLOAD_FOLDER', '/tmp'),
+                    current_app.config['MAX_CONTENT_LENGTH'],
+                    chunk_size=current_app.config.get('UPLOAD_CHUNK_SIZE', 64 * 1024)
+                )
+            except UploadRejected as e:
+                raise UploadRejected(f'{file.filename}: {e}')
+            documents.append({'filepath': ingested.filepath, 'regions': regions,
+                              'document_type': document_type})
+        return documents, request.form.get('reprocess', '').lower() not in ('1', 'true')
+    
+    data = request.get_json(silent=True) or {}
+    if 'documents' in data:
+        documents = [{'filepath': doc.get('filepath'), 'regions': doc.get('regions'),
+                      'document_type': doc.get('document_type')}
+                     for doc in data['documents'] if isinstance(doc, dict)]
+    else:
+        documents = [{'filepath': filepath, 'regions': data.get('regions'),
+                      'document_type': data.get('document_type')}
+                     for filepath in data.get('filepaths') or []]
+    
+    for doc in documents:
+        if not doc['filepath'] or not os.path.exists(doc['filepath']):
+            raise ValueError(f"Invalid file path: {doc['filepath']}")
+    return documents, not data.get('reprocess', False)
+
+
+@api_bp.route('/process-batch', methods=['POST'])
+def process_batch():
+    """Queue many documents as one batch
+    
+    Accepts JSON with "documents" (each with filepath, regions and
+    document_type) or "filepaths" sharing one regions/document_type, or a
+    multipart upload of "files". Returns 202 with a batch ID to poll at
+    /api/process-batch/<batch_id>.
+    """
+    try:
+        try:
+            documents, use_cache = _batch_documents_from_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not documents:
+            return jsonify({'error': 'No documents provided'}), 400
+        
+        max_documents = current_app.config.get('BATCH_MAX_DOCUMENTS', 500)
+        if len(documents) > max_documents:
+            return jsonify({'error': f'Too many documents. Maximum per batch: {max_documents}'}), 400
+        
+        batch_id = current_app.job_runner.submit_batch(documents, use_cache=use_cache)
+        batch = current_app.job_runner.get_batch(batch_id)
+        
+        logger.info("Batch processing queued", batch_id=batch_id, documents=len(documents))
+        
+        return jsonify({
+            'success': True,
+            'batch_id': batch_id,
+            'status': batch['status'],
+            'total': batch['total'],
+            'documents': [
+                {'processing_id': doc['processing_id'], 'file_path': doc['file_path']}
+                for doc in batch['documents']
+            ],
+            'status_url': f"/api/process-batch/{batch_id}",
+            'export_url': f"/api/process-batch/{batch_id}/export"
+        }), 202
+        
+    except Exception as e:
+        logger.error("Error queuing batch", error=str(e))
+        return jsonify({'error': 'Batch processing failed', 'details': str(e)}), 500
+
+
+@api_bp.route('/process-batch/<batch_id>')
+def get_batch_status(batch_id):
+    """Aggregate progress and per-document status for a batch
+    
+    Pass ?include_results=true to include each finished document's results,
+    reduced to ?view=summary|fields|full|compact (default summary).
+    """
+    try:
+        include_results = request.args.get('include_results', '').lower() in ('1', 'true')
+        try:
+            view = requested_view(default='summary')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        batch = current_app.job_runner.get_batch(batch_id, include_results=include_results)
+        if batch is None:
+            return jsonify({'error': 'Unknown batch ID'}), 404
+        
+        for document in batch['documents']:
+            if 'results' in document:
+                document['results'] = result_view(document['results'], view)
+        
+        return jsonify(batch)
+        
+    except Exception as e:
+        logger.error("Error getting batch status", 
+                    error=str(e), 
+                    batch_id=batch_id)
+        return jsonify({'error': 'Status check failed'}), 500
+
+
+@api_bp.route('/process-batch/<batch_id>/export', methods=['POST'])
+def export_batch(batch_id):
+    """Export every document of a batch to one Excel workbook
+    
+    Documents still queued or processing are listed with their status and
+    no fields; export again once the batch has finished.
+    """
+    try:
+        batch = current_app.job_runner.get_batch(batch_id, include_results=True)
+        if batch is None:
+            return jsonify({'error': 'Unknown batch ID'}), 404
+        
+        excel_path = current_app.excel_service.export_batch_to_excel(
+            batch['documents'], f"batch_{batch_id}.xlsx"
+        )
+        
+        return jsonify({
+            'success': True,
+            'batch_id': batch_id,
+            'status': batch['status'],
+            'excel_path': excel_path,
+            'download_url': f'/api/download/{os.path.basename(excel_path)}'
+        })
+        
+    except Exception as e:
+        logger.error("Error exporting batch", error=str(e), batch_id=batch_id)
+        return jsonify({'error': 'Batch export failed'}), 500
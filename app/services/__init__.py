@@ -1,22 +1,36 @@
 """
 PDF Converter V2 - Services Package
 Core services for document processing, AI/ML, and analytics.
+
+Service classes are imported on first access, so importing this package (or
+one of its light modules) does not pull in sklearn, cv2, openpyxl or openai.
 """
 
-from .document_classifier import DocumentClassifier
-from .smart_region_manager import SmartRegionManager
-from .ai_service import AIService
-from .ocr_service import OCRService
-from .pdf_service import PDFService
-from .excel_service import ExcelService
-from .analytics_service import RealEstateAnalytics
-from .quality_scorer import QualityScorer
-from .processing_pipeline import ProcessingPipeline
-from .integration_service import IntegrationService
+import importlib
+
+from .registry import ServiceRegistry
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    'DocumentClassifier': '.document_classifier',
+    'SmartRegionManager': '.smart_region_manager',
+    'EASTInferenceService': '.east_inference',
+    'get_east_inference_service': '.east_inference',
+    'AIService': '.ai_service',
+    'OCRService': '.ocr_service',
+    'PDFService': '.pdf_service',
+    'ExcelService': '.excel_service',
+    'RealEstateAnalytics': '.analytics_service',
+    'QualityScorer': '.quality_scorer',
+    'ProcessingPipeline': '.processing_pipeline',
+    'IntegrationService': '.integration_service'
+}
 
 __all__ = [
     'DocumentClassifier',
     'SmartRegionManager', 
+    'EASTInferenceService',
+    'get_east_inference_service',
     'AIService',
     'OCRService',
     'PDFService',
@@ -24,20 +38,80 @@ __all__ = [
     'RealEstateAnalytics',
     'QualityScorer',
     'ProcessingPipeline',
-    'IntegrationService'
+    'IntegrationService',
+    'ServiceRegistry',
+    'initialize_services',
+    'warm_up_services'
 ]
 
+# App attribute -> (module, class, constructor takes the app)
+SERVICES = {
+    'document_classifier': ('.document_classifier', 'DocumentClassifier', False),
+    'smart_region_manager': ('.smart_region_manager', 'SmartRegionManager', False),
+    'ai_service': ('.ai_service', 'AIService', False),
+    'ocr_service': ('.ocr_service', 'OCRService', False),
+    'pdf_service': ('.pdf_service', 'PDFService', False),
+    'excel_service': ('.excel_service', 'ExcelService', False),
+    'analytics_service': ('.analytics_service', 'RealEstateAnalytics', False),
+    'quality_scorer': ('.quality_scorer', 'QualityScorer', False),
+    'processing_pipeline': ('.processing_pipeline', 'ProcessingPipeline', True),
+    'integration_service': ('.integration_service', 'IntegrationService', False),
+    'session_cache': ('.session_cache', 'create_session_cache', True),
+    'event_bus': ('.event_bus', 'create_event_bus', True),
+    'persistence_service': ('.persistence_service', 'create_persistence_service', True),
+    'analytics_writer': ('.analytics_writer', 'create_analytics_writer', True),
+    'job_runner': ('.job_runner', 'create_job_runner', True)
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
 def initialize_services(app):
-    """Initialize all services and attach them to the Flask app"""
-    app.document_classifier = DocumentClassifier()
-    app.smart_region_manager = SmartRegionManager()
-    app.ai_service = AIService()
-    app.ocr_service = OCRService()
-    app.pdf_service = PDFService()
-    app.excel_service = ExcelService()
-    app.analytics_service = RealEstateAnalytics()
-    app.quality_scorer = QualityScorer()
-    app.processing_pipeline = ProcessingPipeline(app)
-    app.integration_service = IntegrationService()
+    """Register all services and attach them to the Flask app
+    
+    With LAZY_SERVICES (the default) each app attribute is a proxy that builds
+    the service on first use; otherwise every service is built now.
+    SERVICE_WARMUP ('all' or a comma-separated list) builds services at
+    startup for long-lived workers.
+    """
+    registry = ServiceRegistry(app)
+    for name, (module, attr, needs_app) in SERVICES.items():
+        registry.register(name, module, attr, needs_app)
+    app.service_registry = registry
+    
+    if app.config.get('LAZY_SERVICES', True):
+        for name in registry.names:
+            setattr(app, name, registry.proxy(name))
+        warmup = app.config.get('SERVICE_WARMUP', '')
+        if warmup:
+            warm_up_services(app, None if warmup == 'all' else [n.strip() for n in warmup.split(',') if n.strip()])
+    else:
+        for name in registry.names:
+            registry.get(name)
+    
+    # Celery workers only know the processing task once the runner registers it
+    if app.config.get('JOB_BACKEND') == 'celery':
+        registry.get('job_runner')
+    
+    # Optionally load EAST networks at worker start instead of on first request
+    if app.config.get('EAST_WARMUP', False):
+        from .east_inference import get_east_inference_service
+        get_east_inference_service().warm_up()
     
     app.logger.info("All V2 services initialized successfully")
+
+
+def warm_up_services(app, names=None):
+    """Build registered services ahead of the first request (e.g. from a worker post-fork hook)"""
+    return app.service_registry.warm_up(names)
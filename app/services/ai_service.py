@@ -7,17 +7,64 @@ import json
 import re
 import time
 import asyncio
+import threading
+import contextvars
+import concurrent.futures
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple, Union
+from typing import Dict, Any, Callable, List, Optional, Tuple, Union
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import wraps
 
 import structlog
-from openai import OpenAI, RateLimitError, APIError
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from openai import OpenAI, AsyncOpenAI, RateLimitError, APIError, APITimeoutError
+from tenacity import Retrying, stop_after_attempt, stop_after_delay, wait_exponential, retry_if_exception_type
+
+from .llm_dispatcher import AsyncLLMDispatcher
+from .llm_cache import LLMResponseCache
+from .prompt_builder import PromptBuilder
+from .json_stream import IncrementalJSONParser
+from .telemetry import AITelemetry, instrumented
+from .single_flight import create_single_flight
+from .resilience import (
+    CircuitBreaker, CircuitOpenError, DeadlineExceededError, LatencyTracker,
+    call_deadline, latency_budget, remaining_budget
+)
 
 logger = structlog.get_logger()
 
+# Models that accept response_format={"type": "json_schema"}
+STRUCTURED_OUTPUT_MODEL_PREFIXES = ('gpt-4o', 'gpt-4.1', 'gpt-5', 'o1', 'o3', 'o4')
+
+# Response schema for the fused enhance + validate + extract call
+FUSED_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "enhanced_data": {"type": "object"},
+        "validation": {
+            "type": "object",
+            "properties": {
+                "valid": {"type": "boolean"},
+                "errors": {"type": "array", "items": {"type": "string"}},
+                "warnings": {"type": "array", "items": {"type": "string"}},
+                "suggestions": {"type": "array", "items": {"type": "string"}},
+                "confidence": {"type": "number"},
+                "field_scores": {"type": "object"}
+            },
+            "required": ["valid", "errors", "warnings", "confidence"]
+        },
+        "structured": {
+            "type": "object",
+            "properties": {
+                "extracted_fields": {"type": "object"},
+                "document_summary": {"type": "string"},
+                "extraction_confidence": {"type": "number"}
+            },
+            "required": ["extracted_fields"]
+        }
+    },
+    "required": ["enhanced_data", "validation", "structured"]
+}
+
 class AIService:
     """AI service for data enhancement and validation with comprehensive OpenAI integration"""
     
@@ -31,29 +78,111 @@ class AIService:
             'total_cost': 0.0,
             'requests': 0
         }
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self._usage_lock = threading.Lock()
+        self.telemetry = AITelemetry()
+        self.dispatcher = None
+        self.response_cache = None
+        self.max_in_flight = 8
+        self.prompt_token_budget = 3000
+        self._initialize_resilience()
         self._initialize_openai()
+        self.prompt_builder = PromptBuilder(token_budget=self.prompt_token_budget, model=self.model)
+        self.single_flight = create_single_flight('openai')
+        # Batch items wait on the dispatcher, so one thread per in-flight request suffices
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
     
     def _initialize_openai(self):
         """Initialize OpenAI client with configuration"""
         try:
             from config import Config
             if Config.OPENAI_API_KEY:
-                self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+                base_url = getattr(Config, 'OPENAI_BASE_URL', None)
+                self.client = OpenAI(api_key=Config.OPENAI_API_KEY, base_url=base_url)
                 self.model = getattr(Config, 'OPENAI_MODEL', 'gpt-3.5-turbo')
                 self.temperature = getattr(Config, 'OPENAI_TEMPERATURE', 0.1)
                 self.max_tokens = getattr(Config, 'OPENAI_MAX_TOKENS', 1000)
-                logger.info("OpenAI client initialized successfully", model=self.model)
+                self.max_in_flight = getattr(Config, 'OPENAI_MAX_IN_FLIGHT', 8)
+                self.prompt_token_budget = getattr(Config, 'AI_PROMPT_TOKEN_BUDGET', 3000)
+                self.dispatcher = AsyncLLMDispatcher(
+                    AsyncOpenAI(api_key=Config.OPENAI_API_KEY, base_url=base_url),
+                    requests_per_minute=getattr(Config, 'OPENAI_REQUESTS_PER_MINUTE', 500),
+                    tokens_per_minute=getattr(Config, 'OPENAI_TOKENS_PER_MINUTE', 90000),
+                    max_in_flight=self.max_in_flight
+                )
+                if getattr(Config, 'LLM_CACHE_ENABLED', True):
+                    try:
+                        self.response_cache = LLMResponseCache(
+                            db_path=getattr(Config, 'LLM_CACHE_PATH', None),
+                            ttl_seconds=getattr(Config, 'LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600),
+                            max_entries=getattr(Config, 'LLM_CACHE_MAX_ENTRIES', 5000)
+                        )
+                    except Exception as e:
+                        logger.warning("LLM response cache unavailable", error=str(e))
+                logger.info("OpenAI client initialized successfully", model=self.model, base_url=base_url)
             else:
                 logger.warning("OpenAI API key not configured - using fallback methods")
         except Exception as e:
             logger.error("Failed to initialize OpenAI client", error=str(e))
     
-    def _track_usage(self, prompt_tokens: int, completion_tokens: int) -> None:
-        """Track token usage and estimated costs"""
+    def _initialize_resilience(self):
+        """Set up call deadlines, the circuit breaker and hedging from configuration"""
+        from config import Config
+        self.latency_budget_seconds = getattr(Config, 'AI_LATENCY_BUDGET_SECONDS', 60.0)
+        self.call_timeout = getattr(Config, 'AI_CALL_TIMEOUT_SECONDS', 20.0)
+        self.min_call_seconds = getattr(Config, 'AI_MIN_CALL_SECONDS', 1.0)
+        self.hedging_enabled = getattr(Config, 'AI_HEDGING_ENABLED', False)
+        self.hedge_min_samples = getattr(Config, 'AI_HEDGE_MIN_SAMPLES', 20)
+        self.circuit_breaker = CircuitBreaker(
+            name='openai',
+            failure_threshold=getattr(Config, 'AI_BREAKER_FAILURE_THRESHOLD', 5),
+            reset_timeout=getattr(Config, 'AI_BREAKER_RESET_SECONDS', 30.0),
+            slow_call_seconds=getattr(Config, 'AI_BREAKER_SLOW_CALL_SECONDS', 15.0)
+        )
+        self.latency_tracker = LatencyTracker()
+        self._resilience_lock = threading.Lock()
+        self.resilience_stats = {
+            'calls': 0,
+            'fallbacks': {'circuit_open': 0, 'deadline': 0, 'timeout': 0, 'error': 0}
+        }
+    
+    def latency_budget(self, seconds: Optional[float] = None):
+        """Context manager bounding every AI call inside it by one request-level deadline"""
+        return latency_budget(seconds if seconds is not None else self.latency_budget_seconds)
+    
+    def _record_call_outcome(self, fallback_reason: Optional[str] = None) -> None:
+        with self._resilience_lock:
+            self.resilience_stats['calls'] += 1
+            if fallback_reason:
+                self.resilience_stats['fallbacks'][fallback_reason] += 1
+        if fallback_reason:
+            if fallback_reason in ('timeout', 'error'):
+                self.telemetry.record_error()
+            self.telemetry.record_fallback(fallback_reason)
+    
+    def get_resilience_statistics(self) -> Dict[str, Any]:
+        """Breaker state, latency percentiles and fallback rates"""
+        with self._resilience_lock:
+            calls = self.resilience_stats['calls']
+            fallbacks = dict(self.resilience_stats['fallbacks'])
+        total_fallbacks = sum(fallbacks.values())
+        return {
+            'circuit_breaker': self.circuit_breaker.get_statistics(),
+            'latency': self.latency_tracker.get_statistics(),
+            'calls': calls,
+            'fallbacks': fallbacks,
+            'fallback_rate': round(total_fallbacks / calls, 4) if calls else 0.0,
+            'latency_budget_seconds': self.latency_budget_seconds,
+            'call_timeout_seconds': self.call_timeout,
+            'hedging_enabled': self.hedging_enabled
+        }
+    
+    def _track_usage(self, prompt_tokens: int, completion_tokens: int) -> float:
+        """Track token usage and estimated costs
+        
+        Returns:
+            Estimated cost of this call
+        """
         total_tokens = prompt_tokens + completion_tokens
-        self.cost_tracker['total_tokens'] += total_tokens
-        self.cost_tracker['requests'] += 1
         
         # Estimated costs (as of 2024) - update based on current pricing
         if 'gpt-4' in self.model:
@@ -61,22 +190,34 @@ class AIService:
         else:  # gpt-3.5-turbo
             cost = (prompt_tokens * 0.001 + completion_tokens * 0.002) / 1000
         
-        self.cost_tracker['total_cost'] += cost
+        # Called from batch and dispatcher worker threads
+        with self._usage_lock:
+            self.cost_tracker['total_tokens'] += total_tokens
+            self.cost_tracker['requests'] += 1
+            self.cost_tracker['total_cost'] += cost
+            total_cost = self.cost_tracker['total_cost']
+        
         logger.debug("Token usage tracked", 
                     tokens=total_tokens, 
                     estimated_cost=cost,
-                    total_cost=self.cost_tracker['total_cost'])
+                    total_cost=total_cost)
+        return cost
     
-    @retry(
-        retry=retry_if_exception_type((RateLimitError, APIError)),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        stop=stop_after_attempt(3)
-    )
     def _make_openai_request(self, messages: List[Dict[str, str]], 
                            temperature: Optional[float] = None,
                            max_tokens: Optional[int] = None,
-                           response_format: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
-        """Make a request to OpenAI API with retry logic"""
+                           response_format: Optional[Dict[str, str]] = None,
+                           use_cache: bool = True,
+                           on_value: Optional[Callable[[Tuple, Any], None]] = None,
+                           stream_paths: Optional[List[Tuple]] = None) -> Dict[str, Any]:
+        """Make a request to OpenAI API through request coalescing, the response cache and the rate-limited dispatcher
+        
+        Args:
+            use_cache: Set False for calls whose output should vary between runs
+            on_value: Stream the completion and call this with (path, value) for each
+                JSON member under ``stream_paths`` as soon as it is complete
+            stream_paths: Container paths watched by IncrementalJSONParser
+        """
         if not self.client:
             raise ValueError("OpenAI client not initialized")
         
@@ -90,23 +231,218 @@ class AIService:
         if response_format:
             params["response_format"] = response_format
         
-        response = self.client.chat.completions.create(**params)
+        try:
+            if on_value is not None:
+                # Streaming callers each need their own incremental callbacks, so no coalescing
+                parser = IncrementalJSONParser(stream_paths or [()], on_value)
+                result = self._fetch_completion(params, use_cache, parser)
+            elif use_cache and self.single_flight:
+                # Identical concurrent prompts (double submits, parallel endpoints) share one call
+                flight_key = self.single_flight.make_key(json.dumps(params, sort_keys=True, default=str))
+                leader = []
+                result = self.single_flight.do(
+                    flight_key, lambda: leader.append(True) or self._fetch_completion(params, use_cache)
+                )
+                if not leader:
+                    self.telemetry.record_coalesced()
+            else:
+                result = self._fetch_completion(params, use_cache)
+        except CircuitOpenError:
+            self._record_call_outcome('circuit_open')
+            raise
+        except DeadlineExceededError:
+            self._record_call_outcome('deadline')
+            raise
+        except (concurrent.futures.TimeoutError, APITimeoutError):
+            self._record_call_outcome('timeout')
+            raise
+        except Exception:
+            self._record_call_outcome('error')
+            raise
+        
+        self._record_call_outcome()
+        return result
+    
+    def _fetch_completion(self, params: Dict[str, Any], use_cache: bool,
+                          parser: Optional[IncrementalJSONParser] = None) -> Dict[str, Any]:
+        """Serve a completion from the response cache or the API
+        
+        With a parser the completion is streamed through it; cached content is
+        replayed through the parser so callers see the same incremental events.
+        """
+        messages = params["messages"]
+        response_format = params.get("response_format")
+        
+        cache_key = None
+        if use_cache and self.response_cache:
+            cache_key = self.response_cache.make_key(
+                params["model"], messages, params["temperature"],
+                response_format=response_format, max_tokens=params["max_tokens"]
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("LLM response served from cache", model=self.model)
+                self.telemetry.record_cache_hit()
+                cached["cached"] = True
+                if parser is not None:
+                    parser.feed(cached.get("content") or "")
+                return cached
+        
+        # Cache hits are still served while the breaker is open
+        timeout = call_deadline(self.call_timeout, self.min_call_seconds)
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError("OpenAI circuit breaker is open")
+        
+        request_start = time.time()
+        timings: Dict[str, float] = {}
+        try:
+            if parser is not None:
+                result = self._stream_completion(params, timeout, parser, timings)
+            else:
+                if self.dispatcher:
+                    # Rate limiting and 429 retries are handled by the dispatcher
+                    response = self.dispatcher.request(params, timeout=timeout, hedge_after=self._hedge_delay(timeout),
+                                                       timings=timings)
+                else:
+                    response = self._create_completion_with_retry(params, timeout)
+                result = {
+                    "content": response.choices[0].message.content,
+                    "finish_reason": response.choices[0].finish_reason,
+                    "usage": response.usage if hasattr(response, 'usage') else None
+                }
+        except Exception as e:
+            self.circuit_breaker.record_failure(e)
+            raise
+        
+        # Time queued in the dispatcher is not model latency
+        latency = timings.get('call_seconds', time.time() - request_start)
+        self.latency_tracker.record(latency)
+        self.circuit_breaker.record_success(latency)
         
         # Track usage
-        if hasattr(response, 'usage'):
-            self._track_usage(
-                response.usage.prompt_tokens,
-                response.usage.completion_tokens
+        prompt_tokens = completion_tokens = 0
+        cost = 0.0
+        if result["usage"] is not None:
+            prompt_tokens = result["usage"].prompt_tokens
+            completion_tokens = result["usage"].completion_tokens
+            cost = self._track_usage(prompt_tokens, completion_tokens)
+        self.telemetry.record_call(latency, prompt_tokens, completion_tokens, cost,
+                                   streamed=parser is not None)
+        
+        # Only cache complete answers; truncated output would be replayed forever
+        if cache_key and result["finish_reason"] == "stop":
+            self.response_cache.set(
+                cache_key,
+                {"content": result["content"], "finish_reason": result["finish_reason"], "usage": None},
+                model=self.model,
+                latency_seconds=latency
             )
         
+        return result
+    
+    def _stream_completion(self, params: Dict[str, Any], timeout: float,
+                           parser: IncrementalJSONParser,
+                           timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Consume a streamed completion, feeding content deltas to the parser as they arrive"""
+        stream_params = dict(params, stream_options={"include_usage": True})
+        if self.dispatcher:
+            chunks = self.dispatcher.stream(stream_params, timeout=timeout, timings=timings)
+        else:
+            chunks = self.client.chat.completions.create(**stream_params, stream=True, timeout=timeout)
+        
+        finish_reason = None
+        usage = None
+        for chunk in chunks:
+            usage = getattr(chunk, 'usage', None) or usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = getattr(choice.delta, 'content', None)
+            if delta:
+                parser.feed(delta)
+            finish_reason = choice.finish_reason or finish_reason
+        
         return {
-            "content": response.choices[0].message.content,
-            "finish_reason": response.choices[0].finish_reason,
-            "usage": response.usage if hasattr(response, 'usage') else None
+            "content": parser.text,
+            "finish_reason": finish_reason,
+            "usage": usage,
+            "streamed": True
         }
     
-    def enhance_extracted_data(self, raw_data: Dict[str, Any], document_type: str) -> Dict[str, Any]:
-        """Enhance extracted data using AI with real estate context"""
+    def _hedge_delay(self, timeout: float) -> Optional[float]:
+        """Observed p95 latency once enough samples exist, if it leaves room for a hedge"""
+        if not self.hedging_enabled or len(self.latency_tracker) < self.hedge_min_samples:
+            return None
+        p95 = self.latency_tracker.percentile(95)
+        return p95 if p95 is not None and p95 < timeout else None
+    
+    def _create_completion_with_retry(self, params: Dict[str, Any], timeout: Optional[float] = None):
+        """Synchronous completion call used when no dispatcher is configured
+        
+        Retries and backoff waits are clipped so the call never outlives ``timeout``.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        backoff = wait_exponential(multiplier=1, min=4, max=10)
+        
+        def wait(retry_state):
+            delay = backoff(retry_state)
+            return delay if deadline is None else max(0.0, min(delay, deadline - time.monotonic()))
+        
+        stop = stop_after_attempt(3)
+        if timeout:
+            stop = stop | stop_after_delay(timeout)
+        
+        for attempt in Retrying(retry=retry_if_exception_type((RateLimitError, APIError)),
+                                wait=wait, stop=stop, reraise=True):
+            if attempt.retry_state.attempt_number > 1:
+                self.telemetry.record_retry()
+            with attempt:
+                request_params = dict(params)
+                if deadline is not None:
+                    request_params["timeout"] = max(0.1, deadline - time.monotonic())
+                return self.client.chat.completions.create(**request_params)
+    
+    @staticmethod
+    def _field_stream(on_update: Optional[Callable[[Dict[str, Any]], None]],
+                      sections: Dict[str, Tuple]) -> Dict[str, Any]:
+        """Translate streamed JSON members into field and row events
+        
+        Args:
+            on_update: Receives {'type': 'field'|'row', 'section', 'name', 'value'[, 'index']}
+            sections: Section name -> path of the object holding the fields
+            
+        Returns:
+            Keyword arguments for _make_openai_request (empty when not streaming)
+        """
+        if on_update is None:
+            return {}
+        
+        def on_value(path: Tuple, value: Any) -> None:
+            for section, fields_path in sections.items():
+                depth = len(fields_path)
+                if len(path) <= depth or path[:depth] != fields_path:
+                    continue
+                if len(path) == depth + 1:
+                    on_update({'type': 'field', 'section': section, 'name': path[depth], 'value': value})
+                elif isinstance(path[-1], int):
+                    # Element of a list-valued field, e.g. one unit of a rent roll
+                    on_update({'type': 'row', 'section': section, 'name': path[depth],
+                               'index': path[-1], 'value': value})
+                return
+        
+        watch_paths = []
+        for fields_path in sections.values():
+            watch_paths += [fields_path, fields_path + ('*',), fields_path + ('*', 'value')]
+        return {"on_value": on_value, "stream_paths": watch_paths}
+    
+    @instrumented('enhance')
+    def enhance_extracted_data(self, raw_data: Dict[str, Any], document_type: str,
+                               on_update: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Enhance extracted data using AI with real estate context
+        
+        Args:
+            on_update: Optional callback streaming each enhanced field as it is generated
+        """
         try:
             if not self.client:
                 logger.warning("OpenAI client not available, returning enhanced data with basic processing")
@@ -129,7 +465,8 @@ class AIService:
             response = self._make_openai_request(
                 messages=messages,
                 temperature=0.1,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                **self._field_stream(on_update, {'enhanced_data': ()})
             )
             
             enhanced_data = json.loads(response["content"])
@@ -156,13 +493,20 @@ class AIService:
             logger.error("Error enhancing data", error=str(e))
             return self._basic_enhancement(raw_data, document_type)
     
+    def _serialize_prompt_data(self, data: Any, operation: str, 
+                               token_budget: Optional[int] = None) -> str:
+        """Serialize data for a prompt compactly and within the token budget"""
+        text, report = self.prompt_builder.build(data, token_budget)
+        logger.info("Prompt data prepared", operation=operation, **report)
+        return text
+    
     def _create_enhancement_prompt(self, raw_data: Dict[str, Any], document_type: str) -> str:
         """Create context-aware prompt for data enhancement"""
         base_prompt = f"""
 Analyze and enhance the following {document_type} real estate document data.
 
 Raw extracted data:
-{json.dumps(raw_data, indent=2)}
+{self._serialize_prompt_data(raw_data, 'enhance')}
 
 Please enhance this data by:
 1. Standardizing formats (addresses, phone numbers, dates, currency)
@@ -252,6 +596,7 @@ Return enhanced data as JSON with the same structure plus any additional inferre
         
         return max(0.1, min(1.0, confidence))
     
+    @instrumented('validate')
     def validate_real_estate_data(self, data: Dict[str, Any], document_type: str) -> Dict[str, Any]:
         """Validate Real Estate data using AI with domain expertise"""
         try:
@@ -279,18 +624,7 @@ Return enhanced data as JSON with the same structure plus any additional inferre
             )
             
             validation_result = json.loads(response["content"])
-            
-            # Ensure required fields in response
-            result = {
-                "valid": validation_result.get("valid", True),
-                "errors": validation_result.get("errors", []),
-                "warnings": validation_result.get("warnings", []),
-                "suggestions": validation_result.get("suggestions", []),
-                "confidence": validation_result.get("confidence", 0.8),
-                "field_scores": validation_result.get("field_scores", {}),
-                "validation_timestamp": datetime.utcnow().isoformat(),
-                "document_type": document_type
-            }
+            result = self._normalize_validation_result(validation_result, document_type)
             
             logger.info("Data validation completed", 
                        valid=result["valid"],
@@ -306,12 +640,26 @@ Return enhanced data as JSON with the same structure plus any additional inferre
             logger.error("Error validating data", error=str(e))
             return self._basic_validation(data, document_type)
     
+    def _normalize_validation_result(self, validation_result: Dict[str, Any], 
+                                     document_type: str) -> Dict[str, Any]:
+        """Ensure required fields in an AI validation response"""
+        return {
+            "valid": validation_result.get("valid", True),
+            "errors": validation_result.get("errors", []),
+            "warnings": validation_result.get("warnings", []),
+            "suggestions": validation_result.get("suggestions", []),
+            "confidence": validation_result.get("confidence", 0.8),
+            "field_scores": validation_result.get("field_scores", {}),
+            "validation_timestamp": datetime.utcnow().isoformat(),
+            "document_type": document_type
+        }
+    
     def _create_validation_prompt(self, data: Dict[str, Any], document_type: str) -> str:
         """Create validation prompt for real estate data"""
         return f"""
 Validate the following {document_type} real estate document data:
 
-{json.dumps(data, indent=2)}
+{self._serialize_prompt_data(data, 'validate')}
 
 Perform comprehensive validation checking for:
 
@@ -352,6 +700,7 @@ Return JSON with:
 }}
 """
     
+    @instrumented('suggest_corrections')
     def suggest_field_corrections(self, field_data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         """Suggest corrections for specific fields using AI and context"""
         try:
@@ -397,10 +746,10 @@ Return JSON with:
 Analyze and suggest corrections for the following field data:
 
 Field Data:
-{json.dumps(field_data, indent=2)}
+{self._serialize_prompt_data(field_data, 'field_corrections', self.prompt_token_budget * 2 // 3)}
 
 Context:
-{json.dumps(context, indent=2)}
+{self._serialize_prompt_data(context, 'field_corrections_context', self.prompt_token_budget // 3)}
 
 For each field that needs correction, suggest:
 1. Corrected value
@@ -444,6 +793,7 @@ Return JSON:
             "timestamp": datetime.utcnow().isoformat()
         }
     
+    @instrumented('ocr_correction')
     def correct_ocr_errors(self, text: str, context: str = "real_estate") -> Dict[str, Any]:
         """Correct OCR errors using AI with context awareness"""
         try:
@@ -523,6 +873,7 @@ Preserve the original meaning and formatting structure.
                 "error": str(e)
             }
     
+    @instrumented('classify')
     def classify_document_content(self, text: str) -> Dict[str, Any]:
         """Enhanced document classification using AI"""
         try:
@@ -615,8 +966,15 @@ Return JSON:
             "timestamp": datetime.utcnow().isoformat()
         }
     
-    def extract_structured_data(self, text: str, document_type: str) -> Dict[str, Any]:
-        """Extract structured data from unstructured text"""
+    @instrumented('extract')
+    def extract_structured_data(self, text: str, document_type: str,
+                                on_update: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Extract structured data from unstructured text
+        
+        Args:
+            on_update: Optional callback streaming each extracted field (and rows of
+                list-valued fields) as soon as it is complete
+        """
         try:
             if not self.client:
                 return self._basic_structured_extraction(text, document_type)
@@ -638,7 +996,8 @@ Return JSON:
                 messages=messages,
                 temperature=0.1,
                 max_tokens=1500,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                **self._field_stream(on_update, {'structured': ('extracted_fields',)})
             )
             
             extracted_data = json.loads(response["content"])
@@ -651,8 +1010,8 @@ Return JSON:
             logger.error("Error extracting structured data", error=str(e))
             return self._basic_structured_extraction(text, document_type)
     
-    def _create_extraction_prompt(self, text: str, document_type: str) -> str:
-        """Create extraction prompt based on document type"""
+    def _get_extraction_fields(self, document_type: str) -> List[str]:
+        """Get fields to extract for a document type"""
         base_fields = {
             "lease_agreement": [
                 "property_address", "tenant_name", "landlord_name", 
@@ -671,7 +1030,11 @@ Return JSON:
             ]
         }
         
-        fields = base_fields.get(document_type, base_fields["lease_agreement"])
+        return base_fields.get(document_type, base_fields["lease_agreement"])
+    
+    def _create_extraction_prompt(self, text: str, document_type: str) -> str:
+        """Create extraction prompt based on document type"""
+        fields = self._get_extraction_fields(document_type)
         
         return f"""
 Extract structured data from the following {document_type} text:
@@ -720,6 +1083,564 @@ Only include fields that are clearly identifiable in the text.
             "extraction_timestamp": datetime.utcnow().isoformat()
         }
     
+    @instrumented('analyze')
+    def analyze_document(self, raw_data: Dict[str, Any], text: str, 
+                         document_type: str,
+                         on_update: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Enhance, validate and extract structured data in a single AI round trip
+        
+        The fused response is constrained by FUSED_ANALYSIS_SCHEMA. If it cannot
+        be parsed or is missing a section, the three separate calls are made
+        instead so callers always get the same result shape.
+        
+        Returns:
+            Dict with enhanced_data, validation_results, structured_data, the
+            mode used ('fused', 'separate' or 'basic') and round_trips made
+        """
+        if not self.client:
+            enhanced = self._basic_enhancement(raw_data, document_type)
+            return {
+                "enhanced_data": enhanced,
+                "validation_results": self._basic_validation(enhanced.get("enhanced_data", {}), document_type),
+                "structured_data": self._basic_structured_extraction(text, document_type),
+                "mode": "basic",
+                "round_trips": 0
+            }
+        
+        fused_round_trips = 0
+        on_update = self._deduplicate_updates(on_update)
+        try:
+            messages = [
+                {
+                    "role": "system",
+                    "content": "You are an expert real estate document analyst. Enhance, validate and extract structured data from documents in one pass. Return only valid JSON matching the requested schema."
+                },
+                {
+                    "role": "user",
+                    "content": self._create_fused_analysis_prompt(raw_data, text, document_type)
+                }
+            ]
+            
+            response = self._make_openai_request(
+                messages=messages,
+                temperature=0.0,
+                max_tokens=2500,
+                response_format=self._fused_response_format(),
+                **self._field_stream(on_update, {
+                    'enhanced_data': ('enhanced_data',),
+                    'structured': ('structured', 'extracted_fields')
+                })
+            )
+            fused_round_trips = 1
+            
+            fused = self._parse_fused_response(response["content"])
+            
+            enhanced_data = fused["enhanced_data"]
+            structured_data = fused["structured"]
+            structured_data["extraction_timestamp"] = datetime.utcnow().isoformat()
+            structured_data["method"] = "ai_extraction"
+            
+            logger.info("Fused document analysis completed", 
+                       document_type=document_type,
+                       fields_enhanced=len(enhanced_data))
+            
+            return {
+                "enhanced_data": {
+                    "enhanced_data": enhanced_data,
+                    "original_data": raw_data,
+                    "enhancement_confidence": self._calculate_enhancement_confidence(raw_data, enhanced_data),
+                    "document_type": document_type,
+                    "enhanced_timestamp": datetime.utcnow().isoformat()
+                },
+                "validation_results": self._normalize_validation_result(fused["validation"], document_type),
+                "structured_data": structured_data,
+                "mode": "fused",
+                "round_trips": 1
+            }
+            
+        except Exception as e:
+            fallback_error = e
+        
+        if not self._can_fall_back(fallback_error):
+            # Separate calls would be rejected the same way, or would overrun the budget
+            logger.warning("Fused analysis unavailable, using basic processing", error=str(fallback_error))
+            enhanced = self._basic_enhancement(raw_data, document_type)
+            return {
+                "enhanced_data": enhanced,
+                "validation_results": self._basic_validation(enhanced.get("enhanced_data", {}), document_type),
+                "structured_data": self._basic_structured_extraction(text, document_type),
+                "mode": "basic",
+                "round_trips": fused_round_trips
+            }
+        
+        logger.warning("Fused analysis failed, falling back to separate calls", error=str(fallback_error))
+        enhanced = self.enhance_extracted_data(raw_data, document_type, on_update)
+        return {
+            "enhanced_data": enhanced,
+            "validation_results": self.validate_real_estate_data(enhanced.get("enhanced_data", {}), document_type),
+            "structured_data": self.extract_structured_data(text, document_type, on_update),
+            "mode": "separate",
+            "round_trips": fused_round_trips + 3
+        }
+    
+    def _can_fall_back(self, error: Exception) -> bool:
+        """Whether the separate calls can still succeed after the fused call failed"""
+        if isinstance(error, (CircuitOpenError, DeadlineExceededError)):
+            return False
+        if self.circuit_breaker.state == CircuitBreaker.OPEN:
+            return False
+        remaining = remaining_budget()
+        return remaining is None or remaining >= self.min_call_seconds
+    
+    @staticmethod
+    def _deduplicate_updates(on_update: Optional[Callable[[Dict[str, Any]], None]]
+                             ) -> Optional[Callable[[Dict[str, Any]], None]]:
+        """Drop stream events identical to one already delivered
+        
+        A failed fused call may have streamed fields before failing; the
+        separate fallback calls would otherwise send them to the client again.
+        """
+        if on_update is None:
+            return None
+        sent: Dict[Tuple, Any] = {}
+        
+        def deliver(update: Dict[str, Any]) -> None:
+            key = (update['type'], update['section'], update['name'], update.get('index'))
+            if key in sent and sent[key] == update['value']:
+                return
+            sent[key] = update['value']
+            on_update(update)
+        
+        return deliver
+    
+    def _fused_response_format(self) -> Dict[str, Any]:
+        """Use JSON-schema structured output where the model supports it"""
+        from config import Config
+        if getattr(Config, 'OPENAI_STRUCTURED_OUTPUTS', False) or \
+                any(self.model.startswith(prefix) for prefix in STRUCTURED_OUTPUT_MODEL_PREFIXES):
+            return {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "fused_document_analysis",
+                    "schema": FUSED_ANALYSIS_SCHEMA,
+                    "strict": False
+                }
+            }
+        return {"type": "json_object"}
+    
+    def _create_fused_analysis_prompt(self, raw_data: Dict[str, Any], text: str, 
+                                      document_type: str) -> str:
+        """Create combined enhancement, validation and extraction prompt"""
+        fields = self._get_extraction_fields(document_type)
+        
+        return f"""
+Analyze the following {document_type} real estate document.
+
+Raw extracted data:
+{self._serialize_prompt_data(raw_data, 'fused_analysis')}
+
+Document text:
+{text[:2000]}...
+
+Perform three tasks and return them together:
+
+1. "enhanced_data": the raw data enhanced by standardizing formats (addresses, phone numbers,
+   dates, currency), correcting obvious OCR errors, adding inferable fields and standardizing
+   property types. Keep the same structure plus any additional inferred fields.
+
+2. "validation": validate the enhanced data for format accuracy, real estate reasonableness
+   (square footage, rent/price ranges, lease terms, cap rates), cross-field consistency and
+   missing critical information.
+
+3. "structured": extract these fields if clearly present in the document text:
+   {', '.join(fields)}
+
+Return JSON:
+{{
+  "enhanced_data": {{...}},
+  "validation": {{
+    "valid": boolean,
+    "errors": ["list of critical errors"],
+    "warnings": ["list of warnings"],
+    "suggestions": ["list of improvement suggestions"],
+    "confidence": float (0.0-1.0),
+    "field_scores": {{"field_name": confidence_score}}
+  }},
+  "structured": {{
+    "extracted_fields": {{
+      "field_name": {{"value": "extracted_value", "confidence": float_0_to_1, "location": "where_found_in_text"}}
+    }},
+    "document_summary": "brief summary of document",
+    "extraction_confidence": overall_confidence_float
+  }}
+}}
+"""
+    
+    def _parse_fused_response(self, content: str) -> Dict[str, Any]:
+        """Parse fused response, raising ValueError when a section is missing or malformed"""
+        fused = json.loads(content)
+        
+        if not isinstance(fused, dict):
+            raise ValueError("Fused response is not a JSON object")
+        
+        for section in FUSED_ANALYSIS_SCHEMA["required"]:
+            if not isinstance(fused.get(section), dict):
+                raise ValueError(f"Fused response missing section: {section}")
+        
+        if not isinstance(fused["structured"].get("extracted_fields", {}), dict):
+            raise ValueError("Fused response has malformed extracted_fields")
+        
+        return fused
+    
+    def resolve_uncertain_fields(self, fields: Dict[str, Dict[str, Any]], text: str,
+                                 document_type: str,
+                                 on_update: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Resolve low-confidence fields with batched AI correction
+        
+        Args:
+            fields: Field name -> dict with value, confidence and matched pattern
+            text: Document text used as context
+            document_type: Type of document
+        
+        Returns:
+            Dict with resolved fields (name -> value, confidence), method and round_trips
+        """
+        if not fields:
+            return {"fields": {}, "method": "none", "round_trips": 0}
+        
+        if not self.client:
+            return self._basic_field_resolution(fields)
+        
+        snippets = {
+            name: {"text": field.get("value"), "confidence": field.get("confidence"),
+                   "pattern": field.get("pattern")}
+            for name, field in fields.items()
+        }
+        batch = self.correct_fields_batch(snippets, text, document_type, on_update=on_update)
+        
+        logger.info("Uncertain fields resolved",
+                   document_type=document_type,
+                   fields_escalated=len(fields),
+                   round_trips=batch["round_trips"])
+        
+        corrections = batch["corrections"]
+        if not any(correction["source"] == "ai" for correction in corrections.values()):
+            return self._basic_field_resolution(fields)
+        
+        return {
+            "fields": {
+                name: {"value": correction["value"], "confidence": correction["confidence"]}
+                for name, correction in corrections.items()
+            },
+            "method": "ai_resolution",
+            "round_trips": batch["round_trips"]
+        }
+    
+    @instrumented('field_correction')
+    def correct_fields_batch(self, snippets: Dict[str, Dict[str, Any]], context: str = "",
+                             document_type: str = "real_estate", token_budget: Optional[int] = None,
+                             on_update: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Correct many low-confidence OCR snippets in as few AI calls as possible
+        
+        Snippets are sent under short IDs and packed into batches that fit the
+        prompt token budget. A batch whose response is truncated, unparseable
+        or incomplete is split in half and retried, so one bad answer never
+        costs more than the fields it covered.
+        
+        Args:
+            snippets: Field or region ID -> dict with text, confidence (0-100) and
+                optional pattern and region (bounding box)
+            context: Document text shared by all batches
+            document_type: Type of document
+            token_budget: Prompt budget per call (defaults to AI_PROMPT_TOKEN_BUDGET)
+            on_update: Optional callback streaming each correction as it arrives
+            
+        Returns:
+            Dict with corrections keyed by the original IDs (original, value,
+            confidence, changed, explanation, region, source), round_trips and batches
+        """
+        if not snippets:
+            return {"corrections": {}, "round_trips": 0, "batches": 0, "method": "none"}
+        
+        if not self.client:
+            return {"corrections": self._basic_snippet_corrections(snippets), "round_trips": 0,
+                    "batches": 0, "method": "basic"}
+        
+        budget = token_budget or self.prompt_token_budget
+        snippet_ids = {f"s{i}": key for i, key in enumerate(snippets, 1)}
+        batches = self._pack_correction_batches(snippets, snippet_ids, budget * 2 // 3)
+        context_text = self._serialize_prompt_data(context, 'field_correction_context', budget // 3) \
+            if context else ""
+        
+        def run(batch):
+            return self._correct_batch(batch, snippets, snippet_ids, context_text,
+                                       document_type, on_update)
+        
+        # Extra batches share the service executor (bounded by max_in_flight) and
+        # carry the request latency budget into its threads; the caller runs the first
+        futures = [self.executor.submit(contextvars.copy_context().run, run, batch) for batch in batches[1:]]
+        outcomes = [run(batches[0])] + [future.result() for future in futures]
+        
+        corrections = {}
+        round_trips = 0
+        for batch_corrections, calls in outcomes:
+            corrections.update(batch_corrections)
+            round_trips += calls
+        
+        logger.info("Batched field correction completed",
+                   fields=len(snippets),
+                   batches=len(batches),
+                   round_trips=round_trips)
+        
+        return {
+            # Keep the caller's ordering
+            "corrections": {key: corrections[key] for key in snippets},
+            "round_trips": round_trips,
+            "batches": len(batches),
+            "method": "ai_batch_correction"
+        }
+    
+    def _pack_correction_batches(self, snippets: Dict[str, Dict[str, Any]],
+                                 snippet_ids: Dict[str, str], token_budget: int) -> List[List[str]]:
+        """Greedily pack snippet IDs into batches whose payload fits the token budget"""
+        batches = []
+        current = []
+        used = 0
+        for snippet_id, key in snippet_ids.items():
+            cost = self.prompt_builder.estimate_tokens(
+                json.dumps(self._snippet_payload(snippet_id, key, snippets[key]), separators=(',', ':'))
+            )
+            if current and used + cost > token_budget:
+                batches.append(current)
+                current, used = [], 0
+            current.append(snippet_id)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+    
+    @staticmethod
+    def _snippet_payload(snippet_id: str, key: str, snippet: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {"id": snippet_id, "field": key, "text": snippet.get("text") or ""}
+        if snippet.get("confidence") is not None:
+            payload["ocr_confidence"] = round(float(snippet["confidence"]), 1)
+        if snippet.get("pattern"):
+            payload["expected_format"] = snippet["pattern"]
+        return payload
+    
+    def _correct_batch(self, batch: List[str], snippets: Dict[str, Dict[str, Any]],
+                       snippet_ids: Dict[str, str], context_text: str, document_type: str,
+                       on_update: Optional[Callable[[Dict[str, Any]], None]]) -> Tuple[Dict[str, Any], int]:
+        """Correct one batch, splitting it on failure
+        
+        Returns:
+            Tuple of (corrections keyed by original ID, AI calls made)
+        """
+        batch_snippets = {snippet_ids[sid]: snippets[snippet_ids[sid]] for sid in batch}
+        
+        stream_kwargs = {}
+        if on_update is not None:
+            def forward(event):
+                key = snippet_ids.get(event["name"])
+                if key is not None and event["type"] == "field" and isinstance(event["value"], dict):
+                    on_update({"type": "field", "section": "corrected", "name": key,
+                               "value": event["value"].get("value")})
+            stream_kwargs = self._field_stream(forward, {"corrections": ("corrections",)})
+        
+        try:
+            payload = [self._snippet_payload(sid, snippet_ids[sid], snippets[snippet_ids[sid]]) for sid in batch]
+            messages = [
+                {
+                    "role": "system",
+                    "content": "You are a real estate data correction specialist. Correct OCR errors in field snippets using the document context. Return only valid JSON."
+                },
+                {
+                    "role": "user",
+                    "content": self._create_batch_correction_prompt(payload, context_text, document_type)
+                }
+            ]
+            
+            # Answers are about as long as the snippets; leave room so they are not truncated
+            payload_tokens = self.prompt_builder.estimate_tokens(json.dumps(payload, separators=(',', ':')))
+            response = self._make_openai_request(
+                messages=messages,
+                temperature=0.0,
+                max_tokens=min(4096, max(self.max_tokens, payload_tokens * 2 + 40 * len(batch))),
+                response_format={"type": "json_object"},
+                **stream_kwargs
+            )
+            
+            if response.get("finish_reason") == "length":
+                raise ValueError("Batch correction response truncated")
+            
+            answers = json.loads(response["content"]).get("corrections")
+            if not isinstance(answers, dict):
+                raise ValueError("Batch correction response has malformed corrections")
+        
+        except (CircuitOpenError, DeadlineExceededError) as e:
+            logger.warning("Batch correction unavailable, using basic cleanup", error=str(e))
+            return self._basic_snippet_corrections(batch_snippets), 0
+        except Exception as e:
+            if len(batch) == 1:
+                logger.warning("Field correction failed, using basic cleanup", error=str(e))
+                return self._basic_snippet_corrections(batch_snippets), 1
+            logger.info("Splitting correction batch after failure", size=len(batch), error=str(e))
+            middle = len(batch) // 2
+            first, first_calls = self._correct_batch(batch[:middle], snippets, snippet_ids,
+                                                     context_text, document_type, on_update)
+            second, second_calls = self._correct_batch(batch[middle:], snippets, snippet_ids,
+                                                       context_text, document_type, on_update)
+            return {**first, **second}, 1 + first_calls + second_calls
+        
+        corrections = {}
+        missing = []
+        for sid in batch:
+            answer = answers.get(sid)
+            if not isinstance(answer, dict) or answer.get("value") in (None, ""):
+                missing.append(sid)
+                continue
+            key = snippet_ids[sid]
+            snippet = snippets[key]
+            original = snippet.get("text") or ""
+            corrections[key] = {
+                "original": original,
+                "value": answer["value"],
+                "confidence": float(answer.get("confidence", 0.8)),
+                "changed": str(answer["value"]) != original,
+                "explanation": answer.get("explanation", ""),
+                "region": snippet.get("region"),
+                "source": "ai"
+            }
+        
+        calls = 1
+        if missing:
+            if len(missing) < len(batch):
+                # Ask again only for the snippets the model skipped
+                retried, retry_calls = self._correct_batch(missing, snippets, snippet_ids,
+                                                           context_text, document_type, on_update)
+                corrections.update(retried)
+                calls += retry_calls
+            else:
+                corrections.update(self._basic_snippet_corrections(
+                    {snippet_ids[sid]: snippets[snippet_ids[sid]] for sid in missing}
+                ))
+        
+        return corrections, calls
+    
+    def _create_batch_correction_prompt(self, payload: List[Dict[str, Any]], context_text: str,
+                                        document_type: str) -> str:
+        """Create prompt for correcting a batch of field snippets"""
+        return f"""
+The following snippets from a {document_type} were read by OCR with low confidence.
+Each has an "id", the "field" it belongs to and the OCR "text".
+
+Snippets:
+{json.dumps(payload, separators=(',', ':'), ensure_ascii=False)}
+
+Document text:
+{context_text}
+
+For every snippet id, return the most likely correct value, fixing OCR errors
+(e.g. O/0, l/1, S/5) and standardizing formats. Keep values that are already correct.
+
+Return JSON:
+{{
+  "corrections": {{
+    "snippet_id": {{"value": "corrected_value", "confidence": float_0_to_1, "explanation": "brief reason"}}
+  }}
+}}
+"""
+    
+    def _basic_snippet_corrections(self, snippets: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Correct snippets with basic text cleanup"""
+        corrections = {}
+        for key, snippet in snippets.items():
+            original = snippet.get("text") or ""
+            value = self._basic_text_cleanup(original)
+            corrections[key] = {
+                "original": original,
+                "value": value,
+                "confidence": round(float(snippet.get("confidence") or 0.0) / 100, 3),
+                "changed": value != original,
+                "explanation": "Basic text cleanup applied" if value != original else "",
+                "region": snippet.get("region"),
+                "source": "basic"
+            }
+        return corrections
+    
+    def _basic_field_resolution(self, fields: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Resolve uncertain fields with basic text cleanup"""
+        return {
+            "fields": {
+                name: {
+                    "value": self._basic_text_cleanup(field.get("value")),
+                    "confidence": round(float(field.get("confidence") or 0.0) / 100, 3)
+                }
+                for name, field in fields.items()
+            },
+            "method": "basic",
+            "round_trips": 0
+        }
+    
+    @instrumented('analyze_gated')
+    def analyze_gated(self, raw_data: Dict[str, Any], gate_result: Dict[str, Any],
+                      text: str, document_type: str,
+                      on_update: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Build analysis results from a confidence gate decision
+        
+        Confident fields pass through unchanged and only the uncertain ones are
+        sent to the model, in a single call. Returns the same shape as
+        analyze_document with mode 'gated'.
+        """
+        if on_update is not None:
+            # Confident fields are final already
+            for name, field in gate_result.get("confident", {}).items():
+                on_update({'type': 'field', 'section': 'confident', 'name': name, 'value': field["value"]})
+        
+        resolution = self.resolve_uncertain_fields(gate_result.get("uncertain", {}), text,
+                                                   document_type, on_update)
+        
+        fields = {
+            name: {
+                "value": field["value"],
+                "confidence": round(float(field.get("confidence") or 0.0) / 100, 3),
+                "location": field.get("source", "ocr")
+            }
+            for name, field in gate_result.get("confident", {}).items()
+        }
+        for name, field in resolution["fields"].items():
+            fields[name] = {
+                "value": field["value"],
+                "confidence": field["confidence"],
+                "location": resolution["method"]
+            }
+        
+        values = {name: field["value"] for name, field in fields.items()}
+        confidence = round(sum(f["confidence"] for f in fields.values()) / len(fields), 3) if fields else 0.0
+        timestamp = datetime.utcnow().isoformat()
+        
+        return {
+            "enhanced_data": {
+                "enhanced_data": values,
+                "original_data": raw_data,
+                "enhancement_confidence": confidence,
+                "document_type": document_type,
+                "enhanced_timestamp": timestamp,
+                "enhancement_method": "confidence_gate"
+            },
+            "validation_results": self._basic_validation(values, document_type),
+            "structured_data": {
+                "extracted_fields": fields,
+                "document_summary": f"Confidence-gated extraction from {document_type}",
+                "extraction_confidence": confidence,
+                "method": "confidence_gated",
+                "extraction_timestamp": timestamp
+            },
+            "mode": "gated",
+            "round_trips": resolution["round_trips"]
+        }
+    
+    @instrumented('insights')
     def generate_data_insights(self, processed_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate analytical insights from processed data"""
         try:
@@ -729,7 +1650,7 @@ Only include fields that are clearly identifiable in the text.
             prompt = f"""
 Analyze the following real estate data and generate insights:
 
-{json.dumps(processed_data, indent=2)}
+{self._serialize_prompt_data(processed_data, 'insights')}
 
 Provide insights on:
 1. Market analysis and trends
@@ -771,7 +1692,8 @@ Return JSON:
             response = self._make_openai_request(
                 messages=messages,
                 temperature=0.3,
-                max_tokens=1200
+                max_tokens=1200,
+                use_cache=False  # Insights are exploratory; don't replay old answers
             )
             
             insights = json.loads(response["content"])
@@ -807,61 +1729,45 @@ Return JSON:
     
     def process_batch(self, items: List[Dict[str, Any]], 
                      operation: str, **kwargs) -> List[Dict[str, Any]]:
-        """Process multiple items in batch with rate limiting"""
-        results = []
-        batch_size = kwargs.get('batch_size', 5)
-        delay = kwargs.get('delay', 1.0)  # seconds between batches
+        """Process multiple items concurrently, paced by the dispatcher's rate limits
+        
+        Items are submitted all at once; the dispatcher's token buckets and
+        in-flight limit decide how fast they reach OpenAI. Results are returned
+        in input order; an item that takes longer than ``timeout`` seconds
+        (default: the latency budget) is reported as an error. The legacy
+        ``batch_size`` and ``delay`` arguments are accepted but no longer used.
+        """
+        timeout = kwargs.get('timeout') or self.latency_budget_seconds
         
         logger.info("Starting batch processing", 
                    total_items=len(items), 
                    operation=operation,
-                   batch_size=batch_size)
-        
-        for i in range(0, len(items), batch_size):
-            batch = items[i:i + batch_size]
-            batch_results = []
-            
-            # Process batch concurrently
-            with ThreadPoolExecutor(max_workers=min(batch_size, 3)) as executor:
-                futures = []
-                
-                for item in batch:
-                    if operation == "enhance":
-                        future = executor.submit(
-                            self.enhance_extracted_data, 
-                            item.get('data', {}), 
-                            item.get('document_type', 'unknown')
-                        )
-                    elif operation == "validate":
-                        future = executor.submit(
-                            self.validate_real_estate_data,
-                            item.get('data', {}),
-                            item.get('document_type', 'unknown')
-                        )
-                    elif operation == "classify":
-                        future = executor.submit(
-                            self.classify_document_content,
-                            item.get('text', '')
-                        )
-                    else:
-                        future = executor.submit(lambda x: x, item)  # passthrough
-                    
-                    futures.append(future)
-                
-                # Collect results
-                for future in as_completed(futures):
-                    try:
-                        result = future.result(timeout=30)
-                        batch_results.append(result)
-                    except Exception as e:
-                        logger.error("Batch item processing failed", error=str(e))
-                        batch_results.append({"error": str(e)})
-            
-            results.extend(batch_results)
-            
-            # Rate limiting delay
-            if i + batch_size < len(items):
-                time.sleep(delay)
+                   max_in_flight=self.max_in_flight)
+        
+        operations = {
+            "enhance": lambda item: self.enhance_extracted_data(
+                item.get('data', {}), item.get('document_type', 'unknown')
+            ),
+            "validate": lambda item: self.validate_real_estate_data(
+                item.get('data', {}), item.get('document_type', 'unknown')
+            ),
+            "classify": lambda item: self.classify_document_content(item.get('text', ''))
+        }
+        handler = operations.get(operation, lambda item: item)  # passthrough
+        
+        futures = [self.executor.submit(handler, item) for item in items]
+        
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=timeout))
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                logger.error("Batch item timed out", timeout=timeout)
+                results.append({"error": f"Timed out after {timeout}s"})
+            except Exception as e:
+                logger.error("Batch item processing failed", error=str(e))
+                results.append({"error": str(e)})
         
         logger.info("Batch processing completed", 
                    processed=len(results), 
@@ -871,14 +1777,33 @@ Return JSON:
     
     def get_usage_statistics(self) -> Dict[str, Any]:
         """Get AI service usage statistics"""
+        with self._usage_lock:
+            cost_tracker = dict(self.cost_tracker)
         return {
-            "total_requests": self.cost_tracker['requests'],
-            "total_tokens": self.cost_tracker['total_tokens'],
-            "estimated_cost": round(self.cost_tracker['total_cost'], 4),
+            "total_requests": cost_tracker['requests'],
+            "total_tokens": cost_tracker['total_tokens'],
+            "estimated_cost": round(cost_tracker['total_cost'], 4),
             "model_used": self.model,
-            "client_initialized": self.client is not None
+            "client_initialized": self.client is not None,
+            "dispatcher": self.dispatcher.get_statistics() if self.dispatcher else None,
+            "response_cache": self.response_cache.get_statistics() if self.response_cache else None,
+            "prompt_size": self.prompt_builder.get_statistics(),
+            "coalescing": self.single_flight.get_statistics() if self.single_flight else None,
+            "resilience": self.get_resilience_statistics(),
+            "telemetry": self.get_telemetry()
         }
     
+    def get_telemetry(self) -> Dict[str, Any]:
+        """Per-operation latency histograms, tokens, retries, cache hits and fallbacks
+        
+        Retries made inside the dispatcher's event loop cannot be attributed to
+        an operation, so they are reported as a separate total.
+        """
+        snapshot = self.telemetry.snapshot()
+        snapshot['totals']['dispatcher_retries'] = \
+            self.dispatcher.get_statistics().get('retries', 0) if self.dispatcher else 0
+        return snapshot
+    
     def _basic_validation(self, data: Dict[str, Any], document_type: str) -> Dict[str, Any]:
         """Basic validation without AI"""
         errors = []
@@ -939,5 +1864,7 @@ Return JSON:
         try:
             if hasattr(self, 'executor'):
                 self.executor.shutdown(wait=False)
+            if getattr(self, 'dispatcher', None):
+                self.dispatcher.shutdown()
         except:
             pass
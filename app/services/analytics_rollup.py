@@ -0,0 +1,230 @@
+"""
+Analytics Rollups
+Daily per-event-type aggregates of the ``analytics`` table, kept up to date
+as events are written so dashboards never scan the raw events.
+"""
+
+import math
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+import structlog
+from sqlalchemy import delete, func, select
+
+from app.models.database import UPSERT_INSERTS, Analytics, AnalyticsDailyRollup, AnalyticsLatencyBucket
+
+logger = structlog.get_logger()
+
+# Histogram buckets grow by 10%, so percentiles are within 10% of the exact value
+LATENCY_BUCKET_GROWTH = 1.1
+
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+_ROLLUP_KEY = ('day', 'event_type')
+_BUCKET_KEY = ('day', 'event_type', 'bucket')
+
+
+def latency_bucket(processing_time_ms: float) -> int:
+    """Histogram bucket of a processing time: the smallest b with GROWTH**b >= ms"""
+    if processing_time_ms <= 1:
+        return 0
+    return math.ceil(math.log(processing_time_ms) / math.log(LATENCY_BUCKET_GROWTH) - 1e-9)
+
+
+def bucket_upper_bound(bucket: int) -> int:
+    """Largest processing time (ms) counted in a bucket"""
+    return round(LATENCY_BUCKET_GROWTH ** bucket)
+
+
+def _event_day(timestamp: Any) -> date:
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc)
+        return timestamp.date()
+    if isinstance(timestamp, date):
+        return timestamp
+    return datetime.now(timezone.utc).date()
+
+
+def aggregate_events(events: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Collapse events into rollup and histogram rows
+
+    Args:
+        events: Mappings with event_type, timestamp and processing_time_ms
+
+    Returns:
+        (AnalyticsDailyRollup rows, AnalyticsLatencyBucket rows)
+    """
+    rollups: Dict[Tuple[date, str], Dict[str, Any]] = {}
+    buckets: Dict[Tuple[date, str, int], int] = defaultdict(int)
+
+    for event in events:
+        key = (_event_day(event.get('timestamp')), event['event_type'])
+        row = rollups.get(key)
+        if row is None:
+            row = rollups[key] = {
+                'day': key[0], 'event_type': key[1], 'event_count': 0, 'timed_count': 0,
+                'total_processing_time_ms': 0, 'min_processing_time_ms': None, 'max_processing_time_ms': None
+            }
+        row['event_count'] += 1
+
+        elapsed = event.get('processing_time_ms')
+        if elapsed is None:
+            continue
+        elapsed = max(0, int(elapsed))
+        row['timed_count'] += 1
+        row['total_processing_time_ms'] += elapsed
+        low, high = row['min_processing_time_ms'], row['max_processing_time_ms']
+        row['min_processing_time_ms'] = elapsed if low is None else min(low, elapsed)
+        row['max_processing_time_ms'] = elapsed if high is None else max(high, elapsed)
+        buckets[key + (latency_bucket(elapsed),)] += 1
+
+    bucket_rows = [{'day': day, 'event_type': event_type, 'bucket': bucket, 'event_count': count}
+                   for (day, event_type, bucket), count in buckets.items()]
+    return list(rollups.values()), bucket_rows
+
+
+def apply_rollups(session, events: Sequence[Dict[str, Any]]) -> bool:
+    """
+    Add events to the daily rollups in the caller's transaction
+
+    Each (day, event type) and histogram bucket is incremented with one
+    multi-row INSERT ... ON CONFLICT DO UPDATE, so concurrent writers never
+    overwrite each other's counts. The caller commits.
+
+    Returns:
+        False if the database has no upsert support and nothing was written
+    """
+    if not events:
+        return True
+    dialect = session.get_bind().dialect.name
+    insert = UPSERT_INSERTS.get(dialect)
+    if insert is None:
+        logger.debug("Analytics rollups not supported on this database", dialect=dialect)
+        return False
+
+    rollup_rows, bucket_rows = aggregate_events(events)
+    # Two-argument LEAST/GREATEST that ignore NULL like the aggregates do
+    least, greatest = (func.min, func.max) if dialect == 'sqlite' else (func.least, func.greatest)
+
+    table = AnalyticsDailyRollup.__table__
+    statement = insert(table)
+    current, new = table.c, statement.excluded
+    statement = statement.on_conflict_do_update(index_elements=list(_ROLLUP_KEY), set_={
+        'event_count': current.event_count + new.event_count,
+        'timed_count': current.timed_count + new.timed_count,
+        'total_processing_time_ms': current.total_processing_time_ms + new.total_processing_time_ms,
+        'min_processing_time_ms': least(func.coalesce(current.min_processing_time_ms, new.min_processing_time_ms),
+                                        func.coalesce(new.min_processing_time_ms, current.min_processing_time_ms)),
+        'max_processing_time_ms': greatest(func.coalesce(current.max_processing_time_ms, new.max_processing_time_ms),
+                                           func.coalesce(new.max_processing_time_ms, current.max_processing_time_ms)),
+        'updated_at': func.now()
+    })
+    session.execute(statement, rollup_rows)
+
+    if bucket_rows:
+        table = AnalyticsLatencyBucket.__table__
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(index_elements=list(_BUCKET_KEY), set_={
+            'event_count': table.c.event_count + statement.excluded.event_count
+        })
+        session.execute(statement, bucket_rows)
+    return True
+
+
+def _percentile(buckets: List[Tuple[int, int]], total: int, percentile: float,
+                low: Optional[int], high: Optional[int]) -> Optional[int]:
+    """Upper bound of the bucket holding the percentile, clamped to the day's min and max"""
+    if not total:
+        return None
+    rank = max(1, math.ceil(total * percentile / 100))
+    seen = 0
+    for bucket, count in buckets:
+        seen += count
+        if seen >= rank:
+            value = bucket_upper_bound(bucket)
+            if high is not None:
+                value = min(value, high)
+            if low is not None:
+                value = max(value, low)
+            return value
+    return high
+
+
+def daily_summary(session, start_day: date, end_day: date, event_types: Optional[Sequence[str]] = None,
+                  percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> List[Dict[str, Any]]:
+    """
+    Daily counts and processing time statistics from the rollup tables
+
+    Args:
+        session: SQLAlchemy session
+        start_day: First day (inclusive, UTC)
+        end_day: Last day (inclusive, UTC)
+        event_types: Limit to these event types
+        percentiles: Processing time percentiles to report, e.g. 95 -> ``p95_ms``
+
+    Returns:
+        One entry per day and event type, ordered by day then event type
+    """
+    rollup_query = select(AnalyticsDailyRollup).where(AnalyticsDailyRollup.day.between(start_day, end_day))
+    bucket_query = (select(AnalyticsLatencyBucket.day, AnalyticsLatencyBucket.event_type,
+                           AnalyticsLatencyBucket.bucket, AnalyticsLatencyBucket.event_count)
+                    .where(AnalyticsLatencyBucket.day.between(start_day, end_day))
+                    .order_by(AnalyticsLatencyBucket.bucket))
+    if event_types:
+        rollup_query = rollup_query.where(AnalyticsDailyRollup.event_type.in_(event_types))
+        bucket_query = bucket_query.where(AnalyticsLatencyBucket.event_type.in_(event_types))
+
+    histograms: Dict[Tuple[date, str], List[Tuple[int, int]]] = defaultdict(list)
+    for day, event_type, bucket, count in session.execute(bucket_query):
+        histograms[(day, event_type)].append((bucket, count))
+
+    summary = []
+    rollups = session.scalars(rollup_query.order_by(AnalyticsDailyRollup.day, AnalyticsDailyRollup.event_type))
+    for rollup in rollups:
+        entry = rollup.to_dict()
+        entry['avg_processing_time_ms'] = (
+            round(rollup.total_processing_time_ms / rollup.timed_count, 1) if rollup.timed_count else None
+        )
+        histogram = histograms.get((rollup.day, rollup.event_type), [])
+        for percentile in percentiles:
+            entry[f'p{percentile:g}_ms'] = _percentile(histogram, rollup.timed_count, percentile,
+                                                       rollup.min_processing_time_ms, rollup.max_processing_time_ms)
+        summary.append(entry)
+    return summary
+
+
+def rebuild_rollups(session, start_day: date, end_day: date, batch_size: int = 5000) -> int:
+    """
+    Recompute the rollups for a day range from the raw events and commit
+
+    For backfilling events written before the rollup tables existed.
+
+    Returns:
+        Number of events rolled up
+    """
+    start = datetime.combine(start_day, datetime.min.time(), tzinfo=timezone.utc)
+    end = datetime.combine(end_day, datetime.max.time(), tzinfo=timezone.utc)
+    try:
+        session.execute(delete(AnalyticsDailyRollup).where(AnalyticsDailyRollup.day.between(start_day, end_day)))
+        session.execute(delete(AnalyticsLatencyBucket).where(AnalyticsLatencyBucket.day.between(start_day, end_day)))
+
+        total = 0
+        rows = session.execute(
+            select(Analytics.event_type, Analytics.timestamp, Analytics.processing_time_ms)
+            .where(Analytics.timestamp.between(start, end))
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in rows.mappings().partitions(batch_size):
+            apply_rollups(session, partition)
+            total += len(partition)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    logger.info("Analytics rollups rebuilt", start_day=start_day.isoformat(),
+                end_day=end_day.isoformat(), events=total)
+    return total
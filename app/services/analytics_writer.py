@@ -0,0 +1,191 @@
+"""
+Analytics Writer
+Buffers analytics events in memory and writes them to the ``analytics``
+table in batches on a background thread.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import structlog
+from sqlalchemy import insert
+
+logger = structlog.get_logger()
+
+
+class AnalyticsWriter:
+    """Bounded, batched, asynchronous writer for analytics events
+
+    ``record`` only enqueues, so instrumentation never waits on the
+    database. A daemon thread writes queued events with one multi-row
+    insert per ``batch_size`` events or every ``flush_interval`` seconds,
+    whichever comes first, and adds them to the daily rollups in the same
+    transaction. When the queue is full (the database is slow or
+    down during a burst) new events are dropped and counted rather than
+    blocking the caller. Pending events are flushed at interpreter exit.
+    """
+
+    def __init__(self, app, batch_size: int = 200, flush_interval: float = 2.0,
+                 max_queue: int = 10000, enabled: bool = True):
+        self.app = app
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.stats = {'recorded': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+    def record(self, event_type: str, event_data: Optional[Dict[str, Any]] = None,
+               session_id: Optional[str] = None, processing_time_ms: Optional[int] = None) -> bool:
+        """Queue an event; returns False if it was dropped"""
+        if not self.enabled or self._stop.is_set():
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait({
+                'event_type': event_type,
+                'event_data': event_data,
+                'session_id': session_id,
+                'processing_time_ms': processing_time_ms,
+                'timestamp': datetime.now(timezone.utc)
+            })
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('recorded')
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Write everything queued so far; returns False if the writer did not finish in time"""
+        if self._thread is None or not self._thread.is_alive():
+            self._write(self._drain())
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop accepting events, write what is queued and stop the thread"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        else:
+            self._write(self._drain())
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='analytics-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        waiters: List[threading.Event] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=max(0.0, min(deadline - time.monotonic(), 0.5)))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or waiters or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+                deadline = time.monotonic() + self.flush_interval
+
+        # Stopping: what is still queued goes out in batch_size chunks
+        self._write(batch + self._drain(waiters))
+        for waiter in waiters:
+            waiter.set()
+
+    def _drain(self, waiters: Optional[List[threading.Event]] = None) -> List[Dict[str, Any]]:
+        """Take everything queued; flush waiters are collected into ``waiters`` or released"""
+        events = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return events
+            if isinstance(item, threading.Event):
+                if waiters is None:
+                    item.set()
+                else:
+                    waiters.append(item)
+            else:
+                events.append(item)
+
+    def _write(self, events: List[Dict[str, Any]]) -> None:
+        """Insert events with one multi-row statement per batch; a failed batch is counted and dropped"""
+        if not events:
+            return
+        from app.models.database import db, Analytics
+        from app.services.analytics_rollup import apply_rollups
+
+        for start in range(0, len(events), self.batch_size):
+            chunk = events[start:start + self.batch_size]
+            try:
+                with self.app.app_context():
+                    try:
+                        db.session.execute(insert(Analytics), chunk)
+                        apply_rollups(db.session, chunk)
+                        db.session.commit()
+                    except Exception:
+                        db.session.rollback()
+                        raise
+            except Exception as e:
+                self._count('failed', len(chunk))
+                logger.warning("Analytics batch write failed", events=len(chunk), error=str(e))
+                continue
+            self._count('written', len(chunk))
+            self._count('batches')
+
+    def _count(self, stat: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats.update({
+            'queued': self._queue.qsize(),
+            'capacity': self._queue.maxsize,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'enabled': self.enabled
+        })
+        return stats
+
+
+def create_analytics_writer(app) -> AnalyticsWriter:
+    """Build the app's analytics writer from the ANALYTICS_* settings"""
+    config = app.config
+    return AnalyticsWriter(
+        app,
+        batch_size=config.get('ANALYTICS_BATCH_SIZE', 200),
+        flush_interval=config.get('ANALYTICS_FLUSH_INTERVAL', 2.0),
+        max_queue=config.get('ANALYTICS_QUEUE_SIZE', 10000),
+        enabled=config.get('ANALYTICS_ENABLED', True)
+    )
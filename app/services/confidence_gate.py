@@ -0,0 +1,124 @@
+"""
+Confidence Gate
+Decides which extracted fields are certain enough to skip LLM enhancement.
+"""
+
+import re
+from typing import Dict, Any, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class ConfidenceGate:
+    """Score OCR fields with CRE_PATTERNS and OCR confidence
+
+    A field is confident when its OCR confidence meets the threshold and its
+    text matches one of the CRE patterns. Confident fields pass through
+    unchanged; everything else is returned as uncertain for a single batched
+    LLM call.
+    """
+
+    def __init__(self, confidence_threshold: float = 90.0, patterns: Dict[str, str] = None):
+        """
+        Initialize confidence gate
+
+        Args:
+            confidence_threshold: Minimum OCR confidence (0-100) to trust a field
+            patterns: Field patterns (defaults to Config.CRE_PATTERNS)
+        """
+        if patterns is None:
+            from config import Config
+            patterns = Config.CRE_PATTERNS
+
+        self.confidence_threshold = confidence_threshold
+        self.patterns = {
+            name: re.compile(pattern, re.IGNORECASE) for name, pattern in patterns.items()
+        }
+
+    @staticmethod
+    def _match_value(match: re.Match) -> str:
+        """Use the first capture group when the pattern has one"""
+        value = match.group(1) if match.groups() else match.group(0)
+        return ' '.join(value.split())
+
+    def _match_pattern(self, name: str, text: str) -> Optional[Dict[str, str]]:
+        """Find the pattern matching ``text``, preferring one named like the field"""
+        candidates = [name] if name in self.patterns else []
+        candidates += [p for p in self.patterns if p != name]
+
+        for pattern_name in candidates:
+            match = self.patterns[pattern_name].search(text)
+            if match:
+                return {'pattern': pattern_name, 'value': self._match_value(match)}
+        return None
+
+    def score_fields(self, raw_data: Dict[str, Any], ocr_confidence: float = 0.0) -> Dict[str, Dict[str, Any]]:
+        """Score OCR regions and pattern matches from the full text
+
+        Args:
+            raw_data: Dict with optional 'regions' (name -> OCR result) and 'full_text'
+            ocr_confidence: Page-level OCR confidence used for full-text matches
+
+        Returns:
+            Dict of field name -> value, confidence, pattern, source, confident
+        """
+        fields = {}
+
+        for region_name, region in (raw_data.get('regions') or {}).items():
+            if not isinstance(region, dict):
+                continue
+            text = ' '.join(str(region.get('text') or '').split())
+            if not text:
+                continue
+
+            confidence = float(region.get('confidence') or 0.0)
+            match = self._match_pattern(region_name, text)
+
+            fields[region_name] = {
+                'value': text,
+                'confidence': confidence,
+                'pattern': match['pattern'] if match else None,
+                'source': 'region',
+                'confident': confidence >= self.confidence_threshold and match is not None
+            }
+
+        full_text = raw_data.get('full_text') or ''
+        if full_text:
+            for pattern_name, pattern in self.patterns.items():
+                if pattern_name in fields:
+                    continue
+                match = pattern.search(full_text)
+                if not match:
+                    continue
+                fields[pattern_name] = {
+                    'value': self._match_value(match),
+                    'confidence': float(ocr_confidence or 0.0),
+                    'pattern': pattern_name,
+                    'source': 'full_text',
+                    'confident': (ocr_confidence or 0.0) >= self.confidence_threshold
+                }
+
+        return fields
+
+    def evaluate(self, raw_data: Dict[str, Any], ocr_confidence: float = 0.0) -> Dict[str, Any]:
+        """Split fields into confident pass-through and uncertain escalation sets"""
+        fields = self.score_fields(raw_data, ocr_confidence)
+
+        confident = {name: field for name, field in fields.items() if field['confident']}
+        uncertain = {name: field for name, field in fields.items() if not field['confident']}
+
+        logger.info("Confidence gate evaluated",
+                   total_fields=len(fields),
+                   escalated_fields=len(uncertain),
+                   threshold=self.confidence_threshold)
+
+        return {
+            'confident': confident,
+            'uncertain': uncertain,
+            'total_fields': len(fields),
+            'escalated_count': len(uncertain),
+            'passed_through_count': len(confident),
+            'threshold': self.confidence_threshold
+        }
@@ -0,0 +1,122 @@
+"""
+Document Result Model
+One canonical OCR word table per document. Pipeline stages refer to rows of
+the table and to the shared raw data instead of carrying their own copies.
+"""
+
+from typing import Dict, Any, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+WORD_COLUMNS = ('text', 'confidence', 'left', 'top', 'width', 'height', 'level')
+BBOX_COLUMNS = ('left', 'top', 'width', 'height')
+
+# Stands in for ``extracted_data['raw_data']`` wherever AI results echo it back
+RAW_DATA_REF = '$ref'
+RAW_DATA_PATH = 'extracted_data.raw_data'
+
+
+class WordTable:
+    """Columnar store of every OCR word of a document
+
+    Words are appended once per OCR source (a region or the full page) and
+    addressed by a ``[start, stop)`` row range. Keeping one list per column
+    instead of one dict per word is several times smaller in memory and in
+    JSON.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, List[Any]] = {name: [] for name in WORD_COLUMNS}
+        self.sources: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns['text'])
+
+    def add(self, words: List[Dict[str, Any]], source: str) -> List[int]:
+        """Append OCR words (as returned by OCRService) and return their row range"""
+        start = len(self)
+        for word in words:
+            bbox = word.get('bbox') or {}
+            self.columns['text'].append(word.get('text', ''))
+            self.columns['confidence'].append(word.get('confidence'))
+            for name in BBOX_COLUMNS:
+                self.columns[name].append(bbox.get(name))
+            self.columns['level'].append(word.get('level'))
+        ref = [start, len(self)]
+        self.sources[source] = ref
+        return ref
+
+    def rows(self, ref: List[int]) -> List[Dict[str, Any]]:
+        """Word dicts for a row range, in the OCRService word format"""
+        start, stop = ref
+        columns = self.columns
+        return [
+            {
+                'text': columns['text'][i],
+                'confidence': columns['confidence'][i],
+                'bbox': {name: columns[name][i] for name in BBOX_COLUMNS},
+                'level': columns['level'][i]
+            }
+            for i in range(start, min(stop, len(self)))
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'count': len(self), 'sources': self.sources, 'columns': self.columns}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'WordTable':
+        table = cls()
+        if data:
+            for name in WORD_COLUMNS:
+                table.columns[name] = list(data.get('columns', {}).get(name, []))
+            table.sources = dict(data.get('sources', {}))
+        return table
+
+
+def compact_ocr_result(ocr_result: Dict[str, Any], table: WordTable, source: str) -> Dict[str, Any]:
+    """Copy of an OCR result with its words moved into ``table`` (``word_ref`` holds the row range)"""
+    if not isinstance(ocr_result, dict) or 'words' not in ocr_result:
+        return ocr_result
+    compact = {key: value for key, value in ocr_result.items() if key != 'words'}
+    compact['word_ref'] = table.add(ocr_result['words'] or [], source)
+    return compact
+
+
+def share_raw_data(data: Any, raw_data: Dict[str, Any]) -> Any:
+    """Replace values of ``data`` that are the ``raw_data`` object itself with a reference"""
+    if not isinstance(data, dict):
+        return data
+    return {key: {RAW_DATA_REF: RAW_DATA_PATH} if value is raw_data else value
+            for key, value in data.items()}
+
+
+def expand_result(results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rebuild the nested result layout from the reference-based one
+
+    Every ``word_ref`` becomes the original ``words`` list and every raw data
+    reference becomes a copy of ``extracted_data['raw_data']``. The word table
+    itself is dropped. ``results`` is not modified.
+    """
+    if not isinstance(results, dict) or 'ocr_words' not in results:
+        return results
+
+    table = WordTable.from_dict(results.get('ocr_words'))
+    extracted = results.get('extracted_data')
+    raw_data = extracted.get('raw_data') if isinstance(extracted, dict) else None
+
+    def expand(value):
+        if isinstance(value, dict):
+            if value.get(RAW_DATA_REF) == RAW_DATA_PATH and len(value) == 1:
+                return expand(raw_data)
+            expanded = {key: expand(child) for key, child in value.items() if key != 'word_ref'}
+            if 'word_ref' in value:
+                expanded['words'] = table.rows(value['word_ref'])
+            return expanded
+        if isinstance(value, list):
+            return [expand(child) for child in value]
+        return value
+
+    return {key: expand(value) for key, value in results.items() if key != 'ocr_words'}
@@ -0,0 +1,293 @@
+"""
+EAST Inference Service
+Thread-safe pool of EAST text detection networks, loaded (and optionally
+warmed up) once per worker and shared by all region managers.
+"""
+
+import os
+import math
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+# Output layers of the frozen EAST graph: score map and box geometry
+EAST_OUTPUT_LAYERS = ["feature_fusion/Conv_7/Sigmoid", "feature_fusion/concat_3"]
+EAST_MEAN = (123.68, 116.78, 103.94)
+
+DEFAULT_MODEL_PATHS = [
+    'models/frozen_east_text_detection.pb',
+    'app/models/frozen_east_text_detection.pb',
+    os.path.join(os.getcwd(), 'models', 'frozen_east_text_detection.pb')
+]
+
+
+class EASTInferenceService:
+    """Pool of cv2.dnn EAST networks shared by all region managers in a worker.
+
+    A ``cv2.dnn.Net`` keeps its input blob and intermediate buffers as object
+    state, so ``setInput``/``forward`` must never run concurrently on the same
+    instance. Each caller checks a net out of the pool for the duration of one
+    forward pass; nets are loaded lazily up to ``pool_size``.
+    """
+
+    def __init__(self, model_path: str = None, pool_size: int = 2,
+                 num_threads: Optional[int] = None,
+                 score_threshold: float = 0.5, nms_threshold: float = 0.4):
+        """
+        Initialize EAST inference service
+
+        Args:
+            model_path: Path to frozen EAST graph (auto-detected when omitted)
+            pool_size: Maximum number of networks loaded in this process
+            num_threads: Value passed to cv2.setNumThreads (None keeps OpenCV default)
+            score_threshold: Minimum EAST score for a candidate box
+            nms_threshold: IoU threshold for rotated non-maximum suppression
+        """
+        self.model_path = model_path or self._find_model_path()
+        self.pool_size = max(1, int(pool_size))
+        self.num_threads = num_threads
+        self.score_threshold = score_threshold
+        self.nms_threshold = nms_threshold
+
+        self._pool = queue.Queue()
+        self._pool_lock = threading.Lock()
+        self._nets_loaded = 0
+        self._load_failed = False
+        self.warmed_up = False
+
+        if self.num_threads is not None:
+            cv2.setNumThreads(int(self.num_threads))
+
+        logger.info("EAST inference service configured",
+                   model_available=self.model_path is not None,
+                   pool_size=self.pool_size,
+                   num_threads=self.num_threads)
+
+    @staticmethod
+    def _find_model_path() -> Optional[str]:
+        """Look for the EAST model in common locations"""
+        for path in DEFAULT_MODEL_PATHS:
+            if os.path.exists(path):
+                return path
+        return None
+
+    @property
+    def available(self) -> bool:
+        """Whether EAST inference can be used"""
+        return self.model_path is not None and not self._load_failed
+
+    def _load_net(self):
+        """Load a new EAST network from disk"""
+        net = cv2.dnn.readNet(self.model_path)
+        logger.info(f"EAST text detection model loaded from {self.model_path}",
+                   nets_loaded=self._nets_loaded + 1)
+        return net
+
+    @contextmanager
+    def _acquire_net(self):
+        """Check a network out of the pool, loading one if the pool is not full"""
+        net = None
+        try:
+            net = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                if self._nets_loaded < self.pool_size:
+                    try:
+                        net = self._load_net()
+                        self._nets_loaded += 1
+                    except Exception as e:
+                        self._load_failed = True
+                        logger.warning(f"Failed to load EAST model from {self.model_path}", error=str(e))
+                        raise
+            if net is None:
+                net = self._pool.get()
+
+        try:
+            yield net
+        finally:
+            self._pool.put(net)
+
+    def warm_up(self) -> bool:
+        """Load every network in the pool and run one dummy forward pass on each
+
+        Intended to be called once at worker start so the first request does not
+        pay model loading and OpenCV graph initialization.
+        """
+        if not self.available:
+            return False
+
+        try:
+            dummy = np.full((320, 320, 3), 255, dtype=np.uint8)
+            blob = cv2.dnn.blobFromImage(dummy, 1.0, (320, 320), EAST_MEAN, swapRB=True, crop=False)
+
+            nets = []
+            with self._pool_lock:
+                while self._nets_loaded < self.pool_size:
+                    self._pool.put(self._load_net())
+                    self._nets_loaded += 1
+
+            # Drain the pool so every network gets exercised exactly once
+            for _ in range(self.pool_size):
+                nets.append(self._pool.get())
+            try:
+                for net in nets:
+                    net.setInput(blob)
+                    net.forward(EAST_OUTPUT_LAYERS)
+            finally:
+                for net in nets:
+                    self._pool.put(net)
+
+            self.warmed_up = True
+            logger.info("EAST inference service warmed up", nets_loaded=self._nets_loaded)
+            return True
+
+        except Exception as e:
+            self._load_failed = True
+            logger.warning("EAST warm-up failed", error=str(e))
+            return False
+
+    def detect(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """Detect text regions on a single page"""
+        if not self.available:
+            return []
+
+        orig_h, orig_w = image.shape[:2]
+        # EAST requires input dimensions that are multiples of 32
+        new_w = int((orig_w // 32) * 32)
+        new_h = int((orig_h // 32) * 32)
+        if new_w == 0 or new_h == 0:
+            return []
+
+        try:
+            if len(image.shape) == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            blob = cv2.dnn.blobFromImage(cv2.resize(image, (new_w, new_h)), 1.0, (new_w, new_h),
+                                         EAST_MEAN, swapRB=True, crop=False)
+
+            with self._acquire_net() as net:
+                net.setInput(blob)
+                (scores, geometry) = net.forward(EAST_OUTPUT_LAYERS)
+
+            return self._regions_from_output(scores, geometry, orig_w / float(new_w), orig_h / float(new_h),
+                                             orig_w, orig_h)
+        except Exception as e:
+            logger.error("Error in EAST text detection", error=str(e))
+            return []
+
+    def _regions_from_output(self, scores: np.ndarray, geometry: np.ndarray,
+                             r_w: float, r_h: float, orig_w: int, orig_h: int) -> List[Dict[str, Any]]:
+        """Convert one page of EAST output into axis-aligned regions"""
+        rectangles, confidences = decode_east_predictions(scores, geometry, self.score_threshold)
+        if not rectangles:
+            return []
+
+        indices = cv2.dnn.NMSBoxesRotated(rectangles, confidences, self.score_threshold, self.nms_threshold)
+
+        regions = []
+        if len(indices) > 0:
+            for i in np.array(indices).flatten():
+                # Get the rotated rectangle
+                (center_x, center_y), (width, height), angle = rectangles[i]
+
+                # Scale back to original image size
+                center_x = int(center_x * r_w)
+                center_y = int(center_y * r_h)
+                width = int(width * r_w)
+                height = int(height * r_h)
+
+                # Convert to axis-aligned bounding box
+                x = max(0, center_x - width // 2)
+                y = max(0, center_y - height // 2)
+
+                regions.append({
+                    'x': x,
+                    'y': y,
+                    'width': min(width, orig_w - x),
+                    'height': min(height, orig_h - y),
+                    'confidence': float(confidences[i]),
+                    'detection_method': 'east',
+                    'type': 'text_region'
+                })
+
+        return regions
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        return {
+            'model_available': self.model_path is not None,
+            'load_failed': self._load_failed,
+            'pool_size': self.pool_size,
+            'nets_loaded': self._nets_loaded,
+            'nets_idle': self._pool.qsize(),
+            'num_threads': self.num_threads,
+            'warmed_up': self.warmed_up
+        }
+
+
+def decode_east_predictions(scores: np.ndarray, geometry: np.ndarray,
+                            score_threshold: float = 0.5) -> Tuple[List, List]:
+    """Decode EAST model predictions for a single page"""
+    rectangles = []
+    confidences = []
+
+    # Get dimensions
+    (num_rows, num_cols) = scores.shape[2:4]
+
+    for y in range(0, num_rows):
+        scores_data = scores[0, 0, y]
+        x_data0 = geometry[0, 0, y]
+        x_data1 = geometry[0, 1, y]
+        x_data2 = geometry[0, 2, y]
+        x_data3 = geometry[0, 3, y]
+        angles_data = geometry[0, 4, y]
+
+        for x in range(0, num_cols):
+            if scores_data[x] < score_threshold:
+                continue
+
+            # Compute offset factor
+            (offset_x, offset_y) = (x * 4.0, y * 4.0)
+
+            # Extract rotation angle and compute cos/sin
+            angle = angles_data[x]
+            cos = np.cos(angle)
+            sin = np.sin(angle)
+
+            # Compute dimensions
+            h = x_data0[x] + x_data2[x]
+            w = x_data1[x] + x_data3[x]
+
+            # Compute center of rotated rectangle
+            center_x = offset_x + (cos * x_data1[x]) + (sin * x_data2[x])
+            center_y = offset_y - (sin * x_data1[x]) + (cos * x_data2[x])
+
+            rectangles.append(((center_x, center_y), (w, h), -1 * angle * 180.0 / math.pi))
+            confidences.append(float(scores_data[x]))
+
+    return rectangles, confidences
+
+
+_east_service = None
+_east_service_lock = threading.Lock()
+
+
+def get_east_inference_service() -> EASTInferenceService:
+    """Get the process-wide EAST inference service, configured from Config"""
+    global _east_service
+    if _east_service is None:
+        with _east_service_lock:
+            if _east_service is None:
+                from config import Config
+                _east_service = EASTInferenceService(
+                    model_path=getattr(Config, 'EAST_MODEL_PATH', None),
+                    pool_size=getattr(Config, 'EAST_POOL_SIZE', 2),
+                    num_threads=getattr(Config, 'EAST_NUM_THREADS', None)
+                )
+    return _east_service
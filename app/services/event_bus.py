@@ -0,0 +1,237 @@
+"""
+Event Bus
+Per-job progress events for server-sent event streams.
+"""
+
+import json
+import time
+import queue
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, Any, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Events after which a job's stream ends
+TERMINAL_EVENTS = ('complete', 'failed')
+
+
+class Subscription(ABC):
+    """Events for one job: the retained backlog first, then live events
+
+    ``get`` returns the next event dict (``id``, ``event``, ``data``) or None
+    when nothing arrived within ``timeout``, so the caller can send a
+    heartbeat. Events at or below ``last_event_id`` are skipped, which lets a
+    reconnecting client resume where it left off.
+    """
+
+    def __init__(self, backlog, last_event_id: Optional[int] = None):
+        self.last_id = last_event_id or 0
+        self._pending = deque(e for e in backlog if e['id'] > self.last_id)
+        self.finished = any(e['event'] in TERMINAL_EVENTS for e in self._pending)
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            event = self._pending.popleft() if self._pending else self._receive(max(0.0, deadline - time.monotonic()))
+            if event is None:
+                return None
+            if event['id'] > self.last_id:
+                self.last_id = event['id']
+                return event
+
+    @abstractmethod
+    def _receive(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next live event from the transport, or None after ``timeout`` seconds"""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _MemorySubscription(Subscription):
+
+    def __init__(self, bus, channel: str, backlog, last_event_id: Optional[int] = None):
+        self._bus = bus
+        self._channel = channel
+        self._queue: queue.Queue = queue.Queue()
+        super().__init__(backlog, last_event_id)
+
+    def _receive(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self._bus._unsubscribe(self._channel, self._queue)
+
+
+class _Channel:
+    __slots__ = ('history', 'subscribers', 'next_id', 'closed_at')
+
+    def __init__(self, history: int):
+        self.history = deque(maxlen=history)
+        self.subscribers = []
+        self.next_id = 1
+        self.closed_at = None
+
+
+class InMemoryEventBus:
+    """Event bus within one process
+
+    Each job keeps its last ``history`` events so a client that connects
+    after processing started still sees the current state. Finished jobs are
+    dropped ``retention`` seconds after their terminal event. Only suitable
+    when jobs run in the web process (the thread job backend).
+    """
+
+    def __init__(self, history: int = 200, retention: float = 3600):
+        self.history = history
+        self.retention = retention
+        self._channels: Dict[str, _Channel] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, event: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            state = self._channels.get(channel)
+            if state is None:
+                state = self._channels[channel] = _Channel(self.history)
+            message = {'id': state.next_id, 'event': event, 'data': data}
+            state.next_id += 1
+            state.history.append(message)
+            subscribers = list(state.subscribers)
+            if event in TERMINAL_EVENTS:
+                state.closed_at = time.monotonic()
+                self._expire()
+
+        for subscriber in subscribers:
+            subscriber.put(message)
+        return message['id']
+
+    def subscribe(self, channel: str, last_event_id: Optional[int] = None) -> Subscription:
+        with self._lock:
+            state = self._channels.get(channel)
+            if state is None:
+                state = self._channels[channel] = _Channel(self.history)
+            subscription = _MemorySubscription(self, channel, list(state.history), last_event_id)
+            state.subscribers.append(subscription._queue)
+        return subscription
+
+    def _unsubscribe(self, channel: str, subscriber: queue.Queue) -> None:
+        with self._lock:
+            state = self._channels.get(channel)
+            if state is not None and subscriber in state.subscribers:
+                state.subscribers.remove(subscriber)
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.retention
+        expired = [name for name, state in self._channels.items()
+                   if state.closed_at is not None and state.closed_at < cutoff and not state.subscribers]
+        for name in expired:
+            del self._channels[name]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'channels': len(self._channels),
+                'subscribers': sum(len(s.subscribers) for s in self._channels.values())
+            }
+
+
+class _RedisSubscription(Subscription):
+
+    def __init__(self, pubsub, backlog, last_event_id: Optional[int] = None):
+        self._pubsub = pubsub
+        super().__init__(backlog, last_event_id)
+
+    def _receive(self, timeout: float) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            message = self._pubsub.get_message(ignore_subscribe_messages=True,
+                                               timeout=max(0.0, deadline - time.monotonic()))
+            if message is not None and message.get('type') == 'message':
+                return json.loads(message['data'])
+            if time.monotonic() >= deadline:
+                return None
+
+    def close(self) -> None:
+        try:
+            self._pubsub.close()
+        except Exception:
+            pass
+
+
+class RedisEventBus:
+    """Event bus over Redis pub/sub, for jobs that run on Celery workers
+
+    Events are published to ``<prefix><job>`` and also appended to a capped
+    list so late or reconnecting subscribers can replay them.
+    """
+
+    def __init__(self, client, history: int = 200, retention: float = 3600,
+                 prefix: str = 'rexeli:progress:'):
+        self.client = client
+        self.history = history
+        self.retention = int(retention)
+        self.prefix = prefix
+
+    def publish(self, channel: str, event: str, data: Dict[str, Any]) -> int:
+        key = self.prefix + channel
+        event_id = self.client.incr(key + ':seq')
+        payload = json.dumps({'id': event_id, 'event': event, 'data': data}, default=str)
+        pipe = self.client.pipeline()
+        pipe.rpush(key + ':history', payload)
+        pipe.ltrim(key + ':history', -self.history, -1)
+        pipe.expire(key + ':history', self.retention)
+        pipe.expire(key + ':seq', self.retention)
+        pipe.publish(key, payload)
+        pipe.execute()
+        return event_id
+
+    def subscribe(self, channel: str, last_event_id: Optional[int] = None) -> Subscription:
+        key = self.prefix + channel
+        pubsub = self.client.pubsub()
+        # Subscribe before reading history so nothing published in between is lost;
+        # duplicates are dropped by event ID
+        pubsub.subscribe(key)
+        backlog = [json.loads(item) for item in self.client.lrange(key + ':history', 0, -1)]
+        return _RedisSubscription(pubsub, backlog, last_event_id)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {'backend': 'redis'}
+
+
+def format_sse(event: Optional[Dict[str, Any]]) -> str:
+    """Encode an event as a server-sent event frame; None gives a heartbeat comment"""
+    if event is None:
+        return ': keep-alive\n\n'
+    data = json.dumps(event['data'], default=str, separators=(',', ':'))
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+def create_event_bus(app):
+    """Build the app's event bus from EVENT_BUS ('memory' or 'redis')"""
+    config = app.config
+    history = config.get('EVENT_BUS_HISTORY', 200)
+    retention = config.get('EVENT_BUS_RETENTION', 3600)
+
+    if config.get('EVENT_BUS', 'memory') == 'redis' and config.get('REDIS_URL'):
+        try:
+            import redis
+            client = redis.Redis.from_url(config['REDIS_URL'])
+            client.ping()
+            return RedisEventBus(client, history=history, retention=retention)
+        except Exception as e:
+            logger.warning("Redis event bus unavailable, using in-process bus", error=str(e))
+
+    return InMemoryEventBus(history=history, retention=retention)
@@ -149,6 +149,111 @@ class ExcelService:
             logger.error(f"Error exporting to Excel: {str(e)}")
             raise
     
+    def export_batch_to_excel(self, documents: List[Dict[str, Any]], filename: Optional[str] = None) -> str:
+        """Consolidated workbook for a processing batch
+        
+        ``documents`` are the per-document entries of a batch status (file path,
+        status, error and pipeline results). The workbook has one summary row
+        per document and a long-format sheet with every extracted field.
+        """
+        try:
+            logger.info("Starting batch Excel export", documents=len(documents))
+            
+            if not filename:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                filename = f"batch_export_{timestamp}.xlsx"
+            if not filename.endswith('.xlsx'):
+                filename += '.xlsx'
+            filepath = os.path.join('uploads', filename)
+            
+            workbook = Workbook()
+            summary = workbook.active
+            summary.title = "Batch Summary"
+            fields_ws = workbook.create_sheet("All Fields")
+            
+            self._write_header_row(summary, ['File', 'Document Type', 'Status', 'Quality Score',
+                                             'Fields', 'Processing Time (s)', 'Error'])
+            self._write_header_row(fields_ws, ['File', 'Field', 'Value', 'Confidence'])
+            
+            field_row = 2
+            for row, document in enumerate(documents, 2):
+                results = document.get('results') or {}
+                metadata = results.get('metadata') or {}
+                name = os.path.basename(document.get('file_path') or results.get('file_path') or '')
+                fields = self._flatten_fields(results.get('extracted_data') or {})
+                
+                values = [name, metadata.get('document_type', ''), document.get('status', ''),
+                          self._quality_value(metadata.get('quality_score')), len(fields),
+                          round(results.get('processing_time') or 0, 2),
+                          document.get('error') or results.get('error') or '']
+                for col, value in enumerate(values, 1):
+                    cell = summary.cell(row=row, column=col, value=value)
+                    cell.border = self.thin_border
+                    cell.font = self.data_font
+                
+                for field_name, value, confidence in fields:
+                    for col, cell_value in enumerate((name, field_name, value, confidence), 1):
+                        cell = fields_ws.cell(row=field_row, column=col, value=cell_value)
+                        cell.border = self.thin_border
+                        cell.font = self.data_font
+                    field_row += 1
+            
+            for ws, widths in ((summary, (40, 20, 22, 14, 10, 20, 40)), (fields_ws, (40, 30, 40, 12))):
+                for col, width in enumerate(widths, 1):
+                    ws.column_dimensions[get_column_letter(col)].width = width
+                ws.freeze_panes = 'A2'
+            
+            workbook.save(filepath)
+            logger.info("Batch Excel export completed", filepath=filepath)
+            
+            return filepath
+        
+        except Exception as e:
+            logger.error("Error exporting batch to Excel", error=str(e))
+            raise
+    
+    def _write_header_row(self, ws, headers: List[str]):
+        for col, header in enumerate(headers, 1):
+            cell = ws.cell(row=1, column=col, value=header)
+            cell.font = self.header_font
+            cell.fill = self.header_fill
+            cell.alignment = self.header_alignment
+            cell.border = self.thin_border
+    
+    @staticmethod
+    def _quality_value(quality) -> Any:
+        if isinstance(quality, (int, float)):
+            return quality
+        if isinstance(quality, dict):
+            return quality.get('overall_score', '')
+        return getattr(quality, 'overall_score', '')
+    
+    def _flatten_fields(self, extracted_data: Dict[str, Any]) -> List[tuple]:
+        """(field, value, confidence) rows from enhanced or raw pipeline output"""
+        data = extracted_data.get('enhanced_data') or extracted_data.get('raw_data') or extracted_data
+        rows = []
+        
+        def walk(prefix, value):
+            if isinstance(value, dict):
+                if 'value' in value or 'text' in value:
+                    rows.append((prefix, self._cell_value(value.get('value', value.get('text'))),
+                                 value.get('confidence', '')))
+                else:
+                    for key, child in value.items():
+                        walk(f"{prefix}.{key}" if prefix else str(key), child)
+            else:
+                rows.append((prefix, self._cell_value(value), ''))
+        
+        if isinstance(data, dict):
+            walk('', data)
+        return rows
+    
+    @staticmethod
+    def _cell_value(value) -> Any:
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        return str(value)
+    
     def create_summary_sheet(self, workbook: Workbook, data: Dict[str, Any], document_type: str):
         """Create executive summary sheet"""
         ws = workbook.create_sheet("Summary", 0)
@@ -0,0 +1,576 @@
+"""
+Job Runner
+Background execution of the document processing pipeline with persisted progress.
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
+
+import structlog
+
+from .event_bus import InMemoryEventBus, TERMINAL_EVENTS
+
+logger = structlog.get_logger()
+
+QUEUED = 'queued'
+PROCESSING = 'processing'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+# Progress metadata keys that carry partial results rather than a status message
+_PARTIAL_KEYS = ('streamed', 'region_result')
+
+
+def _json_safe(value: Any) -> Any:
+    """Round-trip through JSON so results fit a JSONB column (numpy scalars, datetimes...)"""
+    return json.loads(json.dumps(value, default=str))
+
+
+class MemoryJobStore:
+    """Job status kept in process memory
+
+    Used when no database is configured; status is only visible to the
+    process that runs the job, so pair it with the thread backend.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._batches: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, file_path: str, document_type: Optional[str] = None,
+               batch_id: Optional[str] = None) -> str:
+        processing_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            if batch_id is not None:
+                self._batches.setdefault(batch_id, []).append(processing_id)
+            self._jobs[processing_id] = {
+                'id': processing_id,
+                'document_id': None,
+                'batch_id': batch_id,
+                'file_path': file_path,
+                'document_type': document_type,
+                'session_status': QUEUED,
+                'progress': 0,
+                'current_stage': None,
+                'stage_message': 'Waiting for a worker',
+                'results': None,
+                'error_message': None,
+                'started_at': None,
+                'completed_at': None,
+                'created_at': now,
+                'updated_at': now
+            }
+        return processing_id
+
+    def update(self, processing_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(processing_id)
+            if job is None:
+                return
+            for key, value in fields.items():
+                job[key] = value.isoformat() if isinstance(value, datetime) else value
+            job['updated_at'] = datetime.now(timezone.utc).isoformat()
+
+    def finish(self, processing_id: str, results: Dict[str, Any],
+               regions: Optional[List[Dict]] = None, **fields) -> None:
+        self.update(processing_id, results=results, **fields)
+
+    def get(self, processing_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(processing_id)
+            return dict(job) if job is not None else None
+
+    def list_batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(self._jobs[pid]) for pid in self._batches.get(batch_id, [])]
+
+
+class ProcessingSessionStore:
+    """Job status persisted in the ``processing_sessions`` table
+
+    Every job gets a ``documents`` row for its file and a processing session
+    that holds progress, the final results and any error, so any worker or
+    web process can report status. A finished run's regions and extraction
+    results are written with the session in one transaction.
+    """
+
+    def __init__(self, app, persistence=None):
+        self.app = app
+        if persistence is None:
+            from .persistence_service import ResultPersistenceService
+            persistence = ResultPersistenceService(app.config.get('PERSISTENCE_BATCH_SIZE', 500))
+        self.persistence = persistence
+
+    def create(self, file_path: str, document_type: Optional[str] = None,
+               batch_id: Optional[str] = None) -> str:
+        from app.models.database import db, Document, ProcessingSession
+
+        with self.app.app_context():
+            try:
+                document = Document(
+                    filename=os.path.basename(file_path),
+                    original_name=os.path.basename(file_path),
+                    file_path=file_path,
+                    file_size=os.path.getsize(file_path),
+                    document_type=document_type,
+                    processing_status='processing'
+                )
+                session = ProcessingSession(
+                    document=document,
+                    batch_id=batch_id,
+                    session_status=QUEUED,
+                    progress=0,
+                    stage_message='Waiting for a worker'
+                )
+                db.session.add_all([document, session])
+                db.session.commit()
+                return str(session.id)
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def update(self, processing_id: str, **fields) -> None:
+        from app.models.database import db, ProcessingSession
+
+        with self.app.app_context():
+            try:
+                session = db.session.get(ProcessingSession, uuid.UUID(processing_id))
+                if session is None:
+                    return
+                for key, value in fields.items():
+                    setattr(session, key, value)
+                if fields.get('session_status') in (COMPLETED, FAILED):
+                    session.document.processing_status = fields['session_status']
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def finish(self, processing_id: str, results: Dict[str, Any],
+               regions: Optional[List[Dict]] = None, **fields) -> None:
+        """Record the outcome along with the run's regions and extraction results"""
+        from app.models.database import db
+
+        with self.app.app_context():
+            try:
+                self.persistence.save_run(db.session, processing_id, results, regions, **fields)
+                return
+            except Exception as e:
+                logger.warning("Bulk persistence failed, storing session results only",
+                              processing_id=processing_id, error=str(e))
+        self.update(processing_id, results=results, **fields)
+
+    def get(self, processing_id: str) -> Optional[Dict[str, Any]]:
+        from app.models.database import db, ProcessingSession
+
+        try:
+            session_id = uuid.UUID(processing_id)
+        except ValueError:
+            return None
+        with self.app.app_context():
+            session = db.session.get(ProcessingSession, session_id)
+            return session.to_dict() if session is not None else None
+
+    def list_batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        from app.models.database import db, ProcessingSession
+
+        with self.app.app_context():
+            sessions = db.session.execute(
+                db.select(ProcessingSession)
+                .filter_by(batch_id=batch_id)
+                .order_by(ProcessingSession.created_at, ProcessingSession.id)
+            ).scalars()
+            jobs = []
+            for session in sessions:
+                job = session.to_dict()
+                job['file_path'] = session.document.file_path if session.document else None
+                jobs.append(job)
+            return jobs
+
+
+class JobRunner:
+    """Runs ProcessingPipeline.process_document outside the request
+
+    ``submit`` records a queued job and returns its processing ID at once.
+    The job runs on an in-process thread pool or, with the ``celery``
+    backend, on a Celery worker. Pipeline progress is written to the store as
+    it happens, throttled to one write per ``progress_interval`` seconds
+    unless the stage changes. Every progress update is also published,
+    unthrottled, to the event bus for ``/api/process-stream``.
+    """
+
+    def __init__(self, app, store=None, backend: str = 'thread', max_workers: int = 4,
+                 progress_interval: float = 0.5, event_bus=None, batch_concurrency: int = 2,
+                 analytics=None):
+        """
+        Initialize job runner
+
+        Args:
+            app: Flask app (jobs run inside its app context)
+            store: MemoryJobStore or ProcessingSessionStore
+            backend: 'thread' (in-process pool) or 'celery' (requires app.celery)
+            max_workers: Concurrent jobs for the thread backend
+            progress_interval: Minimum seconds between progress writes within a stage
+            event_bus: InMemoryEventBus or RedisEventBus for live progress events
+            batch_concurrency: Documents of one batch processed at the same time
+            analytics: AnalyticsWriter for per-stage timing events (optional)
+        """
+        self.app = app
+        self.store = store or MemoryJobStore()
+        self.event_bus = event_bus or InMemoryEventBus()
+        self.progress_interval = progress_interval
+        self.analytics = analytics
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='processing-job')
+        self.celery_task = None
+        self.batch_concurrency = max(1, batch_concurrency)
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'batches': 0}
+        self._stats_lock = threading.Lock()
+        self._pending_batches: Dict[str, deque] = {}
+        self._batch_lock = threading.Lock()
+
+        celery = getattr(app, 'celery', None)
+        if backend == 'celery':
+            if celery is None:
+                logger.warning("Celery backend requested but Celery is not configured, using thread pool")
+            else:
+                self.celery_task = celery.task(name='rexeli.process_document')(self.run)
+        self.backend = 'celery' if self.celery_task is not None else 'thread'
+
+    def submit(self, file_path: str, regions: Optional[List[Dict]] = None,
+               document_type: Optional[str] = None, use_cache: bool = True) -> str:
+        """Queue a document for processing and return its processing ID"""
+        processing_id = self.store.create(file_path, document_type)
+        with self._stats_lock:
+            self.stats['submitted'] += 1
+
+        self._dispatch(processing_id, file_path, regions, document_type, use_cache)
+        return processing_id
+
+    def _dispatch(self, processing_id: str, file_path: str, regions: Optional[List[Dict]],
+                  document_type: Optional[str], use_cache: bool):
+        """Hand one job to Celery or the thread pool; returns the Future for thread jobs"""
+        if self.celery_task is not None:
+            try:
+                self.celery_task.delay(processing_id, file_path, regions, document_type, use_cache)
+                logger.info("Processing job queued", processing_id=processing_id, backend='celery')
+                return None
+            except Exception as e:
+                logger.warning("Celery submission failed, running in process",
+                              processing_id=processing_id, error=str(e))
+
+        future = self.executor.submit(self.run, processing_id, file_path, regions, document_type, use_cache)
+        logger.info("Processing job queued", processing_id=processing_id, backend='thread')
+        return future
+
+    def submit_batch(self, documents: List[Dict[str, Any]], use_cache: bool = True) -> str:
+        """Queue many documents as one batch and return its batch ID
+
+        Each document is a dict with ``filepath`` and optional ``regions`` and
+        ``document_type``. Every document gets its own processing session up
+        front. With the thread backend at most ``batch_concurrency`` of them
+        run at once, so a month-end batch does not take every worker from
+        interactive requests; Celery jobs are bounded by worker concurrency.
+        """
+        batch_id = str(uuid.uuid4())
+        jobs = deque(
+            (self.store.create(doc['filepath'], doc.get('document_type'), batch_id=batch_id),
+             doc['filepath'], doc.get('regions'), doc.get('document_type'), use_cache)
+            for doc in documents
+        )
+        with self._stats_lock:
+            self.stats['submitted'] += len(jobs)
+            self.stats['batches'] += 1
+        logger.info("Processing batch queued", batch_id=batch_id, documents=len(jobs))
+
+        if self.celery_task is not None:
+            while jobs:
+                self._dispatch(*jobs.popleft())
+            return batch_id
+
+        with self._batch_lock:
+            self._pending_batches[batch_id] = jobs
+        for _ in range(min(self.batch_concurrency, len(jobs))):
+            self._start_next(batch_id)
+        return batch_id
+
+    def _start_next(self, batch_id: str) -> None:
+        """Start the batch's next queued document, if any"""
+        with self._batch_lock:
+            jobs = self._pending_batches.get(batch_id)
+            if not jobs:
+                self._pending_batches.pop(batch_id, None)
+                return
+            job = jobs.popleft()
+
+        future = self._dispatch(*job)
+        if future is not None:
+            future.add_done_callback(lambda _: self._start_next(batch_id))
+        else:
+            self._start_next(batch_id)
+
+    def run(self, processing_id: str, file_path: str, regions: Optional[List[Dict]] = None,
+            document_type: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """Process one document, recording progress and the outcome
+
+        A job always ends with a terminal event: if the store fails, the
+        session is marked failed where possible and ``failed`` is published.
+        """
+        try:
+            return self._run(processing_id, file_path, regions, document_type, use_cache)
+        except Exception as e:
+            logger.error("Processing job could not be recorded", processing_id=processing_id, error=str(e))
+            error = f"Processing job failed: {e}"
+            self._mark_failed(processing_id, error)
+            self._publish(processing_id, 'failed', {
+                'processing_id': processing_id,
+                'status': FAILED,
+                'message': 'Processing failed',
+                'error': error
+            })
+            with self._stats_lock:
+                self.stats['failed'] += 1
+            return {'processing_id': processing_id, 'success': False}
+
+    def _mark_failed(self, processing_id: str, error: str, attempts: int = 3) -> None:
+        """Best-effort failed status after a store error, retried briefly"""
+        for attempt in range(attempts):
+            try:
+                self.store.update(processing_id, session_status=FAILED, stage_message='Processing failed',
+                                  error_message=error, completed_at=datetime.now(timezone.utc))
+                return
+            except Exception as e:
+                if attempt + 1 == attempts:
+                    logger.error("Failed status not stored", processing_id=processing_id, error=str(e))
+                    return
+                time.sleep(0.1 * (attempt + 1))
+
+    def _run(self, processing_id: str, file_path: str, regions: Optional[List[Dict]],
+             document_type: Optional[str], use_cache: bool) -> Dict[str, Any]:
+        self.store.update(processing_id, session_status=PROCESSING, current_stage='initialization',
+                          stage_message='Processing started', started_at=datetime.now(timezone.utc))
+        self._publish(processing_id, 'stage', {'stage': 'initialization', 'progress': 0.0,
+                                               'message': 'Processing started'})
+        last_write = {'stage': 'initialization', 'time': 0.0}
+        started = time.monotonic()
+        current_stage = {'stage': 'initialization', 'started': started}
+
+        def on_progress(stage: str, progress: float, metadata: Dict[str, Any]) -> None:
+            stage_changed = stage != last_write['stage']
+            partial = {key: metadata[key] for key in _PARTIAL_KEYS if key in metadata}
+            event = 'partial' if partial else ('stage' if stage_changed else 'progress')
+            self._publish(processing_id, event, {'stage': stage, 'progress': progress, **metadata})
+
+            if stage != current_stage['stage']:
+                now = time.monotonic()
+                self._record(processing_id, 'stage_completed', {'stage': current_stage['stage']},
+                             now - current_stage['started'])
+                current_stage.update(stage=stage, started=now)
+
+            now = time.monotonic()
+            if not stage_changed and now - last_write['time'] < self.progress_interval:
+                return
+            last_write.update(stage=stage, time=now)
+            try:
+                self.store.update(processing_id, progress=int(progress), current_stage=stage,
+                                  stage_message=metadata.get('message'))
+            except Exception as e:
+                # Progress was published; a missed status write must not fail the pipeline
+                logger.warning("Progress not stored", processing_id=processing_id, error=str(e))
+
+        try:
+            with self.app.app_context():
+                result = self.app.processing_pipeline.process_document(
+                    file_path, regions, document_type,
+                    processing_id=processing_id, progress_callback=on_progress,
+                    use_cache=use_cache
+                )
+        except Exception as e:
+            result = {'processing_id': processing_id, 'success': False, 'error': str(e)}
+
+        succeeded = bool(result.get('success'))
+        outcome = {
+            'session_status': COMPLETED,
+            'progress': 100,
+            'current_stage': 'finalization',
+            'stage_message': 'Processing completed'
+        } if succeeded else {
+            'session_status': FAILED,
+            'stage_message': 'Processing failed',
+            'error_message': result.get('error') or '; '.join(map(str, result.get('errors', [])))
+        }
+        now = time.monotonic()
+        self._record(processing_id, 'stage_completed', {'stage': current_stage['stage']},
+                     now - current_stage['started'])
+        self._record(processing_id, 'processing_completed' if succeeded else 'processing_failed',
+                     {'document_type': document_type, 'regions': len(regions or [])}, now - started)
+        safe_result = _json_safe(result)
+        self.store.finish(processing_id, safe_result, regions,
+                          completed_at=datetime.now(timezone.utc), **outcome)
+        # Results stay in the store (GET /process-status); bus history only keeps the outcome
+        self._publish(processing_id, 'complete' if succeeded else 'failed', {
+            'processing_id': processing_id,
+            'status': outcome['session_status'],
+            'message': outcome['stage_message'],
+            'error': outcome.get('error_message')
+        })
+        with self._stats_lock:
+            self.stats['completed' if succeeded else 'failed'] += 1
+
+        logger.info("Processing job finished", processing_id=processing_id, success=succeeded)
+        return {'processing_id': processing_id, 'success': succeeded}
+
+    def _publish(self, processing_id: str, event: str, data: Dict[str, Any]) -> None:
+        """Publish a progress event; a bus outage never fails the job"""
+        try:
+            self.event_bus.publish(processing_id, event, data)
+        except Exception as e:
+            logger.warning("Progress event not published", processing_id=processing_id,
+                           event_type=event, error=str(e))
+
+    def _record(self, processing_id: str, event_type: str, data: Dict[str, Any], seconds: float) -> None:
+        """Queue a timing event with the analytics writer (written directly when it is disabled); never fails the job"""
+        if self.analytics is None:
+            return
+        try:
+            # analytics.session_id references processing_sessions, which only the database store writes
+            session_id = processing_id if isinstance(self.store, ProcessingSessionStore) else None
+            event_data = dict(data, processing_id=processing_id)
+            processing_time_ms = int(seconds * 1000)
+            if getattr(self.analytics, 'enabled', True):
+                self.analytics.record(event_type, event_data, session_id=session_id,
+                                      processing_time_ms=processing_time_ms)
+                return
+            from app.models.database import log_analytics_event
+            with self.app.app_context():
+                log_analytics_event(event_type, event_data, session_id=session_id,
+                                    processing_time_ms=processing_time_ms, buffered=False)
+        except Exception as e:
+            logger.debug("Analytics event not recorded", processing_id=processing_id,
+                         event_type=event_type, error=str(e))
+
+    def events(self, processing_id: str, last_event_id: Optional[int] = None,
+               heartbeat: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """Progress events for a job until it finishes; None marks a heartbeat interval
+
+        Jobs that finished before the retained history (e.g. after a restart)
+        get a single terminal event built from the stored status.
+        """
+        with self.event_bus.subscribe(processing_id, last_event_id) as subscription:
+            if not subscription.finished:
+                status = self.get_status(processing_id)
+                if status is not None and status['status'] in (COMPLETED, FAILED):
+                    yield {
+                        'id': subscription.last_id + 1,
+                        'event': 'complete' if status['status'] == COMPLETED else 'failed',
+                        'data': {
+                            'processing_id': processing_id,
+                            'status': status['status'],
+                            'message': status['message'],
+                            'error': status['error']
+                        }
+                    }
+                    return
+
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                yield event
+                if event is not None and event['event'] in TERMINAL_EVENTS:
+                    return
+
+    def get_status(self, processing_id: str) -> Optional[Dict[str, Any]]:
+        """Current status, progress and (once finished) results, or None for unknown IDs"""
+        job = self.store.get(processing_id)
+        if job is None:
+            return None
+        return {
+            'processing_id': processing_id,
+            'status': job['session_status'],
+            'progress': float(job['progress'] or 0),
+            'stage': job['current_stage'],
+            'message': job['stage_message'],
+            'results': job['results'],
+            'error': job['error_message'],
+            'started_at': job['started_at'],
+            'completed_at': job['completed_at'],
+            'updated_at': job['updated_at']
+        }
+
+    def get_batch(self, batch_id: str, include_results: bool = False) -> Optional[Dict[str, Any]]:
+        """Aggregate progress and per-document status for a batch, or None for unknown IDs"""
+        jobs = self.store.list_batch(batch_id)
+        if not jobs:
+            return None
+
+        documents = []
+        counts = {QUEUED: 0, PROCESSING: 0, COMPLETED: 0, FAILED: 0}
+        for job in jobs:
+            status = job['session_status']
+            counts[status] = counts.get(status, 0) + 1
+            document = {
+                'processing_id': job['id'],
+                'file_path': job.get('file_path'),
+                'status': status,
+                'progress': float(job['progress'] or 0),
+                'stage': job['current_stage'],
+                'error': job['error_message']
+            }
+            if include_results:
+                document['results'] = job['results']
+            documents.append(document)
+
+        total = len(jobs)
+        finished = counts[COMPLETED] + counts[FAILED]
+        if finished < total:
+            status = PROCESSING if finished or counts[PROCESSING] else QUEUED
+        elif counts[FAILED] == 0:
+            status = COMPLETED
+        elif counts[COMPLETED] == 0:
+            status = FAILED
+        else:
+            status = 'completed_with_errors'
+
+        return {
+            'batch_id': batch_id,
+            'status': status,
+            'progress': round(sum(d['progress'] for d in documents) / total, 1),
+            'total': total,
+            'counts': counts,
+            'documents': documents
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['backend'] = self.backend
+        stats['store'] = type(self.store).__name__
+        stats['event_bus'] = self.event_bus.get_statistics()
+        return stats
+
+
+def create_job_runner(app) -> JobRunner:
+    """Build the app's job runner from JOB_BACKEND, JOB_STORE and JOB_WORKERS"""
+    config = app.config
+    store_name = config.get('JOB_STORE', 'database')
+    if store_name == 'database':
+        store = ProcessingSessionStore(app, persistence=getattr(app, 'persistence_service', None))
+    else:
+        store = MemoryJobStore()
+    return JobRunner(
+        app,
+        store=store,
+        backend=config.get('JOB_BACKEND', 'thread'),
+        max_workers=config.get('JOB_WORKERS', 4),
+        progress_interval=config.get('JOB_PROGRESS_MIN_INTERVAL', 0.5),
+        event_bus=getattr(app, 'event_bus', None),
+        batch_concurrency=config.get('BATCH_MAX_CONCURRENCY', 2),
+        analytics=getattr(app, 'analytics_writer', None)
+    )
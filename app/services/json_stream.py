@@ -0,0 +1,171 @@
+"""
+JSON Stream
+Incremental parser that reports JSON members as soon as they are complete.
+"""
+
+import json
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+_WHITESPACE = ' \t\r\n'
+
+
+class _Frame:
+    """An open object or array"""
+
+    __slots__ = ('kind', 'path', 'key', 'index', 'expect_key', 'value_start')
+
+    def __init__(self, kind: str, path: Tuple):
+        self.kind = kind
+        self.path = path
+        self.key = None
+        self.index = 0
+        self.expect_key = kind == 'object'
+        self.value_start = None
+
+    @property
+    def child(self):
+        return self.key if self.kind == 'object' else self.index
+
+
+class IncrementalJSONParser:
+    """Feed a JSON document in chunks and get callbacks for completed members
+
+    ``watch_paths`` lists container paths whose direct children are reported:
+    ``()`` is the top-level object, ``('extracted_fields',)`` the members of
+    that key, ``('units',)`` the rows of a ``units`` array. A ``'*'`` element
+    matches any key or index. The callback receives the child's full path and
+    its parsed value.
+    """
+
+    def __init__(self, watch_paths: Iterable[Tuple] = ((),),
+                 on_value: Optional[Callable[[Tuple, Any], None]] = None):
+        self.watch_paths = {tuple(path) for path in watch_paths}
+        self._wildcard_paths = [path for path in self.watch_paths if '*' in path]
+        self.on_value = on_value
+        self.emitted: List[Tuple[Tuple, Any]] = []
+
+        self._text = ''
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._started = False
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return self._text
+
+    def feed(self, chunk: str) -> None:
+        """Consume the next piece of the document"""
+        if not chunk:
+            return
+        self._text += chunk
+        text = self._text
+
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._in_string:
+                self._scan_string(char)
+            else:
+                self._scan(char)
+            self._pos += 1
+
+    def _scan_string(self, char: str) -> None:
+        if self._escape:
+            self._escape = False
+        elif char == '\\':
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            frame = self._stack[-1] if self._stack else None
+            if frame is not None and frame.kind == 'object' and frame.expect_key:
+                frame.key = json.loads(self._text[self._string_start:self._pos + 1])
+
+    def _scan(self, char: str) -> None:
+        frame = self._stack[-1] if self._stack else None
+
+        if char in _WHITESPACE:
+            return
+
+        if char == '"':
+            self._in_string = True
+            self._string_start = self._pos
+            if frame is not None and not frame.expect_key and frame.value_start is None:
+                frame.value_start = self._pos
+            return
+
+        if frame is None:
+            if char in '{[' and not self._started:
+                self._started = True
+                self._stack.append(_Frame('object' if char == '{' else 'array', ()))
+            return
+
+        if char in '{[':
+            if frame.value_start is None:
+                frame.value_start = self._pos
+            self._stack.append(_Frame('object' if char == '{' else 'array', frame.path + (frame.child,)))
+            return
+
+        if char in '}]':
+            self._complete_scalar(frame, self._pos)
+            self._stack.pop()
+            parent = self._stack[-1] if self._stack else None
+            if parent is not None:
+                self._complete_value(parent, self._pos + 1)
+            return
+
+        if char == ':' and frame.kind == 'object':
+            frame.expect_key = False
+            return
+
+        if char == ',':
+            self._complete_scalar(frame, self._pos)
+            if frame.kind == 'object':
+                frame.expect_key = True
+                frame.key = None
+            else:
+                frame.index += 1
+            return
+
+        # Start of a number, true, false or null
+        if frame.value_start is None and not frame.expect_key:
+            frame.value_start = self._pos
+
+    def _is_watched(self, path: Tuple) -> bool:
+        if path in self.watch_paths:
+            return True
+        return any(
+            len(pattern) == len(path) and all(p == '*' or p == k for p, k in zip(pattern, path))
+            for pattern in self._wildcard_paths
+        )
+
+    def _complete_scalar(self, frame: _Frame, end: int) -> None:
+        """Finish a number/literal/string value ending before ``end``"""
+        if frame.value_start is not None:
+            self._complete_value(frame, end)
+
+    def _complete_value(self, frame: _Frame, end: int) -> None:
+        start = frame.value_start
+        frame.value_start = None
+        if start is None or not self._is_watched(frame.path):
+            return
+
+        try:
+            value = json.loads(self._text[start:end])
+        except ValueError:
+            logger.debug("Skipping unparseable streamed value", path=frame.path)
+            return
+
+        path = frame.path + (frame.child,)
+        self.emitted.append((path, value))
+        if self.on_value is not None:
+            try:
+                self.on_value(path, value)
+            except Exception as e:
+                logger.warning("Streamed value callback failed", error=str(e))
@@ -0,0 +1,216 @@
+"""
+LLM Response Cache
+Persistent SQLite cache for OpenAI chat-completion responses keyed by normalized prompt.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+import structlog
+
+from app.utils.security import ensure_private_directory
+
+logger = structlog.get_logger()
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with TTL, size cap and hit/miss metrics
+
+    One short-lived connection is opened per operation, so the cache is safe to
+    share between threads and between worker processes using the same file.
+    """
+
+    def __init__(self, db_path: str = None, ttl_seconds: int = 7 * 24 * 3600,
+                 max_entries: int = 5000):
+        """
+        Initialize response cache
+
+        Args:
+            db_path: SQLite database file (defaults to the app's private STATE_FOLDER)
+            ttl_seconds: Time-to-live for cached responses
+            max_entries: Maximum number of cached responses before LRU eviction
+        """
+        if not db_path:
+            from config import Config
+            db_path = os.path.join(Config.STATE_FOLDER, 'llm_cache.sqlite3')
+        self.db_path = os.path.abspath(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'errors': 0,
+            'latency_saved_seconds': 0.0
+        }
+
+        self._initialize_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits (or rolls back) and is closed when the block exits"""
+        conn = sqlite3.connect(self.db_path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _initialize_db(self) -> None:
+        """Create cache table if needed"""
+        ensure_private_directory(os.path.dirname(self.db_path))
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    latency_seconds REAL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL,
+                    hit_count INTEGER DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_accessed ON llm_cache (last_accessed)")
+
+    @staticmethod
+    def _normalize_content(content: Any) -> Any:
+        """Collapse whitespace so formatting-only prompt differences share an entry"""
+        if isinstance(content, str):
+            return re.sub(r'\s+', ' ', content).strip()
+        return content
+
+    def make_key(self, model: str, messages: List[Dict[str, Any]], temperature: float,
+                 response_format: Optional[Dict[str, Any]] = None,
+                 max_tokens: Optional[int] = None) -> str:
+        """Build cache key from model, sampling parameters and canonicalized messages"""
+        canonical_messages = [
+            {'role': message.get('role'), 'content': self._normalize_content(message.get('content'))}
+            for message in messages
+        ]
+        messages_hash = hashlib.sha256(
+            json.dumps(canonical_messages, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        ).hexdigest()
+
+        key_material = json.dumps({
+            'model': model,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'response_format': response_format,
+            'messages': messages_hash
+        }, sort_keys=True, separators=(',', ':'))
+
+        return hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+
+    def _record(self, stat: str, amount: float = 1) -> None:
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return cached response or None when missing or expired"""
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response, latency_seconds, created_at FROM llm_cache WHERE key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None:
+                    self._record('misses')
+                    return None
+
+                response, latency_seconds, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._record('misses')
+                    self._record('evictions')
+                    return None
+
+                conn.execute(
+                    "UPDATE llm_cache SET last_accessed = ?, hit_count = hit_count + 1 WHERE key = ?",
+                    (now, key)
+                )
+
+            self._record('hits')
+            self._record('latency_saved_seconds', latency_seconds or 0.0)
+            return json.loads(response)
+
+        except Exception as e:
+            self._record('errors')
+            logger.warning("LLM cache read failed", error=str(e))
+            return None
+
+    def set(self, key: str, response: Dict[str, Any], model: str = None,
+            latency_seconds: float = 0.0) -> None:
+        """Store response and enforce the size cap"""
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache "
+                    "(key, model, response, latency_seconds, created_at, last_accessed, hit_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (key, model, json.dumps(response), latency_seconds, now, now)
+                )
+                self._record('stores')
+                self._evict(conn, now)
+
+        except Exception as e:
+            self._record('errors')
+            logger.warning("LLM cache write failed", error=str(e))
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used entries above the cap"""
+        expired = conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+
+        (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.max_entries
+        trimmed = 0
+        if overflow > 0:
+            trimmed = conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_accessed ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+
+        if expired or trimmed:
+            self._record('evictions', expired + trimmed)
+
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['latency_saved_seconds'] = round(stats['latency_saved_seconds'], 3)
+
+        try:
+            with self._connect() as conn:
+                (stats['entries'],) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        except Exception:
+            stats['entries'] = None
+
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
@@ -0,0 +1,478 @@
+"""
+LLM Dispatcher
+Asyncio-based OpenAI request dispatcher with token-bucket rate limiting.
+"""
+
+import json
+import time
+import queue
+import asyncio
+import threading
+import concurrent.futures
+from typing import Dict, Any, Iterator, List, Optional
+
+import structlog
+from openai import RateLimitError, APIError
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential, retry_if_exception_type
+
+logger = structlog.get_logger()
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate
+
+    Only used from the dispatcher event loop, so no thread locking is needed;
+    an asyncio lock keeps waiters FIFO so large requests are not starved.
+    """
+
+    def __init__(self, rate_per_minute: float, name: str = 'bucket'):
+        self.name = name
+        self.configured_rate = float(rate_per_minute)
+        self.rate_per_minute = float(rate_per_minute)
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        if now < self.paused_until:
+            return
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_minute / 60.0)
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until ``amount`` tokens are available and take them
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                else:
+                    delay = (amount - self.tokens) * 60.0 / self.rate_per_minute
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def refund(self, amount: float) -> None:
+        """Return over-estimated tokens to the bucket"""
+        if amount > 0:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds`` and empty the bucket"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def throttle(self, factor: float, floor: float = 0.1) -> None:
+        """Reduce the refill rate after an upstream rate limit"""
+        self.rate_per_minute = max(self.configured_rate * floor, self.rate_per_minute * factor)
+
+    def recover(self, factor: float) -> None:
+        """Move the refill rate back toward the configured rate after a success"""
+        self.rate_per_minute = min(self.configured_rate, self.rate_per_minute * factor)
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            'rate_per_minute': round(self.rate_per_minute, 2),
+            'configured_rate_per_minute': self.configured_rate,
+            'available': round(self.tokens, 2),
+            'paused': time.monotonic() < self.paused_until
+        }
+
+
+class AsyncLLMDispatcher:
+    """Dispatch chat-completion requests through a shared asyncio event loop
+
+    Requests-per-minute and tokens-per-minute are tracked in token buckets,
+    at most ``max_in_flight`` requests are outstanding at once, and 429s are
+    retried through tenacity while the buckets are paused and throttled. The
+    loop runs in a daemon thread so synchronous Flask code can use
+    :meth:`request` and :meth:`request_many`.
+    """
+
+    def __init__(self, client, requests_per_minute: int = 500, tokens_per_minute: int = 90000,
+                 max_in_flight: int = 8, max_attempts: int = 3,
+                 retry_wait_min: float = 4.0, retry_wait_max: float = 10.0,
+                 throttle_factor: float = 0.75, recovery_factor: float = 1.05):
+        """
+        Initialize dispatcher
+
+        Args:
+            client: openai.AsyncOpenAI client
+            requests_per_minute: Upstream request rate limit
+            tokens_per_minute: Upstream token rate limit
+            max_in_flight: Maximum concurrent requests
+            max_attempts: Attempts per request including the first
+            retry_wait_min: Minimum exponential backoff between attempts (seconds)
+            retry_wait_max: Maximum exponential backoff between attempts (seconds)
+            throttle_factor: Rate multiplier applied to both buckets on a 429
+            recovery_factor: Rate multiplier applied after each success
+        """
+        self.client = client
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_wait_min = retry_wait_min
+        self.retry_wait_max = retry_wait_max
+        self.throttle_factor = throttle_factor
+        self.recovery_factor = recovery_factor
+
+        self.request_bucket = TokenBucket(requests_per_minute, name='requests')
+        self.token_bucket = TokenBucket(tokens_per_minute, name='tokens')
+
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+        # Updated from caller threads and the loop thread
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rate_limited': 0,
+            'retries': 0,
+            'in_flight': 0,
+            'timed_out': 0,
+            'hedged': 0,
+            'hedge_wins': 0,
+            'streamed': 0,
+            'rate_limit_wait_seconds': 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Event loop management
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the dispatcher loop thread on first use (after any worker fork)"""
+        if self._loop is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._loop is None or not self._thread.is_alive():
+                    loop = asyncio.new_event_loop()
+                    # asyncio locks and semaphores stay bound to the loop they first waited on
+                    self._semaphore = None
+                    self.request_bucket._lock = None
+                    self.token_bucket._lock = None
+                    ready = threading.Event()
+
+                    def run():
+                        asyncio.set_event_loop(loop)
+                        loop.call_soon(ready.set)
+                        loop.run_forever()
+
+                    self._thread = threading.Thread(target=run, name='llm-dispatcher', daemon=True)
+                    self._thread.start()
+                    ready.wait()
+                    self._loop = loop
+        return self._loop
+
+    def shutdown(self) -> None:
+        """Stop the dispatcher loop"""
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # ------------------------------------------------------------------
+    # Synchronous facade
+    # ------------------------------------------------------------------
+
+    def request(self, params: Dict[str, Any], timeout: Optional[float] = None,
+                hedge_after: Optional[float] = None, timings: Optional[Dict[str, float]] = None):
+        """Send one chat-completion request and block until it finishes
+
+        Args:
+            params: Chat-completion parameters
+            timeout: Deadline in seconds; the request is cancelled when it passes
+            hedge_after: Fire a duplicate request if no answer arrives within this many seconds
+            timings: Receives ``call_seconds``, the duration of the API call that
+                answered, without rate-limit and in-flight queueing
+        """
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Synchronous dispatcher call from the dispatcher loop would deadlock")
+
+        coroutine = (self.arequest_hedged(params, hedge_after, timings) if hedge_after
+                     else self.arequest(params, timings))
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            # Cancelling stops pending retries and frees the in-flight slot
+            future.cancel()
+            self._count('timed_out')
+            raise
+
+    def stream(self, params: Dict[str, Any], timeout: Optional[float] = None,
+               timings: Optional[Dict[str, float]] = None) -> Iterator[Any]:
+        """Stream one chat completion, yielding chunks in the calling thread
+
+        The request goes through the same rate limits and in-flight cap as
+        :meth:`request`. ``timeout`` bounds the whole stream. ``timings``
+        receives ``call_seconds`` as in :meth:`request` before the last chunk
+        is delivered.
+        """
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Synchronous dispatcher call from the dispatcher loop would deadlock")
+
+        chunks: queue.Queue = queue.Queue()
+        finished = object()
+
+        async def produce():
+            try:
+                await self._stream_into(params, chunks, timings)
+                chunks.put(finished)
+            except BaseException as e:
+                chunks.put(e)
+                raise
+
+        future = asyncio.run_coroutine_threadsafe(produce(), loop)
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise concurrent.futures.TimeoutError()
+                try:
+                    item = chunks.get(timeout=remaining)
+                except queue.Empty:
+                    raise concurrent.futures.TimeoutError()
+                if item is finished:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        except concurrent.futures.TimeoutError:
+            self._count('timed_out')
+            raise
+        finally:
+            # Stops the upstream stream if the consumer gave up early
+            future.cancel()
+
+    def request_many(self, params_list: List[Dict[str, Any]],
+                     timeout: Optional[float] = None) -> List[Any]:
+        """Send many requests concurrently; failed items are returned as exceptions"""
+        loop = self._ensure_loop()
+
+        async def gather():
+            return await asyncio.gather(*(self.arequest(p) for p in params_list), return_exceptions=True)
+
+        future = asyncio.run_coroutine_threadsafe(gather(), loop)
+        return future.result(timeout=timeout)
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+
+    async def arequest(self, params: Dict[str, Any], timings: Optional[Dict[str, float]] = None):
+        """Send one chat-completion request with rate limiting and retries"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        self._count('submitted')
+        estimated_tokens = self.estimate_tokens(params)
+
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception_type((RateLimitError, APIError)),
+                wait=self._wait,
+                stop=stop_after_attempt(self.max_attempts),
+                before_sleep=self._before_retry,
+                reraise=True
+            ):
+                with attempt:
+                    response = await self._send(params, estimated_tokens, timings)
+            self._count('completed')
+            return response
+        except Exception:
+            self._count('failed')
+            raise
+
+    async def arequest_hedged(self, params: Dict[str, Any], hedge_after: float,
+                              timings: Optional[Dict[str, float]] = None):
+        """Send a request and race a duplicate against it if it is slower than ``hedge_after``"""
+        primary = asyncio.ensure_future(self.arequest(params, timings))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        self._count('hedged')
+        logger.info("Hedging slow OpenAI request", hedge_after=round(hedge_after, 3))
+        hedge = asyncio.ensure_future(self.arequest(params, timings))
+        pending = {primary, hedge}
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count('hedge_wins')
+                        return task.result()
+            # Both attempts failed; surface the primary's error
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _stream_into(self, params: Dict[str, Any], chunks: queue.Queue,
+                           timings: Optional[Dict[str, float]] = None) -> None:
+        """Open a streaming completion (retrying 429s before the first chunk) and queue its chunks"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        self._count('submitted')
+        self._count('streamed')
+        estimated_tokens = self.estimate_tokens(params)
+
+        waited = await self.request_bucket.acquire(1)
+        waited += await self.token_bucket.acquire(estimated_tokens)
+        self._count('rate_limit_wait_seconds', waited)
+
+        try:
+            async with self._semaphore:
+                self._count('in_flight')
+                try:
+                    async for attempt in AsyncRetrying(
+                        retry=retry_if_exception_type((RateLimitError, APIError)),
+                        wait=self._wait,
+                        stop=stop_after_attempt(self.max_attempts),
+                        before_sleep=self._before_retry,
+                        reraise=True
+                    ):
+                        with attempt:
+                            call_start = time.monotonic()
+                            try:
+                                stream = await self.client.chat.completions.create(**params, stream=True)
+                            except RateLimitError as e:
+                                self._on_rate_limited(e)
+                                raise
+
+                    usage = None
+                    async for chunk in stream:
+                        usage = getattr(chunk, 'usage', None) or usage
+                        chunks.put(chunk)
+                    if timings is not None:
+                        timings['call_seconds'] = time.monotonic() - call_start
+                finally:
+                    self._count('in_flight', -1)
+        except Exception:
+            self._count('failed')
+            raise
+
+        if usage is not None and getattr(usage, 'total_tokens', None):
+            self.token_bucket.refund(estimated_tokens - usage.total_tokens)
+        self._count('completed')
+
+    async def _send(self, params: Dict[str, Any], estimated_tokens: int,
+                    timings: Optional[Dict[str, float]] = None):
+        """Acquire rate budget and in-flight slot, then call the API once"""
+        waited = await self.request_bucket.acquire(1)
+        waited += await self.token_bucket.acquire(estimated_tokens)
+        self._count('rate_limit_wait_seconds', waited)
+
+        async with self._semaphore:
+            self._count('in_flight')
+            call_start = time.monotonic()
+            try:
+                response = await self.client.chat.completions.create(**params)
+            except RateLimitError as e:
+                self._on_rate_limited(e)
+                raise
+            finally:
+                self._count('in_flight', -1)
+        if timings is not None:
+            timings['call_seconds'] = time.monotonic() - call_start
+
+        # Reconcile the token estimate with actual usage
+        usage = getattr(response, 'usage', None)
+        if usage is not None and getattr(usage, 'total_tokens', None):
+            self.token_bucket.refund(estimated_tokens - usage.total_tokens)
+
+        self.request_bucket.recover(self.recovery_factor)
+        self.token_bucket.recover(self.recovery_factor)
+        return response
+
+    # ------------------------------------------------------------------
+    # Rate-limit adaptation
+    # ------------------------------------------------------------------
+
+    def _on_rate_limited(self, error: Exception) -> None:
+        """Pause and throttle both buckets after a 429"""
+        self._count('rate_limited')
+        retry_after = self._retry_after(error) or 1.0
+        for bucket in (self.request_bucket, self.token_bucket):
+            bucket.pause(retry_after)
+            bucket.throttle(self.throttle_factor)
+
+        logger.warning("OpenAI rate limit hit, throttling dispatcher",
+                      retry_after=retry_after,
+                      requests_per_minute=round(self.request_bucket.rate_per_minute, 1),
+                      tokens_per_minute=round(self.token_bucket.rate_per_minute, 1))
+
+    @staticmethod
+    def _retry_after(error: Optional[BaseException]) -> Optional[float]:
+        """Read the Retry-After hint from an OpenAI error response"""
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None)
+        if not headers:
+            return None
+        for header in ('retry-after-ms', 'retry-after'):
+            value = headers.get(header)
+            if value is None:
+                continue
+            try:
+                seconds = float(value)
+            except (TypeError, ValueError):
+                continue
+            return seconds / 1000.0 if header == 'retry-after-ms' else seconds
+        return None
+
+    def _wait(self, retry_state) -> float:
+        """Exponential backoff, extended to honour Retry-After"""
+        base = wait_exponential(multiplier=1, min=self.retry_wait_min, max=self.retry_wait_max)(retry_state)
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        return max(base, self._retry_after(error) or 0.0)
+
+    def _before_retry(self, retry_state) -> None:
+        self._count('retries')
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        logger.info("Retrying OpenAI request",
+                   attempt=retry_state.attempt_number,
+                   error_type=type(error).__name__ if error else None)
+
+    @staticmethod
+    def estimate_tokens(params: Dict[str, Any]) -> int:
+        """Rough token estimate (about 4 characters per token) plus the completion budget"""
+        prompt_chars = len(json.dumps(params.get('messages', []), separators=(',', ':')))
+        return int(prompt_chars / 4) + int(params.get('max_tokens') or 0)
+
+    def _count(self, stat: str, amount: float = 1) -> None:
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get dispatcher statistics"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['rate_limit_wait_seconds'] = round(stats['rate_limit_wait_seconds'], 3)
+        stats['max_in_flight'] = self.max_in_flight
+        stats['request_bucket'] = self.request_bucket.get_state()
+        stats['token_bucket'] = self.token_bucket.get_state()
+        return stats
@@ -15,6 +15,8 @@ from pathlib import Path
 import hashlib
 import tempfile
 
+from .single_flight import create_single_flight
+
 logger = structlog.get_logger()
 
 class OCRService:
@@ -43,6 +45,9 @@ class OCRService:
             os.getcwd(),
         ]
         self.max_file_size = max_file_size
+        
+        # Concurrent OCR of the same image runs once
+        self.single_flight = create_single_flight('ocr')
         self.allowed_extensions = {'.jpg', '.jpeg', '.png', '.tiff', '.tif', '.bmp', '.pdf'}
         
         # OCR configurations optimized for different document types
@@ -256,6 +261,30 @@ class OCRService:
         Returns:
             Dictionary containing extracted text, confidence, and detailed results
         """
+        flight_key = self._ocr_flight_key(image, region) if self.single_flight else None
+        if flight_key:
+            return self.single_flight.do(
+                flight_key, lambda: self._extract_text_from_image(image, region)
+            )
+        return self._extract_text_from_image(image, region)
+    
+    def _ocr_flight_key(self, image: Union[np.ndarray, str], region: Dict[str, int] = None) -> Optional[str]:
+        """Content key for coalescing identical OCR work, or None when the input cannot be keyed"""
+        try:
+            if isinstance(image, str):
+                stat = os.stat(image)
+                material = (os.path.abspath(image), stat.st_size, stat.st_mtime_ns)
+            elif isinstance(image, np.ndarray):
+                material = (image.shape, str(image.dtype), np.ascontiguousarray(image).data)
+            else:
+                return None
+            region_key = tuple(sorted((k, str(v)) for k, v in region.items())) if region else None
+            return self.single_flight.make_key(*material, region_key, self.confidence_threshold)
+        except Exception:
+            return None
+    
+    def _extract_text_from_image(self, image: Union[np.ndarray, str], region: Dict[str, int] = None) -> Dict[str, Any]:
+        """Run preprocessing, OCR and validation for extract_text_from_image"""
         import time
         start_time = time.time()
         
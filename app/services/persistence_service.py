@@ -0,0 +1,229 @@
+"""
+Result Persistence Service
+Writes a pipeline run's session, regions and extraction results to the
+database in one transaction with batched upserts.
+"""
+
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import delete, func, select, tuple_
+
+from app.models.database import UPSERT_INSERTS, ProcessingSession, DocumentRegion, ExtractionResult
+
+logger = structlog.get_logger()
+
+REGION_KEY = ('processing_session_id', 'region_name', 'page_number')
+RESULT_KEY = ('region_id', 'processing_method')
+
+# Small OCR bookkeeping kept with each OCR extraction result
+OCR_METADATA_KEYS = ('word_ref', 'word_count', 'preprocessing_used', 'processing_notes')
+
+
+def _score(value: Any) -> Optional[float]:
+    """Confidence as it fits NUMERIC(5,2), or None"""
+    try:
+        return round(float(value), 2)
+    except (TypeError, ValueError):
+        return None
+
+
+def _enhanced_values(extracted_data: Any) -> Dict[str, Any]:
+    """AI field values from either pipeline layout of ``extracted_data``"""
+    if not isinstance(extracted_data, dict):
+        return {}
+    data = extracted_data.get('enhanced_data')
+    if isinstance(data, dict) and isinstance(data.get('enhanced_data'), dict):
+        data = data['enhanced_data']
+    return data if isinstance(data, dict) else {}
+
+
+class ResultPersistenceService:
+    """Persist pipeline runs with a fixed number of round trips
+
+    A run is written as: the session row update, one multi-row upsert per
+    ``batch_size`` regions, one delete of regions dropped since the last
+    run, one select of region IDs, one multi-row upsert per ``batch_size``
+    extraction results, one delete of stale results and a single commit.
+    Reprocessing a session updates its rows in place through the
+    (session, region, page) and (region, method) unique keys. Databases
+    without ON CONFLICT support get the session's regions deleted and
+    re-inserted with multi-row inserts instead.
+    """
+
+    def __init__(self, batch_size: int = 500):
+        self.batch_size = max(1, batch_size)
+
+    def save_run(self, session, processing_id: str, results: Dict[str, Any],
+                 regions: Optional[List[Dict[str, Any]]] = None, **session_fields) -> Dict[str, int]:
+        """
+        Write a run's results, session fields, regions and extraction results in one transaction
+
+        Args:
+            session: SQLAlchemy session (``db.session`` inside an app context)
+            processing_id: Processing session ID
+            results: JSON-safe pipeline results, also stored on the session
+            regions: Regions the run was given, if any
+            **session_fields: Other ProcessingSession columns to set (status, timestamps...)
+
+        Returns:
+            Number of region and extraction result rows written
+        """
+        dialect = session.get_bind().dialect.name
+        insert = UPSERT_INSERTS.get(dialect)
+
+        session_id = uuid.UUID(str(processing_id))
+        region_rows, result_rows = self.build_rows(session_id, results, regions)
+
+        try:
+            processing_session = session.get(ProcessingSession, session_id)
+            if processing_session is None:
+                raise LookupError(f"Unknown processing session {processing_id}")
+            processing_session.results = results
+            for key, value in session_fields.items():
+                setattr(processing_session, key, value)
+            status = session_fields.get('session_status')
+            if status and processing_session.document is not None:
+                processing_session.document.processing_status = status
+
+            if insert is None:
+                logger.debug("Bulk upserts not supported, replacing regions", dialect=dialect)
+                extraction_rows = self._replace(session, session_id, region_rows, result_rows)
+            else:
+                extraction_rows = self._upsert_run(session, insert, session_id, region_rows, result_rows)
+
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        logger.info("Processing run persisted", processing_id=str(session_id),
+                    regions=len(region_rows), extraction_results=len(extraction_rows))
+        return {'regions': len(region_rows), 'extraction_results': len(extraction_rows)}
+
+    def _upsert_run(self, session, insert, session_id: uuid.UUID, region_rows: List[Dict[str, Any]],
+                    result_rows: List[Tuple[Tuple[str, int], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Upsert the run's rows in place and delete the ones it no longer has"""
+        self._upsert(session, insert, DocumentRegion.__table__, region_rows, REGION_KEY)
+        session.execute(
+            delete(DocumentRegion)
+            .where(DocumentRegion.processing_session_id == session_id)
+            .where(tuple_(DocumentRegion.region_name, DocumentRegion.page_number)
+                   .not_in([(row['region_name'], row['page_number']) for row in region_rows]))
+        )
+
+        region_ids = {
+            (name, page): region_id
+            for region_id, name, page in session.execute(
+                select(DocumentRegion.id, DocumentRegion.region_name, DocumentRegion.page_number)
+                .where(DocumentRegion.processing_session_id == session_id)
+            )
+        }
+        extraction_rows = [dict(row, region_id=region_ids[key]) for key, row in result_rows]
+        self._upsert(session, insert, ExtractionResult.__table__, extraction_rows, RESULT_KEY)
+        if region_ids:
+            session.execute(
+                delete(ExtractionResult)
+                .where(ExtractionResult.region_id.in_(list(region_ids.values())))
+                .where(tuple_(ExtractionResult.region_id, ExtractionResult.processing_method)
+                       .not_in([(row['region_id'], row['processing_method']) for row in extraction_rows]))
+            )
+        return extraction_rows
+
+    def _replace(self, session, session_id: uuid.UUID, region_rows: List[Dict[str, Any]],
+                 result_rows: List[Tuple[Tuple[str, int], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Delete the session's regions and results and bulk insert the run's rows"""
+        region_query = select(DocumentRegion.id).where(DocumentRegion.processing_session_id == session_id)
+        session.execute(delete(ExtractionResult).where(ExtractionResult.region_id.in_(region_query)))
+        session.execute(delete(DocumentRegion).where(DocumentRegion.processing_session_id == session_id))
+
+        region_ids = {}
+        for row in region_rows:
+            row['id'] = region_ids[(row['region_name'], row['page_number'])] = uuid.uuid4()
+        extraction_rows = [dict(row, region_id=region_ids[key]) for key, row in result_rows]
+        # Rows are keyed by column name (e.g. 'metadata'), so insert through the tables like _upsert
+        for table, rows in ((DocumentRegion.__table__, region_rows), (ExtractionResult.__table__, extraction_rows)):
+            for start in range(0, len(rows), self.batch_size):
+                session.execute(table.insert(), rows[start:start + self.batch_size])
+        return extraction_rows
+
+    def _upsert(self, session, insert, table, rows: List[Dict[str, Any]], key: Tuple[str, ...]) -> None:
+        """Multi-row INSERT ... ON CONFLICT DO UPDATE, ``batch_size`` rows per statement"""
+        if not rows:
+            return
+        statement = insert(table)
+        updates = {column: statement.excluded[column] for column in rows[0] if column not in key}
+        updates['updated_at'] = func.now()
+        statement = statement.on_conflict_do_update(index_elements=list(key), set_=updates)
+        for start in range(0, len(rows), self.batch_size):
+            session.execute(statement, rows[start:start + self.batch_size])
+
+    @staticmethod
+    def build_rows(session_id: uuid.UUID, results: Dict[str, Any],
+                   regions: Optional[List[Dict[str, Any]]] = None):
+        """
+        Region and extraction result rows for a run
+
+        Regions come from the per-region OCR results (``stages.ocr_processing``
+        for region runs, ``extracted_data.raw_data.regions`` for full-page
+        runs). Each region gets an ``ocr`` result and, when the AI returned a
+        field of the same name, an ``ai`` result.
+
+        Returns:
+            (region rows, [((region name, page), extraction row), ...])
+        """
+        results = results if isinstance(results, dict) else {}
+        extracted_data = results.get('extracted_data') or {}
+        ocr_results = ((results.get('stages') or {}).get('ocr_processing') or {}).get('results')
+        if not ocr_results and isinstance(extracted_data.get('raw_data'), dict):
+            ocr_results = extracted_data['raw_data'].get('regions')
+        if not isinstance(ocr_results, dict):
+            return [], []
+
+        given = {region.get('name', f'region_{i}'): region for i, region in enumerate(regions or [])}
+        enhanced = _enhanced_values(extracted_data)
+        region_rows, result_rows = [], []
+        seen = set()
+
+        for name, ocr_result in ocr_results.items():
+            if not isinstance(ocr_result, dict):
+                continue
+            region = given.get(name) or ocr_result.get('region') or {}
+            page = int(region.get('page_number', region.get('page', 1)) or 1)
+            if (name, page) in seen:
+                continue
+            seen.add((name, page))
+
+            row = DocumentRegion.mapping_from_region_dict(region, session_id, page)
+            row.update(region_name=name, confidence_score=_score(row['confidence_score']),
+                       is_suggested=bool(row['is_suggested']))
+            region_rows.append(row)
+
+            result_rows.append(((name, page), {
+                'extracted_text': ocr_result.get('text'),
+                'confidence_score': _score(ocr_result.get('confidence')),
+                'processing_method': 'ocr',
+                'validation_status': 'pending',
+                'metadata': {key: ocr_result[key] for key in OCR_METADATA_KEYS if key in ocr_result}
+            }))
+
+            if name in enhanced:
+                value = enhanced[name]
+                confidence = value.get('confidence') if isinstance(value, dict) else None
+                if isinstance(value, dict):
+                    value = value.get('value', value.get('text'))
+                result_rows.append(((name, page), {
+                    'extracted_text': None if value is None else str(value),
+                    'confidence_score': _score(confidence),
+                    'processing_method': 'ai',
+                    'validation_status': 'pending',
+                    'metadata': {}
+                }))
+
+        return region_rows, result_rows
+
+
+def create_persistence_service(app) -> ResultPersistenceService:
+    """Build the app's persistence service from PERSISTENCE_BATCH_SIZE"""
+    return ResultPersistenceService(batch_size=app.config.get('PERSISTENCE_BATCH_SIZE', 500))
@@ -4,13 +4,40 @@ Orchestrates document processing workflow.
 """
 
 import os
+import json
 import time
+import hashlib
+import contextvars
+from contextlib import nullcontext
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Callable
 import structlog
 
+from .confidence_gate import ConfidenceGate
+from .document_result import WordTable, compact_ocr_result, share_raw_data
+from .result_cache import DocumentResultCache, file_sha256
+
 logger = structlog.get_logger()
 
+# Bump when a pipeline change alters results, so cached document results are not reused
+PIPELINE_VERSION = '2.1.0'
+
+# Settings that change what the pipeline extracts; part of the result cache key
+RESULT_AFFECTING_SETTINGS = (
+    'OPENAI_MODEL',
+    'OPENAI_TEMPERATURE',
+    'OCR_DPI',
+    'OCR_CONFIDENCE_THRESHOLD',
+    'TESSERACT_CONFIG',
+    'AI_FUSED_ANALYSIS',
+    'AI_CONFIDENCE_GATE',
+    'AI_GATE_CONFIDENCE_THRESHOLD'
+)
+
+# Progress callback of the document being processed in this thread, so
+# concurrent jobs sharing one pipeline report to their own listeners
+_progress_callback: contextvars.ContextVar = contextvars.ContextVar('pipeline_progress_callback', default=None)
+
 class ProcessingPipeline:
     """End-to-end document processing pipeline with comprehensive workflow management"""
     
@@ -24,6 +51,24 @@ class ProcessingPipeline:
         self.smart_region_manager = getattr(app, 'smart_region_manager', None)
         self.quality_scorer = getattr(app, 'quality_scorer', None)
         
+        config = getattr(app, 'config', None) or {}
+        self.confidence_gate = ConfidenceGate(
+            confidence_threshold=config.get('AI_GATE_CONFIDENCE_THRESHOLD', 90.0)
+        )
+        
+        # Whole-document results keyed by file content, reused for repeat uploads
+        self.result_cache = None
+        if config.get('RESULT_CACHE_ENABLED', False):
+            try:
+                self.result_cache = DocumentResultCache(
+                    db_path=config.get('RESULT_CACHE_PATH'),
+                    ttl_seconds=config.get('RESULT_CACHE_TTL_SECONDS', 30 * 24 * 3600),
+                    max_entries=config.get('RESULT_CACHE_MAX_ENTRIES', 2000)
+                )
+            except Exception as e:
+                logger.warning("Result cache unavailable", error=str(e))
+        self.config_version = self._compute_config_version(config)
+        
         # Processing stages for progress tracking
         self.processing_stages = [
             'initialization',
@@ -44,11 +89,16 @@ class ProcessingPipeline:
         """Set progress callback for UI updates"""
         self.progress_callback = callback
     
+    def _active_progress_callback(self) -> Optional[Callable[[str, float, Dict], None]]:
+        """Per-call callback passed to process_document, else the pipeline-wide one"""
+        return _progress_callback.get() or self.progress_callback
+    
     def _update_progress(self, stage: str, progress: float, metadata: Dict[str, Any] = None):
         """Update processing progress"""
-        if self.progress_callback:
+        callback = self._active_progress_callback()
+        if callback:
             try:
-                self.progress_callback(stage, progress, metadata or {})
+                callback(stage, progress, metadata or {})
             except Exception as e:
                 logger.warning("Progress callback failed", error=str(e))
         
@@ -57,20 +107,188 @@ class ProcessingPipeline:
                    progress=progress,
                    metadata=metadata)
     
+    def _fused_analysis_enabled(self) -> bool:
+        """Whether the AI stage should use the single-call fused analysis"""
+        config = getattr(self.app, 'config', None) or {}
+        return bool(config.get('AI_FUSED_ANALYSIS', True)) and hasattr(self.ai_service, 'analyze_document')
+    
+    def _latency_budget(self):
+        """Request-level deadline for AI calls; OCR time spent first reduces what AI gets"""
+        if hasattr(self.ai_service, 'latency_budget'):
+            return self.ai_service.latency_budget()
+        return nullcontext()
+    
+    def _ai_stream_callback(self, progress: float) -> Optional[Callable[[Dict[str, Any]], None]]:
+        """Progress callback for streamed AI fields, when streaming is enabled and someone listens"""
+        config = getattr(self.app, 'config', None) or {}
+        if not config.get('AI_STREAMING', False) or not self._active_progress_callback():
+            return None
+        
+        def on_update(event: Dict[str, Any]) -> None:
+            self._update_progress('ai_enhancement', progress, {
+                'message': f"Extracted {event['type']} {event['name']}",
+                'streamed': event
+            })
+        
+        return on_update
+    
+    def _confidence_gate_enabled(self) -> bool:
+        """Whether confident fields should bypass the AI stage"""
+        config = getattr(self.app, 'config', None) or {}
+        return bool(config.get('AI_CONFIDENCE_GATE', False)) and hasattr(self.ai_service, 'analyze_gated')
+    
+    @staticmethod
+    def _uncertain_regions(regions: Any, gate_result: Dict[str, Any]) -> Any:
+        """Regions without the ones the confidence gate passed through"""
+        if not isinstance(regions, dict):
+            return regions
+        confident = gate_result['confident']
+        return {name: region for name, region in regions.items() if name not in confident}
+    
+    @staticmethod
+    def _pass_through_confident(enhanced: Dict[str, Any], gate_result: Dict[str, Any],
+                                original_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the gate's confident fields to an enhancement made without them
+        
+        Values the model returned for the same names are kept.
+        """
+        values = {name: field['value'] for name, field in gate_result['confident'].items()}
+        values.update(enhanced.get('enhanced_data') or {})
+        return dict(enhanced, enhanced_data=values, original_data=original_data)
+    
+    @staticmethod
+    def _gate_metadata(gate_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarize a confidence gate decision for result metadata"""
+        return {
+            'total_fields': gate_result['total_fields'],
+            'fields_escalated': gate_result['escalated_count'],
+            'fields_passed_through': gate_result['passed_through_count'],
+            'escalated_fields': sorted(gate_result['uncertain']),
+            'threshold': gate_result['threshold']
+        }
+    
+    @staticmethod
+    def _compute_config_version(config) -> str:
+        """Short fingerprint of the pipeline version and the settings that shape its results"""
+        material = {'pipeline_version': PIPELINE_VERSION}
+        material.update({name: config.get(name) for name in RESULT_AFFECTING_SETTINGS})
+        encoded = json.dumps(material, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()[:16]
+    
+    def _result_cache_key(self, file_path: str, regions: Optional[List[Dict]],
+                          document_type: Optional[str], content_hash: Optional[str] = None):
+        """(cache key, content hash) for a document, or (None, None) when caching is off"""
+        if self.result_cache is None:
+            return None, None
+        try:
+            content_hash = content_hash or file_sha256(file_path)
+        except OSError:
+            return None, None
+        key = self.result_cache.make_key(content_hash, self.config_version, regions, document_type)
+        return key, content_hash
+    
+    def cached_result(self, file_path: str, regions: List[Dict] = None, document_type: str = None,
+                      content_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Results of an earlier run on identical content and settings, if cached"""
+        key, _ = self._result_cache_key(file_path, regions, document_type, content_hash)
+        return self.result_cache.get(key) if key else None
+    
     def process_document(self, file_path: str, regions: List[Dict] = None, 
-                        document_type: str = None) -> Dict[str, Any]:
+                        document_type: str = None, processing_id: Optional[str] = None,
+                        progress_callback: Optional[Callable[[str, float, Dict], None]] = None,
+                        use_cache: bool = True) -> Dict[str, Any]:
         """Process document through the complete pipeline
         
         Args:
             file_path: Path to PDF file
             regions: Optional predefined regions for extraction
             document_type: Optional document type override
+            processing_id: ID to report results under (e.g. the job's processing session)
+            progress_callback: Progress listener for this document only
+            use_cache: Reuse results of an identical earlier document (False forces reprocessing)
             
         Returns:
             Complete processing results with extracted data and metadata
         """
+        token = _progress_callback.set(progress_callback) if progress_callback else None
+        try:
+            cache_key, content_hash = self._result_cache_key(file_path, regions, document_type)
+            if cache_key and use_cache:
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    return self._reuse_result(cached, file_path, processing_id, content_hash)
+            
+            result = self._process_document(file_path, regions, document_type, processing_id)
+            
+            if cache_key and result.get('success'):
+                degraded = self._degraded_reason(result)
+                if degraded:
+                    # A later upload should get another chance at a full run
+                    logger.info("Degraded result not cached", processing_id=result.get('processing_id'),
+                               reason=degraded)
+                else:
+                    self.result_cache.set(cache_key, result, content_hash, self.config_version,
+                                          processing_seconds=result.get('processing_time', 0.0))
+            return result
+        finally:
+            if token is not None:
+                _progress_callback.reset(token)
+    
+    @staticmethod
+    def _degraded_reason(result: Dict[str, Any]) -> Optional[str]:
+        """Why a successful run is not worth reusing, or None for a complete AI analysis"""
+        if result.get('warnings'):
+            return 'warnings'
+        
+        ai_stage = (result.get('stages') or {}).get('ai_enhancement') or {}
+        if not ai_stage.get('success'):
+            return 'no_ai_analysis'
+        if (ai_stage.get('timings') or {}).get('mode') == 'basic':
+            return 'ai_unavailable'
+        
+        extracted = result.get('extracted_data') or {}
+        enhanced = extracted.get('enhanced_data') if 'validation_results' in extracted else extracted
+        validation = extracted.get('validation_results') or {}
+        structured = extracted.get('structured_data') or {}
+        if (enhanced or {}).get('enhancement_method') == 'basic':
+            return 'ai_fallback'
+        if validation.get('method') == 'basic_validation' and structured.get('method') != 'confidence_gated':
+            return 'ai_fallback'
+        if structured.get('method') == 'regex_extraction':
+            return 'ai_fallback'
+        fields = structured.get('extracted_fields') or {}
+        if any(isinstance(field, dict) and field.get('location') == 'basic' for field in fields.values()):
+            return 'ai_fallback'
+        return None
+    
+    def _reuse_result(self, cached: Dict[str, Any], file_path: str, processing_id: Optional[str],
+                      content_hash: str) -> Dict[str, Any]:
+        """Report cached results under this request's processing ID"""
+        result = dict(cached)
+        result['processing_id'] = processing_id or f"proc_{int(time.time())}"
+        result['file_path'] = file_path
+        result['result_cache'] = {
+            'hit': True,
+            'content_hash': content_hash,
+            'config_version': self.config_version,
+            'source_processing_id': cached.get('processing_id'),
+            'source_completed_at': cached.get('end_time')
+        }
+        
+        self._update_progress('finalization', 100.0, {
+            'message': 'Reused results from an identical document',
+            'success': True
+        })
+        logger.info("Document results reused", 
+                   processing_id=result['processing_id'],
+                   source_processing_id=cached.get('processing_id'),
+                   content_hash=content_hash)
+        return result
+    
+    def _process_document(self, file_path: str, regions: Optional[List[Dict]],
+                          document_type: Optional[str], processing_id: Optional[str]) -> Dict[str, Any]:
         start_time = time.time()
-        processing_id = f"proc_{int(time.time())}"
+        processing_id = processing_id or f"proc_{int(time.time())}"
         
         try:
             logger.info("Starting document processing", 
@@ -98,11 +316,12 @@ class ProcessingPipeline:
                 'warnings': []
             }
             
-            # Choose processing path based on regions
-            if regions:
-                processing_result = self.process_with_regions(file_path, regions, document_type)
-            else:
-                processing_result = self.process_full_document(file_path, document_type)
+            # Choose processing path based on regions; AI calls share the request latency budget
+            with self._latency_budget():
+                if regions:
+                    processing_result = self.process_with_regions(file_path, regions, document_type)
+                else:
+                    processing_result = self.process_full_document(file_path, document_type)
             
             # Merge results
             result.update(processing_result)
@@ -212,6 +431,7 @@ class ProcessingPipeline:
             
             ocr_results = {}
             ocr_success_count = 0
+            word_table = WordTable()
             
             for i, region in enumerate(regions):
                 try:
@@ -219,10 +439,19 @@ class ProcessingPipeline:
                         page_image, region
                     )
                     region_name = region.get('name', f'region_{i}')
-                    ocr_results[region_name] = region_result
+                    ocr_results[region_name] = compact_ocr_result(region_result, word_table, region_name)
                     
                     if region_result.get('success', False):
                         ocr_success_count += 1
+                    
+                    self._update_progress('ocr_processing', 50.0 + 20.0 * (i + 1) / len(regions), {
+                        'message': f'Extracted text from region {i + 1} of {len(regions)}',
+                        'region_result': {
+                            'region': region_name,
+                            'text': region_result.get('text', ''),
+                            'confidence': region_result.get('confidence')
+                        }
+                    })
                         
                 except Exception as e:
                     logger.warning(f"OCR failed for region {i}", error=str(e))
@@ -234,6 +463,7 @@ class ProcessingPipeline:
                 'successful_extractions': ocr_success_count,
                 'results': ocr_results
             }
+            result['ocr_words'] = word_table.to_dict()
             
             # Stage 6: AI Enhancement
             self._update_progress('ai_enhancement', 70.0, {
@@ -251,9 +481,34 @@ class ProcessingPipeline:
             
             if raw_extracted_data and self.ai_service:
                 try:
-                    enhanced_result = self.ai_service.enhance_extracted_data(
-                        raw_extracted_data, document_type
-                    )
+                    gate_result = None
+                    if self._confidence_gate_enabled():
+                        gate_result = self.confidence_gate.evaluate({'regions': raw_extracted_data})
+                    
+                    on_update = self._ai_stream_callback(70.0)
+                    if gate_result and gate_result['total_fields']:
+                        result['metadata']['confidence_gate'] = self._gate_metadata(gate_result)
+                        result['metadata']['fields_escalated'] = gate_result['escalated_count']
+                    else:
+                        gate_result = None
+                    
+                    if gate_result is not None and not gate_result['uncertain']:
+                        # Every region passed the confidence gate, so the model has nothing to add
+                        analysis = self.ai_service.analyze_gated(
+                            {'regions': raw_extracted_data}, gate_result, '', document_type, on_update
+                        )
+                        enhanced_result = analysis['enhanced_data']
+                    elif gate_result is not None and gate_result['confident']:
+                        # Only regions failing the confidence gate reach the model
+                        enhanced_result = self.ai_service.enhance_extracted_data(
+                            self._uncertain_regions(raw_extracted_data, gate_result), document_type, on_update
+                        )
+                        enhanced_result = self._pass_through_confident(enhanced_result, gate_result,
+                                                                       raw_extracted_data)
+                    else:
+                        enhanced_result = self.ai_service.enhance_extracted_data(
+                            raw_extracted_data, document_type, on_update
+                        )
                     result['stages']['ai_enhancement'] = {
                         'success': True,
                         'enhanced_fields': len(enhanced_result.get('enhanced_data', {})),
@@ -399,6 +654,14 @@ class ProcessingPipeline:
                 'regions_processed': len(suggested_regions) if suggested_regions else 0
             }
             
+            # Region words go into one table; every later stage refers to its rows
+            word_table = WordTable()
+            ocr_regions = {
+                key: compact_ocr_result(region_result, word_table, key)
+                for key, region_result in (full_page_ocr.get('regions') or {}).items()
+            }
+            result['ocr_words'] = word_table.to_dict()
+            
             # Stage 6: AI Enhancement
             self._update_progress('ai_enhancement', 75.0, {
                 'message': 'Enhancing and validating data with AI'
@@ -407,7 +670,7 @@ class ProcessingPipeline:
             # Prepare extracted data for enhancement
             raw_data = {
                 'full_text': full_page_ocr.get('text', ''),
-                'regions': full_page_ocr.get('regions', {}),
+                'regions': ocr_regions,
                 'pdf_text': text_data.get('text', '')
             }
             
@@ -416,33 +679,85 @@ class ProcessingPipeline:
             
             if self.ai_service:
                 try:
-                    # Enhance the data
-                    enhanced_result = self.ai_service.enhance_extracted_data(
-                        raw_data, document_type
-                    )
-                    enhanced_data = enhanced_result
+                    ai_start = time.time()
                     
-                    # Validate enhanced data
-                    validation_results = self.ai_service.validate_real_estate_data(
-                        enhanced_data.get('enhanced_data', {}), document_type
-                    )
+                    on_update = self._ai_stream_callback(75.0)
+                    gate_result = None
+                    if self._confidence_gate_enabled():
+                        gate_result = self.confidence_gate.evaluate(
+                            raw_data, ocr_confidence=full_page_ocr.get('confidence', 0.0)
+                        )
+                        result['metadata']['confidence_gate'] = self._gate_metadata(gate_result)
+                        result['metadata']['fields_escalated'] = gate_result['escalated_count']
+                        if not gate_result['total_fields']:
+                            # Nothing the gate can score, so the whole document goes to the model
+                            gate_result = None
                     
-                    # Extract structured data
-                    structured_data = self.ai_service.extract_structured_data(
-                        full_page_ocr.get('text', ''), document_type
-                    )
+                    # Regions the gate trusts stay out of the prompt and are passed through
+                    ai_input = raw_data
+                    if gate_result is not None and gate_result['confident']:
+                        ai_input = dict(raw_data, regions=self._uncertain_regions(raw_data['regions'], gate_result))
+                    
+                    if gate_result is not None and not gate_result['uncertain']:
+                        # Every field passed the confidence gate, so the model has nothing to add
+                        analysis = self.ai_service.analyze_gated(
+                            raw_data, gate_result, full_page_ocr.get('text', ''), document_type, on_update
+                        )
+                        enhanced_data = analysis['enhanced_data']
+                        validation_results = analysis['validation_results']
+                        structured_data = analysis['structured_data']
+                        ai_mode = analysis['mode']
+                        round_trips = analysis['round_trips']
+                    elif self._fused_analysis_enabled():
+                        # Enhance, validate and extract in one round trip
+                        analysis = self.ai_service.analyze_document(
+                            ai_input, full_page_ocr.get('text', ''), document_type, on_update
+                        )
+                        enhanced_data = analysis['enhanced_data']
+                        if ai_input is not raw_data:
+                            enhanced_data = self._pass_through_confident(enhanced_data, gate_result, raw_data)
+                        validation_results = analysis['validation_results']
+                        structured_data = analysis['structured_data']
+                        ai_mode = analysis['mode']
+                        round_trips = analysis['round_trips']
+                    else:
+                        # Enhance the data
+                        enhanced_result = self.ai_service.enhance_extracted_data(
+                            ai_input, document_type, on_update
+                        )
+                        enhanced_data = enhanced_result
+                        if ai_input is not raw_data:
+                            enhanced_data = self._pass_through_confident(enhanced_data, gate_result, raw_data)
+                        
+                        # Validate enhanced data
+                        validation_results = self.ai_service.validate_real_estate_data(
+                            enhanced_data.get('enhanced_data', {}), document_type
+                        )
+                        
+                        # Extract structured data
+                        structured_data = self.ai_service.extract_structured_data(
+                            full_page_ocr.get('text', ''), document_type, on_update
+                        )
+                        ai_mode = 'separate'
+                        round_trips = 3
                     
                     result['stages']['ai_enhancement'] = {
                         'success': True,
                         'enhanced': bool(enhanced_data),
                         'validated': bool(validation_results),
                         'structured': bool(structured_data),
-                        'validation_score': validation_results.get('confidence', 0.0)
+                        'validation_score': validation_results.get('confidence', 0.0),
+                        'timings': {
+                            'duration_seconds': round(time.time() - ai_start, 3),
+                            'mode': ai_mode,
+                            'round_trips': round_trips,
+                            'round_trips_saved': max(0, 3 - round_trips) if ai_mode in ('fused', 'gated') else 0
+                        }
                     }
                     
-                    # Store AI results
+                    # Store AI results; their echo of raw_data becomes a reference to it
                     result['extracted_data'] = {
-                        'enhanced_data': enhanced_data,
+                        'enhanced_data': share_raw_data(enhanced_data, raw_data),
                         'validation_results': validation_results,
                         'structured_data': structured_data,
                         'raw_data': raw_data
@@ -0,0 +1,219 @@
+"""
+Prompt Builder
+Compact, token-budgeted serialization of extracted data for LLM prompts.
+"""
+
+import json
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import structlog
+
+# Try to import tiktoken for exact token counts, fallback to a character heuristic
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+logger = structlog.get_logger()
+
+CHARS_PER_TOKEN = 4
+
+# OCR bookkeeping the LLM never needs: word boxes, tesseract levels, timings, duplicates
+DEFAULT_EXCLUDED_KEYS = frozenset({
+    'words', 'word_ref', 'bbox', 'level', 'raw_text', 'region', 'processing_time',
+    'preprocessing_used', 'processing_notes', 'validation', 'operation',
+    'error_code', 'error_message'
+})
+
+# Lower priority is truncated first; unknown keys get DEFAULT_PRIORITY
+DEFAULT_PRIORITIES = {
+    'pdf_text': 1,      # Embedded PDF text duplicates the OCR text on scanned pages
+    'regions': 2,
+    'full_text': 3,
+}
+DEFAULT_PRIORITY = 5
+
+TRUNCATION_MARKER = '...[truncated]'
+MIN_VALUE_CHARS = 32
+
+
+class PromptBuilder:
+    """Serialize prompt data compactly and fit it into a token budget
+
+    Data is stripped of fields listed in ``excluded_keys``, dumped without
+    whitespace and, when still over budget, truncated key by key starting with
+    the lowest priority. Every call returns a report with the token estimate
+    of the legacy ``json.dumps(data, indent=2)`` form so savings are visible.
+    """
+
+    def __init__(self, token_budget: int = 3000, model: str = None,
+                 excluded_keys=None, priorities: Dict[str, int] = None):
+        """
+        Initialize prompt builder
+
+        Args:
+            token_budget: Default maximum tokens for serialized data
+            model: Model name used to pick a tiktoken encoding when available
+            excluded_keys: Keys removed at any depth before serialization
+            priorities: Per-key truncation priority (lower is truncated first)
+        """
+        self.token_budget = token_budget
+        self.excluded_keys = frozenset(excluded_keys) if excluded_keys is not None else DEFAULT_EXCLUDED_KEYS
+        self.priorities = {**DEFAULT_PRIORITIES, **(priorities or {})}
+        self._encoding = self._load_encoding(model)
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'calls': 0,
+            'truncated_calls': 0,
+            'original_tokens': 0,
+            'prompt_tokens': 0
+        }
+
+    @staticmethod
+    def _load_encoding(model: Optional[str]):
+        if not HAS_TIKTOKEN:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model or 'gpt-3.5-turbo')
+        except Exception:
+            return None
+
+    def estimate_tokens(self, text: str) -> int:
+        """Estimate token count for a string"""
+        if self._encoding is not None:
+            try:
+                return len(self._encoding.encode(text))
+            except Exception:
+                pass
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+    @staticmethod
+    def _dumps(data: Any) -> str:
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+
+    def compact(self, data: Any) -> Any:
+        """Remove excluded keys and empty values at any depth"""
+        if isinstance(data, dict):
+            compacted = {}
+            for key, value in data.items():
+                if key in self.excluded_keys:
+                    continue
+                value = self.compact(value)
+                if value in (None, '', [], {}):
+                    continue
+                if isinstance(value, float):
+                    value = round(value, 2)
+                compacted[key] = value
+            return compacted
+        if isinstance(data, list):
+            return [self.compact(item) for item in data]
+        if isinstance(data, str):
+            return ' '.join(data.split())
+        return data
+
+    def _truncate_value(self, value: Any, char_budget: int) -> Any:
+        """Shrink a value so its serialized form is roughly ``char_budget`` characters"""
+        char_budget = max(MIN_VALUE_CHARS, int(char_budget))
+
+        if isinstance(value, str):
+            if len(value) <= char_budget:
+                return value
+            return value[:max(0, char_budget - len(TRUNCATION_MARKER))] + TRUNCATION_MARKER
+
+        if isinstance(value, dict):
+            if len(self._dumps(value)) <= char_budget:
+                return value
+            # Spread the budget over the entries; drop trailing entries that get nothing
+            per_item = char_budget // max(1, len(value))
+            if per_item < MIN_VALUE_CHARS:
+                keep = max(1, char_budget // MIN_VALUE_CHARS)
+                items = list(value.items())
+                truncated = {k: self._truncate_value(v, MIN_VALUE_CHARS) for k, v in items[:keep]}
+                truncated['_omitted'] = f"{len(items) - keep} more entries"
+                return truncated
+            return {k: self._truncate_value(v, per_item) for k, v in value.items()}
+
+        if isinstance(value, list):
+            if len(self._dumps(value)) <= char_budget:
+                return value
+            kept = []
+            used = 0
+            for item in value:
+                size = len(self._dumps(item)) + 1
+                if used + size > char_budget:
+                    break
+                kept.append(item)
+                used += size
+            if len(kept) < len(value):
+                kept.append(f"... {len(value) - len(kept)} more items")
+            return kept
+
+        return value
+
+    def build(self, data: Any, token_budget: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """Serialize ``data`` compactly within the token budget
+
+        Returns:
+            Tuple of (serialized_data, report)
+        """
+        budget = token_budget or self.token_budget
+        original_tokens = self.estimate_tokens(json.dumps(data, indent=2, default=str))
+
+        compacted = self.compact(data)
+        text = self._dumps(compacted)
+        tokens = self.estimate_tokens(text)
+        truncated = False
+
+        if tokens > budget:
+            truncated = True
+            if isinstance(compacted, dict):
+                for key in sorted(compacted, key=lambda k: self.priorities.get(k, DEFAULT_PRIORITY)):
+                    # Shrink this key until the payload fits or the key cannot shrink further;
+                    # the observed chars-per-token ratio keeps tiktoken and heuristic counts aligned
+                    while tokens > budget:
+                        chars_per_token = len(text) / max(1, tokens)
+                        overflow_chars = int((tokens - budget) * chars_per_token) + 1
+                        current_chars = len(self._dumps(compacted[key]))
+                        shrunk = self._truncate_value(compacted[key], current_chars - overflow_chars)
+                        if len(self._dumps(shrunk)) >= current_chars:
+                            break
+                        compacted[key] = shrunk
+                        text = self._dumps(compacted)
+                        tokens = self.estimate_tokens(text)
+                    if tokens <= budget:
+                        break
+            else:
+                compacted = self._truncate_value(compacted, budget * CHARS_PER_TOKEN)
+                text = self._dumps(compacted)
+                tokens = self.estimate_tokens(text)
+
+        report = {
+            'original_tokens': original_tokens,
+            'prompt_tokens': tokens,
+            'tokens_saved': max(0, original_tokens - tokens),
+            'token_budget': budget,
+            'truncated': truncated
+        }
+
+        with self._stats_lock:
+            self.stats['calls'] += 1
+            self.stats['truncated_calls'] += int(truncated)
+            self.stats['original_tokens'] += original_tokens
+            self.stats['prompt_tokens'] += tokens
+
+        logger.debug("Prompt data serialized", **report)
+        return text, report
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get cumulative prompt size statistics"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['tokens_saved'] = max(0, stats['original_tokens'] - stats['prompt_tokens'])
+        stats['savings_ratio'] = round(stats['tokens_saved'] / stats['original_tokens'], 4) \
+            if stats['original_tokens'] else 0.0
+        stats['token_budget'] = self.token_budget
+        stats['token_counter'] = 'tiktoken' if self._encoding is not None else 'heuristic'
+        return stats
@@ -0,0 +1,168 @@
+"""
+Service Registry
+Lazy construction of application services and their heavy imports.
+"""
+
+import sys
+import time
+import importlib
+import importlib.util
+import threading
+from typing import Dict, Any, Iterable, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class ServiceSpec:
+    """How to build one service: the module and class to import, and whether it takes the app"""
+
+    __slots__ = ('name', 'module', 'attr', 'needs_app')
+
+    def __init__(self, name: str, module: str, attr: str, needs_app: bool = False):
+        self.name = name
+        self.module = module
+        self.attr = attr
+        self.needs_app = needs_app
+
+
+class LazyService:
+    """Stand-in attached to the app until the service is first used
+
+    Attribute access builds the real service through the registry and
+    forwards to it, so ``current_app.ai_service.validate_real_estate_data``
+    works unchanged. Once built, the registry replaces the app attribute with
+    the real instance; proxies captured earlier keep forwarding.
+    """
+
+    __slots__ = ('_registry', '_name')
+
+    def __init__(self, registry: 'ServiceRegistry', name: str):
+        object.__setattr__(self, '_registry', registry)
+        object.__setattr__(self, '_name', name)
+
+    def _resolve(self):
+        return self._registry.get(self._name)
+
+    def __getattr__(self, item):
+        return getattr(self._resolve(), item)
+
+    def __setattr__(self, item, value):
+        setattr(self._resolve(), item, value)
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        state = 'loaded' if self._registry.is_loaded(self._name) else 'not loaded'
+        return f"<LazyService {self._name} ({state})>"
+
+
+class ServiceRegistry:
+    """Builds services on first use and records how long imports and construction took
+
+    Each service is created at most once, under a per-registry lock, so
+    concurrent first requests do not build duplicates.
+    """
+
+    def __init__(self, app=None, package: str = __package__):
+        self.app = app
+        self.package = package
+        self._specs: Dict[str, ServiceSpec] = {}
+        self._instances: Dict[str, Any] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, module: str, attr: str, needs_app: bool = False) -> None:
+        self._specs[name] = ServiceSpec(name, module, attr, needs_app)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def get(self, name: str) -> Any:
+        """Return the service, importing and constructing it on first use"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+
+            spec = self._specs.get(name)
+            if spec is None:
+                raise KeyError(f"Unknown service: {name}")
+
+            module_name = importlib.util.resolve_name(spec.module, self.package)
+            already_imported = module_name in sys.modules
+            start = time.perf_counter()
+            try:
+                module = importlib.import_module(module_name)
+                imported = time.perf_counter()
+                factory = getattr(module, spec.attr)
+                instance = factory(self.app) if spec.needs_app else factory()
+            except Exception as e:
+                self._errors[name] = str(e)
+                logger.error("Service initialization failed", service=name, error=str(e))
+                raise
+            built = time.perf_counter()
+
+            self._timings[name] = {
+                'import_seconds': 0.0 if already_imported else round(imported - start, 4),
+                'init_seconds': round(built - imported, 4)
+            }
+            self._instances[name] = instance
+            self._errors.pop(name, None)
+            if self.app is not None:
+                setattr(self.app, name, instance)
+
+        logger.info("Service initialized", service=name, **self._timings[name])
+        return instance
+
+    def proxy(self, name: str) -> LazyService:
+        return LazyService(self, name)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Build services ahead of the first request (for long-lived workers)
+
+        Failures are logged and skipped so one broken optional dependency does
+        not stop the worker from starting.
+        """
+        start = time.perf_counter()
+        loaded = []
+        failed = {}
+        for name in (names or self.names):
+            try:
+                self.get(name)
+                loaded.append(name)
+            except Exception as e:
+                failed[name] = str(e)
+
+        elapsed = round(time.perf_counter() - start, 4)
+        logger.info("Services warmed up", loaded=loaded, failed=list(failed), seconds=elapsed)
+        return {'loaded': loaded, 'failed': failed, 'seconds': elapsed}
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            services = {
+                name: {
+                    'loaded': name in self._instances,
+                    **self._timings.get(name, {}),
+                    **({'error': self._errors[name]} if name in self._errors else {})
+                }
+                for name in self._specs
+            }
+        return {
+            'services': services,
+            'loaded': sum(1 for s in services.values() if s['loaded']),
+            'total': len(services),
+            'import_seconds': round(sum(s.get('import_seconds', 0.0) for s in services.values()), 4),
+            'init_seconds': round(sum(s.get('init_seconds', 0.0) for s in services.values()), 4)
+        }
@@ -0,0 +1,216 @@
+"""
+Resilience
+Latency budgets, rolling latency percentiles and a circuit breaker for upstream AI calls.
+"""
+
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Absolute deadline (time.monotonic) for AI work in the current request
+_request_deadline: contextvars.ContextVar = contextvars.ContextVar('ai_request_deadline', default=None)
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker rejects a call"""
+
+
+class DeadlineExceededError(Exception):
+    """Raised when the request latency budget leaves no time for another call"""
+
+
+@contextmanager
+def latency_budget(seconds: Optional[float]):
+    """Bound all AI calls made inside the block by a shared deadline
+
+    Nested budgets can only shorten the deadline, never extend it.
+    """
+    if not seconds:
+        yield
+        return
+
+    deadline = time.monotonic() + seconds
+    current = _request_deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+
+    token = _request_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current latency budget, or None when unbounded"""
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def call_deadline(max_call_seconds: float, min_call_seconds: float = 1.0) -> float:
+    """Timeout for the next call: the per-call cap clipped to the remaining budget
+
+    Raises:
+        DeadlineExceededError: If less than ``min_call_seconds`` of budget remains
+    """
+    remaining = remaining_budget()
+    if remaining is None:
+        return max_call_seconds
+    if remaining < min_call_seconds:
+        raise DeadlineExceededError(f"Latency budget exhausted ({max(0.0, remaining):.2f}s left)")
+    return min(max_call_seconds, remaining)
+
+
+class LatencyTracker:
+    """Rolling window of call latencies with percentile lookups"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency at percentile ``pct`` (0-100), or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(pct / 100.0 * len(samples))) - 1))
+        return samples[index]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        p50, p95, p99 = (self.percentile(p) for p in (50, 95, 99))
+        return {
+            'samples': len(self),
+            'p50_seconds': round(p50, 3) if p50 is not None else None,
+            'p95_seconds': round(p95, 3) if p95 is not None else None,
+            'p99_seconds': round(p99, 3) if p99 is not None else None
+        }
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker counting failures and slow calls
+
+    After ``failure_threshold`` consecutive failures (slow successes count as
+    failures) the breaker opens and rejects calls for ``reset_timeout``
+    seconds. It then lets one trial call through; success closes it again,
+    failure reopens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str = 'default', failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, slow_call_seconds: Optional[float] = None):
+        """
+        Initialize circuit breaker
+
+        Args:
+            name: Breaker name used in logs
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds to stay open before a half-open trial
+            slow_call_seconds: Successful calls slower than this count as failures
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._consecutive_failures = 0
+        self.stats = {
+            'successes': 0,
+            'failures': 0,
+            'slow_calls': 0,
+            'rejected': 0,
+            'times_opened': 0
+        }
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may proceed; counts rejections"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.stats['rejected'] += 1
+            return False
+
+    def record_success(self, latency_seconds: float = 0.0) -> None:
+        """Record a completed call; slow calls count toward opening the breaker"""
+        if self.slow_call_seconds is not None and latency_seconds > self.slow_call_seconds:
+            with self._lock:
+                self.stats['slow_calls'] += 1
+            self._on_failure('slow_call')
+            return
+
+        with self._lock:
+            self.stats['successes'] += 1
+            self._consecutive_failures = 0
+            if self._state != self.CLOSED:
+                logger.info("Circuit breaker closed", breaker=self.name)
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        """Record a failed call"""
+        self._on_failure(type(error).__name__ if error is not None else 'failure')
+
+    def _on_failure(self, reason: str) -> None:
+        with self._lock:
+            self.stats['failures'] += 1
+            self._consecutive_failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or (
+                    state == self.CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+                self.stats['times_opened'] += 1
+                logger.warning("Circuit breaker opened",
+                              breaker=self.name,
+                              reason=reason,
+                              consecutive_failures=self._consecutive_failures,
+                              reset_timeout=self.reset_timeout)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['state'] = self._current_state()
+            stats['consecutive_failures'] = self._consecutive_failures
+        stats['failure_threshold'] = self.failure_threshold
+        stats['reset_timeout'] = self.reset_timeout
+        return stats
@@ -0,0 +1,222 @@
+"""
+Document Result Cache
+Persistent SQLite cache of whole-document pipeline results keyed by file content.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+import structlog
+
+from app.utils.security import ensure_private_directory
+
+logger = structlog.get_logger()
+
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocumentResultCache:
+    """SQLite-backed cache of ProcessingPipeline results with TTL and size cap
+
+    Entries are keyed by the document's SHA-256, the pipeline config version
+    and the extraction request (regions and document type override), so the
+    same file re-sent to several analysts is processed once. One short-lived
+    connection is opened per operation, as in LLMResponseCache.
+    """
+
+    def __init__(self, db_path: str = None, ttl_seconds: int = 30 * 24 * 3600,
+                 max_entries: int = 2000):
+        """
+        Initialize result cache
+
+        Args:
+            db_path: SQLite database file (defaults to the app's private STATE_FOLDER)
+            ttl_seconds: Time-to-live for cached results
+            max_entries: Maximum number of cached results before LRU eviction
+        """
+        if not db_path:
+            from config import Config
+            db_path = os.path.join(Config.STATE_FOLDER, 'result_cache.sqlite3')
+        self.db_path = os.path.abspath(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'errors': 0,
+            'processing_seconds_saved': 0.0
+        }
+
+        self._initialize_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits (or rolls back) and is closed when the block exits"""
+        conn = sqlite3.connect(self.db_path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _initialize_db(self) -> None:
+        """Create cache table if needed"""
+        ensure_private_directory(os.path.dirname(self.db_path))
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS document_results (
+                    key TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    config_version TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    processing_seconds REAL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL,
+                    hit_count INTEGER DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_document_results_last_accessed "
+                         "ON document_results (last_accessed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_document_results_content_hash "
+                         "ON document_results (content_hash)")
+
+    @staticmethod
+    def make_key(content_hash: str, config_version: str, regions: Optional[List[Dict]] = None,
+                 document_type: Optional[str] = None) -> str:
+        """Build cache key from file content, pipeline version and extraction request"""
+        key_material = json.dumps({
+            'content_hash': content_hash,
+            'config_version': config_version,
+            'regions': regions or None,
+            'document_type': document_type
+        }, sort_keys=True, separators=(',', ':'), default=str)
+
+        return hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+
+    def _record(self, stat: str, amount: float = 1) -> None:
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return cached result or None when missing or expired"""
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT result, processing_seconds, created_at FROM document_results WHERE key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None:
+                    self._record('misses')
+                    return None
+
+                result, processing_seconds, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM document_results WHERE key = ?", (key,))
+                    self._record('misses')
+                    self._record('evictions')
+                    return None
+
+                conn.execute(
+                    "UPDATE document_results SET last_accessed = ?, hit_count = hit_count + 1 WHERE key = ?",
+                    (now, key)
+                )
+
+            self._record('hits')
+            self._record('processing_seconds_saved', processing_seconds or 0.0)
+            return json.loads(result)
+
+        except Exception as e:
+            self._record('errors')
+            logger.warning("Result cache read failed", error=str(e))
+            return None
+
+    def set(self, key: str, result: Dict[str, Any], content_hash: str, config_version: str,
+            processing_seconds: float = 0.0) -> None:
+        """Store result and enforce the size cap"""
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO document_results "
+                    "(key, content_hash, config_version, result, processing_seconds, "
+                    "created_at, last_accessed, hit_count) VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                    (key, content_hash, config_version, json.dumps(result, default=str),
+                     processing_seconds, now, now)
+                )
+                self._record('stores')
+                self._evict(conn, now)
+
+        except Exception as e:
+            self._record('errors')
+            logger.warning("Result cache write failed", error=str(e))
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used entries above the cap"""
+        expired = conn.execute(
+            "DELETE FROM document_results WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+
+        (count,) = conn.execute("SELECT COUNT(*) FROM document_results").fetchone()
+        overflow = count - self.max_entries
+        trimmed = 0
+        if overflow > 0:
+            trimmed = conn.execute(
+                "DELETE FROM document_results WHERE key IN "
+                "(SELECT key FROM document_results ORDER BY last_accessed ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+
+        if expired or trimmed:
+            self._record('evictions', expired + trimmed)
+
+    def invalidate(self, content_hash: str) -> int:
+        """Remove every cached result for one document; returns the number removed"""
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM document_results WHERE content_hash = ?", (content_hash,)
+            ).rowcount
+
+    def clear(self) -> None:
+        """Remove all cached results"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM document_results")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['processing_seconds_saved'] = round(stats['processing_seconds_saved'], 3)
+
+        try:
+            with self._connect() as conn:
+                (stats['entries'],) = conn.execute("SELECT COUNT(*) FROM document_results").fetchone()
+        except Exception:
+            stats['entries'] = None
+
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
@@ -0,0 +1,340 @@
+"""
+Document Session Cache
+Rendered pages, layout analysis and OCR results shared across the
+region-selection API calls for one document.
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple
+
+import numpy as np
+import structlog
+
+from app.utils.security import ensure_private_directory
+from .result_cache import file_sha256
+
+logger = structlog.get_logger()
+
+_MISSING = object()
+_SAFE_NAME = re.compile(r'[^A-Za-z0-9_.-]')
+_CONTENT_ADDRESSED = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _size_of(value: Any) -> int:
+    """Approximate memory footprint used for the cache budget"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return len(json.dumps(value, default=_json_default))
+
+
+class MemorySessionBackend:
+    """Artifacts held in this process, evicted least-recently-used beyond ``max_bytes``"""
+
+    name = 'memory'
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl_seconds: int = 3600):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[Any, int, float]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, document: str, artifact: str) -> Any:
+        key = (document, artifact)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, size, stored_at = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                self._drop(key)
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, document: str, artifact: str, value: Any) -> None:
+        key = (document, artifact)
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, time.time())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def invalidate(self, document: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == document]:
+                self._drop(key)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes}
+
+
+class FileSystemSessionBackend:
+    """Artifacts stored under ``<directory>/<content hash>/`` and shared by all workers
+
+    Arrays are written as ``.npy`` and everything else as JSON, each through
+    a temp file and atomic rename. Expired files are removed, and the oldest
+    files are pruned once the directory grows past ``max_bytes``. Both checks
+    run at most every ``prune_interval`` seconds. Routes trust what is read
+    back, so the directory must be private to the app user (it defaults to
+    ``STATE_FOLDER/sessions``).
+    """
+
+    name = 'filesystem'
+
+    def __init__(self, directory: str = None, max_bytes: int = 1024 * 1024 * 1024,
+                 ttl_seconds: int = 3600, prune_interval: float = 30.0):
+        if not directory:
+            from config import Config
+            directory = os.path.join(Config.STATE_FOLDER, 'sessions')
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+        ensure_private_directory(self.directory)
+
+    def _path(self, document: str, artifact: str) -> str:
+        return os.path.join(self.directory, document, _SAFE_NAME.sub('_', artifact))
+
+    def get(self, document: str, artifact: str) -> Any:
+        base = self._path(document, artifact)
+        for suffix, load in (('.npy', np.load), ('.json', self._load_json)):
+            path = base + suffix
+            try:
+                if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                    os.unlink(path)
+                    return _MISSING
+                return load(path)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.warning("Session cache read failed", artifact=artifact, error=str(e))
+                return _MISSING
+        return _MISSING
+
+    @staticmethod
+    def _load_json(path: str) -> Any:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def set(self, document: str, artifact: str, value: Any) -> None:
+        base = self._path(document, artifact)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        is_array = isinstance(value, np.ndarray)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(base), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if is_array:
+                    np.save(f, value, allow_pickle=False)
+                else:
+                    f.write(json.dumps(value, default=_json_default).encode('utf-8'))
+            os.replace(temp_path, base + ('.npy' if is_array else '.json'))
+        except Exception:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        self._maybe_prune()
+
+    def invalidate(self, document: str) -> None:
+        shutil.rmtree(os.path.join(self.directory, document), ignore_errors=True)
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _maybe_prune(self) -> None:
+        now = time.time()
+        if now - self._last_prune < self.prune_interval or not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_prune = now
+            self.prune(now)
+        finally:
+            self._prune_lock.release()
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete expired files, then the oldest files beyond the size budget"""
+        now = now or time.time()
+        removed = 0
+        live = []
+        for path, size, mtime in self._files():
+            if now - mtime > self.ttl_seconds:
+                removed += self._remove(path)
+            else:
+                live.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in live)
+        for _, size, path in sorted(live):
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                try:
+                    os.rmdir(entry.path)
+                except OSError:
+                    pass
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.unlink(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    def get_statistics(self) -> Dict[str, Any]:
+        files = list(self._files())
+        return {'entries': len(files), 'bytes': sum(size for _, size, _ in files),
+                'directory': self.directory}
+
+
+class DocumentSession:
+    """Cached artifacts for one document, addressed by its content hash"""
+
+    def __init__(self, cache: 'DocumentSessionCache', content_hash: str):
+        self.cache = cache
+        self.content_hash = content_hash
+
+    def get_or_compute(self, artifact: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached artifact, computing and storing it on a miss (None is not cached)"""
+        return self.cache.get_or_compute(self.content_hash, artifact, compute)
+
+    def invalidate(self) -> None:
+        self.cache.backend.invalidate(self.content_hash)
+
+
+class DocumentSessionCache:
+    """Per-document cache for the interactive region-selection flow
+
+    ``/api/suggest-regions``, ``/api/extract-data`` and friends are called
+    one after another on the same file. Keying their intermediate artifacts
+    (page images, layout analysis, per-region OCR) by the file's SHA-256 lets
+    each call pick up where the previous one left off, on any worker when
+    the filesystem backend is used.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemorySessionBackend()
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._hash_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+
+    def content_hash(self, file_path: str) -> str:
+        """SHA-256 of a file: taken from content-addressed upload names, else hashed once per version"""
+        stem, extension = os.path.splitext(os.path.basename(file_path))
+        if extension.lower() == '.pdf' and _CONTENT_ADDRESSED.match(stem):
+            return stem
+
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        with self._hash_lock:
+            cached = self._hashes.get(key)
+        if cached is None:
+            cached = file_sha256(file_path)
+            with self._hash_lock:
+                if len(self._hashes) > 10000:
+                    self._hashes.clear()
+                self._hashes[key] = cached
+        return cached
+
+    def open(self, file_path: str) -> DocumentSession:
+        return DocumentSession(self, self.content_hash(file_path))
+
+    def _record(self, stat: str) -> None:
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def get_or_compute(self, content_hash: str, artifact: str, compute: Callable[[], Any]) -> Any:
+        try:
+            value = self.backend.get(content_hash, artifact)
+        except Exception as e:
+            self._record('errors')
+            logger.warning("Session cache read failed", artifact=artifact, error=str(e))
+            value = _MISSING
+
+        if value is not _MISSING:
+            self._record('hits')
+            return value
+
+        self._record('misses')
+        value = compute()
+        if value is not None:
+            try:
+                self.backend.set(content_hash, artifact, value)
+            except Exception as e:
+                self._record('errors')
+                logger.warning("Session cache write failed", artifact=artifact, error=str(e))
+        return value
+
+    @staticmethod
+    def artifact_key(prefix: str, *parts: Any) -> str:
+        """Stable artifact name from request parameters (e.g. a region dict)"""
+        material = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+        return f"{prefix}-{hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]}"
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['backend'] = self.backend.name
+        stats.update(self.backend.get_statistics())
+        return stats
+
+
+def create_session_cache(app) -> DocumentSessionCache:
+    """Build the app's session cache from SESSION_CACHE_BACKEND ('filesystem' or 'memory')"""
+    config = app.config
+    ttl_seconds = config.get('SESSION_CACHE_TTL_SECONDS', 3600)
+    max_bytes = config.get('SESSION_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+
+    if config.get('SESSION_CACHE_BACKEND', 'filesystem') == 'filesystem':
+        try:
+            return DocumentSessionCache(FileSystemSessionBackend(
+                directory=config.get('SESSION_CACHE_DIR'), max_bytes=max_bytes, ttl_seconds=ttl_seconds
+            ))
+        except OSError as e:
+            logger.warning("Session cache directory unavailable, using process memory", error=str(e))
+
+    return DocumentSessionCache(MemorySessionBackend(max_bytes=max_bytes, ttl_seconds=ttl_seconds))
@@ -0,0 +1,339 @@
+"""
+Single Flight
+Coalesces concurrent duplicate calls so identical OCR and AI work runs once.
+"""
+
+import os
+import copy
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
+
+import structlog
+
+from app.utils.security import ensure_private_directory
+from .resilience import remaining_budget
+
+logger = structlog.get_logger()
+
+_MISSING = object()
+
+
+class _Call:
+    """In-progress computation shared by the leader and its waiters"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SQLiteLeaseBackend:
+    """Cross-process single flight through leases in a shared SQLite file
+
+    The first worker to insert a lease row for a key computes the result and
+    stores it in the row. Other workers poll until the result appears, taking
+    the lease over if the holder dies and it expires. Results are kept for
+    ``result_ttl_seconds`` so late arrivals of the same burst still share them.
+
+    Results are shared as JSON, so only JSON-serializable results (after
+    converting API model objects and numpy values) are coalesced across
+    workers; tuples come back as lists. The database must live in a
+    directory only this user can access.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 120.0,
+                 result_ttl_seconds: float = 30.0, poll_interval: float = 0.05):
+        """
+        Initialize lease backend
+
+        Args:
+            db_path: SQLite database file shared by all workers on the host, in an
+                app-owned directory with mode 0700
+            lease_seconds: How long a leader may hold a key before others take over
+            result_ttl_seconds: How long completed results are served to late callers
+            poll_interval: Seconds between result polls while another worker computes
+
+        Raises:
+            ValueError: If no db_path is given
+            PermissionError: If the database directory is accessible to other users
+        """
+        if not db_path:
+            raise ValueError("A database path in an app-owned directory is required")
+        self.db_path = os.path.abspath(db_path)
+        self.lease_seconds = lease_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self.poll_interval = poll_interval
+        self._initialize_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode so BEGIN IMMEDIATE controls the lease transaction
+        return sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+
+    def _initialize_db(self) -> None:
+        """Create lease table if needed"""
+        ensure_private_directory(os.path.dirname(self.db_path))
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS single_flight_leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    completed_at REAL,
+                    result BLOB
+                )
+            """)
+        finally:
+            conn.close()
+
+    def _try_acquire(self, key: str, owner: str) -> Tuple[str, Any]:
+        """Return ('acquired', None), ('done', result) or ('held', None)"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT expires_at, completed_at, result FROM single_flight_leases WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is not None:
+                expires_at, completed_at, result = row
+                if completed_at is not None and now - completed_at <= self.result_ttl_seconds:
+                    conn.execute("COMMIT")
+                    return 'done', json.loads(result)
+                if completed_at is None and expires_at > now:
+                    conn.execute("COMMIT")
+                    return 'held', None
+
+            conn.execute(
+                "INSERT OR REPLACE INTO single_flight_leases (key, owner, expires_at, completed_at, result) "
+                "VALUES (?, ?, ?, NULL, NULL)",
+                (key, owner, now + self.lease_seconds)
+            )
+            conn.execute("COMMIT")
+            return 'acquired', None
+
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _complete(self, key: str, owner: str, result: Any) -> None:
+        """Publish the leader's result and purge stale rows"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE single_flight_leases SET completed_at = ?, result = ? WHERE key = ? AND owner = ?",
+                (now, json.dumps(result, default=self._to_json), key, owner)
+            )
+            conn.execute(
+                "DELETE FROM single_flight_leases WHERE completed_at < ? OR expires_at < ?",
+                (now - self.result_ttl_seconds, now - self.lease_seconds)
+            )
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_json(value: Any) -> Any:
+        """JSON form of API response objects and numpy values; anything else is not shared"""
+        if hasattr(value, 'model_dump'):
+            return value.model_dump()
+        if hasattr(value, 'tolist'):
+            return value.tolist()
+        raise TypeError(f"{type(value).__name__} result cannot be shared between workers")
+
+    def _release(self, key: str, owner: str) -> None:
+        """Drop a lease without a result so another worker can retry"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM single_flight_leases WHERE key = ? AND owner = ?", (key, owner))
+        finally:
+            conn.close()
+
+    def run(self, key: str, fn: Callable[[], Any], wait_timeout: float) -> Tuple[Any, bool]:
+        """Run ``fn`` once across workers
+
+        Returns:
+            Tuple of (result, computed_here)
+        """
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        deadline = time.time() + wait_timeout
+
+        while True:
+            try:
+                state, result = self._try_acquire(key, owner)
+            except Exception as e:
+                logger.warning("Single-flight lease unavailable, computing locally", error=str(e))
+                return fn(), True
+
+            if state == 'done':
+                return result, False
+
+            if state == 'acquired':
+                try:
+                    result = fn()
+                except BaseException:
+                    self._release(key, owner)
+                    raise
+                try:
+                    self._complete(key, owner, result)
+                except Exception as e:
+                    logger.warning("Single-flight result not shared", error=str(e))
+                    self._release(key, owner)
+                return result, True
+
+            if time.time() >= deadline:
+                logger.warning("Single-flight wait timed out, computing locally", key=key[:16])
+                return fn(), True
+
+            time.sleep(self.poll_interval)
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one computation
+
+    Within a process, waiters block on the leader's thread. When a backend is
+    configured the leader additionally coordinates with other worker processes.
+    Waiters receive deep copies so callers can mutate results freely.
+    """
+
+    def __init__(self, name: str = 'default', backend: SQLiteLeaseBackend = None,
+                 wait_timeout: float = 300.0):
+        """
+        Initialize single flight group
+
+        Args:
+            name: Group name used in logs and to namespace backend keys
+            backend: Optional cross-process lease backend
+            wait_timeout: Seconds a waiter blocks before computing on its own, capped at
+                the remaining request latency budget
+        """
+        self.name = name
+        self.backend = backend
+        self.wait_timeout = wait_timeout
+
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.stats = {
+            'calls': 0,
+            'executions': 0,
+            'coalesced': 0,
+            'coalesced_remote': 0,
+            'wait_timeouts': 0
+        }
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Hash arbitrary key material into a fixed-length key"""
+        digest = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, (bytes, bytearray, memoryview)):
+                digest.update(part)
+            else:
+                digest.update(repr(part).encode('utf-8'))
+            digest.update(b'\x1f')
+        return digest.hexdigest()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Return ``fn()``, sharing one execution among concurrent callers of ``key``"""
+        with self._lock:
+            self.stats['calls'] += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+            else:
+                call.waiters += 1
+                self.stats['coalesced'] += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(self._wait_timeout()):
+                with self._lock:
+                    self.stats['wait_timeouts'] += 1
+                logger.warning("Single-flight wait timed out", group=self.name)
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        result = _MISSING
+        try:
+            if self.backend is not None:
+                result, computed = self.backend.run(f"{self.name}:{key}", fn, self._wait_timeout())
+                if not computed:
+                    with self._lock:
+                        self.stats['coalesced_remote'] += 1
+            else:
+                result = fn()
+            with self._lock:
+                self.stats['executions'] += 1
+            return result
+
+        except BaseException as e:
+            call.error = e
+            raise
+
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                waiters = call.waiters
+            if result is not _MISSING and waiters:
+                # Snapshot before the leader's caller can mutate the result
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def _wait_timeout(self) -> float:
+        """Waiters give up when the request latency budget runs out, if that is sooner"""
+        remaining = remaining_budget()
+        if remaining is None:
+            return self.wait_timeout
+        return max(0.0, min(self.wait_timeout, remaining))
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._calls)
+        stats['backend'] = 'sqlite_lease' if self.backend is not None else 'thread'
+        return stats
+
+
+def create_single_flight(name: str) -> Optional[SingleFlight]:
+    """Build a single-flight group from Config, or None when coalescing is disabled"""
+    from config import Config
+
+    if not getattr(Config, 'SINGLE_FLIGHT_ENABLED', True):
+        return None
+
+    backend = None
+    if getattr(Config, 'SINGLE_FLIGHT_BACKEND', 'thread') == 'sqlite':
+        try:
+            backend = SQLiteLeaseBackend(
+                db_path=getattr(Config, 'SINGLE_FLIGHT_DB_PATH', None),
+                lease_seconds=getattr(Config, 'SINGLE_FLIGHT_LEASE_SECONDS', 120)
+            )
+        except Exception as e:
+            logger.warning("Single-flight lease backend unavailable, using thread-only coalescing",
+                          error=str(e))
+
+    return SingleFlight(
+        name=name,
+        backend=backend,
+        wait_timeout=getattr(Config, 'SINGLE_FLIGHT_WAIT_TIMEOUT', 300)
+    )
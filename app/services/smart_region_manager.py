@@ -16,6 +16,8 @@ import re
 from collections import defaultdict
 import math
 
+from .east_inference import get_east_inference_service
+
 logger = structlog.get_logger()
 
 class SmartRegionManager:
@@ -94,33 +96,17 @@ class SmartRegionManager:
     def _init_cv_models(self):
         """Initialize computer vision models for text detection"""
         try:
-            # Try to load EAST text detector model
-            self.east_model_path = None
-            self.east_net = None
-            
-            # Look for EAST model in common locations
-            possible_paths = [
-                'models/frozen_east_text_detection.pb',
-                'app/models/frozen_east_text_detection.pb',
-                os.path.join(os.getcwd(), 'models', 'frozen_east_text_detection.pb')
-            ]
-            
-            for path in possible_paths:
-                if os.path.exists(path):
-                    self.east_model_path = path
-                    try:
-                        self.east_net = cv2.dnn.readNet(path)
-                        logger.info(f"EAST text detection model loaded from {path}")
-                        break
-                    except Exception as e:
-                        logger.warning(f"Failed to load EAST model from {path}", error=str(e))
+            # EAST networks live in a process-wide pool shared by all managers
+            self.east_service = get_east_inference_service()
+            self.east_model_path = self.east_service.model_path
             
-            if not self.east_net:
+            if not self.east_service.available:
                 logger.info("EAST model not found, using traditional CV methods for text detection")
                 
         except Exception as e:
             logger.warning("Error initializing CV models", error=str(e))
-            self.east_net = None
+            self.east_service = None
+            self.east_model_path = None
     
     def suggest_regions(self, document_type: str, page_image: np.ndarray) -> List[Dict[str, Any]]:
         """Main method to suggest regions using computer vision and ML techniques"""
@@ -173,9 +159,8 @@ class SmartRegionManager:
             regions = []
             
             # Method 1: EAST Text Detection (if available)
-            if self.east_net is not None:
-                east_regions = self._detect_text_with_east(image)
-                regions.extend(east_regions)
+            east_regions = self._detect_text_with_east(image)
+            regions.extend(east_regions)
             
             # Method 2: Traditional CV-based text detection
             cv_regions = self._detect_text_with_traditional_cv(image)
@@ -198,110 +183,15 @@ class SmartRegionManager:
     def _detect_text_with_east(self, image: np.ndarray) -> List[Dict[str, Any]]:
         """Detect text using EAST deep learning model"""
         try:
-            if self.east_net is None:
+            if self.east_service is None or not self.east_service.available:
                 return []
             
-            # Prepare image for EAST
-            orig_h, orig_w = image.shape[:2]
-            
-            # EAST requires dimensions to be multiples of 32
-            new_w = int((orig_w // 32) * 32)
-            new_h = int((orig_h // 32) * 32)
-            
-            r_w = orig_w / float(new_w)
-            r_h = orig_h / float(new_h)
-            
-            resized = cv2.resize(image, (new_w, new_h))
-            
-            # Create blob and run forward pass
-            blob = cv2.dnn.blobFromImage(resized, 1.0, (new_w, new_h),
-                                       (123.68, 116.78, 103.94), swapRB=True, crop=False)
-            
-            self.east_net.setInput(blob)
-            (scores, geometry) = self.east_net.forward(["feature_fusion/Conv_7/Sigmoid",
-                                                       "feature_fusion/concat_3"])
-            
-            # Decode predictions
-            rectangles, confidences = self._decode_east_predictions(scores, geometry)
-            
-            # Apply NMS
-            indices = cv2.dnn.NMSBoxesRotated(rectangles, confidences, 0.5, 0.4)
-            
-            regions = []
-            if len(indices) > 0:
-                for i in indices.flatten():
-                    # Get the rotated rectangle
-                    (center_x, center_y), (width, height), angle = rectangles[i]
-                    
-                    # Scale back to original image size
-                    center_x = int(center_x * r_w)
-                    center_y = int(center_y * r_h)
-                    width = int(width * r_w)
-                    height = int(height * r_h)
-                    
-                    # Convert to axis-aligned bounding box
-                    x = max(0, center_x - width // 2)
-                    y = max(0, center_y - height // 2)
-                    
-                    region = {
-                        'x': x,
-                        'y': y,
-                        'width': min(width, orig_w - x),
-                        'height': min(height, orig_h - y),
-                        'confidence': float(confidences[i]),
-                        'detection_method': 'east',
-                        'type': 'text_region'
-                    }
-                    regions.append(region)
-            
-            return regions
+            return self.east_service.detect(image)
             
         except Exception as e:
             logger.error("Error in EAST text detection", error=str(e))
             return []
     
-    def _decode_east_predictions(self, scores: np.ndarray, geometry: np.ndarray, 
-                               score_threshold: float = 0.5) -> Tuple[List, List]:
-        """Decode EAST model predictions"""
-        rectangles = []
-        confidences = []
-        
-        # Get dimensions
-        (num_rows, num_cols) = scores.shape[2:4]
-        
-        for y in range(0, num_rows):
-            scores_data = scores[0, 0, y]
-            x_data0 = geometry[0, 0, y]
-            x_data1 = geometry[0, 1, y]
-            x_data2 = geometry[0, 2, y]
-            x_data3 = geometry[0, 3, y]
-            angles_data = geometry[0, 4, y]
-            
-            for x in range(0, num_cols):
-                if scores_data[x] < score_threshold:
-                    continue
-                
-                # Compute offset factor
-                (offset_x, offset_y) = (x * 4.0, y * 4.0)
-                
-                # Extract rotation angle and compute cos/sin
-                angle = angles_data[x]
-                cos = np.cos(angle)
-                sin = np.sin(angle)
-                
-                # Compute dimensions
-                h = x_data0[x] + x_data2[x]
-                w = x_data1[x] + x_data3[x]
-                
-                # Compute center of rotated rectangle
-                center_x = offset_x + (cos * x_data1[x]) + (sin * x_data2[x])
-                center_y = offset_y - (sin * x_data1[x]) + (cos * x_data2[x])
-                
-                rectangles.append(((center_x, center_y), (w, h), -1 * angle * 180.0 / math.pi))
-                confidences.append(float(scores_data[x]))
-        
-        return rectangles, confidences
-    
     def _detect_text_with_traditional_cv(self, image: np.ndarray) -> List[Dict[str, Any]]:
         """Detect text using traditional computer vision methods"""
         try:
@@ -4,8 +4,11 @@ Handles file uploads, downloads, and storage management for Supabase integration
 """
 
 import os
+import json
 import logging
 import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, Tuple, List
 from datetime import datetime, timedelta
 import hashlib
@@ -14,6 +17,9 @@ from postgrest.exceptions import APIError
 
 logger = logging.getLogger(__name__)
 
+# Upload session state lives next to the chunks so any instance can resume or complete it
+SESSION_FILE = 'session.json'
+
 class SupabaseStorageService:
     """Service for handling Supabase storage operations"""
     
@@ -34,6 +40,8 @@ class SupabaseStorageService:
         try:
             self.client: Client = create_client(self.url, api_key)
             self.bucket_name = 'documents'
+            # Chunks downloaded at once when assembling a chunked upload
+            self.chunk_download_concurrency = max(1, int(os.environ.get('CHUNK_DOWNLOAD_CONCURRENCY', 4)))
             self._ensure_bucket_exists()
             logger.info("Supabase storage service initialized successfully")
         except Exception as e:
@@ -295,13 +303,21 @@ class SupabaseStorageService:
                 'path': remote_path
             }
     
-    def create_upload_session(self, filename: str, total_size: int) -> str:
+    def create_upload_session(self, filename: str, total_size: int, total_chunks: Optional[int] = None,
+                              checksum: Optional[str] = None, content_type: str = 'application/pdf') -> str:
         """
         Create an upload session for chunked uploads
         
+        The session is stored in the bucket next to its chunks, so an
+        interrupted upload can be resumed (see get_upload_session) and
+        completed by any instance.
+        
         Args:
             filename: Original filename
             total_size: Total file size in bytes
+            total_chunks: Number of chunks the client will send, if known
+            checksum: SHA-256 hex digest of the whole file, if known
+            content_type: MIME type of the assembled file
             
         Returns:
             Upload session ID
@@ -313,17 +329,92 @@ class SupabaseStorageService:
             'id': session_id,
             'filename': filename,
             'total_size': total_size,
-            'chunks_received': [],
+            'total_chunks': total_chunks,
+            'checksum': checksum,
+            'content_type': content_type,
             'created_at': datetime.utcnow().isoformat(),
             'status': 'active'
         }
         
-        # Store session info in a temporary location or database
-        # For now, we'll just return the session ID
+        try:
+            self._save_session(session_info)
+        except Exception as e:
+            # The upload still works, it just cannot be resumed or size-checked
+            logger.warning(f"Failed to store upload session {session_id}: {str(e)}")
+        
         logger.info(f"Created upload session {session_id} for {filename} ({total_size} bytes)")
         
         return session_id
     
+    def get_upload_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get an upload session with the chunks received so far
+        
+        Received chunks are read from the bucket listing rather than the
+        session file, so concurrent chunk uploads never overwrite each other.
+        
+        Args:
+            session_id: Upload session ID
+            
+        Returns:
+            Session dictionary with chunks_received, missing_chunks and
+            bytes_received (None when the chunks could not be listed), or
+            None if the session does not exist
+        """
+        try:
+            session_info = json.loads(
+                self.client.storage.from_(self.bucket_name).download(self._chunk_dir(session_id) + SESSION_FILE)
+            )
+        except Exception as e:
+            logger.warning(f"Upload session {session_id} not found: {str(e)}")
+            return None
+        
+        try:
+            chunk_sizes = self._received_chunks(session_id, session_info.get('total_chunks'))
+        except Exception as e:
+            logger.warning(f"Failed to list chunks for upload session {session_id}: {str(e)}")
+            session_info.update(chunks_received=None, bytes_received=None, missing_chunks=None)
+            return session_info
+        
+        session_info['chunks_received'] = sorted(chunk_sizes)
+        session_info['bytes_received'] = sum(size for size in chunk_sizes.values() if size is not None)
+        total_chunks = session_info.get('total_chunks')
+        session_info['missing_chunks'] = [
+            number for number in range(total_chunks) if number not in chunk_sizes
+        ] if total_chunks else []
+        return session_info
+    
+    def _save_session(self, session_info: Dict[str, Any]) -> None:
+        """Write an upload session's state to the bucket"""
+        self.client.storage.from_(self.bucket_name).upload(
+            self._chunk_dir(session_info['id']) + SESSION_FILE,
+            json.dumps(session_info).encode('utf-8'),
+            file_options={
+                "content-type": "application/json",
+                "x-upsert": "true"
+            }
+        )
+    
+    def _received_chunks(self, session_id: str, total_chunks: Optional[int] = None) -> Dict[int, Optional[int]]:
+        """Chunk number -> size (None if the listing has no size) of the chunks in storage"""
+        listing = self.client.storage.from_(self.bucket_name).list(
+            self._chunk_dir(session_id).rstrip('/'), {"limit": (total_chunks or 10000) + 10}
+        ) or []
+        chunks = {}
+        for file_info in listing:
+            name = file_info.get('name') or ''
+            if name.startswith('chunk_'):
+                try:
+                    number = int(name[len('chunk_'):])
+                except ValueError:
+                    continue
+                chunks[number] = (file_info.get('metadata') or {}).get('size')
+        return chunks
+    
+    @staticmethod
+    def _chunk_dir(session_id: str) -> str:
+        return f"chunks/{session_id}/"
+    
     def upload_chunk(self, session_id: str, chunk_number: int, chunk_data: bytes) -> Dict[str, Any]:
         """
         Upload a chunk as part of a chunked upload session
@@ -337,11 +428,11 @@ class SupabaseStorageService:
             Dict with chunk upload result
         """
         try:
-            chunk_path = f"chunks/{session_id}/chunk_{chunk_number:06d}"
+            chunk_path = f"{self._chunk_dir(session_id)}chunk_{chunk_number:06d}"
             
             logger.debug(f"Uploading chunk {chunk_number} for session {session_id}")
             
-            # Upload chunk to storage
+            # Upload chunk to storage; re-sending a chunk when resuming replaces it
             result = self.client.storage.from_(self.bucket_name).upload(
                 chunk_path,
                 chunk_data,
@@ -369,45 +460,66 @@ class SupabaseStorageService:
             }
     
     def complete_chunked_upload(self, session_id: str, total_chunks: int, 
-                               final_path: str) -> Dict[str, Any]:
+                               final_path: str, checksum: Optional[str] = None) -> Dict[str, Any]:
         """
         Complete a chunked upload by assembling chunks into final file
         
+        Chunks are downloaded in parallel (at most chunk_download_concurrency
+        at a time, with a bounded number held in memory) and written in order
+        to a temporary file while the SHA-256 is computed. The total size and
+        checksum are checked against the session before the file is uploaded
+        from disk. On failure the chunks are kept so the client can re-send
+        missing or bad chunks and complete again.
+        
         Args:
             session_id: Upload session ID
             total_chunks: Total number of chunks expected
             final_path: Final path for the assembled file
+            checksum: Expected SHA-256 hex digest (defaults to the session's)
             
         Returns:
             Dict with completion result
         """
+        temp_path = None
         try:
             logger.info(f"Completing chunked upload for session {session_id}")
             
-            # Download all chunks and assemble
-            assembled_data = b""
-            
-            for chunk_number in range(total_chunks):
-                chunk_path = f"chunks/{session_id}/chunk_{chunk_number:06d}"
-                
-                try:
-                    chunk_data = self.client.storage.from_(self.bucket_name).download(chunk_path)
-                    assembled_data += chunk_data
-                except Exception as e:
-                    logger.error(f"Failed to download chunk {chunk_number}: {str(e)}")
-                    raise Exception(f"Missing chunk {chunk_number}")
-            
-            # Upload assembled file
-            result = self.client.storage.from_(self.bucket_name).upload(
-                final_path,
-                assembled_data,
-                file_options={
-                    "content-type": "application/pdf",  # Assume PDF for now
-                    "x-upsert": "false"
-                }
-            )
-            
-            # Clean up chunks
+            session_info = self.get_upload_session(session_id) or {}
+            expected_size = session_info.get('total_size')
+            expected_checksum = (checksum or session_info.get('checksum') or '').lower() or None
+            
+            if session_info.get('chunks_received') is not None:
+                received = set(session_info['chunks_received'])
+                missing = [number for number in range(total_chunks) if number not in received]
+                if missing:
+                    return {
+                        'success': False,
+                        'error': f"Missing {len(missing)} of {total_chunks} chunks",
+                        'session_id': session_id,
+                        'missing_chunks': missing
+                    }
+            
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.part') as temp_file:
+                temp_path = temp_file.name
+                size, file_hash = self._assemble_chunks(session_id, total_chunks, temp_file)
+            
+            if expected_size is not None and size != expected_size:
+                raise ValueError(f"Assembled size {size} does not match expected size {expected_size}")
+            if expected_checksum and file_hash != expected_checksum:
+                raise ValueError(f"Checksum mismatch: expected {expected_checksum}, got {file_hash}")
+            
+            # Upload assembled file from disk
+            with open(temp_path, 'rb') as assembled_file:
+                result = self.client.storage.from_(self.bucket_name).upload(
+                    final_path,
+                    assembled_file,
+                    file_options={
+                        "content-type": session_info.get('content_type') or "application/pdf",
+                        "x-upsert": "false"
+                    }
+                )
+            
+            # Clean up chunks and session state
             self._cleanup_chunks(session_id, total_chunks)
             
             logger.info(f"Chunked upload completed: {final_path}")
@@ -416,7 +528,8 @@ class SupabaseStorageService:
                 'success': True,
                 'session_id': session_id,
                 'final_path': final_path,
-                'size': len(assembled_data),
+                'size': size,
+                'hash': file_hash,
                 'total_chunks': total_chunks
             }
             
@@ -427,11 +540,58 @@ class SupabaseStorageService:
                 'error': str(e),
                 'session_id': session_id
             }
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    def _assemble_chunks(self, session_id: str, total_chunks: int, output) -> Tuple[int, str]:
+        """
+        Download chunks in parallel and write them to output in order
+        
+        At most twice the download concurrency is in flight or buffered, so
+        memory stays bounded however many chunks there are.
+        
+        Returns:
+            Tuple of (total bytes written, SHA-256 hex digest)
+        """
+        bucket = self.client.storage.from_(self.bucket_name)
+        chunk_dir = self._chunk_dir(session_id)
+        digest = hashlib.sha256()
+        size = 0
+        window = self.chunk_download_concurrency * 2
+        
+        def download(chunk_number: int) -> bytes:
+            try:
+                return bucket.download(f"{chunk_dir}chunk_{chunk_number:06d}")
+            except Exception as e:
+                logger.error(f"Failed to download chunk {chunk_number}: {str(e)}")
+                raise Exception(f"Missing chunk {chunk_number}")
+        
+        with ThreadPoolExecutor(max_workers=self.chunk_download_concurrency,
+                                thread_name_prefix='chunk-download') as executor:
+            pending = deque()
+            next_chunk = 0
+            try:
+                while next_chunk < total_chunks or pending:
+                    while next_chunk < total_chunks and len(pending) < window:
+                        pending.append(executor.submit(download, next_chunk))
+                        next_chunk += 1
+                    chunk_data = pending.popleft().result()
+                    output.write(chunk_data)
+                    digest.update(chunk_data)
+                    size += len(chunk_data)
+            except Exception:
+                for future in pending:
+                    future.cancel()
+                raise
+        
+        return size, digest.hexdigest()
     
     def _cleanup_chunks(self, session_id: str, total_chunks: int) -> None:
-        """Clean up chunk files after successful assembly"""
+        """Clean up chunk files and session state after successful assembly"""
         try:
-            chunk_paths = [f"chunks/{session_id}/chunk_{i:06d}" for i in range(total_chunks)]
+            chunk_dir = self._chunk_dir(session_id)
+            chunk_paths = [f"{chunk_dir}chunk_{i:06d}" for i in range(total_chunks)] + [chunk_dir + SESSION_FILE]
             self.client.storage.from_(self.bucket_name).remove(chunk_paths)
             logger.debug(f"Cleaned up {total_chunks} chunks for session {session_id}")
         except Exception as e:
@@ -0,0 +1,254 @@
+"""
+Telemetry
+Thread-safe per-operation counters and latency histograms for AI calls.
+"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0)
+
+# Name of the AIService operation the current thread of work belongs to
+_current_operation: contextvars.ContextVar = contextvars.ContextVar('ai_operation', default=None)
+
+
+def current_operation() -> str:
+    """Operation name for calls made in the current context"""
+    return _current_operation.get() or 'other'
+
+
+@contextmanager
+def operation_scope(name: str):
+    """Attribute AI calls made inside the block to ``name``"""
+    token = _current_operation.set(name)
+    try:
+        yield
+    finally:
+        _current_operation.reset(token)
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram (not thread-safe; guarded by its owner)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Upper bound of the bucket holding percentile ``pct`` (max for the overflow bucket)"""
+        if not self.count:
+            return None
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum_seconds': round(self.sum, 4),
+            'avg_seconds': round(self.sum / self.count, 4) if self.count else None,
+            'max_seconds': round(self.max, 4),
+            'p50_seconds': self.percentile(50),
+            'p95_seconds': self.percentile(95),
+            'buckets': dict(zip(bounds, self.counts))
+        }
+
+
+class _OperationStats:
+    """Counters for one operation"""
+
+    def __init__(self):
+        self.operations = 0
+        self.operation_latency = LatencyHistogram()
+        self.calls = 0
+        self.call_latency = LatencyHistogram()
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.streamed = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.fallbacks: Dict[str, int] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.calls + self.cache_hits
+        return {
+            'operations': self.operations,
+            'operation_latency': self.operation_latency.to_dict(),
+            'calls': self.calls,
+            'call_latency': self.call_latency.to_dict(),
+            'errors': self.errors,
+            'retries': self.retries,
+            'cache_hits': self.cache_hits,
+            'cache_hit_rate': round(self.cache_hits / lookups, 4) if lookups else 0.0,
+            'coalesced': self.coalesced,
+            'streamed': self.streamed,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'total_tokens': self.prompt_tokens + self.completion_tokens,
+            'estimated_cost': round(self.cost, 6),
+            'fallbacks': dict(self.fallbacks),
+            'fallback_count': sum(self.fallbacks.values())
+        }
+
+
+class AITelemetry:
+    """Concurrency-safe usage and latency telemetry keyed by operation
+
+    Every record method takes the lock, so worker threads (batch processing,
+    the dispatcher callers, parallel correction batches) can report at once.
+    Calls are attributed to the operation set with ``operation_scope``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations: Dict[str, _OperationStats] = {}
+        self.started_at = time.time()
+
+    def _stats(self, operation: Optional[str]) -> _OperationStats:
+        name = operation or current_operation()
+        stats = self._operations.get(name)
+        if stats is None:
+            stats = self._operations[name] = _OperationStats()
+        return stats
+
+    def record_operation(self, seconds: float, operation: Optional[str] = None) -> None:
+        """Record end-to-end latency of a public AIService operation"""
+        with self._lock:
+            stats = self._stats(operation)
+            stats.operations += 1
+            stats.operation_latency.observe(seconds)
+
+    def record_call(self, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+                    cost: float = 0.0, streamed: bool = False, operation: Optional[str] = None) -> None:
+        """Record one completed upstream call"""
+        with self._lock:
+            stats = self._stats(operation)
+            stats.calls += 1
+            stats.call_latency.observe(seconds)
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost += cost
+            if streamed:
+                stats.streamed += 1
+
+    def record_cache_hit(self, operation: Optional[str] = None) -> None:
+        with self._lock:
+            self._stats(operation).cache_hits += 1
+
+    def record_coalesced(self, operation: Optional[str] = None) -> None:
+        with self._lock:
+            self._stats(operation).coalesced += 1
+
+    def record_retry(self, operation: Optional[str] = None) -> None:
+        with self._lock:
+            self._stats(operation).retries += 1
+
+    def record_error(self, operation: Optional[str] = None) -> None:
+        with self._lock:
+            self._stats(operation).errors += 1
+
+    def record_fallback(self, reason: str, operation: Optional[str] = None) -> None:
+        """Record that an operation fell back to non-AI processing"""
+        with self._lock:
+            fallbacks = self._stats(operation).fallbacks
+            fallbacks[reason] = fallbacks.get(reason, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Totals plus per-operation breakdown"""
+        with self._lock:
+            operations = {name: stats.to_dict() for name, stats in sorted(self._operations.items())}
+
+        totals: Dict[str, Any] = {}
+        for key in ('operations', 'calls', 'errors', 'retries', 'cache_hits', 'coalesced', 'streamed',
+                    'prompt_tokens', 'completion_tokens', 'total_tokens', 'fallback_count'):
+            totals[key] = sum(stats[key] for stats in operations.values())
+        totals['estimated_cost'] = round(sum(stats['estimated_cost'] for stats in operations.values()), 6)
+        totals['call_seconds'] = round(sum(stats['call_latency']['sum_seconds']
+                                           for stats in operations.values()), 4)
+
+        return {
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'totals': totals,
+            'operations': operations
+        }
+
+    def to_prometheus(self, prefix: str = 'ai') -> str:
+        """Render the snapshot in Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        counters = ('operations', 'calls', 'errors', 'retries', 'cache_hits', 'coalesced',
+                    'streamed', 'prompt_tokens', 'completion_tokens')
+        for counter in counters:
+            lines.append(f'# TYPE {prefix}_{counter}_total counter')
+            for name, stats in snapshot['operations'].items():
+                lines.append(f'{prefix}_{counter}_total{{operation="{name}"}} {stats[counter]}')
+
+        lines.append(f'# TYPE {prefix}_fallbacks_total counter')
+        for name, stats in snapshot['operations'].items():
+            for reason, count in sorted(stats['fallbacks'].items()):
+                lines.append(f'{prefix}_fallbacks_total{{operation="{name}",reason="{reason}"}} {count}')
+
+        for histogram in ('call_latency', 'operation_latency'):
+            metric = f'{prefix}_{histogram}_seconds'
+            lines.append(f'# TYPE {metric} histogram')
+            for name, stats in snapshot['operations'].items():
+                data = stats[histogram]
+                cumulative = 0
+                for bound, count in data['buckets'].items():
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{operation="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{operation="{name}"}} {data["sum_seconds"]}')
+                lines.append(f'{metric}_count{{operation="{name}"}} {data["count"]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def instrumented(operation: str):
+    """Decorator for AIService methods: scope calls to ``operation`` and time it
+
+    The instance must expose a ``telemetry`` attribute (an AITelemetry).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.time()
+            with operation_scope(operation):
+                try:
+                    return func(self, *args, **kwargs)
+                finally:
+                    telemetry = getattr(self, 'telemetry', None)
+                    if telemetry is not None:
+                        telemetry.record_operation(time.time() - start, operation)
+        return wrapper
+    return decorator
@@ -0,0 +1,176 @@
+"""
+Response Utilities
+Fast JSON encoding, response compression and result views.
+"""
+
+import gzip
+import json
+from typing import Any, Dict, Optional
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+import structlog
+
+from app.services.document_result import expand_result
+
+# Try to import orjson and brotli, fallback to the standard library if not available
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+logger = structlog.get_logger()
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json', 'text/html', 'text/plain', 'text/css', 'text/csv',
+    'application/javascript', 'image/svg+xml'
+})
+
+RESULT_VIEWS = ('summary', 'fields', 'full', 'compact')
+
+# Top-level result keys kept by the summary view
+SUMMARY_KEYS = ('processing_id', 'file_path', 'success', 'start_time', 'end_time',
+                'processing_time', 'errors', 'warnings', 'error', 'result_cache')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson when it is installed
+
+    orjson serializes dataclasses, datetimes, UUIDs and numpy values natively
+    and is several times faster than the standard encoder on large results.
+    Keys keep insertion order; anything orjson rejects (e.g. integers wider
+    than 64 bits) falls back to the standard encoder.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self._encode(obj, **kwargs).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if HAS_ORJSON and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if self.compact is False or (self.compact is None and self._app.debug) else None
+        return self._app.response_class(self._encode(obj, indent=indent) + b'\n', mimetype=self.mimetype)
+
+    def _encode(self, obj: Any, indent: Optional[int] = None, **kwargs: Any) -> bytes:
+        if HAS_ORJSON and not kwargs:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except orjson.JSONEncodeError as e:
+                logger.debug("orjson encoding failed, using standard encoder", error=str(e))
+
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, indent=indent, **kwargs).encode('utf-8')
+
+
+def setup_compression(app):
+    """Compress responses with brotli or gzip according to Accept-Encoding"""
+    encodings = ['br', 'gzip'] if HAS_BROTLI else ['gzip']
+
+    @app.after_request
+    def compress_response(response):
+        """Compress large, buffered text responses the client accepts"""
+        if (not app.config.get('COMPRESSION_ENABLED', True)
+                or response.direct_passthrough
+                or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings)
+        data = response.get_data()
+        if encoding is None or len(data) < app.config.get('COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        try:
+            if encoding == 'br':
+                compressed = brotli.compress(data, quality=app.config.get('COMPRESSION_BROTLI_QUALITY', 4))
+            else:
+                compressed = gzip.compress(data, compresslevel=app.config.get('COMPRESSION_GZIP_LEVEL', 6))
+        except Exception as e:
+            logger.warning("Response compression failed", encoding=encoding, error=str(e))
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def requested_view(data: Optional[Dict[str, Any]] = None, default: str = 'full') -> str:
+    """Result view named by the ``view`` query parameter or JSON body field"""
+    view = request.args.get('view') or (data or {}).get('view') or default
+    if view not in RESULT_VIEWS:
+        raise ValueError(f"Unknown view '{view}'. Expected one of: {', '.join(RESULT_VIEWS)}")
+    return view
+
+
+def _quality_score(quality: Any) -> Any:
+    if quality is None or isinstance(quality, (int, float)):
+        return quality
+    if isinstance(quality, dict):
+        return quality.get('overall_score')
+    return getattr(quality, 'overall_score', None)
+
+
+def _field_count(extracted_data: Any) -> int:
+    if not isinstance(extracted_data, dict):
+        return 0
+    data = extracted_data.get('enhanced_data') or extracted_data.get('raw_data') or extracted_data
+    return len(data) if isinstance(data, dict) else 0
+
+
+def result_view(results: Optional[Dict[str, Any]], view: str = 'full') -> Optional[Dict[str, Any]]:
+    """
+    Reduce pipeline results to the requested view
+
+    ``full`` returns everything in the nested layout, with words and raw
+    data in every stage that produced them. ``compact`` (opt-in) returns the
+    stored layout, with OCR words in one columnar table that stages refer to
+    by row range. ``fields`` returns the extracted data and metadata without
+    the per-stage output, and ``summary`` only the status, document type,
+    quality score and per-stage success flags.
+    """
+    if view == 'compact' or not isinstance(results, dict):
+        return results
+    if view == 'full':
+        return expand_result(results)
+
+    metadata = results.get('metadata') or {}
+    summary = {key: results[key] for key in SUMMARY_KEYS if key in results}
+    summary.update({
+        'document_type': metadata.get('document_type'),
+        'quality_score': _quality_score(metadata.get('quality_score')),
+        'field_count': _field_count(results.get('extracted_data')),
+        'stages': {
+            name: stage.get('success') if isinstance(stage, dict) else None
+            for name, stage in (results.get('stages') or {}).items()
+        },
+        'view': view
+    })
+    if view == 'summary':
+        return summary
+
+    summary['extracted_data'] = results.get('extracted_data', {})
+    summary['metadata'] = metadata
+    return summary
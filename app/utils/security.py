@@ -6,6 +6,8 @@ Application security and headers.
 from flask import request, g
 import structlog
 import time
+import os
+import stat
 
 logger = structlog.get_logger()
 
@@ -41,3 +43,21 @@ def setup_security_headers(app):
                    duration=duration,
                    path=request.path)
         return response
+
+def ensure_private_directory(path):
+    """Create a directory only this user can access, or check an existing one
+    
+    For caches and lease databases whose contents the application trusts.
+    
+    Raises:
+        PermissionError: If the path is not a directory owned by this user
+            with mode 0700 (no group or other access)
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if os.name == 'nt':
+        return path
+    
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise PermissionError(f"{path} must be a directory owned by this user with mode 0700")
+    return path
@@ -0,0 +1,132 @@
+"""
+Streaming upload ingest.
+Writes uploads to disk in fixed-size chunks while hashing and validating them.
+"""
+
+import os
+import hashlib
+import tempfile
+from typing import BinaryIO, NamedTuple, Optional
+
+import structlog
+
+# Try to import python-magic, fallback to basic validation if not available
+try:
+    import magic
+    HAS_MAGIC = True
+except ImportError:
+    HAS_MAGIC = False
+
+logger = structlog.get_logger()
+
+HEADER_SIZE = 1024
+MIN_PDF_SIZE = 100  # Minimum viable PDF size
+
+
+class UploadRejected(ValueError):
+    """The upload failed validation; the message is safe to return to the client"""
+
+
+class IngestedFile(NamedTuple):
+    filename: str
+    filepath: str
+    sha256: str
+    size: int
+    duplicate: bool  # Identical content was already stored
+
+
+def check_pdf_header(header: bytes) -> Optional[str]:
+    """Validate the first bytes of a PDF; returns an error message or None"""
+    if not header.startswith(b'%PDF-'):
+        return "Invalid PDF signature"
+
+    # If python-magic is available, perform MIME type check
+    if HAS_MAGIC:
+        try:
+            mime_type = magic.from_buffer(header, mime=True)
+            if mime_type != 'application/pdf':
+                return f"Invalid file type: {mime_type}. Expected: application/pdf"
+        except Exception as e:
+            logger.warning("Magic library check failed", error=str(e))
+
+    # Basic PDF version check
+    if not header[:8].decode('ascii', errors='ignore').startswith('%PDF-1.'):
+        return "Unsupported PDF version"
+
+    return None
+
+
+def ingest_pdf(stream: BinaryIO, upload_folder: str, max_size: int,
+               chunk_size: int = 64 * 1024) -> IngestedFile:
+    """
+    Copy a PDF upload to ``upload_folder`` under its content-addressed name
+
+    The stream is read ``chunk_size`` bytes at a time: the header is validated
+    from the first bytes, the SHA-256 is updated as each chunk is written to
+    a temporary file in the same folder, and the finished file is renamed
+    atomically to ``<sha256>.pdf``. Memory use does not depend on file size.
+
+    Args:
+        stream: Readable binary stream (e.g. ``FileStorage.stream``)
+        upload_folder: Destination directory
+        max_size: Maximum accepted size in bytes
+        chunk_size: Bytes per read
+
+    Returns:
+        IngestedFile with the stored name, path, hex digest, size and whether
+        the content was already stored
+
+    Raises:
+        UploadRejected: If the content is not an acceptable PDF
+    """
+    os.makedirs(upload_folder, mode=0o755, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    header = b''
+
+    fd, temp_path = tempfile.mkstemp(prefix='.upload-', suffix='.part', dir=upload_folder)
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+
+                if len(header) < HEADER_SIZE:
+                    header += chunk[:HEADER_SIZE - len(header)]
+                    if len(header) >= HEADER_SIZE:
+                        error = check_pdf_header(header)
+                        if error:
+                            raise UploadRejected(error)
+
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadRejected(f"File too large. Maximum size: {max_size} bytes")
+
+                digest.update(chunk)
+                temp_file.write(chunk)
+
+        if size < MIN_PDF_SIZE:
+            raise UploadRejected("File too small to be a valid PDF")
+        if len(header) < HEADER_SIZE:
+            error = check_pdf_header(header)
+            if error:
+                raise UploadRejected(error)
+
+        file_hash = digest.hexdigest()
+        filename = f"{file_hash}.pdf"
+        filepath = os.path.join(upload_folder, filename)
+        duplicate = os.path.exists(filepath)
+        if duplicate:
+            os.unlink(temp_path)
+        else:
+            os.chmod(temp_path, 0o644)  # Read-only for group and others
+            os.replace(temp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    return IngestedFile(filename, filepath, file_hash, size, duplicate)
@@ -17,6 +17,7 @@ class Config:
         else:
             SECRET_KEY = 'development-key-only-not-for-production'
     MAX_CONTENT_LENGTH = 32 * 1024 * 1024  # 32MB max file size for large PDFs
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 64 * 1024))  # Bytes read per chunk when streaming uploads to disk
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     HOST = os.environ.get('FLASK_HOST', '0.0.0.0')
     PORT = int(os.environ.get('PORT', os.environ.get('FLASK_PORT', 5000)))  # Support both PORT and FLASK_PORT
@@ -33,6 +34,32 @@ class Config:
     CELERY_TASK_TIME_LIMIT = 300  # 5 minutes
     CELERY_TASK_SOFT_TIME_LIMIT = 240  # 4 minutes
     
+    # Background document processing jobs
+    JOB_BACKEND = os.environ.get('JOB_BACKEND', 'thread')  # 'thread' (in-process pool) or 'celery'
+    JOB_STORE = os.environ.get('JOB_STORE', 'database')  # 'database' (processing_sessions) or 'memory'
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+    JOB_PROGRESS_MIN_INTERVAL = float(os.environ.get('JOB_PROGRESS_MIN_INTERVAL', 0.5))  # Seconds between progress writes
+    EVENT_BUS = os.environ.get('EVENT_BUS', 'memory')  # 'memory' (thread jobs) or 'redis' (needed for celery jobs)
+    EVENT_BUS_HISTORY = int(os.environ.get('EVENT_BUS_HISTORY', 200))  # Events kept per job for late subscribers
+    EVENT_BUS_RETENTION = int(os.environ.get('EVENT_BUS_RETENTION', 3600))  # Seconds to keep finished jobs' events
+    SSE_HEARTBEAT_INTERVAL = float(os.environ.get('SSE_HEARTBEAT_INTERVAL', 15))  # Seconds between keep-alive comments
+    BATCH_MAX_CONCURRENCY = int(os.environ.get('BATCH_MAX_CONCURRENCY', 2))  # Documents of one batch processed at once
+    BATCH_MAX_DOCUMENTS = int(os.environ.get('BATCH_MAX_DOCUMENTS', 500))
+    PERSISTENCE_BATCH_SIZE = int(os.environ.get('PERSISTENCE_BATCH_SIZE', 500))  # Rows per bulk upsert statement
+    
+    # Analytics events (written in batches by a background thread)
+    ANALYTICS_ENABLED = os.environ.get('ANALYTICS_ENABLED', 'true').lower() == 'true'  # 'false' writes events synchronously
+    ANALYTICS_BATCH_SIZE = int(os.environ.get('ANALYTICS_BATCH_SIZE', 200))  # Events per insert statement
+    ANALYTICS_FLUSH_INTERVAL = float(os.environ.get('ANALYTICS_FLUSH_INTERVAL', 2.0))  # Max seconds an event waits
+    ANALYTICS_QUEUE_SIZE = int(os.environ.get('ANALYTICS_QUEUE_SIZE', 10000))  # Events beyond this are dropped
+    
+    # API responses
+    RESULT_DEFAULT_VIEW = os.environ.get('RESULT_DEFAULT_VIEW', 'full')  # 'summary', 'fields', 'full' or 'compact'
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # Smaller bodies are sent as-is
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))  # Used when brotli is installed
+    
     # Production settings
     FLASK_ENV = os.environ.get('FLASK_ENV', 'development')
     TESTING = os.environ.get('TESTING', 'False').lower() == 'true'
@@ -40,6 +67,7 @@ class Config:
     # File paths
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
     TEMP_FOLDER = os.path.join(os.getcwd(), 'temp')
+    STATE_FOLDER = os.environ.get('STATE_FOLDER') or os.path.join(os.getcwd(), 'instance', 'state')  # Private (0700) caches and leases
     
     # OCR settings
     OCR_DPI = 400
@@ -65,9 +93,62 @@ class Config:
     
     # OpenAI settings
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
+    OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL') or None  # e.g. the local mock server for load tests
     OPENAI_MODEL = 'gpt-3.5-turbo'
     OPENAI_TEMPERATURE = 0.1
     OPENAI_MAX_TOKENS = 1000
+    OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get('OPENAI_REQUESTS_PER_MINUTE', 500))
+    OPENAI_TOKENS_PER_MINUTE = int(os.environ.get('OPENAI_TOKENS_PER_MINUTE', 90000))
+    OPENAI_MAX_IN_FLIGHT = int(os.environ.get('OPENAI_MAX_IN_FLIGHT', 8))
+    OPENAI_STRUCTURED_OUTPUTS = os.environ.get('OPENAI_STRUCTURED_OUTPUTS', 'false').lower() == 'true'
+    AI_FUSED_ANALYSIS = os.environ.get('AI_FUSED_ANALYSIS', 'true').lower() == 'true'
+    AI_PROMPT_TOKEN_BUDGET = int(os.environ.get('AI_PROMPT_TOKEN_BUDGET', 3000))  # Tokens for serialized data per prompt
+    AI_LATENCY_BUDGET_SECONDS = float(os.environ.get('AI_LATENCY_BUDGET_SECONDS', 60))  # Per document request
+    AI_CALL_TIMEOUT_SECONDS = float(os.environ.get('AI_CALL_TIMEOUT_SECONDS', 20))  # Cap for one call incl. retries
+    AI_MIN_CALL_SECONDS = float(os.environ.get('AI_MIN_CALL_SECONDS', 1.0))  # Skip calls with less budget left
+    AI_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('AI_BREAKER_FAILURE_THRESHOLD', 5))
+    AI_BREAKER_RESET_SECONDS = float(os.environ.get('AI_BREAKER_RESET_SECONDS', 30))
+    AI_BREAKER_SLOW_CALL_SECONDS = float(os.environ.get('AI_BREAKER_SLOW_CALL_SECONDS', 15))
+    AI_HEDGING_ENABLED = os.environ.get('AI_HEDGING_ENABLED', 'false').lower() == 'true'
+    AI_HEDGE_MIN_SAMPLES = int(os.environ.get('AI_HEDGE_MIN_SAMPLES', 20))  # Latency samples before p95 hedging
+    AI_STREAMING = os.environ.get('AI_STREAMING', 'false').lower() == 'true'  # Push fields to progress as they stream
+    AI_CONFIDENCE_GATE = os.environ.get('AI_CONFIDENCE_GATE', 'false').lower() == 'true'  # Skip the model for fields OCR got right
+    AI_GATE_CONFIDENCE_THRESHOLD = float(os.environ.get('AI_GATE_CONFIDENCE_THRESHOLD', 90.0))  # OCR confidence (0-100)
+    
+    # LLM response cache settings
+    LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH') or os.path.join(STATE_FOLDER, 'llm_cache.sqlite3')
+    LLM_CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+    LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 5000))
+    
+    # Whole-document result cache keyed by file content hash, pipeline version and regions
+    RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+    RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH') or os.path.join(STATE_FOLDER, 'result_cache.sqlite3')
+    RESULT_CACHE_TTL_SECONDS = int(os.environ.get('RESULT_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+    RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 2000))
+    
+    # Per-document session cache (page images, region suggestions, OCR) for the interactive API flow
+    SESSION_CACHE_BACKEND = os.environ.get('SESSION_CACHE_BACKEND', 'filesystem')  # 'filesystem' (shared) or 'memory'
+    SESSION_CACHE_DIR = os.environ.get('SESSION_CACHE_DIR') or os.path.join(STATE_FOLDER, 'sessions')
+    SESSION_CACHE_TTL_SECONDS = int(os.environ.get('SESSION_CACHE_TTL_SECONDS', 3600))
+    SESSION_CACHE_MAX_BYTES = int(os.environ.get('SESSION_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    
+    # In-flight request coalescing for OCR and OpenAI calls
+    SINGLE_FLIGHT_ENABLED = os.environ.get('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+    SINGLE_FLIGHT_BACKEND = os.environ.get('SINGLE_FLIGHT_BACKEND', 'thread')  # 'thread' or 'sqlite' (cross-worker)
+    SINGLE_FLIGHT_DB_PATH = os.environ.get('SINGLE_FLIGHT_DB_PATH') or os.path.join(STATE_FOLDER, 'single_flight.sqlite3')
+    SINGLE_FLIGHT_LEASE_SECONDS = int(os.environ.get('SINGLE_FLIGHT_LEASE_SECONDS', 120))
+    SINGLE_FLIGHT_WAIT_TIMEOUT = int(os.environ.get('SINGLE_FLIGHT_WAIT_TIMEOUT', 300))
+    
+    # EAST text detection settings
+    EAST_MODEL_PATH = os.environ.get('EAST_MODEL_PATH') or None
+    EAST_POOL_SIZE = int(os.environ.get('EAST_POOL_SIZE', 2))
+    EAST_NUM_THREADS = int(os.environ['EAST_NUM_THREADS']) if os.environ.get('EAST_NUM_THREADS') else None
+    EAST_WARMUP = os.environ.get('EAST_WARMUP', 'false').lower() == 'true'
+    
+    # Service initialization: build services on first use, optionally warming some at startup
+    LAZY_SERVICES = os.environ.get('LAZY_SERVICES', 'true').lower() == 'true'
+    SERVICE_WARMUP = os.environ.get('SERVICE_WARMUP', '')  # '', 'all' or e.g. 'ai_service,pdf_service'
     
     # ML settings
     ML_MODEL_PATH = 'ml_model.joblib'
@@ -205,6 +286,9 @@ class TestingConfig(Config):
     TESTING = True
     WTF_CSRF_ENABLED = False
     DATABASE_URL = 'sqlite:///:memory:'
+    SESSION_CACHE_BACKEND = 'memory'
+    RESULT_CACHE_ENABLED = False
+    ANALYTICS_ENABLED = False
 
 
 # Configuration mapping
@@ -23,18 +23,26 @@ CREATE TABLE IF NOT EXISTS documents (
 CREATE TABLE IF NOT EXISTS processing_sessions (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     document_id UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    batch_id VARCHAR(64),
     session_status VARCHAR(50) DEFAULT 'started',
     progress INTEGER DEFAULT 0,
     current_stage VARCHAR(100),
     stage_message TEXT,
     classification_results JSONB,
     quality_score NUMERIC(5,2),
+    results JSONB,
+    error_message TEXT,
     started_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     completed_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Columns added for background processing jobs (existing databases)
+ALTER TABLE processing_sessions ADD COLUMN IF NOT EXISTS results JSONB;
+ALTER TABLE processing_sessions ADD COLUMN IF NOT EXISTS error_message TEXT;
+ALTER TABLE processing_sessions ADD COLUMN IF NOT EXISTS batch_id VARCHAR(64);
+
 -- Regions table to store document region information
 CREATE TABLE IF NOT EXISTS document_regions (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -87,28 +95,65 @@ CREATE TABLE IF NOT EXISTS analytics (
     timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Daily per-event-type rollups of analytics, maintained as events are written
+CREATE TABLE IF NOT EXISTS analytics_daily_rollups (
+    day DATE NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    timed_count INTEGER NOT NULL DEFAULT 0,
+    total_processing_time_ms BIGINT NOT NULL DEFAULT 0,
+    min_processing_time_ms INTEGER,
+    max_processing_time_ms INTEGER,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (day, event_type)
+);
+
+-- Processing time histogram per day and event type (10% buckets) for percentiles
+CREATE TABLE IF NOT EXISTS analytics_daily_latency_buckets (
+    day DATE NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    bucket INTEGER NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, event_type, bucket)
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_documents_created_at ON documents(created_at);
-CREATE INDEX IF NOT EXISTS idx_documents_processing_status ON documents(processing_status);
+CREATE INDEX IF NOT EXISTS idx_documents_status_created ON documents(processing_status, created_at);
 CREATE INDEX IF NOT EXISTS idx_documents_document_type ON documents(document_type);
 
-CREATE INDEX IF NOT EXISTS idx_processing_sessions_document_id ON processing_sessions(document_id);
-CREATE INDEX IF NOT EXISTS idx_processing_sessions_status ON processing_sessions(session_status);
+-- (document_id, session_status) serves get_or_create_processing_session and the document_id foreign key
+CREATE INDEX IF NOT EXISTS idx_processing_sessions_document_status ON processing_sessions(document_id, session_status);
+CREATE INDEX IF NOT EXISTS idx_processing_sessions_batch_created ON processing_sessions(batch_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_processing_sessions_status_created ON processing_sessions(session_status, created_at);
 CREATE INDEX IF NOT EXISTS idx_processing_sessions_created_at ON processing_sessions(created_at);
 
-CREATE INDEX IF NOT EXISTS idx_document_regions_session_id ON document_regions(processing_session_id);
 CREATE INDEX IF NOT EXISTS idx_document_regions_page ON document_regions(page_number);
 CREATE INDEX IF NOT EXISTS idx_document_regions_type ON document_regions(region_type);
 
-CREATE INDEX IF NOT EXISTS idx_extraction_results_region_id ON extraction_results(region_id);
 CREATE INDEX IF NOT EXISTS idx_extraction_results_method ON extraction_results(processing_method);
 CREATE INDEX IF NOT EXISTS idx_extraction_results_validation ON extraction_results(validation_status);
 
-CREATE INDEX IF NOT EXISTS idx_export_history_session_id ON export_history(processing_session_id);
+-- Upsert keys for bulk persistence of reprocessed sessions
+CREATE UNIQUE INDEX IF NOT EXISTS uq_document_regions_session_region ON document_regions(processing_session_id, region_name, page_number);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_extraction_results_region_method ON extraction_results(region_id, processing_method);
+
+CREATE INDEX IF NOT EXISTS idx_export_history_session_created ON export_history(processing_session_id, created_at);
 CREATE INDEX IF NOT EXISTS idx_export_history_created_at ON export_history(created_at);
 
-CREATE INDEX IF NOT EXISTS idx_analytics_event_type ON analytics(event_type);
+CREATE INDEX IF NOT EXISTS idx_analytics_event_type_timestamp ON analytics(event_type, timestamp);
 CREATE INDEX IF NOT EXISTS idx_analytics_timestamp ON analytics(timestamp);
+CREATE INDEX IF NOT EXISTS idx_analytics_session_id ON analytics(session_id);
+
+-- Single-column indexes whose column leads a composite or unique index above
+DROP INDEX IF EXISTS idx_documents_processing_status;
+DROP INDEX IF EXISTS idx_processing_sessions_document_id;
+DROP INDEX IF EXISTS idx_processing_sessions_status;
+DROP INDEX IF EXISTS idx_processing_sessions_batch_id;
+DROP INDEX IF EXISTS idx_document_regions_session_id;
+DROP INDEX IF EXISTS idx_extraction_results_region_id;
+DROP INDEX IF EXISTS idx_export_history_session_id;
+DROP INDEX IF EXISTS idx_analytics_event_type;
 
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -709,6 +709,43 @@ class ApiService {
     }
   }
 
+  // Live processing progress over server-sent events; returns a function that closes the stream.
+  // The complete event carries the status only; fetch results with getProcessingStatus.
+  subscribeToProcessing(
+    processingId: string,
+    handlers: {
+      onEvent: (event: 'stage' | 'progress' | 'partial', data: any) => void;
+      onComplete: (data: any) => void;
+      onError: (error: Error) => void;
+    }
+  ): () => void {
+    const source = new EventSource(`${API_BASE_URL}/process-stream/${processingId}`);
+    const close = () => source.close();
+
+    (['stage', 'progress', 'partial'] as const).forEach((type) => {
+      source.addEventListener(type, (event) => {
+        handlers.onEvent(type, JSON.parse((event as MessageEvent).data));
+      });
+    });
+    source.addEventListener('complete', (event) => {
+      close();
+      handlers.onComplete(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('failed', (event) => {
+      close();
+      const data = JSON.parse((event as MessageEvent).data);
+      handlers.onError(new Error(data.error || data.message || 'Processing failed'));
+    });
+    // EventSource reconnects on its own (resuming via Last-Event-ID); only give up once it stops trying
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        handlers.onError(new Error('Processing stream closed'));
+      }
+    };
+
+    return close;
+  }
+
   // Validate Processing Results
   async validateProcessing(
     processingResults: Record<string, any>
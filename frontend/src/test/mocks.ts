@@ -111,6 +111,7 @@ export const mockApiService = {
   getUploadStatus: vi.fn(),
   processDocument: vi.fn(),
   getProcessingStatus: vi.fn(),
+  subscribeToProcessing: vi.fn(() => () => {}),
   getResults: vi.fn(),
   exportResults: vi.fn(),
   healthCheck: vi.fn().mockResolvedValue({ success: true, status: 'healthy' }),
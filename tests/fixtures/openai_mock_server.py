@@ -0,0 +1,597 @@
+"""
+OpenAI Mock Server
+Local stand-in for the OpenAI chat-completions API used by load, latency and
+integration tests.
+
+Implements the endpoints the application calls:
+    POST /v1/chat/completions   (JSON mode, json_schema, streaming with usage)
+    GET  /v1/models
+
+plus control endpoints for test harnesses:
+    GET  /mock/stats            request, error and latency counters
+    POST /mock/config           change latency/fault settings at runtime
+    POST /mock/reset            clear counters
+
+Responses are deterministic canned JSON chosen from the prompt: the
+operation (classification, enhancement, validation, extraction, fused
+analysis, batched field correction, insights...) and the real estate
+document type mentioned in it.
+
+Latency is drawn from a configurable distribution:
+    fixed:0.5   uniform:0.2,1.5   normal:0.8,0.2   lognormal:0.8,0.5 (median, sigma)
+and faults can be injected with error_rate (HTTP 500), rate_limit_rate
+(HTTP 429 with retry-after-ms) and timeout_rate (hang for hang_seconds).
+
+Usage:
+    python -m tests.fixtures.openai_mock_server --port 8089 --latency lognormal:0.8,0.5 --rate-limit-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=mock python app.py
+
+In-process (tests):
+    with OpenAIMockServer(latency='fixed:0') as server:
+        client = OpenAI(base_url=server.base_url, api_key='mock')
+"""
+
+import re
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+DOCUMENT_TYPES = (
+    'lease_agreement', 'rent_roll', 'offering_memo', 'comparable_sales',
+    'purchase_contract', 'property_listing'
+)
+
+CANNED_FIELDS: Dict[str, Dict[str, Any]] = {
+    'lease_agreement': {
+        'tenant_name': 'John Smith',
+        'landlord_name': 'Main Street Properties LLC',
+        'property_address': '123 Main Street, Suite 400, Springfield, IL 62701',
+        'monthly_rent': '$2,500.00',
+        'security_deposit': '$5,000.00',
+        'lease_start_date': '2024-01-01',
+        'lease_end_date': '2026-12-31',
+        'square_footage': '1,850'
+    },
+    'rent_roll': {
+        'property_name': 'Oakwood Apartments',
+        'property_address': '450 Oak Avenue, Springfield, IL 62704',
+        'total_units': '24',
+        'occupied_units': '22',
+        'total_monthly_rent': '$38,400.00',
+        'occupancy_rate': '91.7%'
+    },
+    'offering_memo': {
+        'property_name': 'Riverside Plaza',
+        'property_address': '800 River Road, Springfield, IL 62702',
+        'asking_price': '$12,500,000',
+        'cap_rate': '6.25%',
+        'noi': '$781,250',
+        'square_footage': '64,000',
+        'year_built': '1998'
+    },
+    'comparable_sales': {
+        'subject_property': '123 Main Street, Springfield, IL 62701',
+        'comparable_count': '3',
+        'average_price_per_sqft': '$185.40',
+        'average_cap_rate': '6.4%'
+    },
+    'purchase_contract': {
+        'buyer_name': 'Acme Holdings Inc',
+        'seller_name': 'Jane Doe',
+        'property_address': '77 Elm Street, Springfield, IL 62703',
+        'purchase_price': '$850,000.00',
+        'earnest_money': '$25,000.00',
+        'closing_date': '2024-06-30'
+    },
+    'property_listing': {
+        'property_address': '15 Lake View Drive, Springfield, IL 62711',
+        'listing_price': '$425,000',
+        'property_type': 'residential',
+        'square_footage': '2,400',
+        'bedrooms': '4',
+        'bathrooms': '2.5'
+    }
+}
+
+GENERIC_FIELDS = {
+    'property_address': '123 Main Street, Springfield, IL 62701',
+    'document_date': '2024-01-15'
+}
+
+# System-prompt markers -> operation, checked in order
+OPERATION_MARKERS: Tuple[Tuple[str, str], ...] = (
+    ('in one pass', 'fused'),
+    ('field snippets', 'batch_correction'),
+    ('classification expert', 'classify'),
+    ('classify', 'classify'),
+    ('validation expert', 'validate'),
+    ('enhance and standardize', 'enhance'),
+    ('suggest accurate corrections', 'suggest_corrections'),
+    ('ocr error correction', 'ocr_correction'),
+    ('extraction expert', 'extract'),
+    ('investment analyst', 'insights'),
+)
+
+PROPERTY_TYPES = {
+    'lease_agreement': 'office', 'rent_roll': 'multifamily', 'offering_memo': 'retail',
+    'comparable_sales': 'office', 'purchase_contract': 'residential', 'property_listing': 'residential'
+}
+
+
+def parse_latency(spec: str):
+    """Parse a latency spec into a sampler taking a random.Random"""
+    name, _, args = (spec or 'fixed:0').partition(':')
+    values = [float(v) for v in args.split(',') if v.strip()] if args else []
+
+    if name == 'fixed':
+        seconds = values[0] if values else 0.0
+        return lambda rng: seconds
+    if name == 'uniform':
+        low, high = values
+        return lambda rng: rng.uniform(low, high)
+    if name == 'normal':
+        mean, stddev = values
+        return lambda rng: max(0.0, rng.gauss(mean, stddev))
+    if name == 'lognormal':
+        median, sigma = values
+        return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def message_text(messages: List[Dict[str, Any]]) -> str:
+    """Concatenate message contents, including the text parts of multimodal messages"""
+    parts = []
+    for message in messages:
+        content = message.get('content')
+        if isinstance(content, list):
+            parts.extend(part.get('text', '') for part in content if isinstance(part, dict))
+        elif content:
+            parts.append(str(content))
+    return '\n'.join(parts)
+
+
+def detect_operation(messages: List[Dict[str, Any]]) -> str:
+    system = ' '.join(str(m.get('content', '')) for m in messages if m.get('role') == 'system').lower()
+    text = system or message_text(messages).lower()
+    for marker, operation in OPERATION_MARKERS:
+        if marker in text:
+            return operation
+    return 'generic'
+
+
+def detect_document_type(text: str) -> str:
+    """Document type named in the prompt
+
+    Plain-language mentions ("Rent Roll") come from document text and win over
+    identifiers ("rent_roll"), which prompts also use when listing the options.
+    """
+    lowered = text.lower()
+    for document_type in DOCUMENT_TYPES:
+        if document_type.replace('_', ' ') in lowered:
+            return document_type
+    for document_type in DOCUMENT_TYPES:
+        if document_type in lowered:
+            return document_type
+    return 'unknown'
+
+
+def clean_snippet(text: str) -> str:
+    """Deterministic OCR-style cleanup used for canned corrections"""
+    text = ' '.join(str(text).split())
+    previous = None
+    # Repeat so runs like "5OO" are fixed letter by letter
+    while previous != text:
+        previous = text
+        text = re.sub(r'(?<=\d)[Oo]|[Oo](?=\d)', '0', text)
+        text = re.sub(r'(?<=\d)[lI]|[lI](?=\d)', '1', text)
+    return text
+
+
+def example_from_schema(schema: Dict[str, Any]) -> Any:
+    """Minimal instance of a JSON schema, for json_schema requests without a canned answer"""
+    schema_type = schema.get('type')
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != 'null'), 'null')
+    if 'enum' in schema:
+        return schema['enum'][0]
+    if schema_type == 'object':
+        return {key: example_from_schema(value) for key, value in schema.get('properties', {}).items()}
+    if schema_type == 'array':
+        return []
+    if schema_type in ('number', 'integer'):
+        return 0.9
+    if schema_type == 'boolean':
+        return True
+    if schema_type == 'string':
+        return 'mock'
+    return None
+
+
+def canned_response(operation: str, document_type: str, text: str,
+                    response_format: Optional[Dict[str, Any]]) -> Any:
+    """Deterministic answer for an operation and document type"""
+    fields = CANNED_FIELDS.get(document_type, GENERIC_FIELDS)
+    validation = {
+        'valid': True,
+        'errors': [],
+        'warnings': [],
+        'suggestions': [],
+        'confidence': 0.92,
+        'field_scores': {name: 0.9 for name in fields}
+    }
+    structured = {
+        'extracted_fields': {
+            name: {'value': value, 'confidence': 0.9, 'location': 'document'}
+            for name, value in fields.items()
+        },
+        'document_summary': f"Mock {document_type.replace('_', ' ')}",
+        'extraction_confidence': 0.9
+    }
+
+    if operation == 'classify':
+        return {
+            'document_type': document_type if document_type != 'unknown' else 'lease_agreement',
+            'property_type': PROPERTY_TYPES.get(document_type, 'office'),
+            'purpose': 'analysis',
+            'entities': {'addresses': [fields.get('property_address', '')], 'companies': [], 'people': []},
+            'confidence': 0.93,
+            'keywords': [document_type],
+            'language': 'en'
+        }
+    if operation == 'enhance':
+        return dict(fields)
+    if operation == 'validate':
+        return validation
+    if operation == 'extract':
+        return structured
+    if operation == 'fused':
+        return {'enhanced_data': dict(fields), 'validation': validation, 'structured': structured}
+    if operation == 'batch_correction':
+        match = re.search(r'Snippets:\n(.*)', text)
+        snippets = json.loads(match.group(1)) if match else []
+        return {'corrections': {
+            snippet['id']: {'value': clean_snippet(snippet.get('text', '')), 'confidence': 0.9,
+                            'explanation': 'Mock OCR correction'}
+            for snippet in snippets
+        }}
+    if operation == 'suggest_corrections':
+        return {'corrections': {}, 'confidence_scores': {}, 'explanations': {}}
+    if operation == 'ocr_correction':
+        match = re.search(r'Original text:\n"?(.*?)"?\n\n', text, re.S)
+        original = match.group(1) if match else ''
+        return {'corrected_text': clean_snippet(original), 'corrections_made': [], 'confidence': 0.9}
+    if operation == 'insights':
+        return {
+            'market_insights': ['Mock market observation'],
+            'financial_analysis': {'key_metrics': {}, 'performance_indicators': []},
+            'investment_potential': {'score': 7.0, 'factors': ['Mock factor']},
+            'recommendations': ['Mock recommendation'],
+            'risk_assessment': {'risk_level': 'medium', 'risk_factors': []}
+        }
+
+    if response_format and response_format.get('type') == 'json_schema':
+        return example_from_schema(response_format.get('json_schema', {}).get('schema', {}))
+    return dict(fields)
+
+
+class MockState:
+    """Mutable settings and counters shared by the handler threads"""
+
+    def __init__(self, latency: str = 'fixed:0', error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 timeout_rate: float = 0.0, hang_seconds: float = 30.0, stream_chunk_chars: int = 16,
+                 stream_chunk_delay: float = 0.0, retry_after_ms: int = 200, seed: Optional[int] = 0):
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.configure(latency=latency, error_rate=error_rate, rate_limit_rate=rate_limit_rate,
+                       timeout_rate=timeout_rate, hang_seconds=hang_seconds,
+                       stream_chunk_chars=stream_chunk_chars, stream_chunk_delay=stream_chunk_delay,
+                       retry_after_ms=retry_after_ms)
+        self.reset()
+
+    def configure(self, **settings) -> Dict[str, Any]:
+        with self.lock:
+            if 'latency' in settings:
+                self.latency_sampler = parse_latency(settings['latency'])
+            for key, value in settings.items():
+                setattr(self, key, value)
+            return self.settings()
+
+    def settings(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in (
+            'latency', 'error_rate', 'rate_limit_rate', 'timeout_rate', 'hang_seconds',
+            'stream_chunk_chars', 'stream_chunk_delay', 'retry_after_ms'
+        )}
+
+    def reset(self) -> None:
+        with self.lock:
+            self.stats = {
+                'requests': 0,
+                'completed': 0,
+                'streamed': 0,
+                'errors_injected': 0,
+                'rate_limited': 0,
+                'timeouts_injected': 0,
+                'by_operation': {},
+                'latency_seconds_total': 0.0
+            }
+
+    def draw(self) -> Tuple[str, float]:
+        """Pick this request's fault (None/'error'/'rate_limit'/'timeout') and latency"""
+        with self.lock:
+            roll = self.rng.random()
+            latency = self.latency_sampler(self.rng)
+        fault = None
+        if roll < self.rate_limit_rate:
+            fault = 'rate_limit'
+        elif roll < self.rate_limit_rate + self.error_rate:
+            fault = 'error'
+        elif roll < self.rate_limit_rate + self.error_rate + self.timeout_rate:
+            fault = 'timeout'
+        return fault, latency
+
+    def count(self, key: str, amount: float = 1) -> None:
+        with self.lock:
+            self.stats[key] += amount
+
+    def count_operation(self, operation: str) -> None:
+        with self.lock:
+            by_operation = self.stats['by_operation']
+            by_operation[operation] = by_operation.get(operation, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = json.loads(json.dumps(self.stats))
+        stats['settings'] = self.settings()
+        return stats
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """Request handler implementing the chat-completions subset"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'OpenAIMock/1.0'
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        logger.debug("Mock OpenAI request", line=format % args)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        return json.loads(body or b'{}')
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, error_type: str, code: Optional[str] = None,
+                    headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_json(status, {'error': {'message': message, 'type': error_type, 'param': None, 'code': code}},
+                        headers)
+
+    def do_GET(self):
+        path = self.path.split('?')[0].rstrip('/')
+        if path.endswith('/models'):
+            self._send_json(200, {'object': 'list', 'data': [
+                {'id': model, 'object': 'model', 'created': 0, 'owned_by': 'mock'}
+                for model in ('gpt-3.5-turbo', 'gpt-4o-mini', 'gpt-4o')
+            ]})
+        elif path == '/mock/stats':
+            self._send_json(200, self.state.snapshot())
+        else:
+            self._send_error(404, f"Unknown path {self.path}", 'invalid_request_error')
+
+    def do_POST(self):
+        path = self.path.split('?')[0].rstrip('/')
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_error(400, 'Request body is not valid JSON', 'invalid_request_error')
+            return
+
+        if path.endswith('/chat/completions'):
+            self._chat_completion(payload)
+        elif path == '/mock/config':
+            self._send_json(200, self.state.configure(**payload))
+        elif path == '/mock/reset':
+            self.state.reset()
+            self._send_json(200, {'reset': True})
+        else:
+            self._send_error(404, f"Unknown path {self.path}", 'invalid_request_error')
+
+    def _chat_completion(self, payload: Dict[str, Any]) -> None:
+        state = self.state
+        state.count('requests')
+        messages = payload.get('messages') or []
+        if not messages:
+            self._send_error(400, "'messages' is required", 'invalid_request_error')
+            return
+
+        fault, latency = state.draw()
+        if fault == 'rate_limit':
+            state.count('rate_limited')
+            self._send_error(429, 'Rate limit reached (mock)', 'requests', 'rate_limit_exceeded',
+                             {'retry-after-ms': str(state.retry_after_ms)})
+            return
+        if fault == 'timeout':
+            state.count('timeouts_injected')
+            time.sleep(state.hang_seconds)
+        elif fault == 'error':
+            state.count('errors_injected')
+            time.sleep(latency)
+            self._send_error(500, 'The server had an error processing your request (mock)', 'server_error')
+            return
+
+        text = message_text(messages)
+        operation = detect_operation(messages)
+        state.count_operation(operation)
+        response_format = payload.get('response_format')
+        answer = canned_response(operation, detect_document_type(text), text, response_format)
+        json_mode = response_format and response_format.get('type') in ('json_object', 'json_schema')
+        content = json.dumps(answer) if json_mode or not isinstance(answer, str) else answer
+
+        finish_reason = 'stop'
+        max_tokens = payload.get('max_tokens') or payload.get('max_completion_tokens')
+        if max_tokens and estimate_tokens(content) > max_tokens:
+            content = content[:max_tokens * 4]
+            finish_reason = 'length'
+
+        usage = {
+            'prompt_tokens': estimate_tokens(json.dumps(messages)),
+            'completion_tokens': estimate_tokens(content)
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+
+        with state.lock:
+            completion_id = f"chatcmpl-mock-{state.stats['requests']}"
+        model = payload.get('model', 'gpt-3.5-turbo')
+
+        if payload.get('stream'):
+            include_usage = (payload.get('stream_options') or {}).get('include_usage', False)
+            self._stream(completion_id, model, content, finish_reason, usage if include_usage else None, latency)
+        else:
+            time.sleep(latency)
+            self._send_json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'logprobs': None,
+                    'finish_reason': finish_reason
+                }],
+                'usage': usage
+            })
+        state.count('completed')
+        state.count('latency_seconds_total', latency)
+
+    def _stream(self, completion_id: str, model: str, content: str, finish_reason: str,
+                usage: Optional[Dict[str, int]], latency: float) -> None:
+        """Send the completion as server-sent events in HTTP chunked encoding"""
+        state = self.state
+        state.count('streamed')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def event(choices, usage_payload=None):
+            chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                     'model': model, 'choices': choices}
+            if usage_payload is not None or usage is not None:
+                chunk['usage'] = usage_payload
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+
+        # Latency is time to first token
+        time.sleep(latency)
+        event([{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}])
+        size = max(1, state.stream_chunk_chars)
+        for start in range(0, len(content), size):
+            if state.stream_chunk_delay:
+                time.sleep(state.stream_chunk_delay)
+            event([{'index': 0, 'delta': {'content': content[start:start + size]}, 'finish_reason': None}])
+        event([{'index': 0, 'delta': {}, 'finish_reason': finish_reason}])
+        if usage is not None:
+            event([], usage)
+        self._write_chunk("data: [DONE]\n\n")
+        self._write_chunk('')
+
+    def _write_chunk(self, data: str) -> None:
+        encoded = data.encode('utf-8')
+        self.wfile.write(f"{len(encoded):x}\r\n".encode('ascii') + encoded + b"\r\n")
+        self.wfile.flush()
+
+
+class OpenAIMockServer:
+    """Threaded mock server usable in-process (context manager) or from the command line"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, **settings):
+        self.state = MockState(**settings)
+        self.httpd = ThreadingHTTPServer((host, port), MockOpenAIHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'OpenAIMockServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                                        name='openai-mock', daemon=True)
+        self._thread.start()
+        logger.info("OpenAI mock server started", base_url=self.base_url, **self.state.settings())
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> 'OpenAIMockServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Local OpenAI-compatible mock server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', default='fixed:0',
+                        help='fixed:S | uniform:MIN,MAX | normal:MEAN,STD | lognormal:MEDIAN,SIGMA')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction answered with 429')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='Fraction that hang for --hang-seconds')
+    parser.add_argument('--hang-seconds', type=float, default=30.0)
+    parser.add_argument('--stream-chunk-chars', type=int, default=16)
+    parser.add_argument('--stream-chunk-delay', type=float, default=0.0)
+    parser.add_argument('--retry-after-ms', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = OpenAIMockServer(
+        host=args.host, port=args.port, latency=args.latency, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds, stream_chunk_chars=args.stream_chunk_chars,
+        stream_chunk_delay=args.stream_chunk_delay, retry_after_ms=args.retry_after_ms, seed=args.seed
+    )
+    print(f"OpenAI mock server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
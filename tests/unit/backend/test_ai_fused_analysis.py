@@ -0,0 +1,153 @@
+"""
+Tests for the fused single-call AI analysis used by the processing pipeline.
+"""
+
+import os
+import sys
+import json
+import time
+import pytest
+from types import SimpleNamespace
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai_service import AIService
+from app.services.resilience import CircuitBreaker, latency_budget
+
+
+class ScriptedClient:
+    """Fake OpenAI client returning queued response contents"""
+
+    def __init__(self, contents):
+        self.contents = list(contents)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, stream=False, **params):
+        self.calls.append(params)
+        content = self.contents.pop(0) if self.contents else '{}'
+        if isinstance(content, Exception):
+            raise content
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50)
+        if stream:
+            delta = SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason='stop')
+            return iter([SimpleNamespace(choices=[delta], usage=usage)])
+        choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop')
+        return SimpleNamespace(choices=[choice], usage=usage)
+
+
+def make_service(contents, model='gpt-3.5-turbo'):
+    service = AIService()
+    service.model = model
+    service.client = ScriptedClient(contents)
+    service.dispatcher = None
+    service.response_cache = None
+    service.single_flight = None
+    return service
+
+
+FUSED_CONTENT = json.dumps({
+    'enhanced_data': {'tenant_name': 'John Smith', 'monthly_rent': '$2,500.00'},
+    'validation': {'valid': True, 'errors': [], 'warnings': ['Check lease dates'], 'confidence': 0.9},
+    'structured': {
+        'extracted_fields': {'monthly_rent': {'value': '$2,500.00', 'confidence': 0.95, 'location': 'line 3'}},
+        'document_summary': 'Lease agreement',
+        'extraction_confidence': 0.9
+    }
+})
+
+
+class TestFusedAnalysis:
+    """Test suite for AIService.analyze_document"""
+
+    raw_data = {'full_text': 'Tenant: John Smith Monthly Rent $2,5OO', 'regions': {}, 'pdf_text': ''}
+
+    def test_single_round_trip(self):
+        service = make_service([FUSED_CONTENT])
+        result = service.analyze_document(self.raw_data, self.raw_data['full_text'], 'lease_agreement')
+
+        assert result['mode'] == 'fused'
+        assert result['round_trips'] == 1
+        assert len(service.client.calls) == 1
+        assert result['enhanced_data']['enhanced_data']['tenant_name'] == 'John Smith'
+        assert result['enhanced_data']['original_data'] == self.raw_data
+        assert result['validation_results']['warnings'] == ['Check lease dates']
+        assert 'validation_timestamp' in result['validation_results']
+        assert result['structured_data']['method'] == 'ai_extraction'
+        assert 'monthly_rent' in result['structured_data']['extracted_fields']
+
+    def test_falls_back_to_separate_calls_on_bad_response(self):
+        service = make_service([
+            '{"enhanced_data": {}}',            # fused response missing sections
+            '{"tenant_name": "John Smith"}',    # enhance
+            '{"valid": true, "errors": []}',    # validate
+            '{"extracted_fields": {}}'          # extract
+        ])
+        result = service.analyze_document(self.raw_data, self.raw_data['full_text'], 'lease_agreement')
+
+        assert result['mode'] == 'separate'
+        assert result['round_trips'] == 4
+        assert len(service.client.calls) == 4
+        assert result['enhanced_data']['enhanced_data'] == {'tenant_name': 'John Smith'}
+        assert result['validation_results']['valid'] is True
+
+    def test_basic_mode_without_client(self):
+        service = make_service([])
+        service.client = None
+        result = service.analyze_document(self.raw_data, self.raw_data['full_text'], 'lease_agreement')
+
+        assert result['mode'] == 'basic'
+        assert result['round_trips'] == 0
+        assert result['structured_data']['method'] == 'regex_extraction'
+
+    @pytest.mark.parametrize('model,expected_type', [
+        ('gpt-3.5-turbo', 'json_object'),
+        ('gpt-4o-mini', 'json_schema'),
+    ])
+    def test_response_format_by_model(self, model, expected_type):
+        service = make_service([FUSED_CONTENT], model=model)
+        service.analyze_document(self.raw_data, '', 'lease_agreement')
+
+        assert service.client.calls[0]['response_format']['type'] == expected_type
+
+    def test_no_fallback_once_budget_is_spent(self):
+        service = make_service([TimeoutError('Request timed out'), '{"tenant_name": "John Smith"}'])
+        service.min_call_seconds = 0.8
+
+        def slow_create(**params):
+            time.sleep(0.3)
+            return ScriptedClient.create(service.client, **params)
+
+        service.client.chat.completions.create = slow_create
+        with latency_budget(1.0):
+            result = service.analyze_document(self.raw_data, self.raw_data['full_text'], 'lease_agreement')
+
+        assert result['mode'] == 'basic'
+        assert len(service.client.calls) == 1
+
+    def test_no_fallback_when_breaker_opens(self):
+        service = make_service([ConnectionError('upstream unavailable')])
+        service.circuit_breaker = CircuitBreaker(failure_threshold=1)
+
+        result = service.analyze_document(self.raw_data, self.raw_data['full_text'], 'lease_agreement')
+
+        assert result['mode'] == 'basic'
+        assert len(service.client.calls) == 1
+
+    def test_fallback_does_not_repeat_streamed_fields(self):
+        service = make_service([
+            '{"enhanced_data": {"tenant_name": "John Smith"}}',                     # streamed, then unparseable
+            '{"tenant_name": "John Smith", "monthly_rent": "$2,500.00"}',           # enhance
+            '{"valid": true, "errors": []}',                                        # validate
+            '{"extracted_fields": {}}'                                              # extract
+        ])
+        events = []
+
+        result = service.analyze_document(self.raw_data, self.raw_data['full_text'], 'lease_agreement', events.append)
+
+        assert result['mode'] == 'separate'
+        assert [(event['section'], event['name']) for event in events] == [
+            ('enhanced_data', 'tenant_name'), ('enhanced_data', 'monthly_rent')
+        ]
@@ -0,0 +1,195 @@
+"""
+Tests for streaming structured extraction with incremental field delivery.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.json_stream import IncrementalJSONParser
+from app.services.llm_dispatcher import AsyncLLMDispatcher
+from app.services.llm_cache import LLMResponseCache
+from app.services.ai_service import AIService
+
+
+RENT_ROLL = json.dumps({
+    'extracted_fields': {
+        'property_address': {'value': '123 Main St, Suite "A"', 'confidence': 0.95, 'location': 'header'},
+        'units': {'value': [{'unit': '101', 'rent': 1500}, {'unit': '102', 'rent': 1650}],
+                  'confidence': 0.9, 'location': 'table'}
+    },
+    'document_summary': 'Rent roll',
+    'extraction_confidence': 0.9
+})
+
+
+def chunked(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def make_chunk(content=None, finish_reason=None, usage=None):
+    choices = [] if content is None and finish_reason is None else [
+        SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)
+    ]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def stream_chunks(content):
+    chunks = [make_chunk(piece) for piece in chunked(content)]
+    chunks.append(make_chunk('', 'stop'))
+    chunks.append(make_chunk(usage=SimpleNamespace(prompt_tokens=40, completion_tokens=30, total_tokens=70)))
+    return chunks
+
+
+class StreamingClient:
+    """Fake sync OpenAI client supporting stream=True"""
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, stream=False, **params):
+        self.calls.append(dict(params, stream=stream))
+        if stream:
+            return iter(stream_chunks(self.content))
+        usage = SimpleNamespace(prompt_tokens=40, completion_tokens=30)
+        choice = SimpleNamespace(message=SimpleNamespace(content=self.content), finish_reason='stop')
+        return SimpleNamespace(choices=[choice], usage=usage)
+
+
+def make_service(content, cache=None):
+    service = AIService()
+    service.model = 'gpt-3.5-turbo'
+    service.client = StreamingClient(content)
+    service.dispatcher = None
+    service.response_cache = cache
+    service.single_flight = None
+    return service
+
+
+def without_timestamp(result):
+    return {k: v for k, v in result.items() if k != 'extraction_timestamp'}
+
+
+class TestIncrementalJSONParser:
+    """Test suite for IncrementalJSONParser"""
+
+    @pytest.mark.parametrize('size', [1, 3, 64])
+    def test_members_emitted_when_complete(self, size):
+        parser = IncrementalJSONParser([('extracted_fields',), ('extracted_fields', '*', 'value')])
+        for piece in chunked(RENT_ROLL, size):
+            parser.feed(piece)
+
+        paths = [path for path, _ in parser.emitted]
+        assert paths == [
+            ('extracted_fields', 'property_address'),
+            ('extracted_fields', 'units', 'value', 0),
+            ('extracted_fields', 'units', 'value', 1),
+            ('extracted_fields', 'units'),
+        ]
+        assert parser.emitted[0][1]['value'] == '123 Main St, Suite "A"'
+        assert parser.text == RENT_ROLL
+
+    def test_value_available_before_document_ends(self):
+        seen = []
+        parser = IncrementalJSONParser([()], lambda path, value: seen.append(path))
+        parser.feed('{"a": 1, "b": {"c": [1, 2]}, "d"')
+
+        assert seen == [('a',), ('b',)]
+
+    def test_scalars_and_literals(self):
+        parser = IncrementalJSONParser([()])
+        parser.feed('{"n": -1.5e3, "t": true, "z": null, "s": "x}"}')
+
+        assert dict((path[0], value) for path, value in parser.emitted) == \
+            {'n': -1500.0, 't': True, 'z': None, 's': 'x}'}
+
+
+class TestStreamingExtraction:
+    """Streaming mode delivers fields early and returns the same result"""
+
+    def test_streamed_result_matches_non_streaming(self):
+        events = []
+        streamed = make_service(RENT_ROLL).extract_structured_data('rent roll text', 'rent_roll', events.append)
+        plain = make_service(RENT_ROLL).extract_structured_data('rent roll text', 'rent_roll')
+
+        assert without_timestamp(streamed) == without_timestamp(plain)
+        assert [(e['type'], e['name']) for e in events] == [
+            ('field', 'property_address'), ('row', 'units'), ('row', 'units'), ('field', 'units')
+        ]
+        assert events[1]['value'] == {'unit': '101', 'rent': 1500}
+        assert events[1]['index'] == 0
+
+    def test_usage_tracked_from_final_chunk(self):
+        service = make_service(RENT_ROLL)
+        service.extract_structured_data('text', 'rent_roll', lambda event: None)
+
+        assert service.client.calls[0]['stream'] is True
+        assert service.client.calls[0]['stream_options'] == {'include_usage': True}
+        assert service.cost_tracker['total_tokens'] == 70
+
+    def test_cached_response_replays_events(self, tmp_path):
+        cache = LLMResponseCache(db_path=str(tmp_path / 'cache.sqlite3'))
+        service = make_service(RENT_ROLL, cache=cache)
+        service.extract_structured_data('text', 'rent_roll')
+
+        events = []
+        service.extract_structured_data('text', 'rent_roll', events.append)
+
+        assert len(service.client.calls) == 1
+        assert [e['name'] for e in events if e['type'] == 'field'] == ['property_address', 'units']
+
+    def test_enhancement_streams_top_level_fields(self):
+        events = []
+        content = json.dumps({'tenant_name': 'John Smith', 'monthly_rent': '$2,500.00'})
+        result = make_service(content).enhance_extracted_data({'tenant': 'J0hn'}, 'lease_agreement', events.append)
+
+        assert [e['name'] for e in events] == ['tenant_name', 'monthly_rent']
+        assert result['enhanced_data'] == json.loads(content)
+
+
+class FakeAsyncStreamingClient:
+    """Fake AsyncOpenAI client returning an async chunk iterator"""
+
+    def __init__(self, content):
+        self.content = content
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, stream=False, **params):
+        assert stream
+
+        async def chunks():
+            for chunk in stream_chunks(self.content):
+                await asyncio.sleep(0)
+                yield chunk
+
+        return chunks()
+
+
+class TestDispatcherStreaming:
+    """Test AsyncLLMDispatcher.stream"""
+
+    def test_chunks_delivered_in_order(self):
+        dispatcher = AsyncLLMDispatcher(FakeAsyncStreamingClient(RENT_ROLL))
+        try:
+            params = {'model': 'gpt-3.5-turbo', 'messages': [{'role': 'user', 'content': 'x'}], 'max_tokens': 100}
+            text = ''.join(
+                chunk.choices[0].delta.content or ''
+                for chunk in dispatcher.stream(params, timeout=5) if chunk.choices
+            )
+
+            assert text == RENT_ROLL
+            stats = dispatcher.get_statistics()
+            assert stats['streamed'] == 1
+            assert stats['completed'] == 1
+            assert stats['in_flight'] == 0
+        finally:
+            dispatcher.shutdown()
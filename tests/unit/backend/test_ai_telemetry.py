@@ -0,0 +1,139 @@
+"""
+Tests for thread-safe AI usage and latency telemetry.
+"""
+
+import os
+import sys
+import json
+import threading
+import pytest
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.telemetry import AITelemetry, LatencyHistogram, operation_scope
+from app.services.llm_cache import LLMResponseCache
+from app.services.ai_service import AIService
+
+
+def make_response(content):
+    usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50, total_tokens=150)
+    choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop')
+    return SimpleNamespace(choices=[choice], usage=usage)
+
+
+def make_service(create, cache=None):
+    service = AIService()
+    service.model = 'gpt-3.5-turbo'
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    service.dispatcher = None
+    service.response_cache = cache
+    service.single_flight = None
+    return service
+
+
+class TestLatencyHistogram:
+    """Test suite for LatencyHistogram"""
+
+    def test_buckets_and_percentiles(self):
+        histogram = LatencyHistogram(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.05, 0.5, 3.0):
+            histogram.observe(seconds)
+
+        data = histogram.to_dict()
+        assert data['buckets'] == {'0.1': 2, '1.0': 1, '+Inf': 1}
+        assert data['count'] == 4
+        assert histogram.percentile(50) == 0.1
+        assert histogram.percentile(100) == 3.0
+
+
+class TestAITelemetry:
+    """Test suite for AITelemetry"""
+
+    def test_calls_attributed_to_scope(self):
+        telemetry = AITelemetry()
+        with operation_scope('classify'):
+            telemetry.record_call(0.2, 10, 5, 0.001)
+            telemetry.record_fallback('timeout')
+        telemetry.record_cache_hit()
+
+        snapshot = telemetry.snapshot()
+        assert snapshot['operations']['classify']['total_tokens'] == 15
+        assert snapshot['operations']['classify']['fallbacks'] == {'timeout': 1}
+        assert snapshot['operations']['other']['cache_hits'] == 1
+        assert snapshot['totals']['calls'] == 1
+
+    def test_concurrent_records_are_not_lost(self):
+        telemetry = AITelemetry()
+
+        def work(_):
+            for _ in range(500):
+                telemetry.record_call(0.01, 2, 1)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(work, range(8)))
+
+        totals = telemetry.snapshot()['totals']
+        assert totals['calls'] == 4000
+        assert totals['total_tokens'] == 12000
+
+    def test_prometheus_rendering(self):
+        telemetry = AITelemetry()
+        telemetry.record_call(0.3, 10, 5, operation='enhance')
+
+        text = telemetry.to_prometheus()
+        assert 'ai_calls_total{operation="enhance"} 1' in text
+        assert 'ai_call_latency_seconds_bucket{operation="enhance",le="+Inf"} 1' in text
+
+
+class TestAIServiceTelemetry:
+    """AIService reports per-operation telemetry"""
+
+    def test_usage_tracking_is_thread_safe(self):
+        service = make_service(lambda **params: make_response('{}'))
+        barrier = threading.Barrier(8)
+
+        def work():
+            barrier.wait()
+            for _ in range(250):
+                service._track_usage(10, 5)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = service.get_usage_statistics()
+        assert stats['total_requests'] == 2000
+        assert stats['total_tokens'] == 30000
+
+    def test_operations_cache_hits_and_fallbacks(self, tmp_path):
+        cache = LLMResponseCache(db_path=str(tmp_path / 'cache.sqlite3'))
+        content = json.dumps({'document_type': 'lease_agreement', 'confidence': 0.9})
+        service = make_service(lambda **params: make_response(content), cache=cache)
+
+        service.classify_document_content('Lease agreement between landlord and tenant')
+        service.classify_document_content('Lease agreement between landlord and tenant')
+
+        def fail(**params):
+            raise RuntimeError('upstream down')
+
+        service.client.chat.completions.create = fail
+        service.enhance_extracted_data({'rent': '$2,5OO'}, 'lease_agreement')
+
+        telemetry = service.get_usage_statistics()['telemetry']
+        classify = telemetry['operations']['classify']
+        assert classify['operations'] == 2
+        assert classify['calls'] == 1
+        assert classify['cache_hits'] == 1
+        assert classify['prompt_tokens'] == 100
+        assert classify['call_latency']['count'] == 1
+
+        enhance = telemetry['operations']['enhance']
+        assert enhance['errors'] == 1
+        assert enhance['fallbacks'] == {'error': 1}
+        assert telemetry['totals']['dispatcher_retries'] == 0
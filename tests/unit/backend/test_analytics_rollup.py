@@ -0,0 +1,144 @@
+"""
+Tests for query indexes and the daily analytics rollups.
+"""
+
+import os
+import sys
+import uuid
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from flask import Flask, Blueprint
+from sqlalchemy import create_engine, insert, inspect, select
+from sqlalchemy.orm import Session
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.models.database import db, Analytics, AnalyticsDailyRollup, ProcessingSession
+from app.services.analytics_rollup import (
+    aggregate_events, apply_rollups, bucket_upper_bound, daily_summary, latency_bucket, rebuild_rollups
+)
+from app import routes
+
+DAY = date(2026, 3, 2)
+
+
+def at(day, hour=12):
+    return datetime(day.year, day.month, day.day, hour, tzinfo=timezone.utc)
+
+
+def events(event_type, timings, day=DAY):
+    return [{'event_type': event_type, 'timestamp': at(day), 'processing_time_ms': ms} for ms in timings]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+class TestIndexes:
+    """Composite indexes follow the query patterns"""
+
+    def test_declared_indexes(self, session):
+        inspector = inspect(session.get_bind())
+        sessions = {index['name']: index['column_names'] for index in inspector.get_indexes('processing_sessions')}
+        analytics = {index['name']: index['column_names'] for index in inspector.get_indexes('analytics')}
+
+        assert sessions['idx_processing_sessions_document_status'] == ['document_id', 'session_status']
+        assert sessions['idx_processing_sessions_batch_created'] == ['batch_id', 'created_at', 'id']
+        assert analytics['idx_analytics_event_type_timestamp'] == ['event_type', 'timestamp']
+        assert sessions['idx_processing_sessions_created_at'] == ['created_at']
+
+    def test_open_session_lookup_uses_the_composite_index(self, session):
+        query = select(ProcessingSession).filter_by(document_id=uuid.uuid4(), session_status='started')
+        compiled = query.compile(session.get_bind())
+
+        rows = session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', (uuid.uuid4().hex, 'started'))
+        plan = ' '.join(row[-1] for row in rows)
+
+        assert 'idx_processing_sessions_document_status' in plan
+
+
+class TestAggregation:
+    """Events collapse into per-day rollups and latency histograms"""
+
+    def test_buckets_are_within_ten_percent(self):
+        for ms in (2, 17, 250, 999, 12345, 600000):
+            assert ms <= bucket_upper_bound(latency_bucket(ms)) <= ms * 1.1 + 1
+
+    def test_aggregate_events(self):
+        batch = events('upload', [10, 30, None]) + events('upload', [5], day=DAY + timedelta(days=1))
+
+        rollups, buckets = aggregate_events(batch)
+
+        first = next(row for row in rollups if row['day'] == DAY)
+        assert first['event_count'] == 3 and first['timed_count'] == 2
+        assert (first['total_processing_time_ms'], first['min_processing_time_ms'], first['max_processing_time_ms']) == (40, 10, 30)
+        assert sum(row['event_count'] for row in buckets) == 3
+
+
+class TestRollupTables:
+    """Rollups are maintained incrementally and read without the raw events"""
+
+    def test_increments_accumulate(self, session):
+        apply_rollups(session, events('stage_completed', [100, 200]))
+        apply_rollups(session, events('stage_completed', [50, None, 400]))
+        session.commit()
+
+        rollup = session.get(AnalyticsDailyRollup, (DAY, 'stage_completed'))
+        assert (rollup.event_count, rollup.timed_count, rollup.total_processing_time_ms) == (5, 4, 750)
+        assert (rollup.min_processing_time_ms, rollup.max_processing_time_ms) == (50, 400)
+
+    def test_daily_summary_percentiles(self, session):
+        apply_rollups(session, events('processing_completed', range(1, 1001)))
+        apply_rollups(session, events('upload', [None]))
+        session.commit()
+
+        summary = daily_summary(session, DAY, DAY, ['processing_completed'])
+
+        assert len(summary) == 1
+        entry = summary[0]
+        assert entry['event_count'] == 1000 and entry['avg_processing_time_ms'] == 500.5
+        for percentile, exact in ((50, 500), (95, 950), (99, 990)):
+            assert exact <= entry[f'p{percentile}_ms'] <= exact * 1.1
+        assert daily_summary(session, DAY, DAY, ['upload'])[0]['p50_ms'] is None
+
+    def test_rebuild_from_raw_events(self, session):
+        session.execute(insert(Analytics), events('upload', [10, 20, 30]) + events('upload', [5], day=DAY + timedelta(days=3)))
+        apply_rollups(session, events('upload', [99999]))
+        session.commit()
+
+        assert rebuild_rollups(session, DAY, DAY + timedelta(days=1)) == 3
+
+        rollup = session.get(AnalyticsDailyRollup, (DAY, 'upload'))
+        assert (rollup.event_count, rollup.max_processing_time_ms) == (3, 30)
+
+
+@pytest.fixture
+def client():
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(flask_app)
+    blueprint = Blueprint('api', __name__)
+    blueprint.add_url_rule('/analytics/daily', view_func=routes.analytics_daily)
+    flask_app.register_blueprint(blueprint, url_prefix='/api')
+    with flask_app.app_context():
+        db.create_all()
+        today = datetime.now(timezone.utc).date()
+        apply_rollups(db.session, events('upload', [120, 80], day=today) + events('export', [None], day=today))
+        db.session.commit()
+    return flask_app.test_client()
+
+
+def test_daily_route(client):
+    response = client.get('/api/analytics/daily?days=3&event_type=upload')
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [(day['event_type'], day['event_count'], day['avg_processing_time_ms']) for day in body['days']] == [('upload', 2, 100.0)]
+    assert client.get('/api/analytics/daily?start=2026-01-02&end=2026-01-01').status_code == 400
+    assert client.get('/api/analytics/daily?days=500').status_code == 400
@@ -0,0 +1,184 @@
+"""
+Tests for the buffered analytics event writer.
+"""
+
+import os
+import sys
+import math
+import threading
+import pytest
+from flask import Flask
+from sqlalchemy import event, select, func
+from sqlalchemy.pool import StaticPool
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.models.database import db, Analytics, log_analytics_event
+from app.services.analytics_writer import AnalyticsWriter
+from app.services.job_runner import JobRunner, MemoryJobStore
+
+
+@pytest.fixture
+def app():
+    flask_app = Flask(__name__)
+    flask_app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SQLALCHEMY_ENGINE_OPTIONS={'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+    )
+    db.init_app(flask_app)
+    with flask_app.app_context():
+        db.create_all()
+        flask_app.inserts = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statement.startswith('INSERT INTO analytics (')
+                     and flask_app.inserts.append(statement))
+    return flask_app
+
+
+def stored_events(app):
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(Analytics))
+
+
+class TestAnalyticsWriter:
+    """Test suite for AnalyticsWriter"""
+
+    def test_events_are_written_in_batches(self, app):
+        writer = AnalyticsWriter(app, batch_size=50, flush_interval=60)
+
+        for i in range(120):
+            assert writer.record('stage_completed', {'stage': 'ocr', 'i': i}, processing_time_ms=i)
+        assert writer.flush()
+
+        stats = writer.get_statistics()
+        assert stored_events(app) == 120
+        assert stats['written'] == 120 and stats['dropped'] == 0
+        assert len(app.inserts) <= 3
+        writer.close()
+
+    def test_full_queue_drops_and_counts(self, app):
+        writer = AnalyticsWriter(app, max_queue=5, flush_interval=60)
+        writer._ensure_started = lambda: None  # keep the queue from draining
+
+        accepted = [writer.record('upload') for _ in range(8)]
+
+        assert accepted == [True] * 5 + [False] * 3
+        assert writer.get_statistics()['dropped'] == 3
+        writer.close()
+        assert stored_events(app) == 5
+
+    def test_close_flushes_pending_events(self, app):
+        writer = AnalyticsWriter(app, batch_size=100, flush_interval=60)
+        writer.record('upload', {'file': 'a.pdf'})
+        writer.record('upload', {'file': 'b.pdf'})
+
+        writer.close()
+
+        assert stored_events(app) == 2
+        assert not writer.get_statistics()['running']
+        assert writer.record('upload') is False
+
+    def test_close_writes_the_backlog_in_batches(self, app):
+        release = threading.Event()
+        writer = AnalyticsWriter(app, batch_size=50, flush_interval=60)
+        original_write = writer._write
+        writer._write = lambda events: release.wait(5) and original_write(events)
+
+        for i in range(1000):
+            writer.record('stage_completed', {'i': i})
+        threading.Timer(0.1, release.set).start()
+        writer.close()
+
+        assert stored_events(app) == 1000
+        assert len(app.inserts) <= math.ceil(1000 / 50)
+
+    def test_record_does_not_wait_for_the_database(self, app):
+        release = threading.Event()
+        writer = AnalyticsWriter(app, batch_size=1, flush_interval=60)
+        original_write = writer._write
+        writer._write = lambda events: release.wait(5) and original_write(events)
+
+        for _ in range(10):
+            writer.record('stage_completed')
+
+        assert writer.get_statistics()['written'] == 0
+        release.set()
+        assert writer.flush()
+        assert stored_events(app) == 10
+        writer.close()
+
+    def test_failed_batch_is_counted(self, app):
+        writer = AnalyticsWriter(app, flush_interval=60)
+        writer.record('upload', session_id='not-a-uuid')
+
+        writer.flush()
+
+        assert writer.get_statistics()['failed'] == 1
+        writer.close()
+
+
+class TestLogAnalyticsEvent:
+    """log_analytics_event goes through the app's writer when there is one"""
+
+    def test_buffered_when_writer_is_enabled(self, app):
+        app.analytics_writer = AnalyticsWriter(app, flush_interval=60)
+        with app.app_context():
+            assert log_analytics_event('upload', {'file': 'a.pdf'}) is None
+        assert app.analytics_writer.get_statistics()['recorded'] == 1
+        app.analytics_writer.close()
+        assert stored_events(app) == 1
+
+    def test_synchronous_without_writer(self, app):
+        with app.app_context():
+            row = log_analytics_event('upload', {'file': 'a.pdf'}, processing_time_ms=12)
+            assert row.processing_time_ms == 12
+        assert stored_events(app) == 1
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.events = []
+
+    def record(self, event_type, event_data=None, session_id=None, processing_time_ms=None):
+        self.events.append((event_type, event_data, processing_time_ms))
+        return True
+
+
+def test_job_runner_writes_directly_when_writer_is_disabled(app):
+    class Pipeline:
+        def process_document(self, file_path, regions, document_type, processing_id=None,
+                             progress_callback=None, use_cache=True):
+            progress_callback('ocr_processing', 50.0, {})
+            return {'success': True}
+
+    app.processing_pipeline = Pipeline()
+    runner = JobRunner(app, store=MemoryJobStore(), analytics=AnalyticsWriter(app, enabled=False))
+    processing_id = runner.store.create('a.pdf', 'rent_roll')
+
+    runner.run(processing_id, 'a.pdf', document_type='rent_roll')
+
+    assert stored_events(app) == 3
+
+
+def test_job_runner_records_stage_timings():
+    class Pipeline:
+        def process_document(self, file_path, regions, document_type, processing_id=None,
+                             progress_callback=None, use_cache=True):
+            progress_callback('pdf_conversion', 10.0, {})
+            progress_callback('ocr_processing', 50.0, {})
+            return {'success': True}
+
+    flask_app = Flask(__name__)
+    flask_app.processing_pipeline = Pipeline()
+    analytics = RecordingWriter()
+    runner = JobRunner(flask_app, store=MemoryJobStore(), analytics=analytics)
+    processing_id = runner.store.create('a.pdf', 'rent_roll')
+
+    runner.run(processing_id, 'a.pdf', document_type='rent_roll')
+
+    stages = [data['stage'] for event_type, data, _ in analytics.events if event_type == 'stage_completed']
+    assert stages == ['initialization', 'pdf_conversion', 'ocr_processing']
+    assert analytics.events[-1][0] == 'processing_completed'
+    assert analytics.events[-1][1]['processing_id'] == processing_id
@@ -0,0 +1,203 @@
+"""
+Tests for batch document processing.
+"""
+
+import io
+import os
+import sys
+import time
+import threading
+import pytest
+from contextlib import nullcontext
+from types import SimpleNamespace
+from flask import Flask, Blueprint
+from openpyxl import load_workbook
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.job_runner import JobRunner, MemoryJobStore
+from app.services.excel_service import ExcelService
+from app.utils import upload_stream
+
+PDF_BYTES = b'%PDF-1.4\n' + b'0' * 500
+
+
+class FakePipeline:
+    """Records how many documents run at once; files named bad*.pdf fail"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def process_document(self, file_path, regions=None, document_type=None,
+                         processing_id=None, progress_callback=None, use_cache=True):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            progress_callback('ocr_processing', 50.0, {'message': 'Reading text'})
+            time.sleep(self.delay)
+            if os.path.basename(file_path).startswith('bad'):
+                raise RuntimeError('OCR failed')
+            return {'processing_id': processing_id, 'success': True, 'file_path': file_path,
+                    'processing_time': 1.5,
+                    'metadata': {'document_type': 'rent_roll', 'quality_score': {'overall_score': 0.9}},
+                    'extracted_data': {'enhanced_data': {
+                        'monthly_rent': {'value': '$2,500', 'confidence': 0.95},
+                        'property': {'address': '1 Main St'}
+                    }}}
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def make_runner(pipeline, batch_concurrency=2):
+    app = SimpleNamespace(config={}, processing_pipeline=pipeline, app_context=nullcontext)
+    return JobRunner(app, store=MemoryJobStore(), max_workers=8, progress_interval=0,
+                     batch_concurrency=batch_concurrency)
+
+
+def wait_for_batch(runner, batch_id):
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        batch = runner.get_batch(batch_id, include_results=True)
+        if batch['status'] not in ('queued', 'processing'):
+            return batch
+        time.sleep(0.01)
+    raise AssertionError(f"batch {batch_id} did not finish")
+
+
+class TestSubmitBatch:
+    """Test suite for JobRunner.submit_batch"""
+
+    def test_concurrency_is_limited_per_batch(self):
+        pipeline = FakePipeline()
+        runner = make_runner(pipeline, batch_concurrency=2)
+
+        batch_id = runner.submit_batch([{'filepath': f'/tmp/doc{i}.pdf'} for i in range(6)])
+        batch = wait_for_batch(runner, batch_id)
+
+        assert batch['status'] == 'completed'
+        assert batch['counts']['completed'] == 6
+        assert batch['progress'] == 100.0
+        assert pipeline.peak == 2
+
+    def test_aggregate_status_with_failures(self):
+        runner = make_runner(FakePipeline(delay=0))
+
+        batch_id = runner.submit_batch([{'filepath': '/tmp/good.pdf'}, {'filepath': '/tmp/bad.pdf'}])
+        batch = wait_for_batch(runner, batch_id)
+
+        assert batch['status'] == 'completed_with_errors'
+        assert [doc['status'] for doc in batch['documents']] == ['completed', 'failed']
+        assert batch['documents'][1]['error'] == 'OCR failed'
+
+    def test_documents_start_queued(self):
+        gate = threading.Event()
+        pipeline = FakePipeline(delay=0)
+        original = pipeline.process_document
+        pipeline.process_document = lambda *args, **kwargs: (gate.wait(5), original(*args, **kwargs))[1]
+        runner = make_runner(pipeline, batch_concurrency=1)
+
+        batch_id = runner.submit_batch([{'filepath': '/tmp/a.pdf'}, {'filepath': '/tmp/b.pdf'}])
+        statuses = [doc['status'] for doc in runner.get_batch(batch_id)['documents']]
+        gate.set()
+
+        assert statuses[1] == 'queued'
+        assert wait_for_batch(runner, batch_id)['status'] == 'completed'
+
+    def test_unknown_batch(self):
+        assert make_runner(FakePipeline()).get_batch('missing') is None
+
+
+class TestBatchExport:
+    """Test suite for ExcelService.export_batch_to_excel"""
+
+    def test_summary_and_field_sheets(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        runner = make_runner(FakePipeline(delay=0))
+        batch = wait_for_batch(runner, runner.submit_batch([{'filepath': '/tmp/good.pdf'},
+                                                            {'filepath': '/tmp/bad.pdf'}]))
+
+        path = ExcelService().export_batch_to_excel(batch['documents'], 'batch')
+        workbook = load_workbook(path)
+        summary = [[cell.value for cell in row] for row in workbook['Batch Summary'].iter_rows(min_row=2)]
+        fields = [[cell.value for cell in row] for row in workbook['All Fields'].iter_rows(min_row=2)]
+
+        assert path == os.path.join('uploads', 'batch.xlsx')
+        assert summary[0][:6] == ['good.pdf', 'rent_roll', 'completed', 0.9, 2, 1.5]
+        assert summary[1][2:] == ['failed', None, 0, 0, 'OCR failed']
+        assert fields == [['good.pdf', 'monthly_rent', '$2,500', 0.95],
+                          ['good.pdf', 'property.address', '1 Main St', None]]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import app.routes as routes
+
+    monkeypatch.setattr(upload_stream, 'HAS_MAGIC', False)
+    flask_app = Flask(__name__)
+    blueprint = Blueprint('batch', __name__)
+    blueprint.add_url_rule('/api/process-batch', view_func=routes.process_batch, methods=['POST'])
+    blueprint.add_url_rule('/api/process-batch/<batch_id>', view_func=routes.get_batch_status)
+    blueprint.add_url_rule('/api/process-batch/<batch_id>/export', view_func=routes.export_batch,
+                           methods=['POST'])
+    flask_app.register_blueprint(blueprint)
+    flask_app.config.update(UPLOAD_FOLDER=str(tmp_path / 'uploads'), MAX_CONTENT_LENGTH=1024 * 1024,
+                            BATCH_MAX_DOCUMENTS=3)
+    flask_app.job_runner = make_runner(FakePipeline(delay=0))
+    flask_app.exported = []
+
+    def export_batch_to_excel(documents, filename):
+        flask_app.exported.append(documents)
+        return os.path.join('uploads', filename)
+
+    flask_app.excel_service = SimpleNamespace(export_batch_to_excel=export_batch_to_excel)
+    return flask_app.test_client()
+
+
+@pytest.fixture
+def pdf_paths(tmp_path):
+    paths = []
+    for name in ('lease.pdf', 'rent_roll.pdf'):
+        path = tmp_path / name
+        path.write_bytes(PDF_BYTES)
+        paths.append(str(path))
+    return paths
+
+
+class TestProcessBatchRoutes:
+    """Test suite for /api/process-batch"""
+
+    def test_submit_poll_and_export(self, client, pdf_paths):
+        response = client.post('/api/process-batch', json={'filepaths': pdf_paths, 'document_type': 'rent_roll'})
+        batch_id = response.get_json()['batch_id']
+        wait_for_batch(client.application.job_runner, batch_id)
+
+        status = client.get(f'/api/process-batch/{batch_id}').get_json()
+        exported = client.post(f'/api/process-batch/{batch_id}/export').get_json()
+
+        assert response.status_code == 202
+        assert [d['file_path'] for d in response.get_json()['documents']] == pdf_paths
+        assert status['status'] == 'completed' and 'results' not in status['documents'][0]
+        assert exported['download_url'] == f'/api/download/batch_{batch_id}.xlsx'
+        assert client.application.exported[0][0]['results']['success'] is True
+
+    def test_multipart_upload(self, client):
+        response = client.post('/api/process-batch', data={
+            'files': [(io.BytesIO(PDF_BYTES), 'a.pdf'), (io.BytesIO(PDF_BYTES + b'1'), 'b.pdf')],
+            'document_type': 'lease'
+        }, content_type='multipart/form-data')
+
+        assert response.status_code == 202
+        assert response.get_json()['total'] == 2
+
+    def test_rejects_invalid_requests(self, client, pdf_paths):
+        assert client.post('/api/process-batch', json={}).status_code == 400
+        assert client.post('/api/process-batch', json={'filepaths': ['/missing.pdf']}).status_code == 400
+        assert client.post('/api/process-batch', json={'filepaths': pdf_paths * 2}).status_code == 400
+        assert client.get('/api/process-batch/missing').status_code == 404
@@ -0,0 +1,192 @@
+"""
+Tests for confidence-gated LLM escalation.
+"""
+
+import os
+import sys
+import json
+import pytest
+import numpy as np
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.confidence_gate import ConfidenceGate
+from app.services.ai_service import AIService
+from app.services.processing_pipeline import ProcessingPipeline
+
+
+class RecordingClient:
+    """Fake OpenAI client returning a fixed response content"""
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **params):
+        self.calls.append(params)
+        usage = SimpleNamespace(prompt_tokens=50, completion_tokens=20)
+        choice = SimpleNamespace(message=SimpleNamespace(content=self.content), finish_reason='stop')
+        return SimpleNamespace(choices=[choice], usage=usage)
+
+
+def make_service(content='{}'):
+    service = AIService()
+    service.model = 'gpt-3.5-turbo'
+    service.client = RecordingClient(content)
+    service.dispatcher = None
+    service.response_cache = None
+    return service
+
+
+@pytest.fixture
+def gate():
+    return ConfidenceGate(confidence_threshold=90.0)
+
+
+class TestConfidenceGate:
+    """Test suite for ConfidenceGate"""
+
+    def test_region_needs_confidence_and_pattern(self, gate):
+        raw_data = {'regions': {
+            'rent_amount': {'text': '$2,500.00', 'confidence': 96.0},
+            'tenant_name': {'text': 'Tenant: John Smith', 'confidence': 72.0},
+            'notes': {'text': 'see attached exhibit', 'confidence': 98.0},
+        }}
+        result = gate.evaluate(raw_data)
+
+        assert set(result['confident']) == {'rent_amount'}
+        assert set(result['uncertain']) == {'tenant_name', 'notes'}
+        assert result['escalated_count'] == 2
+        assert result['confident']['rent_amount']['pattern'] == 'rent_amount'
+
+    def test_full_text_matches_use_page_confidence(self, gate):
+        raw_data = {'full_text': 'Monthly rent $2,500 due on 01/05/2024. Contact (555) 123-4567'}
+
+        confident = gate.evaluate(raw_data, ocr_confidence=94.0)
+        uncertain = gate.evaluate(raw_data, ocr_confidence=60.0)
+
+        assert set(confident['confident']) == {'rent_amount', 'date', 'phone'}
+        assert confident['escalated_count'] == 0
+        assert uncertain['escalated_count'] == 3
+
+    def test_region_takes_precedence_over_full_text(self, gate):
+        raw_data = {
+            'full_text': 'Rent $9,999',
+            'regions': {'rent_amount': {'text': '$2,500', 'confidence': 95.0}}
+        }
+        fields = gate.score_fields(raw_data, ocr_confidence=95.0)
+
+        assert fields['rent_amount']['value'] == '$2,500'
+        assert fields['rent_amount']['source'] == 'region'
+
+
+class TestGatedAnalysis:
+    """Test AIService.analyze_gated"""
+
+    raw_data = {'regions': {
+        'rent_amount': {'text': '$2,500.00', 'confidence': 97.0},
+        'tenant_name': {'text': 'Tenant: J0hn Smith', 'confidence': 70.0},
+    }}
+
+    def test_all_confident_skips_openai(self, gate):
+        raw_data = {'regions': {'rent_amount': {'text': '$2,500.00', 'confidence': 97.0}}}
+        service = make_service()
+        result = service.analyze_gated(raw_data, gate.evaluate(raw_data), '', 'lease_agreement')
+
+        assert service.client.calls == []
+        assert result['mode'] == 'gated'
+        assert result['round_trips'] == 0
+        assert result['enhanced_data']['enhanced_data'] == {'rent_amount': '$2,500.00'}
+
+    def test_uncertain_fields_escalated_in_one_call(self, gate):
+        service = make_service(json.dumps({
+            'corrections': {'s1': {'value': 'John Smith', 'confidence': 0.92}}
+        }))
+        result = service.analyze_gated(self.raw_data, gate.evaluate(self.raw_data),
+                                       'Tenant: J0hn Smith Rent $2,500.00', 'lease_agreement')
+
+        assert len(service.client.calls) == 1
+        prompt = service.client.calls[0]['messages'][1]['content']
+        assert 'tenant_name' in prompt
+        assert 'rent_amount' not in prompt.split('Document text:')[0]
+
+        fields = result['structured_data']['extracted_fields']
+        assert fields['tenant_name']['value'] == 'John Smith'
+        assert fields['rent_amount'] == {'value': '$2,500.00', 'confidence': 0.97, 'location': 'region'}
+        assert result['round_trips'] == 1
+
+    def test_falls_back_to_ocr_values_on_bad_response(self, gate):
+        service = make_service('not json')
+        result = service.analyze_gated(self.raw_data, gate.evaluate(self.raw_data), '', 'lease_agreement')
+
+        assert result['enhanced_data']['enhanced_data']['tenant_name'] == 'Tenant: J0hn Smith'
+        assert result['round_trips'] == 0
+
+
+def make_pipeline(regions, ai_service, full_text='Rent $2,500.00', **config):
+    pdf = MagicMock()
+    pdf.get_pdf_info.return_value = {}
+    pdf.convert_pdf_to_images.return_value = [np.zeros((10, 10, 3))]
+    pdf.extract_text_from_pdf.return_value = {'text': full_text}
+    ocr = MagicMock()
+    ocr.extract_text_from_pdf_page.return_value = {
+        'text': full_text, 'confidence': 60.0, 'success': True, 'word_count': 4, 'regions': regions
+    }
+    smart_region_manager = MagicMock()
+    smart_region_manager.suggest_regions.return_value = []
+    quality_scorer = MagicMock()
+    quality_scorer.calculate_quality_score.return_value = 80
+    app = SimpleNamespace(config=dict({'AI_CONFIDENCE_GATE': True}, **config), pdf_service=pdf,
+                          ocr_service=ocr, ai_service=ai_service, smart_region_manager=smart_region_manager,
+                          quality_scorer=quality_scorer, document_classifier=MagicMock())
+    return ProcessingPipeline(app)
+
+
+class TestPipelineGate:
+    """The pipeline keeps the full analysis and only leaves confident fields out of it"""
+
+    regions = {
+        'rent_amount': {'text': '$2,500.00', 'confidence': 97.0},
+        'tenant_name': {'text': 'Tenant: J0hn Smith', 'confidence': 70.0},
+    }
+
+    def test_disabled_by_default(self):
+        pipeline = make_pipeline(self.regions, MagicMock(), AI_CONFIDENCE_GATE=False)
+        assert not pipeline._confidence_gate_enabled()
+        assert not ProcessingPipeline(SimpleNamespace(config={}, ai_service=MagicMock()))._confidence_gate_enabled()
+
+    def test_confident_regions_left_out_of_the_full_analysis(self):
+        ai_service = MagicMock(spec=AIService)
+        ai_service.analyze_document.return_value = {
+            'enhanced_data': {'enhanced_data': {'tenant_name': 'John Smith'}, 'original_data': {}},
+            'validation_results': {'valid': True, 'confidence': 0.9},
+            'structured_data': {'extracted_fields': {'tenant_name': {'value': 'John Smith'}}},
+            'mode': 'fused',
+            'round_trips': 4
+        }
+
+        result = make_pipeline(self.regions, ai_service).process_full_document('x.pdf', 'lease_agreement')
+
+        ai_service.analyze_gated.assert_not_called()
+        sent = ai_service.analyze_document.call_args.args[0]
+        assert list(sent['regions']) == ['tenant_name']
+        enhanced = result['extracted_data']['enhanced_data']['enhanced_data']
+        assert enhanced == {'rent_amount': '$2,500.00', 'tenant_name': 'John Smith'}
+        assert result['extracted_data']['validation_results'] == {'valid': True, 'confidence': 0.9}
+        assert result['metadata']['fields_escalated'] == 1
+        assert result['stages']['ai_enhancement']['timings']['round_trips_saved'] == 0
+
+    def test_model_skipped_only_when_every_field_passes(self):
+        ai_service = make_service()
+        regions = {'rent_amount': self.regions['rent_amount']}
+
+        result = make_pipeline(regions, ai_service, full_text='').process_full_document('x.pdf', 'lease_agreement')
+
+        assert ai_service.client.calls == []
+        timings = result['stages']['ai_enhancement']['timings']
+        assert (timings['mode'], timings['round_trips'], timings['round_trips_saved']) == ('gated', 0, 3)
@@ -0,0 +1,128 @@
+"""
+Tests for the reference-based document result model.
+"""
+
+import os
+import sys
+import json
+import numpy as np
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.document_result import (
+    WordTable, compact_ocr_result, expand_result, share_raw_data, RAW_DATA_REF
+)
+from app.services.processing_pipeline import ProcessingPipeline
+from app.services.ai_service import AIService
+
+
+def make_words(count, prefix='word'):
+    return [{'text': f'{prefix}{i}', 'confidence': 90, 'level': 5,
+             'bbox': {'left': i * 10, 'top': 5, 'width': 8, 'height': 12}} for i in range(count)]
+
+
+def region_result(words):
+    return {'text': ' '.join(w['text'] for w in words), 'confidence': 90.0, 'success': True,
+            'words': words, 'word_count': len(words)}
+
+
+class TestWordTable:
+    """Test suite for WordTable"""
+
+    def test_rows_round_trip(self):
+        table = WordTable()
+        first, second = make_words(3, 'a'), make_words(2, 'b')
+
+        assert table.add(first, 'region_0') == [0, 3]
+        assert table.add(second, 'region_1') == [3, 5]
+        assert table.rows([3, 5]) == second
+        assert WordTable.from_dict(json.loads(json.dumps(table.to_dict()))).rows([0, 3]) == first
+
+    def test_compact_ocr_result(self):
+        table = WordTable()
+        original = region_result(make_words(4))
+
+        compact = compact_ocr_result(original, table, 'rent')
+
+        assert 'words' not in compact and compact['word_ref'] == [0, 4]
+        assert compact['text'] == original['text']
+        assert 'words' in original  # the input is left untouched
+        assert table.sources == {'rent': [0, 4]}
+
+
+class TestExpandResult:
+    """expand_result restores the nested layout"""
+
+    def test_expand_matches_nested_layout(self):
+        table = WordTable()
+        words = make_words(5)
+        raw_data = {'full_text': 'text', 'regions': {'region_0': compact_ocr_result(region_result(words), table, 'region_0')}}
+        enhanced = share_raw_data({'enhanced_data': {'rent': '$2,500'}, 'original_data': raw_data}, raw_data)
+        results = {'success': True, 'ocr_words': table.to_dict(),
+                   'extracted_data': {'enhanced_data': enhanced, 'raw_data': raw_data}}
+
+        expanded = expand_result(results)
+
+        nested_raw = {'full_text': 'text', 'regions': {'region_0': region_result(words)}}
+        assert enhanced['original_data'] == {RAW_DATA_REF: 'extracted_data.raw_data'}
+        assert expanded['extracted_data']['raw_data'] == nested_raw
+        assert expanded['extracted_data']['enhanced_data']['original_data'] == nested_raw
+        assert 'ocr_words' not in expanded
+
+    def test_results_without_word_table_are_unchanged(self):
+        results = {'success': True, 'extracted_data': {}}
+
+        assert expand_result(results) is results
+
+
+def make_pipeline(region_words):
+    ai = AIService()
+    ai.client = None
+    pdf = MagicMock()
+    pdf.get_pdf_info.return_value = {}
+    pdf.convert_pdf_to_images.return_value = [np.zeros((10, 10, 3))]
+    pdf.extract_text_from_pdf.return_value = {'text': 'Rent Roll'}
+    ocr = MagicMock()
+    ocr.extract_text_from_pdf_page.return_value = {
+        'text': 'Monthly rent $2,500', 'confidence': 90.0, 'success': True, 'word_count': 20,
+        'regions': {f'region_{i}': region_result(make_words(region_words, f'r{i}w')) for i in range(3)}
+    }
+    ocr.extract_text_from_image.side_effect = lambda image, region: region_result(make_words(region_words))
+    smart_region_manager = MagicMock()
+    smart_region_manager.suggest_regions.return_value = [{'x': 0, 'y': 0, 'width': 5, 'height': 5}] * 3
+    quality_scorer = MagicMock()
+    quality_scorer.calculate_quality_score.return_value = 80
+    app = SimpleNamespace(config={}, pdf_service=pdf, ocr_service=ocr, ai_service=ai,
+                          smart_region_manager=smart_region_manager, quality_scorer=quality_scorer,
+                          document_classifier=MagicMock())
+    return ProcessingPipeline(app)
+
+
+class TestPipelineResults:
+    """Pipeline stages share one word table and one copy of the raw data"""
+
+    def test_full_document_result_is_compact(self):
+        result = make_pipeline(200).process_full_document('x.pdf', 'rent_roll')
+        extracted = result['extracted_data']
+
+        assert result['ocr_words']['count'] == 600
+        assert extracted['raw_data']['regions']['region_1']['word_ref'] == [200, 400]
+        assert extracted['enhanced_data']['original_data'] == {RAW_DATA_REF: 'extracted_data.raw_data'}
+
+        compact_size = len(json.dumps(result, default=str))
+        expanded_size = len(json.dumps(expand_result(result), default=str))
+        assert compact_size * 3 < expanded_size
+
+    def test_region_results_reference_the_table(self):
+        regions = [{'name': 'rent', 'x': 0, 'y': 0, 'width': 5, 'height': 5},
+                   {'name': 'tenant', 'x': 5, 'y': 0, 'width': 5, 'height': 5}]
+
+        result = make_pipeline(10).process_with_regions('x.pdf', regions, 'rent_roll')
+        ocr_results = result['stages']['ocr_processing']['results']
+
+        assert ocr_results['tenant']['word_ref'] == [10, 20]
+        assert expand_result(result)['stages']['ocr_processing']['results']['tenant']['words'] == make_words(10)
@@ -0,0 +1,110 @@
+"""
+Tests for the EAST inference service.
+Uses a fake cv2.dnn network so the pool can be tested without the model file.
+"""
+
+import os
+import sys
+import threading
+import time
+import pytest
+import numpy as np
+from unittest.mock import patch
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.east_inference import EASTInferenceService
+
+
+class FakeEASTNet:
+    """Stand-in for cv2.dnn.Net that detects concurrent use"""
+
+    def __init__(self):
+        self.blob = None
+        self.in_use = False
+        self.concurrent_use = False
+        self.batch_sizes = []
+
+    def setInput(self, blob):
+        if self.in_use:
+            self.concurrent_use = True
+        self.in_use = True
+        self.blob = blob
+
+    def forward(self, layers):
+        time.sleep(0.01)
+        n, _, h, w = self.blob.shape
+        self.batch_sizes.append(n)
+        scores = np.zeros((n, 1, h // 4, w // 4), dtype=np.float32)
+        geometry = np.zeros((n, 5, h // 4, w // 4), dtype=np.float32)
+        # One confident box in the top-left cell of every page
+        scores[:, 0, 0, 0] = 0.9
+        geometry[:, :4, 0, 0] = 8.0
+        self.in_use = False
+        return scores, geometry
+
+
+class TestEASTInferenceService:
+    """Test suite for EASTInferenceService"""
+
+    @pytest.fixture
+    def fake_nets(self):
+        return []
+
+    @pytest.fixture
+    def service(self, fake_nets):
+        def load_net(_self):
+            net = FakeEASTNet()
+            fake_nets.append(net)
+            return net
+
+        with patch.object(EASTInferenceService, '_load_net', load_net):
+            yield EASTInferenceService(model_path='fake_east.pb', pool_size=2)
+
+    def test_unavailable_without_model(self):
+        service = EASTInferenceService(model_path=None)
+        service.model_path = None
+        assert not service.available
+        assert service.detect(np.zeros((64, 64, 3), dtype=np.uint8)) == []
+
+    def test_detects_regions_on_a_page(self, service, fake_nets):
+        regions = service.detect(np.full((640, 480, 3), 255, dtype=np.uint8))
+
+        assert len(regions) == 1
+        assert regions[0]['detection_method'] == 'east'
+        assert [net.batch_sizes for net in fake_nets] == [[1]]
+
+    def test_small_page_is_skipped(self, service, fake_nets):
+        assert service.detect(np.full((20, 20, 3), 255, dtype=np.uint8)) == []
+        assert not fake_nets
+
+    def test_concurrent_detection_never_shares_a_net(self, service, fake_nets):
+        page = np.full((320, 320, 3), 255, dtype=np.uint8)
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(5):
+                    service.detect(page)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert len(fake_nets) <= service.pool_size
+        assert not any(net.concurrent_use for net in fake_nets)
+
+    def test_warm_up_loads_full_pool(self, service, fake_nets):
+        assert service.warm_up()
+        stats = service.get_statistics()
+        assert stats['warmed_up']
+        assert stats['nets_loaded'] == 2
+        assert stats['nets_idle'] == 2
+        assert len(fake_nets) == 2
@@ -0,0 +1,238 @@
+"""
+Tests for progress events and the server-sent event stream.
+"""
+
+import os
+import sys
+import json
+import threading
+import pytest
+from contextlib import nullcontext
+from types import SimpleNamespace
+from flask import Flask, Blueprint
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.event_bus import InMemoryEventBus, RedisEventBus, Subscription, format_sse
+from app.services.job_runner import JobRunner, MemoryJobStore
+
+
+class FakePipeline:
+    """Emits a stage, a partial OCR result and a streamed AI field"""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+
+    def process_document(self, file_path, regions=None, document_type=None,
+                         processing_id=None, progress_callback=None, use_cache=True):
+        if self.gate is not None:
+            self.gate.wait(5)
+        progress_callback('ocr_processing', 50.0, {'message': 'Extracting text from regions'})
+        progress_callback('ocr_processing', 60.0, {
+            'message': 'Extracted text from region 1 of 2',
+            'region_result': {'region': 'rent', 'text': '$2,500', 'confidence': 91.0}
+        })
+        progress_callback('ocr_processing', 70.0, {'message': 'Extracted text from region 2 of 2'})
+        progress_callback('ai_enhancement', 75.0, {
+            'message': 'Extracted field tenant',
+            'streamed': {'type': 'field', 'name': 'tenant', 'value': 'John Smith'}
+        })
+        return {'processing_id': processing_id, 'success': True, 'extracted_data': {'tenant': 'John Smith'}}
+
+
+def make_runner(pipeline, bus=None):
+    app = SimpleNamespace(config={}, processing_pipeline=pipeline, app_context=nullcontext)
+    return JobRunner(app, store=MemoryJobStore(), progress_interval=60, event_bus=bus)
+
+
+class TestInMemoryEventBus:
+    """Test suite for InMemoryEventBus"""
+
+    def test_late_subscriber_replays_history(self):
+        bus = InMemoryEventBus()
+        bus.publish('job', 'stage', {'stage': 'ocr_processing'})
+        bus.publish('job', 'progress', {'progress': 55.0})
+
+        with bus.subscribe('job') as subscription:
+            events = [subscription.get(timeout=0.1) for _ in range(3)]
+
+        assert [e['event'] for e in events[:2]] == ['stage', 'progress']
+        assert events[2] is None
+
+    def test_resume_from_last_event_id(self):
+        bus = InMemoryEventBus()
+        for progress in (10.0, 20.0, 30.0):
+            bus.publish('job', 'progress', {'progress': progress})
+
+        with bus.subscribe('job', last_event_id=2) as subscription:
+            assert subscription.get(timeout=0.1)['data'] == {'progress': 30.0}
+
+    def test_live_events_reach_subscriber(self):
+        bus = InMemoryEventBus()
+        subscription = bus.subscribe('job')
+        threading.Timer(0.05, bus.publish, args=('job', 'complete', {'status': 'completed'})).start()
+
+        event = subscription.get(timeout=2)
+        subscription.close()
+
+        assert event['event'] == 'complete'
+        assert bus.get_statistics()['subscribers'] == 0
+
+    def test_history_is_bounded_and_finished_jobs_expire(self):
+        bus = InMemoryEventBus(history=2, retention=0)
+        for progress in range(5):
+            bus.publish('old', 'progress', {'progress': progress})
+        assert len(bus._channels['old'].history) == 2
+
+        bus.publish('old', 'complete', {})
+        bus.publish('new', 'complete', {})
+
+        assert 'old' not in bus._channels
+
+
+class FakeRedis:
+    """Just enough of redis-py for RedisEventBus"""
+
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+        self.published = []
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    def pipeline(self):
+        return self
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    def ltrim(self, key, start, end):
+        self.lists[key] = self.lists[key][start:]
+
+    def expire(self, key, seconds):
+        pass
+
+    def publish(self, channel, payload):
+        self.published.append((channel, payload))
+
+    def execute(self):
+        pass
+
+    def lrange(self, key, start, end):
+        return list(self.lists.get(key, []))
+
+    def pubsub(self):
+        return SimpleNamespace(subscribe=lambda key: None, close=lambda: None,
+                               get_message=lambda **kwargs: None)
+
+
+class TestRedisEventBus:
+    """Test suite for RedisEventBus"""
+
+    def test_publish_keeps_capped_history(self):
+        client = FakeRedis()
+        bus = RedisEventBus(client, history=2)
+        for progress in range(3):
+            bus.publish('job', 'progress', {'progress': progress})
+
+        with bus.subscribe('job') as subscription:
+            events = [subscription.get(timeout=0) for _ in range(2)]
+
+        assert [e['id'] for e in events] == [2, 3]
+        assert client.published[-1][0] == 'rexeli:progress:job'
+
+
+class TestJobEvents:
+    """JobRunner publishes pipeline progress to the bus"""
+
+    def test_event_sequence(self):
+        runner = make_runner(FakePipeline())
+        events = list(runner.events(runner.submit('/tmp/doc.pdf'), heartbeat=2))
+
+        assert [e['event'] for e in events] == ['stage', 'stage', 'partial', 'progress', 'partial', 'complete']
+        assert events[2]['data']['region_result']['text'] == '$2,500'
+        terminal = events[-1]['data']
+        assert terminal['status'] == 'completed' and 'results' not in terminal
+        assert runner.get_status(terminal['processing_id'])['results']['extracted_data'] == {'tenant': 'John Smith'}
+
+    def test_progress_events_are_not_throttled(self):
+        runner = make_runner(FakePipeline())
+        writes = []
+        original = runner.store.update
+        runner.store.update = lambda pid, **fields: (writes.append(fields), original(pid, **fields))
+
+        events = list(runner.events(runner.submit('/tmp/doc.pdf'), heartbeat=2))
+
+        # Progress within a stage is published every time but written once per interval
+        assert len([e for e in events if e['event'] == 'progress']) == 1
+        assert [w.get('progress') for w in writes if 'progress' in w] == [50, 75, 100]
+
+    def test_finished_job_without_history(self):
+        runner = make_runner(FakePipeline())
+        processing_id = runner.submit('/tmp/doc.pdf')
+        list(runner.events(processing_id, heartbeat=2))
+        runner.event_bus = InMemoryEventBus()
+
+        events = list(runner.events(processing_id, heartbeat=2))
+
+        assert [e['event'] for e in events] == ['complete']
+
+    def test_bus_failure_does_not_fail_job(self):
+        broken = SimpleNamespace(publish=lambda *args: (_ for _ in ()).throw(ConnectionError('down')))
+        runner = make_runner(FakePipeline(), bus=broken)
+        processing_id = runner.submit('/tmp/doc.pdf')
+        runner.executor.shutdown(wait=True)
+
+        assert runner.get_status(processing_id)['status'] == 'completed'
+
+
+@pytest.fixture
+def client():
+    """Flask app with only the SSE route registered against a real JobRunner"""
+    import app.routes as routes
+
+    flask_app = Flask(__name__)
+    blueprint = Blueprint('sse', __name__)
+    blueprint.add_url_rule('/api/process-stream/<processing_id>', view_func=routes.stream_processing)
+    flask_app.register_blueprint(blueprint)
+    flask_app.config['SSE_HEARTBEAT_INTERVAL'] = 2
+    flask_app.job_runner = make_runner(FakePipeline())
+    return flask_app.test_client()
+
+
+class TestProcessStreamRoute:
+    """Test suite for /api/process-stream"""
+
+    def test_streams_events_until_complete(self, client):
+        processing_id = client.application.job_runner.submit('/tmp/doc.pdf')
+
+        response = client.get(f'/api/process-stream/{processing_id}')
+        frames = [f for f in response.get_data(as_text=True).split('\n\n') if f]
+
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+        assert frames[-1].startswith('id: 6\nevent: complete\n')
+        assert json.loads(frames[2].split('data: ', 1)[1])['region_result']['region'] == 'rent'
+
+    def test_resume_with_last_event_id(self, client):
+        processing_id = client.application.job_runner.submit('/tmp/doc.pdf')
+        client.get(f'/api/process-stream/{processing_id}').get_data()
+
+        response = client.get(f'/api/process-stream/{processing_id}', headers={'Last-Event-ID': '5'})
+
+        assert response.get_data(as_text=True).startswith('id: 6\nevent: complete\n')
+
+    def test_unknown_processing_id(self, client):
+        assert client.get('/api/process-stream/missing').status_code == 404
+
+    def test_heartbeat_frame(self):
+        assert format_sse(None) == ': keep-alive\n\n'
+
+
+def test_subscription_requires_a_transport():
+    with pytest.raises(TypeError):
+        Subscription([])
@@ -0,0 +1,160 @@
+"""
+Tests for batched low-confidence field correction.
+"""
+
+import os
+import sys
+import json
+import pytest
+from types import SimpleNamespace
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.ai_service import AIService
+
+
+def snippet_ids(prompt):
+    """IDs of the snippets packed into a correction prompt"""
+    payload = prompt.split('Snippets:\n')[1].split('\n')[0]
+    return [item['id'] for item in json.loads(payload)]
+
+
+class CorrectingClient:
+    """Fake OpenAI client answering every snippet it is sent, with optional faults"""
+
+    def __init__(self, truncate_above=None, skip_ids=()):
+        self.truncate_above = truncate_above
+        self.skip_ids = set(skip_ids)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **params):
+        ids = snippet_ids(params['messages'][1]['content'])
+        self.calls.append(ids)
+
+        finish_reason = 'stop'
+        if self.truncate_above is not None and len(ids) > self.truncate_above:
+            content, finish_reason = '{"corrections": {"s1": {"val', 'length'
+        else:
+            answered = [sid for sid in ids if sid not in self.skip_ids]
+            self.skip_ids.clear()
+            content = json.dumps({'corrections': {
+                sid: {'value': f'fixed-{sid}', 'confidence': 0.9, 'explanation': 'OCR fix'}
+                for sid in answered
+            }})
+
+        usage = SimpleNamespace(prompt_tokens=50, completion_tokens=20)
+        choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)
+        return SimpleNamespace(choices=[choice], usage=usage)
+
+
+def make_service(**client_kwargs):
+    service = AIService()
+    service.model = 'gpt-3.5-turbo'
+    service.client = CorrectingClient(**client_kwargs)
+    service.dispatcher = None
+    service.response_cache = None
+    service.single_flight = None
+    return service
+
+
+def make_snippets(count):
+    return {
+        f'region-{i}': {'text': f'Va1ue {i}', 'confidence': 55.0, 'region': [i, i, 10, 10]}
+        for i in range(count)
+    }
+
+
+class TestBatchedFieldCorrection:
+    """Test suite for AIService.correct_fields_batch"""
+
+    def test_many_fields_corrected_in_one_call(self):
+        service = make_service()
+        result = service.correct_fields_batch(make_snippets(20), 'Lease for unit 4B', 'lease_agreement')
+
+        assert len(service.client.calls) == 1
+        assert result['round_trips'] == 1
+        assert result['batches'] == 1
+        assert len(result['corrections']) == 20
+
+    def test_corrections_mapped_back_to_regions(self):
+        service = make_service()
+        snippets = make_snippets(3)
+        result = service.correct_fields_batch(snippets)
+
+        assert list(result['corrections']) == list(snippets)
+        correction = result['corrections']['region-2']
+        assert correction['original'] == 'Va1ue 2'
+        assert correction['value'] == 'fixed-s3'
+        assert correction['region'] == [2, 2, 10, 10]
+        assert correction['changed'] is True
+        assert correction['source'] == 'ai'
+
+    def test_split_by_token_budget(self):
+        service = make_service()
+        result = service.correct_fields_batch(make_snippets(12), token_budget=150)
+
+        assert result['batches'] > 1
+        assert len(service.client.calls) == result['batches']
+        assert sorted(sid for call in service.client.calls for sid in call) == \
+            sorted(f's{i}' for i in range(1, 13))
+
+    def test_extra_batches_use_the_service_executor(self):
+        service = make_service()
+        submitted = []
+        submit = service.executor.submit
+        service.executor.submit = lambda *args: (submitted.append(args), submit(*args))[1]
+
+        result = service.correct_fields_batch(make_snippets(12), token_budget=150)
+
+        assert len(submitted) == result['batches'] - 1
+        assert len(result['corrections']) == 12
+
+    def test_truncated_batch_split_in_half(self):
+        service = make_service(truncate_above=4)
+        result = service.correct_fields_batch(make_snippets(8))
+
+        assert [len(call) for call in service.client.calls] == [8, 4, 4]
+        assert result['round_trips'] == 3
+        assert all(c['source'] == 'ai' for c in result['corrections'].values())
+
+    def test_only_missing_ids_requested_again(self):
+        service = make_service(skip_ids=['s2', 's4'])
+        result = service.correct_fields_batch(make_snippets(5))
+
+        assert service.client.calls[1] == ['s2', 's4']
+        assert result['round_trips'] == 2
+        assert result['corrections']['region-1']['value'] == 'fixed-s2'
+
+    def test_basic_cleanup_without_client(self):
+        service = make_service()
+        service.client = None
+        result = service.correct_fields_batch({'rent': {'text': '  $2,5OO ', 'confidence': 60.0}})
+
+        correction = result['corrections']['rent']
+        assert result['round_trips'] == 0
+        assert correction['source'] == 'basic'
+        assert correction['confidence'] == 0.6
+
+    def test_streams_corrections_by_original_id(self):
+        events = []
+        service = make_service()
+        original_create = service.client.create
+
+        def create(stream=False, **params):
+            response = original_create(**params)
+            if not stream:
+                return response
+            content = response.choices[0].message.content
+            chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content),
+                                                               finish_reason='stop')], usage=None)]
+            return iter(chunks)
+
+        service.client.chat.completions.create = create
+        service.correct_fields_batch(make_snippets(2), on_update=events.append)
+
+        assert [(e['section'], e['name'], e['value']) for e in events] == [
+            ('corrected', 'region-0', 'fixed-s1'), ('corrected', 'region-1', 'fixed-s2')
+        ]
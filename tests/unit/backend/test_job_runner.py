@@ -0,0 +1,199 @@
+"""
+Tests for background document processing jobs.
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+from contextlib import nullcontext
+from types import SimpleNamespace
+from flask import Flask, Blueprint
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.job_runner import JobRunner, MemoryJobStore, COMPLETED, FAILED
+from app.services.processing_pipeline import ProcessingPipeline
+
+
+class FakePipeline:
+    """Reports two progress stages, optionally waiting on an event first"""
+
+    def __init__(self, gate=None, error=None):
+        self.gate = gate
+        self.error = error
+
+    def process_document(self, file_path, regions=None, document_type=None,
+                         processing_id=None, progress_callback=None, use_cache=True):
+        if self.gate is not None:
+            self.gate.wait(5)
+        progress_callback('ocr_processing', 40.0, {'message': 'Reading text'})
+        progress_callback('ai_analysis', 70.0, {'message': 'Analyzing'})
+        if self.error:
+            raise RuntimeError(self.error)
+        return {'processing_id': processing_id, 'success': True,
+                'extracted_data': {'tenant': 'John Smith'}}
+
+
+def make_runner(pipeline, **kwargs):
+    app = SimpleNamespace(config={}, processing_pipeline=pipeline, app_context=nullcontext)
+    return JobRunner(app, store=MemoryJobStore(), progress_interval=0, **kwargs)
+
+
+def wait_for(runner, processing_id, statuses=(COMPLETED, FAILED)):
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        status = runner.get_status(processing_id)
+        if status['status'] in statuses:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {processing_id} did not finish")
+
+
+class TestJobRunner:
+    """Test suite for JobRunner"""
+
+    def test_submit_returns_before_processing(self):
+        gate = threading.Event()
+        runner = make_runner(FakePipeline(gate=gate))
+
+        processing_id = runner.submit('/tmp/doc.pdf')
+        status = runner.get_status(processing_id)
+        gate.set()
+
+        assert status['status'] in ('queued', 'processing')
+        assert status['results'] is None
+        assert wait_for(runner, processing_id)['status'] == COMPLETED
+
+    def test_completed_job_has_results(self):
+        runner = make_runner(FakePipeline())
+
+        status = wait_for(runner, runner.submit('/tmp/doc.pdf', document_type='lease_agreement'))
+
+        assert status['progress'] == 100.0
+        assert status['stage'] == 'finalization'
+        assert status['results']['extracted_data'] == {'tenant': 'John Smith'}
+        assert status['completed_at'] is not None
+        assert runner.get_statistics()['completed'] == 1
+
+    def test_failure_records_error(self):
+        runner = make_runner(FakePipeline(error='OCR engine unavailable'))
+
+        status = wait_for(runner, runner.submit('/tmp/doc.pdf'))
+
+        assert status['status'] == FAILED
+        assert status['error'] == 'OCR engine unavailable'
+        assert status['progress'] == 70.0
+        assert runner.get_statistics()['failed'] == 1
+
+    def test_progress_is_stored(self):
+        runner = make_runner(FakePipeline())
+        updates = []
+        original = runner.store.update
+
+        def record(processing_id, **fields):
+            updates.append(fields)
+            original(processing_id, **fields)
+
+        runner.store.update = record
+        wait_for(runner, runner.submit('/tmp/doc.pdf'))
+
+        stages = [u['current_stage'] for u in updates if 'current_stage' in u]
+        assert stages == ['initialization', 'ocr_processing', 'ai_analysis', 'finalization']
+
+    @pytest.mark.parametrize('method,failures', [('update', 1), ('finish', 1), ('update', 100)])
+    def test_store_errors_still_end_the_job(self, method, failures):
+        runner = make_runner(FakePipeline())
+        processing_id = runner.store.create('/tmp/doc.pdf')
+        original = getattr(runner.store, method)
+        calls = []
+
+        def flaky(*args, **fields):
+            calls.append(fields)
+            if len(calls) <= failures:
+                raise RuntimeError('database is locked')
+            return original(*args, **fields)
+
+        setattr(runner.store, method, flaky)
+        result = runner.run(processing_id, '/tmp/doc.pdf')
+
+        with runner.event_bus.subscribe(processing_id) as subscription:
+            events = [subscription.get(timeout=0) for _ in range(10)]
+        terminal = [event for event in events if event and event['event'] in ('complete', 'failed')]
+        assert result['success'] is False
+        assert [event['event'] for event in terminal] == ['failed']
+        assert 'database is locked' in terminal[0]['data']['error']
+        assert runner.get_statistics()['failed'] == 1
+        if failures == 1:
+            status = runner.get_status(processing_id)
+            assert status['status'] == FAILED and 'database is locked' in status['error']
+
+    def test_unknown_processing_id(self):
+        assert make_runner(FakePipeline()).get_status('missing') is None
+
+
+class TestPipelineProgressCallbacks:
+    """Concurrent runs on one pipeline report progress to their own callbacks"""
+
+    def test_callbacks_do_not_cross(self, monkeypatch):
+        pipeline = ProcessingPipeline.__new__(ProcessingPipeline)
+        pipeline.progress_callback = None
+        pipeline.result_cache = None
+        barrier = threading.Barrier(2)
+
+        def fake_process(file_path, regions, document_type, processing_id):
+            pipeline._update_progress('ocr_processing', 10.0, {'file': file_path})
+            barrier.wait(5)
+            pipeline._update_progress('ai_analysis', 50.0, {'file': file_path})
+            return {'success': True}
+
+        monkeypatch.setattr(pipeline, '_process_document', fake_process)
+        seen = {'a.pdf': [], 'b.pdf': []}
+
+        def run(name):
+            pipeline.process_document(name, progress_callback=lambda stage, progress, meta:
+                                      seen[name].append(meta['file']))
+
+        threads = [threading.Thread(target=run, args=(name,)) for name in seen]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert seen == {'a.pdf': ['a.pdf', 'a.pdf'], 'b.pdf': ['b.pdf', 'b.pdf']}
+
+
+class TestProcessDocumentRoute:
+    """/api/process-document answers inline unless the caller opts into a job"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        import app.routes as routes
+
+        flask_app = Flask(__name__)
+        blueprint = Blueprint('process', __name__)
+        blueprint.add_url_rule('/api/process-document', view_func=routes.process_document, methods=['POST'])
+        flask_app.register_blueprint(blueprint)
+        flask_app.processing_pipeline = SimpleNamespace(process_document=lambda *args, **kwargs: {
+            'success': True, 'extracted_data': {'tenant': 'John Smith'}})
+        flask_app.job_runner = make_runner(FakePipeline())
+        flask_app.pdf_path = tmp_path / 'doc.pdf'
+        flask_app.pdf_path.write_bytes(b'%PDF-1.4')
+        return flask_app.test_client()
+
+    def test_synchronous_by_default(self, client):
+        response = client.post('/api/process-document', json={'filepath': str(client.application.pdf_path)})
+
+        assert response.status_code == 200
+        assert response.get_json()['processing_results']['extracted_data'] == {'tenant': 'John Smith'}
+
+    def test_async_opt_in_queues_a_job(self, client):
+        response = client.post('/api/process-document',
+                               json={'filepath': str(client.application.pdf_path), 'async': True})
+
+        body = response.get_json()
+        assert response.status_code == 202
+        assert wait_for(client.application.job_runner, body['processing_id'])['status'] == COMPLETED
@@ -0,0 +1,147 @@
+"""
+Tests for the persistent LLM response cache and its use in AIService.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import pytest
+from types import SimpleNamespace
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.llm_cache import LLMResponseCache
+from app.services.ai_service import AIService
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(db_path=str(tmp_path / 'llm_cache.sqlite3'), ttl_seconds=60, max_entries=3)
+
+
+class TestLLMResponseCache:
+    """Test suite for LLMResponseCache"""
+
+    def test_key_ignores_whitespace_but_not_parameters(self, cache):
+        messages_a = [{'role': 'user', 'content': 'Validate\n\n  this   data'}]
+        messages_b = [{'role': 'user', 'content': 'Validate this data'}]
+
+        key_a = cache.make_key('gpt-3.5-turbo', messages_a, 0.1, {'type': 'json_object'})
+        key_b = cache.make_key('gpt-3.5-turbo', messages_b, 0.1, {'type': 'json_object'})
+
+        assert key_a == key_b
+        assert key_a != cache.make_key('gpt-4', messages_b, 0.1, {'type': 'json_object'})
+        assert key_a != cache.make_key('gpt-3.5-turbo', messages_b, 0.0, {'type': 'json_object'})
+        assert key_a != cache.make_key('gpt-3.5-turbo', messages_b, 0.1, None)
+
+    def test_hit_miss_and_latency_saved(self, cache):
+        assert cache.get('missing') is None
+
+        cache.set('k1', {'content': '{}', 'finish_reason': 'stop'}, latency_seconds=2.5)
+        assert cache.get('k1')['content'] == '{}'
+
+        stats = cache.get_statistics()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['latency_saved_seconds'] == 2.5
+        assert stats['entries'] == 1
+
+    def test_connections_are_closed(self, cache, monkeypatch):
+        opened = []
+        connect = sqlite3.connect
+
+        def tracking_connect(*args, **kwargs):
+            opened.append(connect(*args, **kwargs))
+            return opened[-1]
+
+        monkeypatch.setattr(sqlite3, 'connect', tracking_connect)
+
+        cache.set('k1', {'content': '{}'})
+        cache.get('k1')
+        cache.get_statistics()
+
+        assert opened
+        for conn in opened:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute('SELECT 1')
+
+    def test_ttl_expiry(self, cache):
+        cache.ttl_seconds = 0
+        cache.set('k1', {'content': '{}'})
+        time.sleep(0.01)
+        assert cache.get('k1') is None
+
+    def test_size_cap_evicts_least_recently_used(self, cache):
+        for i in range(3):
+            cache.set(f'k{i}', {'content': str(i)})
+            time.sleep(0.01)
+        cache.get('k0')  # Refresh k0 so k1 becomes least recently used
+        cache.set('k3', {'content': '3'})
+
+        assert cache.get('k1') is None
+        assert cache.get('k0') is not None
+        assert cache.get_statistics()['entries'] == 3
+
+    def test_shared_between_instances(self, cache, tmp_path):
+        cache.set('k1', {'content': 'shared'})
+        other = LLMResponseCache(db_path=str(tmp_path / 'llm_cache.sqlite3'))
+        assert other.get('k1')['content'] == 'shared'
+
+    def test_default_path_is_private(self, tmp_path, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, 'STATE_FOLDER', str(tmp_path / 'state'))
+
+        cache = LLMResponseCache()
+
+        assert cache.db_path == str(tmp_path / 'state' / 'llm_cache.sqlite3')
+        assert os.stat(tmp_path / 'state').st_mode & 0o777 == 0o700
+
+    def test_refuses_a_shared_directory(self, tmp_path):
+        shared = tmp_path / 'shared'
+        shared.mkdir()
+        shared.chmod(0o777)
+
+        with pytest.raises(PermissionError):
+            LLMResponseCache(db_path=str(shared / 'llm_cache.sqlite3'))
+
+
+class TestAIServiceCaching:
+    """Test cache integration in AIService._make_openai_request"""
+
+    @pytest.fixture
+    def service(self, cache):
+        calls = []
+
+        def create(**params):
+            calls.append(params)
+            usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+            choice = SimpleNamespace(message=SimpleNamespace(content='{"valid": true}'), finish_reason='stop')
+            return SimpleNamespace(choices=[choice], usage=usage)
+
+        service = AIService()
+        service.model = 'gpt-3.5-turbo'
+        service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        service.dispatcher = None
+        service.response_cache = cache
+        service.calls = calls
+        return service
+
+    def test_repeat_request_served_from_cache(self, service):
+        messages = [{'role': 'user', 'content': 'validate'}]
+        first = service._make_openai_request(messages, temperature=0.0, response_format={'type': 'json_object'})
+        second = service._make_openai_request(messages, temperature=0.0, response_format={'type': 'json_object'})
+
+        assert first['content'] == second['content']
+        assert second.get('cached') is True
+        assert len(service.calls) == 1
+
+    def test_opt_out_bypasses_cache(self, service):
+        messages = [{'role': 'user', 'content': 'insights'}]
+        service._make_openai_request(messages, use_cache=False)
+        service._make_openai_request(messages, use_cache=False)
+
+        assert len(service.calls) == 2
+        assert service.response_cache.get_statistics()['stores'] == 0
@@ -0,0 +1,241 @@
+"""
+Tests for the asyncio LLM dispatcher and AIService batch processing.
+Uses fake async OpenAI clients; no network access is required.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from openai import RateLimitError
+from app.services.llm_dispatcher import AsyncLLMDispatcher, TokenBucket
+from app.services.ai_service import AIService
+
+
+def make_response(content='{"ok": true}', total_tokens=10):
+    usage = SimpleNamespace(prompt_tokens=total_tokens - 2, completion_tokens=2, total_tokens=total_tokens)
+    choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop')
+    return SimpleNamespace(choices=[choice], usage=usage)
+
+
+class FakeAsyncClient:
+    """Fake AsyncOpenAI client tracking concurrency and optional 429s"""
+
+    def __init__(self, latency=0.02, rate_limit_first=0):
+        self.latency = latency
+        self.rate_limit_remaining = rate_limit_first
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **params):
+        self.calls += 1
+        if self.rate_limit_remaining > 0:
+            self.rate_limit_remaining -= 1
+            raise RateLimitError('rate limited',
+                                 response=Mock(status_code=429, headers={'retry-after': '0.05'}),
+                                 body=None)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return make_response()
+        finally:
+            self.in_flight -= 1
+
+
+class TestTokenBucket:
+    """Test suite for TokenBucket"""
+
+    def test_waits_when_empty(self):
+        bucket = TokenBucket(rate_per_minute=600)  # 10 per second
+
+        async def drain():
+            await bucket.acquire(600)
+            start = time.monotonic()
+            await bucket.acquire(2)
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(drain())
+        assert 0.15 <= elapsed < 1.0
+
+    def test_throttle_and_recover(self):
+        bucket = TokenBucket(rate_per_minute=100)
+        bucket.throttle(0.5)
+        assert bucket.rate_per_minute == 50
+        bucket.recover(10)
+        assert bucket.rate_per_minute == 100
+
+
+class TestAsyncLLMDispatcher:
+    """Test suite for AsyncLLMDispatcher"""
+
+    def test_respects_max_in_flight(self):
+        client = FakeAsyncClient(latency=0.05)
+        dispatcher = AsyncLLMDispatcher(client, requests_per_minute=10000,
+                                        tokens_per_minute=10_000_000, max_in_flight=3)
+        try:
+            params = {'model': 'test', 'messages': [{'role': 'user', 'content': 'hi'}], 'max_tokens': 10}
+            results = dispatcher.request_many([params] * 10)
+        finally:
+            dispatcher.shutdown()
+
+        assert len(results) == 10
+        assert all(not isinstance(r, Exception) for r in results)
+        assert client.max_in_flight == 3
+        assert dispatcher.get_statistics()['completed'] == 10
+
+    def test_request_rate_limits_throughput(self):
+        client = FakeAsyncClient(latency=0)
+        # Capacity of 120 requests, refilled at 2 per second
+        dispatcher = AsyncLLMDispatcher(client, requests_per_minute=120,
+                                        tokens_per_minute=10_000_000, max_in_flight=50)
+        dispatcher.request_bucket.tokens = 0
+        try:
+            params = {'model': 'test', 'messages': [], 'max_tokens': 1}
+            start = time.monotonic()
+            dispatcher.request_many([params] * 2)
+            elapsed = time.monotonic() - start
+        finally:
+            dispatcher.shutdown()
+
+        assert elapsed >= 0.9
+
+    def test_retries_and_throttles_on_429(self):
+        client = FakeAsyncClient(latency=0, rate_limit_first=1)
+        dispatcher = AsyncLLMDispatcher(client, requests_per_minute=1000, tokens_per_minute=1_000_000,
+                                        retry_wait_min=0, retry_wait_max=0.1)
+        try:
+            response = dispatcher.request({'model': 'test', 'messages': [], 'max_tokens': 1})
+        finally:
+            dispatcher.shutdown()
+
+        stats = dispatcher.get_statistics()
+        assert response.choices[0].message.content == '{"ok": true}'
+        assert client.calls == 2
+        assert stats['rate_limited'] == 1
+        assert stats['retries'] == 1
+        assert stats['request_bucket']['rate_per_minute'] < 1000
+
+    def test_restarted_loop_gets_fresh_primitives(self):
+        client = FakeAsyncClient(latency=0.01)
+        dispatcher = AsyncLLMDispatcher(client, requests_per_minute=10000,
+                                        tokens_per_minute=10_000_000, max_in_flight=1)
+        params = {'model': 'test', 'messages': [], 'max_tokens': 1}
+        try:
+            dispatcher.request_many([params] * 3)
+            first_thread = dispatcher._thread
+            dispatcher.shutdown()
+            first_thread.join(timeout=5)
+
+            # e.g. the first request in a forked worker
+            results = dispatcher.request_many([params] * 3)
+        finally:
+            dispatcher.shutdown()
+
+        assert dispatcher._thread is not first_thread
+        assert all(not isinstance(r, Exception) for r in results)
+
+    def test_statistics_from_many_caller_threads(self):
+        client = FakeAsyncClient(latency=0)
+        dispatcher = AsyncLLMDispatcher(client, requests_per_minute=100000,
+                                        tokens_per_minute=100_000_000, max_in_flight=8)
+        params = {'model': 'test', 'messages': [], 'max_tokens': 1}
+
+        def caller():
+            for _ in range(25):
+                dispatcher.request(params)
+
+        threads = [threading.Thread(target=caller) for _ in range(8)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            dispatcher.shutdown()
+
+        stats = dispatcher.get_statistics()
+        assert stats['submitted'] == stats['completed'] == 200
+        assert stats['in_flight'] == 0
+
+
+class TestAIServiceBatch:
+    """Test AIService.process_batch on top of the dispatcher"""
+
+    def test_process_batch_preserves_order_without_sleeping(self):
+        service = AIService()
+        service.model = 'gpt-3.5-turbo'
+        service.client = object()
+        service.dispatcher = AsyncLLMDispatcher(FakeAsyncClient(latency=0.05),
+                                                requests_per_minute=10000,
+                                                tokens_per_minute=10_000_000,
+                                                max_in_flight=8)
+        try:
+            items = [{'text': f'lease agreement {i}'} for i in range(12)]
+            start = time.monotonic()
+            results = service.process_batch(items, 'classify', batch_size=5, delay=1.0)
+            elapsed = time.monotonic() - start
+        finally:
+            service.dispatcher.shutdown()
+
+        assert len(results) == 12
+        assert all(r.get('method') == 'ai_classification' for r in results)
+        # Old implementation slept 1s between each chunk of 5
+        assert elapsed < 1.0
+
+    def test_process_batch_bounds_each_item(self):
+        service = AIService()
+        service.latency_budget_seconds = 0.1
+        release = threading.Event()
+        service.classify_document_content = lambda text: release.wait(5) or {'method': 'late'}
+        try:
+            start = time.monotonic()
+            results = service.process_batch([{'text': 'stuck'}], 'classify')
+            elapsed = time.monotonic() - start
+        finally:
+            release.set()
+
+        assert 'Timed out' in results[0]['error']
+        assert elapsed < 1.0
+
+
+class TestAIServiceLatency:
+    """Call latency seen by AIService excludes time queued in the dispatcher"""
+
+    def test_queue_wait_is_not_model_latency(self):
+        service = AIService()
+        service.model = 'gpt-3.5-turbo'
+        service.client = object()
+        service.response_cache = None
+        service.single_flight = None
+        service.dispatcher = AsyncLLMDispatcher(FakeAsyncClient(latency=0.2),
+                                                requests_per_minute=10000,
+                                                tokens_per_minute=10_000_000,
+                                                max_in_flight=1)
+        messages = [{'role': 'user', 'content': 'lease agreement'}]
+        try:
+            start = time.monotonic()
+            threads = [threading.Thread(target=service._make_openai_request, args=(messages,),
+                                        kwargs={'use_cache': False}) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - start
+        finally:
+            service.dispatcher.shutdown()
+
+        assert elapsed >= 0.6
+        assert len(service.latency_tracker) == 3
+        assert service.latency_tracker.percentile(100) < 0.35
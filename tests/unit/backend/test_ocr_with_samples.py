@@ -10,7 +10,7 @@ import json
 from pathlib import Path
 
 # Add app directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), 'app'))
 
 from services.ocr_service import OCRService
 
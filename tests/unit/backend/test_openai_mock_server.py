@@ -0,0 +1,128 @@
+"""
+Tests for the local OpenAI-compatible mock server.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import pytest
+from openai import OpenAI, RateLimitError, InternalServerError
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from tests.fixtures.openai_mock_server import OpenAIMockServer, parse_latency, CANNED_FIELDS
+from app.services.ai_service import AIService
+
+
+@pytest.fixture
+def server():
+    with OpenAIMockServer() as mock:
+        yield mock
+
+
+def make_client(server, **kwargs):
+    return OpenAI(base_url=server.base_url, api_key='mock', **kwargs)
+
+
+def make_service(server):
+    service = AIService()
+    service.model = 'gpt-3.5-turbo'
+    service.client = make_client(server, max_retries=0)
+    service.dispatcher = None
+    service.response_cache = None
+    service.single_flight = None
+    return service
+
+
+class TestOpenAIMockServer:
+    """Test suite for OpenAIMockServer"""
+
+    def test_json_mode_returns_canned_fields(self, server):
+        response = make_client(server).chat.completions.create(
+            model='gpt-3.5-turbo',
+            messages=[{'role': 'system', 'content': 'Enhance and standardize the extracted data.'},
+                      {'role': 'user', 'content': 'lease_agreement data: {"tenant": "J0hn"}'}],
+            response_format={'type': 'json_object'}
+        )
+
+        assert json.loads(response.choices[0].message.content) == CANNED_FIELDS['lease_agreement']
+        assert response.choices[0].finish_reason == 'stop'
+        assert response.usage.total_tokens > 0
+
+    def test_streaming_with_usage(self, server):
+        stream = make_client(server).chat.completions.create(
+            model='gpt-3.5-turbo',
+            messages=[{'role': 'user', 'content': 'rent_roll'}],
+            response_format={'type': 'json_object'},
+            stream=True,
+            stream_options={'include_usage': True}
+        )
+        chunks = list(stream)
+        content = ''.join(c.choices[0].delta.content or '' for c in chunks if c.choices)
+
+        assert json.loads(content) == CANNED_FIELDS['rent_roll']
+        assert chunks[-1].usage.completion_tokens > 0
+
+    def test_rate_limit_injection(self, server):
+        server.state.configure(rate_limit_rate=1.0)
+        with pytest.raises(RateLimitError) as exc_info:
+            make_client(server, max_retries=0).chat.completions.create(
+                model='gpt-3.5-turbo', messages=[{'role': 'user', 'content': 'hi'}]
+            )
+
+        assert exc_info.value.response.headers['retry-after-ms'] == '200'
+        assert server.state.snapshot()['rate_limited'] == 1
+
+    def test_error_injection(self, server):
+        server.state.configure(error_rate=1.0)
+        with pytest.raises(InternalServerError):
+            make_client(server, max_retries=0).chat.completions.create(
+                model='gpt-3.5-turbo', messages=[{'role': 'user', 'content': 'hi'}]
+            )
+
+    def test_latency_distribution(self, server):
+        server.state.configure(latency='fixed:0.2')
+        start = time.time()
+        make_client(server).chat.completions.create(
+            model='gpt-3.5-turbo', messages=[{'role': 'user', 'content': 'hi'}]
+        )
+
+        assert time.time() - start >= 0.2
+        assert 0.1 <= parse_latency('uniform:0.1,0.3')(random.Random(1)) <= 0.3
+
+    def test_truncates_at_max_tokens(self, server):
+        response = make_client(server).chat.completions.create(
+            model='gpt-3.5-turbo',
+            messages=[{'role': 'user', 'content': 'offering_memo'}],
+            response_format={'type': 'json_object'},
+            max_tokens=5
+        )
+
+        assert response.choices[0].finish_reason == 'length'
+
+
+class TestAIServiceAgainstMock:
+    """AIService round trips through the mock exactly as through the real API"""
+
+    def test_classification(self, server):
+        result = make_service(server).classify_document_content('RENT ROLL - Oakwood Apartments, 24 units')
+
+        assert result['document_type'] == 'rent_roll'
+        assert result['property_type'] == 'multifamily'
+
+    def test_fused_analysis(self, server):
+        result = make_service(server).analyze_document({'tenant_name': 'J0hn'}, 'Lease text', 'lease_agreement')
+
+        assert result['mode'] == 'fused'
+        assert result['enhanced_data']['enhanced_data']['tenant_name'] == 'John Smith'
+
+    def test_batched_correction(self, server):
+        service = make_service(server)
+        result = service.correct_fields_batch({'rent': {'text': '$2,5OO', 'confidence': 40.0}})
+
+        assert result['corrections']['rent']['value'] == '$2,500'
+        assert result['round_trips'] == 1
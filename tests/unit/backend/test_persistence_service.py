@@ -0,0 +1,131 @@
+"""
+Tests for bulk persistence of processing runs.
+"""
+
+import os
+import sys
+import pytest
+from sqlalchemy import create_engine, event, select, func
+from sqlalchemy.orm import Session
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.models.database import db, Document, ProcessingSession, DocumentRegion, ExtractionResult
+from app.services import persistence_service
+from app.services.persistence_service import ResultPersistenceService
+
+
+def make_results(count, text='$2,500'):
+    regions = [{'name': f'unit_{i}', 'x': i, 'y': 10, 'width': 50, 'height': 20} for i in range(count)]
+    ocr_results = {
+        region['name']: {'text': f'{text} #{i}', 'confidence': 91.456, 'success': True,
+                         'word_ref': [i * 2, i * 2 + 2], 'word_count': 2, 'region': region}
+        for i, region in enumerate(regions)
+    }
+    results = {
+        'success': True,
+        'stages': {'ocr_processing': {'success': True, 'results': ocr_results}},
+        'extracted_data': {'enhanced_data': {'unit_0': {'value': 'Unit 101', 'confidence': 88}}}
+    }
+    return regions, results
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    with Session(engine) as session:
+        document = Document(filename='rr.pdf', original_name='rr.pdf', file_path='/tmp/rr.pdf', file_size=100)
+        processing_session = ProcessingSession(document=document, session_status='processing')
+        session.add_all([document, processing_session])
+        session.commit()
+        session.processing_id = str(processing_session.id)
+        session.statements = statements
+        yield session
+
+
+def count(session, model):
+    return session.scalar(select(func.count()).select_from(model))
+
+
+class TestResultPersistenceService:
+    """Test suite for ResultPersistenceService"""
+
+    def test_large_run_takes_a_handful_of_statements(self, session):
+        regions, results = make_results(500)
+        service = ResultPersistenceService(batch_size=200)
+        session.statements.clear()
+
+        written = service.save_run(session, session.processing_id, results, regions,
+                                   session_status='completed')
+
+        assert written == {'regions': 500, 'extraction_results': 501}
+        assert count(session, DocumentRegion) == 500
+        assert count(session, ExtractionResult) == 501
+        assert len(session.statements) < 20
+        processing_session = session.scalars(select(ProcessingSession)).one()
+        assert processing_session.session_status == 'completed'
+        assert processing_session.results['success'] is True
+        assert processing_session.document.processing_status == 'completed'
+
+    def test_reprocessing_upserts_in_place(self, session):
+        service = ResultPersistenceService()
+        regions, results = make_results(3)
+        service.save_run(session, session.processing_id, results, regions)
+        first_ids = set(session.scalars(select(DocumentRegion.id)))
+
+        regions, results = make_results(2, text='$2,750')
+        results['extracted_data'] = {}
+        service.save_run(session, session.processing_id, results, regions)
+
+        rows = session.execute(select(DocumentRegion.region_name, ExtractionResult.extracted_text,
+                                      ExtractionResult.processing_method)
+                               .join(ExtractionResult.region).order_by(DocumentRegion.region_name)).all()
+        assert set(session.scalars(select(DocumentRegion.id))) < first_ids
+        assert [tuple(row) for row in rows] == [('unit_0', '$2,750 #0', 'ocr'), ('unit_1', '$2,750 #1', 'ocr')]
+
+    def test_replaces_rows_without_upsert_support(self, session, monkeypatch):
+        monkeypatch.setattr(persistence_service, 'UPSERT_INSERTS', {})
+        service = ResultPersistenceService(batch_size=2)
+        regions, results = make_results(3)
+        service.save_run(session, session.processing_id, results, regions)
+
+        regions, results = make_results(2, text='$2,750')
+        written = service.save_run(session, session.processing_id, results, regions, session_status='completed')
+
+        rows = session.execute(select(DocumentRegion.region_name, ExtractionResult.extracted_text,
+                                      ExtractionResult.processing_method)
+                               .join(ExtractionResult.region).order_by(DocumentRegion.region_name,
+                                                                       ExtractionResult.processing_method)).all()
+        assert written == {'regions': 2, 'extraction_results': 3}
+        assert count(session, ExtractionResult) == 3
+        assert [tuple(row) for row in rows] == [('unit_0', 'Unit 101', 'ai'), ('unit_0', '$2,750 #0', 'ocr'),
+                                                ('unit_1', '$2,750 #1', 'ocr')]
+        assert session.scalars(select(ProcessingSession)).one().session_status == 'completed'
+        metadata = session.scalars(select(ExtractionResult.extraction_metadata)
+                                   .where(ExtractionResult.processing_method == 'ocr')).all()
+        assert sorted(item['word_ref'] for item in metadata) == [[0, 2], [2, 4]]
+
+    def test_rows_from_results(self):
+        regions, results = make_results(1)
+
+        region_rows, result_rows = ResultPersistenceService.build_rows('sid', results, regions)
+
+        assert region_rows[0]['region_name'] == 'unit_0' and region_rows[0]['width'] == 50
+        assert [row['processing_method'] for _, row in result_rows] == ['ocr', 'ai']
+        assert result_rows[0][1]['confidence_score'] == 91.46
+        assert result_rows[0][1]['metadata'] == {'word_ref': [0, 2], 'word_count': 2}
+        assert result_rows[1][1]['extracted_text'] == 'Unit 101'
+
+    def test_failed_write_rolls_back(self, session):
+        regions, results = make_results(2)
+
+        with pytest.raises(LookupError):
+            ResultPersistenceService().save_run(session, '00000000-0000-0000-0000-000000000000', results, regions)
+
+        assert count(session, DocumentRegion) == 0
@@ -0,0 +1,87 @@
+"""
+Tests for the token-budgeted prompt builder.
+"""
+
+import os
+import sys
+import json
+import pytest
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.prompt_builder import PromptBuilder, TRUNCATION_MARKER
+
+
+def make_ocr_region(text, word_count=40):
+    return {
+        'text': text,
+        'raw_text': text,
+        'confidence': 87.123456,
+        'words': [
+            {'text': f'word{i}', 'confidence': 90, 'bbox': {'left': i, 'top': 0, 'width': 10, 'height': 10}, 'level': 5}
+            for i in range(word_count)
+        ],
+        'region': {'x': 0, 'y': 0, 'width': 100, 'height': 100},
+        'processing_time': 0.42,
+        'preprocessing_used': 'standard',
+        'validation': {'is_valid': True, 'quality_score': 80.0, 'issues': [], 'recommendations': []}
+    }
+
+
+@pytest.fixture
+def raw_data():
+    return {
+        'full_text': 'Tenant: John Smith   Monthly Rent: $2,500\n\nLease Term: 12 months',
+        'regions': {f'region_{i}': make_ocr_region(f'Unit {i} rent $1,{i:03d}') for i in range(10)},
+        'pdf_text': 'Tenant: John Smith Monthly Rent: $2,500 Lease Term: 12 months'
+    }
+
+
+class TestPromptBuilder:
+    """Test suite for PromptBuilder"""
+
+    def test_compact_drops_ocr_bookkeeping(self, raw_data):
+        builder = PromptBuilder(token_budget=10000)
+        text, report = builder.build(raw_data)
+        data = json.loads(text)
+
+        region = data['regions']['region_0']
+        assert region == {'text': 'Unit 0 rent $1,000', 'confidence': 87.12}
+        assert data['full_text'] == 'Tenant: John Smith Monthly Rent: $2,500 Lease Term: 12 months'
+        assert not report['truncated']
+        assert report['tokens_saved'] > 0
+        assert report['prompt_tokens'] < report['original_tokens'] / 5
+
+    def test_budget_truncates_lowest_priority_first(self, raw_data):
+        raw_data['pdf_text'] = 'lorem ipsum ' * 500
+        raw_data['full_text'] = 'Tenant: John Smith Monthly Rent: $2,500'
+        builder = PromptBuilder(token_budget=300)
+        text, report = builder.build(raw_data)
+        data = json.loads(text)
+
+        assert report['truncated']
+        assert report['prompt_tokens'] <= 300
+        assert data['pdf_text'].endswith(TRUNCATION_MARKER)
+        # Higher priority data survives intact
+        assert data['full_text'] == 'Tenant: John Smith Monthly Rent: $2,500'
+
+    def test_large_collections_are_summarized(self):
+        builder = PromptBuilder(token_budget=60)
+        text, report = builder.build({'regions': {f'r{i}': {'text': 'x' * 50} for i in range(50)}})
+        data = json.loads(text)
+
+        assert report['truncated']
+        assert '_omitted' in data['regions']
+        assert len(data['regions']) < 50
+
+    def test_statistics_accumulate(self, raw_data):
+        builder = PromptBuilder(token_budget=10000)
+        builder.build(raw_data)
+        builder.build(raw_data)
+        stats = builder.get_statistics()
+
+        assert stats['calls'] == 2
+        assert stats['tokens_saved'] > 0
+        assert 0 < stats['savings_ratio'] < 1
@@ -0,0 +1,224 @@
+"""
+Tests for latency budgets, the circuit breaker and hedged OpenAI requests.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import concurrent.futures
+import pytest
+from types import SimpleNamespace
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.resilience import (
+    CircuitBreaker, DeadlineExceededError, LatencyTracker, call_deadline, latency_budget
+)
+from app.services.llm_dispatcher import AsyncLLMDispatcher
+from app.services.ai_service import AIService
+
+
+def make_response(content='{"ok": true}'):
+    usage = SimpleNamespace(prompt_tokens=8, completion_tokens=2, total_tokens=10)
+    choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop')
+    return SimpleNamespace(choices=[choice], usage=usage)
+
+
+class TestCircuitBreaker:
+    """Test suite for CircuitBreaker"""
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        for _ in range(3):
+            assert breaker.allow_request()
+            breaker.record_failure(RuntimeError())
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+        assert breaker.get_statistics()['rejected'] == 1
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success(0.1)
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_single_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+        breaker.record_success(0.1)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        breaker.allow_request()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=1.0)
+        breaker.record_success(5.0)
+        breaker.record_success(5.0)
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.get_statistics()['slow_calls'] == 2
+
+
+class TestLatencyBudget:
+    """Test request-level deadlines"""
+
+    def test_unbounded_without_budget(self):
+        assert call_deadline(20.0) == 20.0
+
+    def test_call_deadline_clipped_to_remaining_budget(self):
+        with latency_budget(5.0):
+            assert 4.0 < call_deadline(20.0) <= 5.0
+            assert call_deadline(2.0) == 2.0
+
+    def test_nested_budget_cannot_extend(self):
+        with latency_budget(2.0):
+            with latency_budget(100.0):
+                assert call_deadline(20.0) <= 2.0
+
+    def test_exhausted_budget_raises(self):
+        with latency_budget(0.5):
+            with pytest.raises(DeadlineExceededError):
+                call_deadline(20.0, min_call_seconds=1.0)
+
+    def test_percentiles(self):
+        tracker = LatencyTracker()
+        for i in range(1, 101):
+            tracker.record(i / 100)
+
+        assert tracker.percentile(50) == 0.5
+        assert tracker.percentile(95) == 0.95
+
+
+class TestAIServiceFallbacks:
+    """AIService falls back to basic processing instead of waiting on a bad upstream"""
+
+    @pytest.fixture
+    def service(self):
+        calls = []
+
+        def create(**params):
+            calls.append(params)
+            raise RuntimeError('upstream down')
+
+        service = AIService()
+        service.model = 'gpt-3.5-turbo'
+        service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        service.dispatcher = None
+        service.response_cache = None
+        service.single_flight = None
+        service.circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        service.calls = calls
+        return service
+
+    def test_open_breaker_skips_upstream(self, service):
+        for _ in range(4):
+            result = service.enhance_extracted_data({'rent': '$2,5OO'}, 'lease_agreement')
+            assert result['enhancement_method'] == 'basic'
+
+        assert len(service.calls) == 2
+        stats = service.get_resilience_statistics()
+        assert stats['circuit_breaker']['state'] == 'open'
+        assert stats['fallbacks'] == {'circuit_open': 2, 'deadline': 0, 'timeout': 0, 'error': 2}
+        assert stats['fallback_rate'] == 1.0
+
+    def test_exhausted_budget_skips_upstream(self, service):
+        with service.latency_budget(0.01):
+            time.sleep(0.02)
+            result = service.validate_real_estate_data({'tenant_name': 'John'}, 'lease_agreement')
+
+        assert result['method'] == 'basic_validation'
+        assert service.calls == []
+        assert service.get_resilience_statistics()['fallbacks']['deadline'] == 1
+
+    def test_sync_call_receives_timeout(self, service):
+        seen = []
+
+        def create(**params):
+            seen.append(params.get('timeout'))
+            return make_response()
+
+        service.client.chat.completions.create = create
+        with service.latency_budget(3.0):
+            service._make_openai_request([{'role': 'user', 'content': 'hi'}])
+
+        assert 0 < seen[0] <= 3.0
+
+
+class SlowThenFastClient:
+    """Fake AsyncOpenAI client whose first call hangs"""
+
+    def __init__(self, first_latency=1.0, latency=0.01):
+        self.latencies = [first_latency]
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **params):
+        self.calls += 1
+        latency = self.latencies.pop(0) if self.latencies else self.latency
+        await asyncio.sleep(latency)
+        return make_response()
+
+
+class TestDispatcherDeadlinesAndHedging:
+    """Test dispatcher timeouts and hedged requests"""
+
+    params = {'model': 'gpt-3.5-turbo', 'messages': [{'role': 'user', 'content': 'hi'}], 'max_tokens': 10}
+
+    def test_hedge_wins_over_slow_primary(self):
+        client = SlowThenFastClient(first_latency=2.0)
+        dispatcher = AsyncLLMDispatcher(client)
+        try:
+            start = time.time()
+            response = dispatcher.request(self.params, timeout=5, hedge_after=0.05)
+
+            assert response.choices[0].message.content == '{"ok": true}'
+            assert time.time() - start < 1.0
+            stats = dispatcher.get_statistics()
+            assert stats['hedged'] == 1
+            assert stats['hedge_wins'] == 1
+        finally:
+            dispatcher.shutdown()
+
+    def test_fast_primary_is_not_hedged(self):
+        client = SlowThenFastClient(first_latency=0.01)
+        dispatcher = AsyncLLMDispatcher(client)
+        try:
+            dispatcher.request(self.params, timeout=5, hedge_after=0.5)
+            assert client.calls == 1
+            assert dispatcher.get_statistics()['hedged'] == 0
+        finally:
+            dispatcher.shutdown()
+
+    def test_timeout_cancels_request(self):
+        client = SlowThenFastClient(first_latency=2.0)
+        dispatcher = AsyncLLMDispatcher(client)
+        try:
+            with pytest.raises(concurrent.futures.TimeoutError):
+                dispatcher.request(self.params, timeout=0.1)
+            time.sleep(0.05)
+
+            stats = dispatcher.get_statistics()
+            assert stats['timed_out'] == 1
+            assert stats['in_flight'] == 0
+        finally:
+            dispatcher.shutdown()
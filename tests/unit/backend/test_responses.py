@@ -0,0 +1,165 @@
+"""
+Tests for JSON encoding, response compression and result views.
+"""
+
+import os
+import sys
+import gzip
+import json
+import pytest
+import numpy as np
+from dataclasses import dataclass
+from datetime import datetime
+from flask import Flask, Response, jsonify
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.utils import responses
+from app.services.document_result import WordTable, compact_ocr_result
+from app.utils.responses import FastJSONProvider, result_view, setup_compression
+
+
+@dataclass
+class Report:
+    overall_score: float
+    grade: str
+
+
+RESULTS = {
+    'processing_id': 'job-1',
+    'success': True,
+    'processing_time': 4.2,
+    'stages': {
+        'ocr_processing': {'success': True, 'results': {
+            'rent': {'text': '$2,500', 'words': [{'text': '$2,500', 'bbox': {'x': 1, 'y': 2}}] * 50}
+        }},
+        'ai_enhancement': {'success': False, 'error': 'timeout'}
+    },
+    'extracted_data': {'enhanced_data': {'monthly_rent': '$2,500', 'tenant': 'John Smith'}},
+    'metadata': {'document_type': 'rent_roll', 'quality_score': Report(0.92, 'A')},
+    'errors': [],
+    'warnings': []
+}
+
+
+@pytest.fixture
+def app():
+    flask_app = Flask(__name__)
+    flask_app.json = FastJSONProvider(flask_app)
+    flask_app.config['COMPRESSION_MIN_SIZE'] = 100
+    setup_compression(flask_app)
+
+    @flask_app.route('/results')
+    def results():
+        return jsonify(RESULTS)
+
+    @flask_app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @flask_app.route('/stream')
+    def stream():
+        return Response(iter(['data: x\n\n'] * 100), mimetype='text/event-stream')
+
+    return flask_app
+
+
+class TestFastJSONProvider:
+    """Test suite for FastJSONProvider"""
+
+    def test_encodes_rich_types(self, app):
+        payload = {'report': Report(0.9, 'A'), 'when': datetime(2026, 1, 2, 3, 4, 5),
+                   'score': np.float32(0.5), 'pages': np.arange(3), 1: 'int key'}
+
+        decoded = json.loads(app.json.dumps(payload))
+
+        assert decoded['report'] == {'overall_score': 0.9, 'grade': 'A'}
+        assert decoded['when'].startswith('2026-01-02T03:04:05')
+        assert decoded['score'] == 0.5 and decoded['pages'] == [0, 1, 2]
+        assert decoded['1'] == 'int key'
+
+    def test_falls_back_to_standard_encoder(self, app):
+        assert json.loads(app.json.dumps({'big': 2 ** 70})) == {'big': 2 ** 70}
+
+    def test_unserializable_values_still_raise(self, app):
+        with pytest.raises(TypeError):
+            app.json.dumps({'value': object()})
+
+    def test_request_json_round_trip(self, app):
+        with app.test_request_context(json={'view': 'summary'}):
+            from flask import request
+            assert request.get_json() == {'view': 'summary'}
+
+
+class TestCompression:
+    """Test suite for setup_compression"""
+
+    def test_gzip_when_accepted(self, app):
+        response = app.test_client().get('/results', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data))['processing_id'] == 'job-1'
+
+    @pytest.mark.skipif(not responses.HAS_BROTLI, reason="brotli not installed")
+    def test_brotli_preferred(self, app):
+        response = app.test_client().get('/results', headers={'Accept-Encoding': 'gzip, br'})
+
+        assert response.headers['Content-Encoding'] == 'br'
+
+    def test_skipped_without_accept_encoding_or_for_small_bodies(self, app):
+        client = app.test_client()
+
+        assert 'Content-Encoding' not in client.get('/results').headers
+        assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+
+    def test_event_streams_are_not_buffered(self, app):
+        response = app.test_client().get('/stream', headers={'Accept-Encoding': 'gzip'})
+
+        assert 'Content-Encoding' not in response.headers
+        assert response.data.startswith(b'data: x')
+
+
+class TestResultView:
+    """Test suite for result_view"""
+
+    def test_full_is_the_nested_layout(self):
+        table = WordTable()
+        words = [{'text': '$2,500', 'confidence': 90, 'level': 5,
+                  'bbox': {'left': 1, 'top': 2, 'width': 8, 'height': 12}}]
+        ocr_result = {'text': '$2,500', 'confidence': 90.0, 'words': words}
+        compact = {'success': True, 'stages': {'ocr_processing': {
+            'results': {'rent': compact_ocr_result(ocr_result, table, 'rent')}
+        }}}
+        compact['ocr_words'] = table.to_dict()
+
+        assert result_view(compact, 'full') == {'success': True, 'stages': {'ocr_processing': {
+            'results': {'rent': ocr_result}
+        }}}
+        assert result_view(compact, 'compact') is compact
+        assert result_view(RESULTS, 'full') is RESULTS
+
+    def test_default_view_is_full(self):
+        with Flask(__name__).test_request_context('/'):
+            assert responses.requested_view() == 'full'
+        with Flask(__name__).test_request_context('/?view=expanded'):
+            with pytest.raises(ValueError):
+                responses.requested_view()
+
+    def test_summary(self):
+        summary = result_view(RESULTS, 'summary')
+
+        assert summary['quality_score'] == 0.92
+        assert summary['document_type'] == 'rent_roll'
+        assert summary['field_count'] == 2
+        assert summary['stages'] == {'ocr_processing': True, 'ai_enhancement': False}
+        assert 'extracted_data' not in summary
+
+    def test_fields_drop_word_level_output(self, app):
+        fields = result_view(RESULTS, 'fields')
+
+        assert fields['extracted_data'] == RESULTS['extracted_data']
+        assert '"words"' not in app.json.dumps(fields)
+        assert fields['metadata']['document_type'] == 'rent_roll'
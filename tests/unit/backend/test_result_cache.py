@@ -0,0 +1,192 @@
+"""
+Tests for whole-document result reuse.
+"""
+
+import io
+import os
+import sys
+import time
+import hashlib
+import pytest
+from types import SimpleNamespace
+from flask import Flask, Blueprint
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.result_cache import DocumentResultCache, file_sha256
+from app.services.processing_pipeline import ProcessingPipeline
+from app.utils import upload_stream
+
+PDF_BYTES = b'%PDF-1.4\n' + b'0' * 5000 + b'\n%%EOF\n'
+REGIONS = [{'name': 'rent', 'x': 10, 'y': 20, 'width': 100, 'height': 30}]
+
+
+def make_pipeline(tmp_path, **config):
+    settings = {'RESULT_CACHE_ENABLED': True, 'RESULT_CACHE_PATH': str(tmp_path / 'results.sqlite3'),
+                'OPENAI_MODEL': 'gpt-3.5-turbo'}
+    settings.update(config)
+    pipeline = ProcessingPipeline(SimpleNamespace(config=settings))
+    pipeline.runs = []
+
+    def fake_process(file_path, regions, document_type, processing_id):
+        pipeline.runs.append(file_path)
+        return {'processing_id': processing_id, 'file_path': file_path, 'success': True,
+                'extracted_data': {'monthly_rent': '$2,500', 'enhancement_method': 'ai_analysis'},
+                'stages': {'ai_enhancement': {'success': True}}, 'warnings': [],
+                'processing_time': 12.5, 'end_time': '2026-01-01T00:00:00'}
+
+    pipeline._process_document = fake_process
+    return pipeline
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / 'package.pdf'
+    path.write_bytes(PDF_BYTES)
+    return str(path)
+
+
+class TestDocumentResultCache:
+    """Test suite for DocumentResultCache"""
+
+    def test_key_depends_on_request(self):
+        key = DocumentResultCache.make_key('abc', 'v1', REGIONS, 'rent_roll')
+
+        assert key == DocumentResultCache.make_key('abc', 'v1', [dict(reversed(list(REGIONS[0].items())))], 'rent_roll')
+        assert key != DocumentResultCache.make_key('abc', 'v2', REGIONS, 'rent_roll')
+        assert key != DocumentResultCache.make_key('abc', 'v1', None, 'rent_roll')
+        assert DocumentResultCache.make_key('abc', 'v1', []) == DocumentResultCache.make_key('abc', 'v1', None)
+
+    def test_expired_entries_miss(self, tmp_path):
+        cache = DocumentResultCache(db_path=str(tmp_path / 'c.sqlite3'), ttl_seconds=0)
+        cache.set('k', {'success': True}, 'abc', 'v1')
+        time.sleep(0.01)
+
+        assert cache.get('k') is None
+
+    def test_invalidate_by_content_hash(self, tmp_path):
+        cache = DocumentResultCache(db_path=str(tmp_path / 'c.sqlite3'))
+        cache.set('k1', {'success': True}, 'abc', 'v1')
+        cache.set('k2', {'success': True}, 'abc', 'v2')
+
+        assert cache.invalidate('abc') == 2
+        assert cache.get_statistics()['entries'] == 0
+
+    def test_default_path_is_private(self, tmp_path, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, 'STATE_FOLDER', str(tmp_path / 'state'))
+
+        cache = DocumentResultCache()
+
+        assert cache.db_path == str(tmp_path / 'state' / 'result_cache.sqlite3')
+        assert os.stat(tmp_path / 'state').st_mode & 0o777 == 0o700
+
+    def test_file_sha256(self, pdf_path):
+        assert file_sha256(pdf_path, chunk_size=1000) == hashlib.sha256(PDF_BYTES).hexdigest()
+
+
+class TestPipelineResultReuse:
+    """ProcessingPipeline reuses results for identical content"""
+
+    def test_repeat_document_is_not_reprocessed(self, tmp_path, pdf_path):
+        pipeline = make_pipeline(tmp_path)
+        copy_path = str(tmp_path / 'resent.pdf')
+        with open(copy_path, 'wb') as f:
+            f.write(PDF_BYTES)
+        progress = []
+
+        first = pipeline.process_document(pdf_path, REGIONS, processing_id='job-1')
+        second = pipeline.process_document(copy_path, REGIONS, processing_id='job-2',
+                                           progress_callback=lambda *args: progress.append(args))
+
+        assert pipeline.runs == [pdf_path]
+        assert second['extracted_data'] == first['extracted_data']
+        assert second['processing_id'] == 'job-2'
+        assert second['file_path'] == copy_path
+        assert second['result_cache']['source_processing_id'] == 'job-1'
+        assert progress[-1][:2] == ('finalization', 100.0)
+        assert pipeline.result_cache.get_statistics()['processing_seconds_saved'] == 12.5
+
+    def test_regions_and_config_change_the_key(self, tmp_path, pdf_path):
+        pipeline = make_pipeline(tmp_path)
+        pipeline.process_document(pdf_path, REGIONS)
+        pipeline.process_document(pdf_path, None)
+
+        upgraded = make_pipeline(tmp_path, OPENAI_MODEL='gpt-4o')
+        upgraded.process_document(pdf_path, REGIONS)
+
+        assert len(pipeline.runs) == 2
+        assert len(upgraded.runs) == 1
+        assert upgraded.config_version != pipeline.config_version
+
+    def test_failures_are_not_cached(self, tmp_path, pdf_path):
+        pipeline = make_pipeline(tmp_path)
+        pipeline._process_document = lambda *args: {'success': False, 'error': 'OCR failed'}
+
+        pipeline.process_document(pdf_path)
+
+        assert pipeline.cached_result(pdf_path) is None
+
+    @pytest.mark.parametrize('degraded', [
+        {'warnings': ['Region rent: OCR failed']},
+        {'stages': {'ai_enhancement': {'success': False}}},
+        {'stages': {'ai_enhancement': {'success': True, 'timings': {'mode': 'basic'}}}},
+        {'extracted_data': {'monthly_rent': '$2,500', 'enhancement_method': 'basic'}},
+        {'extracted_data': {'enhanced_data': {'enhancement_method': 'ai_analysis'},
+                            'validation_results': {'method': 'basic_validation'}, 'structured_data': {}}},
+    ])
+    def test_degraded_results_are_not_cached(self, tmp_path, pdf_path, degraded):
+        pipeline = make_pipeline(tmp_path)
+        process = pipeline._process_document
+        pipeline._process_document = lambda *args: {**process(*args), **degraded}
+
+        pipeline.process_document(pdf_path)
+        pipeline.process_document(pdf_path)
+
+        assert len(pipeline.runs) == 2
+        assert pipeline.cached_result(pdf_path) is None
+
+    def test_reprocess_bypasses_cache(self, tmp_path, pdf_path):
+        pipeline = make_pipeline(tmp_path)
+        pipeline.process_document(pdf_path)
+        pipeline.process_document(pdf_path, use_cache=False)
+
+        assert len(pipeline.runs) == 2
+
+    def test_disabled_by_default(self):
+        assert ProcessingPipeline(SimpleNamespace(config={})).result_cache is None
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import app.routes as routes
+
+    monkeypatch.setattr(upload_stream, 'HAS_MAGIC', False)
+    flask_app = Flask(__name__)
+    blueprint = Blueprint('upload', __name__)
+    blueprint.add_url_rule('/api/upload', view_func=routes.upload_file, methods=['POST'])
+    flask_app.register_blueprint(blueprint)
+    flask_app.config.update(UPLOAD_FOLDER=str(tmp_path / 'uploads'), MAX_CONTENT_LENGTH=32 * 1024 * 1024)
+    flask_app.processing_pipeline = make_pipeline(tmp_path)
+    return flask_app.test_client()
+
+
+class TestRepeatUpload:
+    """A repeat upload is stored once and returns prior results"""
+
+    def upload(self, client):
+        return client.post('/api/upload', data={'file': (io.BytesIO(PDF_BYTES), 'package.pdf')},
+                           content_type='multipart/form-data').get_json()
+
+    def test_repeat_upload_returns_prior_results(self, client, tmp_path):
+        first = self.upload(client)
+        client.application.processing_pipeline.process_document(first['filepath'])
+        second = self.upload(client)
+
+        assert first['duplicate'] is False and 'processing_results' not in first
+        assert second['duplicate'] is True
+        assert second['filepath'] == first['filepath']
+        assert second['processing_results']['extracted_data']['monthly_rent'] == '$2,500'
+        assert os.listdir(tmp_path / 'uploads') == [first['filename']]
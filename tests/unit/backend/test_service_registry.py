@@ -0,0 +1,100 @@
+"""
+Tests for lazy service initialization.
+"""
+
+import os
+import sys
+import logging
+import threading
+import subprocess
+import pytest
+from types import SimpleNamespace
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services import initialize_services, warm_up_services
+from app.services.registry import LazyService, ServiceRegistry
+
+
+def make_app(**config):
+    return SimpleNamespace(config=config, logger=logging.getLogger('test'))
+
+
+class TestServiceRegistry:
+    """Test suite for ServiceRegistry"""
+
+    def test_service_built_once_under_concurrency(self):
+        registry = ServiceRegistry()
+        registry.register('analytics_service', '.analytics_service', 'RealEstateAnalytics')
+        results = []
+
+        def work():
+            results.append(registry.get('analytics_service'))
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(result) for result in results}) == 1
+        stats = registry.get_statistics()['services']['analytics_service']
+        assert stats['loaded'] is True
+        assert 'import_seconds' in stats and 'init_seconds' in stats
+
+    def test_warm_up_skips_failures(self):
+        registry = ServiceRegistry()
+        registry.register('analytics_service', '.analytics_service', 'RealEstateAnalytics')
+        registry.register('broken', '.does_not_exist', 'Missing')
+
+        result = registry.warm_up()
+
+        assert result['loaded'] == ['analytics_service']
+        assert 'broken' in result['failed']
+        assert 'error' in registry.get_statistics()['services']['broken']
+
+
+class TestInitializeServices:
+    """initialize_services attaches lazy proxies by default"""
+
+    def test_services_built_on_first_use(self):
+        app = make_app()
+        initialize_services(app)
+
+        assert isinstance(app.integration_service, LazyService)
+        assert app.service_registry.get_statistics()['loaded'] == 0
+
+        app.analytics_service.generate_rent_roll_insights
+        assert not isinstance(app.analytics_service, LazyService)
+        assert app.service_registry.get_statistics()['loaded'] == 1
+
+    def test_pipeline_does_not_build_its_dependencies(self):
+        app = make_app()
+        initialize_services(app)
+
+        pipeline = app.service_registry.get('processing_pipeline')
+
+        assert isinstance(pipeline.ai_service, LazyService)
+        assert app.service_registry.get_statistics()['loaded'] == 1
+
+    def test_warm_up_hook(self):
+        app = make_app(SERVICE_WARMUP='analytics_service, integration_service')
+        initialize_services(app)
+
+        assert app.service_registry.get_statistics()['loaded'] == 2
+        assert warm_up_services(app, ['analytics_service'])['loaded'] == ['analytics_service']
+
+    def test_package_import_is_light(self):
+        code = (
+            "import sys, types\n"
+            "pkg = types.ModuleType('app'); pkg.__path__ = [sys.argv[1] + '/app']; sys.modules['app'] = pkg\n"
+            "sys.path.insert(0, sys.argv[1])\n"
+            "import app.services\n"
+            "print(','.join(m for m in ('sklearn', 'cv2', 'openpyxl', 'openai', 'pandas') if m in sys.modules))\n"
+        )
+        output = subprocess.run([sys.executable, '-c', code, project_root],
+                                capture_output=True, text=True, check=True).stdout
+
+        assert output.strip() == ''
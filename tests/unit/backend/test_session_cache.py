@@ -0,0 +1,186 @@
+"""
+Tests for the per-document session cache.
+"""
+
+import os
+import sys
+import time
+import hashlib
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from flask import Flask, Blueprint
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.session_cache import (
+    DocumentSessionCache, FileSystemSessionBackend, MemorySessionBackend, create_session_cache, _MISSING
+)
+
+PDF_BYTES = b'%PDF-1.4\n' + b'0' * 500
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / 'rent_roll.pdf'
+    path.write_bytes(PDF_BYTES)
+    return str(path)
+
+
+class Counter:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+class TestBackends:
+    """Test suite for session cache backends"""
+
+    def test_filesystem_shared_between_instances(self, tmp_path):
+        image = np.arange(24, dtype=np.uint8).reshape(2, 4, 3)
+        writer = FileSystemSessionBackend(str(tmp_path))
+        writer.set('doc', 'page-0', image)
+        writer.set('doc', 'regions-rent_roll', [{'name': 'rent', 'confidence': np.float32(0.5)}])
+
+        reader = FileSystemSessionBackend(str(tmp_path))
+
+        assert np.array_equal(reader.get('doc', 'page-0'), image)
+        assert reader.get('doc', 'regions-rent_roll') == [{'name': 'rent', 'confidence': 0.5}]
+
+    def test_filesystem_ttl_and_size_budget(self, tmp_path):
+        backend = FileSystemSessionBackend(str(tmp_path), max_bytes=3000, ttl_seconds=60, prune_interval=0)
+        for i in range(3):
+            backend.set(f'doc{i}', 'page-0', np.zeros(1000, dtype=np.uint8))
+            past = time.time() - 10 + i
+            os.utime(backend._path(f'doc{i}', 'page-0') + '.npy', (past, past))
+        backend.set('doc3', 'page-0', np.zeros(1000, dtype=np.uint8))
+
+        assert backend.get('doc0', 'page-0') is _MISSING
+        assert isinstance(backend.get('doc3', 'page-0'), np.ndarray)
+        assert backend.get_statistics()['bytes'] <= 3000
+
+        expired = FileSystemSessionBackend(str(tmp_path), ttl_seconds=0)
+        time.sleep(0.01)
+        assert expired.get('doc3', 'page-0') is _MISSING
+
+    def test_filesystem_requires_a_private_directory(self, tmp_path, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, 'STATE_FOLDER', str(tmp_path / 'state'))
+        shared = tmp_path / 'shared'
+        shared.mkdir()
+        shared.chmod(0o777)
+
+        backend = FileSystemSessionBackend()
+
+        assert backend.directory == str(tmp_path / 'state' / 'sessions')
+        assert os.stat(backend.directory).st_mode & 0o777 == 0o700
+        with pytest.raises(PermissionError):
+            FileSystemSessionBackend(str(shared))
+
+    def test_memory_bounded_by_bytes(self):
+        backend = MemorySessionBackend(max_bytes=2500)
+        for i in range(3):
+            backend.set(f'doc{i}', 'page-0', np.zeros(1000, dtype=np.uint8))
+
+        assert backend.get('doc0', 'page-0') is _MISSING
+        assert isinstance(backend.get('doc2', 'page-0'), np.ndarray)
+        assert backend.get_statistics()['bytes'] == 2000
+
+
+class TestDocumentSessionCache:
+    """Test suite for DocumentSessionCache"""
+
+    def test_get_or_compute_runs_once(self, pdf_path):
+        cache = DocumentSessionCache()
+        compute = Counter({'text': 'Rent Roll'})
+
+        first = cache.open(pdf_path).get_or_compute('text-0', compute)
+        second = cache.open(pdf_path).get_or_compute('text-0', compute)
+
+        assert first == second == {'text': 'Rent Roll'}
+        assert compute.calls == 1
+        assert cache.get_statistics()['hits'] == 1
+
+    def test_none_is_not_cached(self, pdf_path):
+        cache = DocumentSessionCache()
+        compute = Counter(None)
+
+        cache.open(pdf_path).get_or_compute('page-0', compute)
+        cache.open(pdf_path).get_or_compute('page-0', compute)
+
+        assert compute.calls == 2
+
+    def test_keyed_by_content(self, tmp_path, pdf_path):
+        cache = DocumentSessionCache()
+        copy_path = tmp_path / 'copy.pdf'
+        copy_path.write_bytes(PDF_BYTES)
+        named = tmp_path / f"{hashlib.sha256(PDF_BYTES).hexdigest()}.pdf"
+        named.write_bytes(PDF_BYTES)
+
+        assert cache.content_hash(pdf_path) == cache.content_hash(str(copy_path)) == cache.content_hash(str(named))
+
+    def test_artifact_key_is_stable(self):
+        region = {'name': 'rent', 'x': 1, 'y': 2, 'width': 3, 'height': 4}
+
+        assert DocumentSessionCache.artifact_key('ocr', region) == \
+            DocumentSessionCache.artifact_key('ocr', dict(reversed(list(region.items()))))
+
+    def test_factory_backends(self, tmp_path):
+        app = SimpleNamespace(config={'SESSION_CACHE_DIR': str(tmp_path)})
+
+        assert create_session_cache(app).backend.name == 'filesystem'
+        app.config['SESSION_CACHE_BACKEND'] = 'memory'
+        assert create_session_cache(app).backend.name == 'memory'
+
+
+@pytest.fixture
+def client(tmp_path):
+    import app.routes as routes
+
+    flask_app = Flask(__name__)
+    blueprint = Blueprint('session', __name__)
+    for rule, view in (('/api/suggest-regions', routes.suggest_regions), ('/api/extract-data', routes.extract_data)):
+        blueprint.add_url_rule(rule, view_func=view, methods=['POST'])
+    flask_app.register_blueprint(blueprint)
+
+    flask_app.session_cache = DocumentSessionCache(FileSystemSessionBackend(str(tmp_path / 'sessions')))
+    flask_app.renders = []
+    flask_app.ocr_calls = []
+
+    def get_page_image(path, page):
+        flask_app.renders.append(path)
+        return np.full((20, 20, 3), 255, dtype=np.uint8)
+
+    def extract_text_from_image(image, region):
+        flask_app.ocr_calls.append(region['name'])
+        return {'text': '$2,500', 'confidence': 91.0, 'success': True}
+
+    flask_app.pdf_service = SimpleNamespace(get_page_image=get_page_image)
+    flask_app.smart_region_manager = SimpleNamespace(
+        suggest_regions=lambda document_type, image: [{'name': 'rent', 'x': 1, 'y': 1, 'width': 5, 'height': 5}]
+    )
+    flask_app.ocr_service = SimpleNamespace(extract_text_from_image=extract_text_from_image)
+    return flask_app.test_client()
+
+
+class TestRegionSelectionFlow:
+    """The interactive API calls share one rendered page and cached OCR"""
+
+    def test_page_rendered_once_and_ocr_reused(self, client, pdf_path):
+        suggested = client.post('/api/suggest-regions', json={'filepath': pdf_path, 'document_type': 'rent_roll'})
+        regions = suggested.get_json()['regions']
+        client.post('/api/extract-data', json={'filepath': pdf_path, 'regions': regions})
+        extracted = client.post('/api/extract-data', json={
+            'filepath': pdf_path,
+            'regions': regions + [{'name': 'tenant', 'x': 6, 'y': 1, 'width': 5, 'height': 5}]
+        })
+
+        assert client.application.renders == [pdf_path]
+        assert client.application.ocr_calls == ['rent', 'tenant']
+        assert extracted.get_json()['extracted_data']['rent']['text'] == '$2,500'
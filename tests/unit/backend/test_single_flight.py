@@ -0,0 +1,230 @@
+"""
+Tests for in-flight request coalescing.
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+import pytest
+import numpy as np
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.services.single_flight import SingleFlight, SQLiteLeaseBackend
+from app.services.resilience import latency_budget
+from app.services.ai_service import AIService
+
+
+def run_concurrently(fn, count=5):
+    barrier = threading.Barrier(count)
+
+    def call():
+        barrier.wait()
+        return fn()
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return [f.result() for f in [pool.submit(call) for _ in range(count)]]
+
+
+class SlowCounter:
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return {'text': 'result', 'words': [1, 2, 3]}
+
+
+class TestSingleFlight:
+    """Test suite for SingleFlight"""
+
+    def test_concurrent_callers_share_one_execution(self):
+        flight = SingleFlight('test')
+        work = SlowCounter()
+
+        results = run_concurrently(lambda: flight.do('k', work))
+
+        assert work.calls == 1
+        assert all(result == {'text': 'result', 'words': [1, 2, 3]} for result in results)
+        stats = flight.get_statistics()
+        assert stats['coalesced'] == 4
+        assert stats['executions'] == 1
+        assert stats['in_flight'] == 0
+
+    def test_waiters_get_independent_copies(self):
+        flight = SingleFlight('test')
+        results = run_concurrently(lambda: flight.do('k', SlowCounter()), count=3)
+
+        results[0]['words'].append(4)
+        assert all(result['words'] == [1, 2, 3] for result in results[1:])
+
+    def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight('test')
+        work = SlowCounter(delay=0)
+        flight.do('k', work)
+        flight.do('k', work)
+
+        assert work.calls == 2
+
+    def test_error_propagates_to_waiters(self):
+        flight = SingleFlight('test')
+
+        def failing():
+            time.sleep(0.1)
+            raise RuntimeError('boom')
+
+        def call():
+            try:
+                flight.do('k', failing)
+            except RuntimeError as e:
+                return str(e)
+
+        assert run_concurrently(call, count=3) == ['boom'] * 3
+
+    def test_waiters_stop_at_the_latency_budget(self):
+        flight = SingleFlight('test', wait_timeout=300)
+        release = threading.Event()
+        leader = threading.Thread(target=lambda: flight.do('k', lambda: release.wait(5) and 'leader'))
+        leader.start()
+        time.sleep(0.05)
+
+        start = time.monotonic()
+        with latency_budget(0.2):
+            result = flight.do('k', lambda: 'own')
+        release.set()
+        leader.join()
+
+        assert result == 'own'
+        assert time.monotonic() - start < 1
+        assert flight.get_statistics()['wait_timeouts'] == 1
+
+
+class TestSQLiteLeaseBackend:
+    """Cross-worker coalescing through a shared lease database"""
+
+    def test_separate_groups_share_result(self, tmp_path):
+        db_path = str(tmp_path / 'leases.sqlite3')
+        # One group per simulated worker process, each with its own backend connection
+        workers = [SingleFlight('ocr', backend=SQLiteLeaseBackend(db_path, poll_interval=0.01))
+                   for _ in range(3)]
+        work = SlowCounter()
+
+        barrier = threading.Barrier(3)
+
+        def call(flight):
+            barrier.wait()
+            return flight.do('page-1', work)
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(call, workers))
+
+        assert work.calls == 1
+        assert all(result['text'] == 'result' for result in results)
+        assert sum(w.get_statistics()['coalesced_remote'] for w in workers) == 2
+
+    def test_failed_leader_releases_lease(self, tmp_path):
+        backend = SQLiteLeaseBackend(str(tmp_path / 'leases.sqlite3'))
+
+        with pytest.raises(ValueError):
+            backend.run('k', lambda: (_ for _ in ()).throw(ValueError('fail')), wait_timeout=1)
+
+        result, computed = backend.run('k', lambda: 'ok', wait_timeout=1)
+        assert (result, computed) == ('ok', True)
+
+    def test_expired_lease_is_taken_over(self, tmp_path):
+        backend = SQLiteLeaseBackend(str(tmp_path / 'leases.sqlite3'), lease_seconds=0.05)
+        assert backend._try_acquire('k', 'dead-worker')[0] == 'acquired'
+
+        time.sleep(0.1)
+        assert backend.run('k', lambda: 'ok', wait_timeout=1) == ('ok', True)
+
+    def test_results_are_stored_as_json(self, tmp_path):
+        db_path = str(tmp_path / 'leases.sqlite3')
+        backend = SQLiteLeaseBackend(db_path)
+        usage = SimpleNamespace(model_dump=lambda: {'prompt_tokens': 10})
+
+        backend.run('k', lambda: {'content': 'ok', 'usage': usage, 'words': np.arange(3)}, wait_timeout=1)
+
+        stored = sqlite3.connect(db_path).execute('SELECT result FROM single_flight_leases').fetchone()[0]
+        assert json.loads(stored) == {'content': 'ok', 'usage': {'prompt_tokens': 10}, 'words': [0, 1, 2]}
+        assert backend.run('k', lambda: 'recomputed', wait_timeout=1)[1] is False
+
+    def test_unshareable_result_is_not_stored(self, tmp_path):
+        backend = SQLiteLeaseBackend(str(tmp_path / 'leases.sqlite3'))
+
+        assert backend.run('k', lambda: {'value': object()}, wait_timeout=1)[1] is True
+        assert backend.run('k', lambda: 'recomputed', wait_timeout=1) == ('recomputed', True)
+
+    @pytest.mark.skipif(os.name == 'nt', reason='POSIX permissions')
+    def test_requires_private_directory(self, tmp_path):
+        shared = tmp_path / 'shared'
+        shared.mkdir()
+        shared.chmod(0o777)
+
+        with pytest.raises(PermissionError):
+            SQLiteLeaseBackend(str(shared / 'leases.sqlite3'))
+        with pytest.raises(ValueError):
+            SQLiteLeaseBackend(None)
+
+        private = SQLiteLeaseBackend(str(tmp_path / 'state' / 'leases.sqlite3'))
+        assert os.stat(os.path.dirname(private.db_path)).st_mode & 0o777 == 0o700
+
+
+class TestAIServiceCoalescing:
+    """Duplicate concurrent prompts reach OpenAI once"""
+
+    def test_identical_requests_coalesce(self):
+        calls = []
+
+        def create(**params):
+            calls.append(params)
+            time.sleep(0.2)
+            usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+            choice = SimpleNamespace(message=SimpleNamespace(content='{"ok": true}'), finish_reason='stop')
+            return SimpleNamespace(choices=[choice], usage=usage)
+
+        service = AIService()
+        service.model = 'gpt-3.5-turbo'
+        service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        service.dispatcher = None
+        service.response_cache = None
+        service.single_flight = SingleFlight('openai')
+
+        messages = [{'role': 'user', 'content': 'classify'}]
+        results = run_concurrently(lambda: service._make_openai_request(messages), count=4)
+
+        assert len(calls) == 1
+        assert all(result['content'] == '{"ok": true}' for result in results)
+
+        service._make_openai_request(messages, use_cache=False)
+        assert len(calls) == 2
+
+
+class TestOCRFlightKey:
+    """Keys for OCR coalescing are content based"""
+
+    def test_key_depends_on_pixels_and_region(self):
+        from app.services.ocr_service import OCRService
+
+        service = OCRService()
+        service.single_flight = SingleFlight('ocr')
+        image = np.zeros((20, 20, 3), dtype=np.uint8)
+
+        same = service._ocr_flight_key(image.copy(), {'x': 0, 'y': 0})
+        assert service._ocr_flight_key(image, {'x': 0, 'y': 0}) == same
+
+        changed = image.copy()
+        changed[0, 0, 0] = 255
+        assert service._ocr_flight_key(changed, {'x': 0, 'y': 0}) != same
+        assert service._ocr_flight_key(image, {'x': 1, 'y': 0}) != same
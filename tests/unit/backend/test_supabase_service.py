@@ -0,0 +1,148 @@
+"""
+Tests for chunked uploads in SupabaseStorageService.
+"""
+
+import os
+import sys
+import time
+import random
+import hashlib
+import threading
+import pytest
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+pytest.importorskip('supabase')
+
+from app.services.supabase_service import SupabaseStorageService, SESSION_FILE
+
+
+class FakeBucket:
+    """In-memory stand-in for a storage bucket"""
+
+    def __init__(self, download_delay=0.0):
+        self.files = {}
+        self.download_delay = download_delay
+        self.active_downloads = 0
+        self.max_active_downloads = 0
+        self.lock = threading.Lock()
+
+    def upload(self, path, data, file_options=None):
+        if hasattr(data, 'read'):
+            data = data.read()
+        if path in self.files and file_options.get('x-upsert') != 'true':
+            raise Exception('Duplicate')
+        self.files[path] = bytes(data)
+        return {'Key': path}
+
+    def download(self, path):
+        with self.lock:
+            self.active_downloads += 1
+            self.max_active_downloads = max(self.max_active_downloads, self.active_downloads)
+        try:
+            time.sleep(random.uniform(0, self.download_delay))
+            if path not in self.files:
+                raise Exception('Object not found')
+            return self.files[path]
+        finally:
+            with self.lock:
+                self.active_downloads -= 1
+
+    def list(self, path, options=None):
+        prefix = path.rstrip('/') + '/'
+        return [{'name': name[len(prefix):], 'metadata': {'size': len(data)}}
+                for name, data in self.files.items() if name.startswith(prefix)]
+
+    def remove(self, paths):
+        for path in paths:
+            self.files.pop(path, None)
+
+
+class FakeClient:
+    def __init__(self, bucket):
+        self.storage = self
+        self.bucket = bucket
+
+    def from_(self, bucket_name):
+        return self.bucket
+
+
+def make_service(concurrency=3, download_delay=0.0):
+    service = SupabaseStorageService.__new__(SupabaseStorageService)
+    service.bucket_name = 'documents'
+    service.chunk_download_concurrency = concurrency
+    service.client = FakeClient(FakeBucket(download_delay))
+    return service
+
+
+def split(data, chunk_size):
+    return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+@pytest.fixture
+def payload():
+    return os.urandom(100_000)
+
+
+class TestChunkedUpload:
+    """Test suite for chunked upload sessions and assembly"""
+
+    def test_parallel_assembly_in_order(self, payload):
+        service = make_service(concurrency=3, download_delay=0.01)
+        chunks = split(payload, 4_000)
+        session_id = service.create_upload_session('rr.pdf', len(payload), len(chunks),
+                                                   checksum=hashlib.sha256(payload).hexdigest())
+        for number in random.sample(range(len(chunks)), len(chunks)):
+            assert service.upload_chunk(session_id, number, chunks[number])['success']
+
+        result = service.complete_chunked_upload(session_id, len(chunks), 'documents/rr.pdf')
+
+        bucket = service.client.bucket
+        assert result['success'], result
+        assert bucket.files['documents/rr.pdf'] == payload
+        assert result['size'] == len(payload) and result['hash'] == hashlib.sha256(payload).hexdigest()
+        assert 1 < bucket.max_active_downloads <= 3
+        assert list(bucket.files) == ['documents/rr.pdf']
+
+    def test_resume_reports_missing_chunks(self, payload):
+        service = make_service()
+        chunks = split(payload, 10_000)
+        session_id = service.create_upload_session('rr.pdf', len(payload), len(chunks))
+        for number in (0, 1, 2, 5, 9):
+            service.upload_chunk(session_id, number, chunks[number])
+
+        session = service.get_upload_session(session_id)
+        result = service.complete_chunked_upload(session_id, len(chunks), 'documents/rr.pdf')
+
+        assert session['missing_chunks'] == [3, 4, 6, 7, 8]
+        assert session['bytes_received'] == 50_000
+        assert not result['success'] and result['missing_chunks'] == [3, 4, 6, 7, 8]
+
+        for number in result['missing_chunks']:
+            service.upload_chunk(session_id, number, chunks[number])
+        assert service.complete_chunked_upload(session_id, len(chunks), 'documents/rr.pdf')['success']
+
+    def test_checksum_mismatch_keeps_chunks(self, payload):
+        service = make_service()
+        chunks = split(payload, 50_000)
+        session_id = service.create_upload_session('rr.pdf', len(payload), len(chunks), checksum='0' * 64)
+        for number, chunk in enumerate(chunks):
+            service.upload_chunk(session_id, number, chunk)
+
+        result = service.complete_chunked_upload(session_id, len(chunks), 'documents/rr.pdf')
+
+        files = service.client.bucket.files
+        assert not result['success'] and 'Checksum mismatch' in result['error']
+        assert 'documents/rr.pdf' not in files
+        assert f'chunks/{session_id}/{SESSION_FILE}' in files and len(files) == 3
+
+    def test_size_mismatch_fails(self, payload):
+        service = make_service()
+        session_id = service.create_upload_session('rr.pdf', len(payload) + 1, 1)
+        service.upload_chunk(session_id, 0, payload)
+
+        result = service.complete_chunked_upload(session_id, 1, 'documents/rr.pdf')
+
+        assert not result['success'] and 'does not match expected size' in result['error']
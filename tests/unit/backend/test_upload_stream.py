@@ -0,0 +1,127 @@
+"""
+Tests for streaming upload ingest.
+"""
+
+import io
+import os
+import sys
+import hashlib
+import pytest
+from flask import Flask, Blueprint
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+from app.utils import upload_stream
+from app.utils.upload_stream import UploadRejected, ingest_pdf
+
+PDF_BYTES = b'%PDF-1.4\n' + b'0' * 5000 + b'\n%%EOF\n'
+
+
+@pytest.fixture(autouse=True)
+def no_magic(monkeypatch):
+    """python-magic is optional; keep results independent of whether it is installed"""
+    monkeypatch.setattr(upload_stream, 'HAS_MAGIC', False)
+
+
+class CountingStream(io.BytesIO):
+    """Records the size of every read"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+class TestIngestPdf:
+    """Test suite for ingest_pdf"""
+
+    def test_content_addressed_file(self, tmp_path):
+        ingested = ingest_pdf(io.BytesIO(PDF_BYTES), str(tmp_path), max_size=10_000, chunk_size=512)
+        expected = hashlib.sha256(PDF_BYTES).hexdigest()
+
+        assert ingested.sha256 == expected
+        assert ingested.filename == f"{expected}.pdf"
+        assert ingested.size == len(PDF_BYTES)
+        with open(ingested.filepath, 'rb') as f:
+            assert f.read() == PDF_BYTES
+        assert os.listdir(tmp_path) == [ingested.filename]
+
+    def test_reads_fixed_size_chunks(self, tmp_path):
+        stream = CountingStream(PDF_BYTES)
+        ingest_pdf(stream, str(tmp_path), max_size=10_000, chunk_size=256)
+
+        assert set(stream.reads) == {256}
+
+    def test_rejects_bad_signature_from_first_chunk(self, tmp_path):
+        stream = CountingStream(b'GIF89a' + b'0' * 5000)
+
+        with pytest.raises(UploadRejected, match='Invalid PDF signature'):
+            ingest_pdf(stream, str(tmp_path), max_size=10_000, chunk_size=2048)
+
+        assert len(stream.reads) == 1
+        assert os.listdir(tmp_path) == []
+
+    def test_rejects_oversized_upload(self, tmp_path):
+        with pytest.raises(UploadRejected, match='File too large'):
+            ingest_pdf(io.BytesIO(PDF_BYTES), str(tmp_path), max_size=2048, chunk_size=512)
+
+        assert os.listdir(tmp_path) == []
+
+    def test_rejects_tiny_and_short_files(self, tmp_path):
+        with pytest.raises(UploadRejected, match='too small'):
+            ingest_pdf(io.BytesIO(b'%PDF-1.4\n'), str(tmp_path), max_size=10_000)
+        with pytest.raises(UploadRejected, match='Unsupported PDF version'):
+            ingest_pdf(io.BytesIO(b'%PDF-2.0\n' + b'0' * 200), str(tmp_path), max_size=10_000)
+
+    def test_same_content_same_file(self, tmp_path):
+        first = ingest_pdf(io.BytesIO(PDF_BYTES), str(tmp_path), max_size=10_000)
+        second = ingest_pdf(io.BytesIO(PDF_BYTES), str(tmp_path), max_size=10_000)
+
+        assert first.filepath == second.filepath
+        assert len(os.listdir(tmp_path)) == 1
+
+
+@pytest.fixture
+def client(tmp_path):
+    import app.routes as routes
+
+    flask_app = Flask(__name__)
+    blueprint = Blueprint('upload', __name__)
+    blueprint.add_url_rule('/api/upload', view_func=routes.upload_file, methods=['POST'])
+    flask_app.register_blueprint(blueprint)
+    flask_app.config.update(UPLOAD_FOLDER=str(tmp_path), MAX_CONTENT_LENGTH=32 * 1024 * 1024,
+                            UPLOAD_CHUNK_SIZE=1024)
+    return flask_app.test_client()
+
+
+class TestUploadRoute:
+    """Test suite for /api/upload"""
+
+    def test_upload_valid_pdf(self, client, tmp_path):
+        response = client.post('/api/upload', data={'file': (io.BytesIO(PDF_BYTES), 'lease.pdf')},
+                               content_type='multipart/form-data')
+        data = response.get_json()
+
+        assert response.status_code == 200
+        assert data['sha256'] == hashlib.sha256(PDF_BYTES).hexdigest()
+        assert data['file_size'] == len(PDF_BYTES)
+        assert os.path.dirname(data['filepath']) == str(tmp_path)
+
+    def test_upload_invalid_file_type(self, client):
+        response = client.post('/api/upload', data={'file': (io.BytesIO(b'text content'), 'test.txt')},
+                               content_type='multipart/form-data')
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Only PDF files are supported'
+
+    def test_upload_invalid_content(self, client):
+        response = client.post('/api/upload', data={'file': (io.BytesIO(b'<html>' * 100), 'fake.pdf')},
+                               content_type='multipart/form-data')
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Invalid PDF signature'